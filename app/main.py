@@ -1,27 +1,42 @@
+import asyncio
 import json
+import os
+import threading
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from datetime import date
 from pathlib import Path
-from typing import List
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from typing import Literal, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
-from .utils.data_loader import load_all_data
+from .utils.http_cache import customer_etag, file_etag, is_not_modified
+from .utils.single_flight import single_flight
 
-from .models.portfolio import CustomerPortfolio
+from .models.customers import CustomerPage
+from .models.portfolio import BankOffer, CustomerPortfolio
 from .models.scenarios import ScenarioSummary
 from .models.scenarios import ScenarioComparisonResult
-from .models.report import GeneratedReport
-
-from .services.portfolio_service import build_customer_portfolio
-from .services.scenario_minimum_service import simulate_minimum_payment_scenario
-from .services.scenario_optimized_service import simulate_optimized_plan
-from .services.scenario_consolidation_service import simulate_consolidation_scenario
-from .services.scenario_comparison_service import compute_scenarios_overview
-from .services.report_generation_service import generate_explanatory_report
-
-import pandas as pd
-
+from .models.scenarios import CashflowSweepResult
+from .models.scenarios import IncomeStressResult, MAX_SIMULATIONS
+from .models.scenarios import RepaymentStrategy, StrategyComparisonResult
+from .models.scenarios import OptimizedSolverResult
+from .models.scenarios import ConsolidationSearchResult
+from .models.scenarios import OfferImpactResult
+from .models.scenarios import ScenarioScheduleColumns
+from .models.report import GeneratedReport, ReportJob, ReportJobRequest
+from .models.analytics import BookAnalytics
+from .models.behavior import CustomerPaymentBehavior
+from .models.credit_score import CreditScoreAt, CreditScoreTrend
+
+# Los servicios (pandas, numpy, SDK de OpenAI) se importan dentro de cada
+# endpoint: así el proceso arranca y sirve `/` y la UI de inmediato
+# mientras los datasets se cargan en segundo plano (ver `startup_event`).
 
 app = FastAPI(title="Asistente de Reestructuración Financiera")
 
@@ -31,8 +46,12 @@ STATIC_DIR = BASE_DIR / "app" / "static"
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
 @app.get("/")
-def home():
-    return FileResponse(STATIC_DIR / "index.html")
+def home(request: Request):
+    index = STATIC_DIR / "index.html"
+    headers = {"ETag": file_etag(index), "Cache-Control": "no-cache"}
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(index, headers=headers)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,8 +59,20 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    # La UI lee el ETag para sus pedidos condicionales.
+    expose_headers=["ETag"],
 )
 
+# Compresión de JSON y estáticos: brotli si está instalado `brotli-asgi`
+# (con gzip para clientes que no lo aceptan); si no, gzip.
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+try:
+    from brotli_asgi import BrotliMiddleware
+
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
 @app.post("/datasets/upload")
 async def upload_datasets(
     loans: UploadFile = File(...),
@@ -50,12 +81,24 @@ async def upload_datasets(
     credit_score_history: UploadFile = File(...),
     customer_cashflow: UploadFile = File(...),
     bank_offers: UploadFile = File(...),
+    validate_only: bool = False,
 ):
+    """
+    Reemplaza los datasets. Con `validate_only=true` solo lee y valida
+    (el router lo usa como primera fase antes de publicar en los shards).
+    """
+    import pandas as pd
+    from .utils.data_loader import decompress_bytes, read_csv_upload
+    from .utils.dataset_schema import DatasetValidationError, validate_datasets
+    from .utils.sharding import filter_data_for_shard, get_shard_config
+    from .services.dataset_service import replace_datasets
+
     try:
+        # Los archivos pueden venir comprimidos (.gz, .zst, según el nombre).
         def read_csv(upload: UploadFile, name: str) -> pd.DataFrame:
             try:
                 upload.file.seek(0)
-                df = pd.read_csv(upload.file)
+                df = read_csv_upload(upload.file, upload.filename, name)
                 if df.empty:
                     raise ValueError(f"El archivo '{name}' está vacío.")
                 return df
@@ -65,7 +108,7 @@ async def upload_datasets(
         def read_bank_offers_json(upload: UploadFile, name: str):
             try:
                 upload.file.seek(0)
-                raw = upload.file.read()
+                raw = decompress_bytes(upload.file.read(), upload.filename)
                 text = raw.decode("utf-8").strip()
                 if not text:
                     raise ValueError(f"El archivo JSON '{name}' está vacío.")
@@ -93,62 +136,334 @@ async def upload_datasets(
             finally:
                 upload.file.close()
 
-        new_data = {
-            "loans": read_csv(loans, "loans"),
-            "cards": read_csv(cards, "cards"),
-            "payments_history": read_csv(payments_history, "payments_history"),
-            "credit_score_history": read_csv(credit_score_history, "credit_score_history"),
-            "customer_cashflow": read_csv(customer_cashflow, "customer_cashflow"),
-            "bank_offers": read_bank_offers_json(bank_offers, "bank_offers"),
+        # Los seis archivos se leen en paralelo, fuera del event loop.
+        uploads = {
+            "loans": (read_csv, loans),
+            "cards": (read_csv, cards),
+            "payments_history": (read_csv, payments_history),
+            "credit_score_history": (read_csv, credit_score_history),
+            "customer_cashflow": (read_csv, customer_cashflow),
+            "bank_offers": (read_bank_offers_json, bank_offers),
         }
+        parsed = await asyncio.gather(
+            *(asyncio.to_thread(reader, upload, name) for name, (reader, upload) in uploads.items())
+        )
+        new_data = dict(zip(uploads, parsed))
 
-        app.state.data = new_data
+        # Tipos y valores según el esquema; todos los errores juntos.
+        # Validar y publicar (SQLite / memoria compartida) también va en un
+        # hilo: el event loop sigue atendiendo otros requests.
+        new_data = await asyncio.to_thread(validate_datasets, new_data)
 
+        # En modo shard cada proceso se queda solo con sus clientes.
+        shard_index, shard_count = get_shard_config()
+        new_data = await asyncio.to_thread(filter_data_for_shard, new_data, shard_index, shard_count)
         summary = {name: len(obj) for name, obj in new_data.items()}
 
+        if validate_only:
+            return {
+                "status": "valid",
+                "message": "Datasets válidos (no se reemplazaron).",
+                "rows_per_dataset": summary,
+            }
+
+        await asyncio.to_thread(replace_datasets, app, new_data)
+
         return {
             "status": "ok",
             "message": "Datasets cargados y reemplazados correctamente.",
             "rows_per_dataset": summary,
         }
 
+    except DatasetValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "message": f"Los archivos no cumplen el esquema: {e}",
+                "error_counts": e.error_counts,
+                "errors": e.errors,
+            },
+        )
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Error al procesar los archivos: {e}",
         )
 
+# Rutas que responden sin datasets (UI, estáticos, docs y readiness).
+_NO_DATA_PATHS = ("/", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json")
+# Cuánto espera un request que necesita datos mientras termina la carga.
+STARTUP_WAIT_S = float(os.getenv("STARTUP_WAIT_S", "60"))
+
+app.state.ready = threading.Event()
+app.state.startup = {"status": "starting", "error": None, "timings_s": {}}
+
+
+def _load_in_background() -> None:
+    """
+    Carga de arranque fuera del event loop: .env, servicios, datasets y
+    cola de informes. Al terminar marca `app.state.ready`.
+    """
+    timings = app.state.startup["timings_s"]
+    try:
+        t = time.perf_counter()
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        from .services.dataset_service import load_initial_datasets
+        from .services.report_job_service import ReportJobManager
+        from .services.scenario_kernels import warm_up
+        from .utils.data_loader import load_all_data
+        from .utils.sharding import get_shard_config
+        timings["service_imports"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        warm_up()
+        timings["kernels"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if getattr(app.state, "store", None) is None:
+            shard_index, shard_count = get_shard_config()
+            # Segundos por archivo (se leen en paralelo: el total ≈ el más lento).
+            file_timings = timings["dataset_files"] = {}
+            load_initial_datasets(
+                app,
+                lambda: load_all_data(shard_index, shard_count, timings=file_timings),
+                file_timings,
+            )
+        timings["datasets"] = time.perf_counter() - t
+
+        # Cola de informes en lote: retoma los jobs que quedaron a medias.
+        app.state.report_jobs = ReportJobManager(app)
+        app.state.report_jobs.resume_pending()
+
+        timings["ready_since_import"] = time.perf_counter() - _IMPORT_STARTED
+        app.state.startup["status"] = "ready"
+    except Exception as e:
+        app.state.startup["status"] = "failed"
+        app.state.startup["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        app.state.ready.set()
+
+
 @app.on_event("startup")
 def startup_event():
-    if not getattr(app.state, "data", None):
-        app.state.data = load_all_data()
+    app.state.startup["timings_s"]["app_import"] = _APP_IMPORTED - _IMPORT_STARTED
+    if os.getenv("BACKGROUND_LOAD", "1") == "0":
+        _load_in_background()
+        return
+    threading.Thread(target=_load_in_background, name="startup-load", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    report_jobs = getattr(app.state, "report_jobs", None)
+    if report_jobs is not None:
+        report_jobs.shutdown()
+
+
+@app.middleware("http")
+async def shared_data_middleware(request: Request, call_next):
+    path = request.url.path
+    if path in _NO_DATA_PATHS or path.startswith("/static/"):
+        return await call_next(request)
+
+    # Mientras se cargan los datasets, el request espera (hasta
+    # STARTUP_WAIT_S) en lugar de fallar: útil con scale-to-zero.
+    if not app.state.ready.is_set():
+        await asyncio.to_thread(app.state.ready.wait, STARTUP_WAIT_S)
+    if app.state.startup["status"] != "ready":
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "La aplicación está iniciando", **app.state.startup},
+            headers={"Retry-After": "5"},
+        )
+
+    # Otro worker puede haber publicado datos nuevos (SHARED_DATA o SQLite).
+    from .services.dataset_service import get_data_version, sync_datasets
+
+    sync_datasets(app)
+    if request.method != "GET" or not path.startswith("/customers"):
+        return await call_next(request)
+
+    # GET condicional: el ETag no depende del endpoint, así que un 304 no
+    # llega a ejecutarlo (ver utils/http_cache.py).
+    # Sin `at` el score es el de hoy: la fecha entra en el ETag para no
+    # revalidar después de medianoche la respuesta del día anterior.
+    today = ""
+    if path.endswith("/credit-score") and "at" not in request.query_params:
+        today = date.today().isoformat()
+    headers = {"ETag": customer_etag(get_data_version(app), request, today), "Cache-Control": "no-cache"}
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    # Un endpoint que fija su propio Cache-Control (p.ej. el informe de
+    # plantilla, `no-store`) no recibe ETag.
+    if response.status_code == 200 and "cache-control" not in response.headers:
+        response.headers.update(headers)
+    return response
+
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness: 200 cuando los datasets están cargados, 503 mientras inicia
+    (o si la carga falló). Incluye los tiempos de arranque.
+    """
+    status_code = 200 if app.state.startup["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=app.state.startup)
 
 
 @app.get("/test")
 def test_check():
-    keys = list(getattr(app.state, "data", {}).keys())
+    from .services.dataset_service import get_store
+
+    keys = get_store(app).tables()
     return {"status": "ok", "datasets": keys}
 
 
-@app.get("/customers", response_model=List[str])
-def list_customers():
-    data = app.state.data
-    loans_df = data["loans"]
-    cards_df = data["cards"]
+@app.get("/metrics")
+def get_metrics():
+    """
+    Métricas del proceso. `simulation_backend`: "numba" o "python".
+    `coalescing`: por tipo de cálculo, llamadas
+    totales, ejecutadas, deduplicadas (`coalesced`), con error y en curso.
+    `reports`: informes servidos por el LLM, desde el caché, de plantilla
+    (plazo vencido o error del LLM) y reemplazados luego por el del LLM.
+    `report_usage`: tokens de las llamadas al LLM y latencia p50/p99.
+    """
+    from .services.report_generation_service import report_stats, report_usage_stats
+    from .services.scenario_kernels import simulation_backend
+
+    return {
+        "pid": os.getpid(),
+        "simulation_backend": simulation_backend(),
+        "coalescing": single_flight.stats(),
+        "reports": report_stats(),
+        "report_usage": report_usage_stats(),
+    }
+
 
-    loan_customers = set(loans_df["customer_id"].unique())
-    card_customers = set(cards_df["customer_id"].unique())
+@app.get("/datasets/stats")
+def datasets_stats():
+    """
+    Filas y memoria (bytes, `memory_usage(deep=True)`) por dataset y
+    columna, con su dtype. Se calcula una vez por generación de datasets.
+    """
+    from .services.dataset_service import get_dataset_generation, get_derived, get_store
 
-    customers = sorted(loan_customers.union(card_customers))
-    return customers
+    datasets = get_derived(app, "dataset_stats", lambda store: store.stats())
+    return {
+        "backend": get_store(app).backend,
+        "generation": get_dataset_generation(app),
+        "total_memory_bytes": sum(d.get("memory_bytes", 0) for d in datasets.values()),
+        "datasets": datasets,
+    }
+
+
+@app.get("/datasets/shared")
+def shared_datasets_status():
+    """
+    Estado del modo memoria compartida en este worker: segmento vigente
+    y memoria del proceso (RSS total, anónima y compartida).
+    """
+    from .utils.shared_store import shared_data_enabled
+
+    memory = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssShmem"):
+                    memory[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+
+    return {
+        "enabled": shared_data_enabled(),
+        "pid": os.getpid(),
+        "segment": getattr(app.state, "shared_manifest", None),
+        "memory_bytes": memory,
+    }
+
+
+@app.get("/analytics/book", response_model=BookAnalytics)
+def book_analytics():
+    """
+    Agregados de todo el book: deuda por tipo de producto, distribución
+    del ahorro potencial, elegibilidad a consolidación y ahorro por banda
+    de score. Se calcula una vez por generación de datasets.
+    """
+    from .services.book_analytics_service import get_book_analytics
+
+    return get_book_analytics(app)
+
+
+@app.get("/analytics/book/savings", response_class=Response)
+def book_savings():
+    """
+    Ahorro potencial de cada cliente (float64 little-endian, orden de
+    customer_id). Lo usa el router en modo shard para los percentiles de
+    `/analytics/book` sobre todos los shards.
+    """
+    from .services.book_analytics_service import get_book_savings
+
+    return Response(
+        get_book_savings(app).astype("<f8").tobytes(),
+        media_type="application/octet-stream",
+    )
+
+
+@app.get("/customers", response_model=CustomerPage)
+def list_customers(
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Lista paginada de customer_id. `cursor` es el último id de la página
+    anterior (`next_cursor`) y `prefix` filtra por inicio del id.
+    """
+    from .services.customer_service import list_customers_page
+
+    return list_customers_page(app, prefix=prefix, cursor=cursor, limit=limit)
 
 
 @app.get("/customers/{customer_id}/portfolio", response_model=CustomerPortfolio)
 def get_customer_portfolio(customer_id: str):
+    from .services.portfolio_service import build_customer_portfolio
+
     portfolio = build_customer_portfolio(app, customer_id)
     return portfolio
 
 
+@app.get("/customers/{customer_id}/credit-score", response_model=CreditScoreAt)
+def get_credit_score(customer_id: str, at: Optional[date] = None):
+    """
+    Score vigente a la fecha `at` (default: hoy): último registro
+    del historial en o antes de esa fecha.
+    """
+    from .services.credit_score_service import get_credit_score_index
+
+    index = get_credit_score_index(app)
+    return index.score_at(customer_id, at or date.today())
+
+
+@app.get("/customers/{customer_id}/credit-score/trend", response_model=CreditScoreTrend)
+def get_credit_score_trend(
+    customer_id: str,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    """
+    Historial de score en el rango, variación total y pendiente mensual.
+    """
+    from .services.credit_score_service import get_credit_score_index
+
+    index = get_credit_score_index(app)
+    return index.trend(customer_id, date_from, date_to)
+
+
 @app.get(
     "/customers/{customer_id}/scenarios/minimum",
     response_model=ScenarioSummary,
@@ -158,6 +473,9 @@ def get_minimum_payment_scenario(customer_id: str):
     Escenario 1: el cliente paga solo mínimo en tarjetas
     y sigue el plan original en préstamos.
     """
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_minimum_service import simulate_minimum_payment_scenario
+
     portfolio = build_customer_portfolio(app, customer_id)
     scenario = simulate_minimum_payment_scenario(portfolio)
     return scenario
@@ -166,15 +484,61 @@ def get_minimum_payment_scenario(customer_id: str):
     "/customers/{customer_id}/scenarios/optimized",
     response_model=ScenarioSummary,
 )
-def get_optimized_payment_scenario(customer_id: str):
+def get_optimized_payment_scenario(
+    customer_id: str,
+    strategy: RepaymentStrategy = "avalanche",
+    arrears_threshold_days: int = Query(1, ge=0),
+):
     """
     Escenario 2: plan optimizado usando el available_cashflow para
-    pagar mínimos y luego atacar la deuda más cara.
+    pagar mínimos y luego atacar la deuda prioritaria según `strategy`
+    (avalanche = más cara, snowball = saldo más chico, hybrid = mora primero).
     """
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_optimized_service import simulate_optimized_plan
+
     portfolio = build_customer_portfolio(app, customer_id)
-    scenario = simulate_optimized_plan(portfolio)
+    scenario = simulate_optimized_plan(
+        portfolio, strategy=strategy, arrears_threshold_days=arrears_threshold_days
+    )
     return scenario
 
+@app.get(
+    "/customers/{customer_id}/scenarios/optimized/solver",
+    response_model=OptimizedSolverResult,
+)
+def get_optimized_solver_plan(
+    customer_id: str,
+    time_limit_s: Optional[float] = Query(None, gt=0, le=10),
+):
+    """
+    Plan optimizado resuelto como programa lineal (mínimo interés total)
+    y su mejora frente al greedy. Requiere scipy (status "unavailable" si no).
+    """
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_solver_service import solve_optimal_plan
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    return solve_optimal_plan(portfolio, time_limit_s=time_limit_s)
+
+@app.get(
+    "/customers/{customer_id}/scenarios/strategies",
+    response_model=StrategyComparisonResult,
+)
+def get_strategy_comparison(
+    customer_id: str,
+    arrears_threshold_days: int = Query(1, ge=0),
+):
+    """
+    Compara avalanche, snowball e hybrid (las tres en un mismo bucle de
+    meses, ver `simulate_optimized_plans`), con ahorros vs pago mínimo.
+    """
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_strategy_service import compare_repayment_strategies
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    return compare_repayment_strategies(portfolio, arrears_threshold_days=arrears_threshold_days)
+
 @app.get(
     "/customers/{customer_id}/scenarios/consolidation",
     response_model=ScenarioSummary,
@@ -183,37 +547,241 @@ def get_consolidation_scenario(customer_id: str):
     """
     Escenario 3: Consolidación de deudas usando las ofertas del banco.
     """
+    from .services.dataset_service import get_bank_offers
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_consolidation_service import simulate_consolidation_scenario
+
     portfolio = build_customer_portfolio(app, customer_id)
-    offers_raw = app.state.data["bank_offers"]
+    offers_raw = get_bank_offers(app)
     scenario = simulate_consolidation_scenario(portfolio, offers_raw)
     return scenario
 
+@app.get(
+    "/customers/{customer_id}/scenarios/consolidation/search",
+    response_model=ConsolidationSearchResult,
+)
+def get_consolidation_search(customer_id: str):
+    """
+    Consolidación parcial y/o en varias ofertas: qué deudas conviene
+    consolidar y en qué oferta, con el resto en el plan optimizado.
+    """
+    from .services.dataset_service import get_bank_offers
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_consolidation_search_service import search_consolidation_plan
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    offers_raw = get_bank_offers(app)
+    return search_consolidation_plan(portfolio, offers_raw)
+
+@app.post("/offers/impact", response_model=OfferImpactResult)
+def get_offer_impact(offer: BankOffer):
+    """
+    Impacto de una oferta nueva (o que reemplaza a la del mismo offer_id)
+    sobre la mejor consolidación de cada cliente del book. Solo se
+    recalculan los clientes que la oferta alcanza según su elegibilidad.
+    """
+    from .services.offer_impact_service import offer_impact
+
+    return offer_impact(app, offer)
+
+SCHEDULE_SCENARIO_TYPES = {
+    "minimum": "minimum_payment",
+    "optimized": "optimized_plan",
+    "consolidation": "consolidation",
+    "behavioral": "behavioral",
+}
+
+@app.get(
+    "/customers/{customer_id}/scenarios/{scenario}/schedule",
+    response_model=None,
+    responses={200: {"model": ScenarioScheduleColumns}},
+)
+def get_scenario_schedule(
+    customer_id: str,
+    scenario: Literal["minimum", "optimized", "consolidation", "behavioral"],
+    format: Literal["ndjson", "csv", "columns"] = "ndjson",
+    strategy: RepaymentStrategy = "avalanche",
+    arrears_threshold_days: int = Query(1, ge=0),
+):
+    """
+    Cronograma mes a mes (pago, interés y saldo por deuda) del escenario.
+    `ndjson` y `csv` se transmiten a medida que se simulan los meses;
+    `columns` devuelve una serie por deuda para graficar.
+    """
+    from .services.dataset_service import get_bank_offers
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_schedule_service import (
+        iter_behavioral_schedule,
+        iter_consolidation_schedule,
+        iter_minimum_schedule,
+        iter_optimized_schedule,
+        schedule_columns,
+        schedule_csv,
+        schedule_ndjson,
+    )
+    from .services.payment_behavior_service import get_customer_payment_behavior
+
+    portfolio = build_customer_portfolio(app, customer_id)
+
+    if scenario == "minimum":
+        rows = iter_minimum_schedule(portfolio)
+    elif scenario == "optimized":
+        rows = iter_optimized_schedule(
+            portfolio, strategy=strategy, arrears_threshold_days=arrears_threshold_days
+        )
+    elif scenario == "consolidation":
+        rows = iter_consolidation_schedule(portfolio, get_bank_offers(app))
+    else:
+        behavior = get_customer_payment_behavior(app, customer_id)
+        rows = iter_behavioral_schedule(portfolio, behavior)
+
+    if format == "columns":
+        return schedule_columns(customer_id, SCHEDULE_SCENARIO_TYPES[scenario], rows)
+    if format == "csv":
+        return StreamingResponse(
+            schedule_csv(rows),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f'attachment; filename="{customer_id}_{scenario}_schedule.csv"'
+            },
+        )
+    return StreamingResponse(schedule_ndjson(rows), media_type="application/x-ndjson")
+
+@app.get(
+    "/customers/{customer_id}/scenarios/sweep",
+    response_model=CashflowSweepResult,
+)
+def get_cashflow_sweep(
+    customer_id: str,
+    cashflow_from: float = Query(...),
+    cashflow_to: float = Query(..., alias="to"),
+    step: float = Query(...),
+):
+    """
+    "¿Y si el cliente pudiera pagar S/ X más al mes?": meses e intereses
+    del plan optimizado y de la consolidación para una grilla de
+    available_cashflow, reutilizando portafolio y escenario mínimo.
+    """
+    from .services.dataset_service import get_bank_offers
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_sweep_service import cashflow_grid, simulate_cashflow_sweep
+
+    try:
+        cashflows = cashflow_grid(cashflow_from, cashflow_to, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    offers_raw = get_bank_offers(app)
+    return simulate_cashflow_sweep(portfolio, offers_raw, cashflows)
+
+@app.get(
+    "/customers/{customer_id}/scenarios/stress",
+    response_model=IncomeStressResult,
+)
+def get_income_stress(
+    customer_id: str,
+    simulations: int = Query(10_000, ge=100, le=MAX_SIMULATIONS),
+    seed: int = 42,
+):
+    """
+    Monte Carlo de ingresos (variabilidad = income_variability_pct):
+    percentiles de meses/intereses del plan optimizado y probabilidad de
+    no cubrir alguna cuota de la consolidación.
+    """
+    from .services.dataset_service import get_bank_offers
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.scenario_stress_service import simulate_income_stress
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    offers_raw = get_bank_offers(app)
+    return simulate_income_stress(portfolio, offers_raw, simulations=simulations, seed=seed)
+
+@app.get(
+    "/customers/{customer_id}/scenarios/behavioral",
+    response_model=ScenarioSummary,
+)
+def get_behavioral_scenario(customer_id: str):
+    """
+    Escenario "behavioral": el cliente sigue pagando como muestra
+    su historial (payments_history).
+    """
+    from .services.portfolio_service import build_customer_portfolio
+    from .services.payment_behavior_service import get_customer_payment_behavior
+    from .services.scenario_behavioral_service import simulate_behavioral_scenario
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    behavior = get_customer_payment_behavior(app, customer_id)
+    scenario = simulate_behavioral_scenario(portfolio, behavior)
+    return scenario
+
+@app.get(
+    "/customers/{customer_id}/payment-behavior",
+    response_model=CustomerPaymentBehavior,
+)
+def get_payment_behavior(customer_id: str):
+    """
+    Regularidad, meses sin pago y sobrepago vs mínimo por producto,
+    precalculados desde payments_history.
+    """
+    from .services.payment_behavior_service import get_customer_payment_behavior
+
+    return get_customer_payment_behavior(app, customer_id)
+
 @app.get(
     "/customers/{customer_id}/scenarios/overview",
     response_model=ScenarioComparisonResult,
 )
-def get_scenarios_overview(customer_id: str):
+def get_scenarios_overview(customer_id: str, include_behavioral: bool = False):
     """
     Devuelve los tres escenarios (mínimo, optimizado, consolidación)
     y el ahorro en intereses y meses de cada uno vs el escenario mínimo.
+    Con `include_behavioral=true` agrega el escenario según historial de pagos.
     """
-    overview = compute_scenarios_overview(app, customer_id)
+    from .services.scenario_comparison_service import coalesced_scenarios_overview
+
+    overview = coalesced_scenarios_overview(app, customer_id, include_behavioral=include_behavioral)
     return overview
 
 @app.get(
     "/customers/{customer_id}/report",
     response_model=GeneratedReport,
 )
-def get_customer_report(customer_id: str):
+def get_customer_report(customer_id: str, response: Response):
     """
     Genera un informe explicativo usando IA generativa
     a partir del portafolio del cliente y el overview de escenarios.
+    Solicitudes simultáneas del mismo cliente comparten el cálculo.
+
+    Si el LLM no responde en REPORT_DEADLINE_S se devuelve el informe de
+    plantilla (`fallback=true`, sin ETag); el del LLM llega al caché y se
+    sirve en los pedidos siguientes.
     """
+    from .services.report_generation_service import customer_report_within_deadline
+
+    report = customer_report_within_deadline(app, customer_id)
+    if report.fallback:
+        response.headers["Cache-Control"] = "no-store"
+    return report
 
-    portfolio = build_customer_portfolio(app, customer_id)
 
-    overview = compute_scenarios_overview(app, customer_id)
+@app.post("/reports/jobs", response_model=ReportJob, status_code=202)
+def create_report_job(request: ReportJobRequest):
+    """
+    Encola la generación de informes para varios clientes (todos si no se
+    indican). Responde de inmediato con el job; el avance se consulta en
+    GET /reports/jobs/{job_id}.
+    """
+    return app.state.report_jobs.submit(request.customer_ids)
+
+
+@app.get("/reports/jobs/{job_id}", response_model=ReportJob)
+def get_report_job(job_id: str):
+    """
+    Estado del job y de cada cliente (pendiente, en curso, listo o con
+    error) y el archivo Markdown generado.
+    """
+    return app.state.report_jobs.get(job_id)
 
-    report = generate_explanatory_report(portfolio, overview)
 
-    return report
\ No newline at end of file
+_APP_IMPORTED = time.perf_counter()
@@ -0,0 +1,45 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ProductTypeDebt(BaseModel):
+    product_type: str
+    products: int
+    customers: int
+    total_balance: float
+    share_of_debt: float
+
+
+class SavingsBucket(BaseModel):
+    min_savings: float
+    max_savings: Optional[float]
+    customers: int
+
+
+class SavingsDistribution(BaseModel):
+    total: float
+    mean: float
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+    buckets: List[SavingsBucket]
+
+
+class ScoreBandSavings(BaseModel):
+    band: str
+    customers: int
+    total_savings: float
+    avg_savings: float
+    consolidation_eligible_share: float
+
+
+class BookAnalytics(BaseModel):
+    customers: int
+    total_debt: float
+    debt_by_product_type: List[ProductTypeDebt]
+    savings: SavingsDistribution
+    consolidation_eligible_customers: int
+    consolidation_eligible_share: float
+    by_score_band: List[ScoreBandSavings]
@@ -0,0 +1,19 @@
+from typing import List, Literal
+from pydantic import BaseModel
+
+
+class ProductPaymentBehavior(BaseModel):
+    product_id: str
+    product_type: Literal["loan", "card"]
+    payments_count: int
+    months_with_payment: int
+    missed_months: int
+    regularity: float
+    avg_monthly_payment: float
+    min_payment: float
+    avg_overpayment: float
+
+
+class CustomerPaymentBehavior(BaseModel):
+    customer_id: str
+    products: List[ProductPaymentBehavior]
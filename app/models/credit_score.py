@@ -0,0 +1,23 @@
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CreditScorePoint(BaseModel):
+    date: date
+    credit_score: int
+
+
+class CreditScoreAt(BaseModel):
+    customer_id: str
+    date: date
+    credit_score: Optional[int]
+    observed_at: Optional[date]
+
+
+class CreditScoreTrend(BaseModel):
+    customer_id: str
+    latest_score: Optional[int]
+    change: int
+    slope_per_month: float
+    points: List[CreditScorePoint]
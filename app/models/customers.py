@@ -0,0 +1,8 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CustomerPage(BaseModel):
+    items: List[str]
+    next_cursor: Optional[str] = None
+    total: int
@@ -1,7 +1,49 @@
+from typing import List, Literal, Optional
+
 from pydantic import BaseModel
 
 
+class ReportUsage(BaseModel):
+    # Conteo local (ver utils/token_count.py): instrucciones fijas + datos del cliente.
+    instruction_tokens: int
+    payload_tokens: int
+    # Informados por el servicio del LLM (None si no los entrega, p.ej. el stub).
+    input_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    latency_ms: float
+
+
 class GeneratedReport(BaseModel):
     customer_id: str
     language: str = "es"
-    report_text: str
\ No newline at end of file
+    report_text: str
+    # True si es el informe de plantilla (el LLM no respondió a tiempo o falló).
+    fallback: bool = False
+    fallback_reason: Optional[Literal["deadline", "llm_error"]] = None
+    # Tokens y latencia de la llamada al LLM (None en el informe de plantilla).
+    usage: Optional[ReportUsage] = None
+
+
+class ReportJobRequest(BaseModel):
+    # Si no se indica, se generan informes para todos los clientes.
+    customer_ids: Optional[List[str]] = None
+
+
+class ReportJobItem(BaseModel):
+    customer_id: str
+    status: Literal["pending", "running", "done", "failed"] = "pending"
+    attempts: int = 0
+    file: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ReportJob(BaseModel):
+    job_id: str
+    status: Literal["pending", "running", "completed"] = "pending"
+    created_at: str
+    updated_at: str
+    total: int
+    done: int = 0
+    failed: int = 0
+    items: List[ReportJobItem]
@@ -1,8 +1,13 @@
-from typing import List, Literal
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 
-ScenarioType = Literal["minimum_payment", "optimized_plan", "consolidation"]
+ScenarioType = Literal["minimum_payment", "optimized_plan", "consolidation", "behavioral"]
+
+RepaymentStrategy = Literal["avalanche", "snowball", "hybrid"]
+
+# Tope de trayectorias del estrés Monte Carlo (validación del endpoint).
+MAX_SIMULATIONS = 100_000
 
 
 class DebtAmortizationSummary(BaseModel):
@@ -36,4 +41,135 @@ class ScenarioComparisonResult(BaseModel):
     baseline_type: ScenarioType
     baseline_total_months: int
     baseline_total_interest_paid: float
-    scenarios: List[ScenarioSavings]
\ No newline at end of file
+    scenarios: List[ScenarioSavings]
+
+class StrategySavings(BaseModel):
+    strategy: RepaymentStrategy
+    total_months: int
+    total_paid: float
+    total_interest_paid: float
+    interest_savings_vs_minimum: float
+    months_saved_vs_minimum: int
+    payoff_order: List[str]
+
+
+class StrategyComparisonResult(BaseModel):
+    customer_id: str
+    available_cashflow: float
+    arrears_threshold_days: int
+    baseline_type: ScenarioType
+    baseline_total_months: int
+    baseline_total_interest_paid: float
+    best_strategy: Optional[RepaymentStrategy] = None
+    strategies: List[StrategySavings]
+
+class OptimizedSolverResult(BaseModel):
+    customer_id: str
+    status: Literal["optimal", "greedy", "infeasible", "time_limit", "unavailable"]
+    solve_seconds: float
+    horizon_months: int
+    greedy: ScenarioSummary
+    solver: Optional[ScenarioSummary] = None
+    interest_improvement_vs_greedy: Optional[float] = None
+    months_improvement_vs_greedy: Optional[int] = None
+
+class ConsolidationGroup(BaseModel):
+    offer_id: str
+    product_ids: List[str]
+    consolidated_balance: float
+    monthly_payment: float
+    term_months: int
+    total_interest_paid: float
+
+
+class ConsolidationSearchResult(BaseModel):
+    customer_id: str
+    available_cashflow: float
+    feasible: bool
+    groups: List[ConsolidationGroup]
+    scenario: ScenarioSummary
+    optimized_total_interest_paid: float
+    interest_savings_vs_optimized: float
+    single_offer_total_interest_paid: Optional[float] = None
+    interest_savings_vs_single_offer: Optional[float] = None
+    candidates_evaluated: int
+    search_nodes: int
+    search_budget_exhausted: bool = False
+
+class OfferImpactResult(BaseModel):
+    offer_id: str
+    replaces_existing: bool
+    customers_in_book: int
+    customers_recomputed: int
+    customers_affected: int
+    customers_gained: int
+    customers_lost: int
+    customers_switched: int
+    interest_before: float
+    interest_after: float
+    interest_savings_delta: float
+    sample_customer_ids: List[str]
+
+class DebtScheduleSeries(BaseModel):
+    product_id: str
+    product_type: Literal["loan", "card"]
+    start_month: int
+    payment: List[float]
+    interest: List[float]
+    balance: List[float]
+
+
+class ScenarioScheduleColumns(BaseModel):
+    customer_id: str
+    scenario_type: ScenarioType
+    total_months: int
+    series: List[DebtScheduleSeries]
+
+class CashflowSweepPoint(BaseModel):
+    available_cashflow: float
+    optimized_total_months: int
+    optimized_total_interest_paid: float
+    optimized_interest_savings_vs_minimum: float
+    consolidation_offer_id: Optional[str] = None
+    consolidation_total_months: Optional[int] = None
+    consolidation_total_interest_paid: Optional[float] = None
+    consolidation_interest_savings_vs_minimum: Optional[float] = None
+
+
+class CashflowSweepResult(BaseModel):
+    customer_id: str
+    current_available_cashflow: float
+    baseline_type: ScenarioType
+    baseline_total_months: int
+    baseline_total_interest_paid: float
+    points: List[CashflowSweepPoint]
+
+
+class PercentileSummary(BaseModel):
+    p10: float
+    p50: float
+    p90: float
+    mean: float
+
+
+class OptimizedStressResult(BaseModel):
+    payoff_months: PercentileSummary
+    total_interest_paid: PercentileSummary
+    probability_not_paid_off: float
+
+
+class ConsolidationStressResult(BaseModel):
+    offer_id: str
+    monthly_payment: float
+    term_months: int
+    probability_missed_payment: float
+    expected_missed_payments: float
+
+
+class IncomeStressResult(BaseModel):
+    customer_id: str
+    simulations: int
+    seed: int
+    income_variability_pct: float
+    optimized: OptimizedStressResult
+    consolidation: Optional[ConsolidationStressResult] = None
@@ -0,0 +1,478 @@
+"""
+Router delgado para el modo shard.
+
+Cada shard es una instancia normal de `app.main:app` levantada con
+SHARD_INDEX/SHARD_COUNT; este proceso no carga datasets, solo:
+  - reenvía `/customers/{id}/...` al shard dueño del cliente,
+  - hace fan-out de los endpoints batch y mezcla resultados (listado de
+    clientes, upload, analítica del book, impacto de ofertas, jobs de
+    informes),
+  - reenvía el resto (UI, estáticos) al shard 0.
+
+Configuración: SHARD_URLS="http://127.0.0.1:8001,http://127.0.0.1:8002"
+(en orden de SHARD_INDEX).
+"""
+import asyncio
+import heapq
+import os
+from itertools import islice
+from typing import List, Optional
+from urllib.parse import quote
+
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from .models.analytics import BookAnalytics, ProductTypeDebt, SavingsDistribution, ScoreBandSavings
+from .models.customers import CustomerPage
+from .models.portfolio import BankOffer
+from .models.report import ReportJob, ReportJobRequest
+from .models.scenarios import OfferImpactResult
+from .utils.sharding import shard_for_customer
+
+
+# Headers hop-by-hop que no deben reenviarse tal cual.
+_HOP_HEADERS = {
+    "host",
+    "content-length",
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+# Igual que SAMPLE_SIZE de offer_impact_service (el router no importa servicios).
+OFFER_IMPACT_SAMPLE_SIZE = 20
+
+
+def _shard_urls() -> List[str]:
+    urls = [u.strip().rstrip("/") for u in os.getenv("SHARD_URLS", "").split(",") if u.strip()]
+    if not urls:
+        raise RuntimeError("SHARD_URLS no está configurado")
+    return urls
+
+
+app = FastAPI(title="Asistente de Reestructuración Financiera (router)")
+
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.shard_urls = _shard_urls()
+    app.state.client = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.client.aclose()
+
+
+def _forward_headers(request: Request) -> dict:
+    return {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+
+
+async def _proxy(request: Request, base_url: str, path: str) -> StreamingResponse:
+    """
+    Reenvía la petición tal cual a `base_url` y devuelve la respuesta
+    en streaming (sin armarla completa en memoria del router).
+    """
+    client: httpx.AsyncClient = app.state.client
+    upstream = client.build_request(
+        request.method,
+        f"{base_url}/{path}",
+        params=request.query_params,
+        headers=_forward_headers(request),
+        content=await request.body(),
+    )
+    try:
+        resp = await client.send(upstream, stream=True)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible ({base_url}): {e}")
+
+    headers = {k: v for k, v in resp.headers.items() if k.lower() not in _HOP_HEADERS}
+    return StreamingResponse(
+        resp.aiter_raw(),
+        status_code=resp.status_code,
+        headers=headers,
+        background=BackgroundTask(resp.aclose),
+    )
+
+
+async def _get_json_all(path: str, params: Optional[dict] = None) -> list:
+    client: httpx.AsyncClient = app.state.client
+    try:
+        responses = await asyncio.gather(
+            *(client.get(f"{url}{path}", params=params) for url in app.state.shard_urls)
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+
+    return _json_responses(responses)
+
+
+async def _post_json_all(path: str, body) -> list:
+    client: httpx.AsyncClient = app.state.client
+    try:
+        responses = await asyncio.gather(
+            *(client.post(f"{url}{path}", json=body) for url in app.state.shard_urls)
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+    return _json_responses(responses)
+
+
+async def _get_bytes_all(path: str) -> List[bytes]:
+    client: httpx.AsyncClient = app.state.client
+    try:
+        responses = await asyncio.gather(
+            *(client.get(f"{url}{path}") for url in app.state.shard_urls)
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+    for resp in responses:
+        if resp.status_code >= 400:
+            raise HTTPException(status_code=resp.status_code, detail=_error_detail(resp))
+    return [resp.content for resp in responses]
+
+
+def _json_responses(responses: List[httpx.Response]) -> list:
+    for resp in responses:
+        if resp.status_code >= 400:
+            raise HTTPException(status_code=resp.status_code, detail=_error_detail(resp))
+    return [resp.json() for resp in responses]
+
+
+def _error_detail(resp: httpx.Response):
+    """El `detail` del shard tal cual (sin volver a envolverlo en texto)."""
+    try:
+        return resp.json().get("detail", resp.text)
+    except (ValueError, AttributeError):
+        return resp.text
+
+
+@app.get("/shards")
+def list_shards():
+    return {"shard_count": len(app.state.shard_urls), "shards": app.state.shard_urls}
+
+
+@app.get("/customers", response_model=CustomerPage)
+async def list_customers(
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Fan-out a todos los shards y merge ordenado. Cada shard devuelve sus
+    primeros `limit` ids posteriores a `cursor`; la página global está
+    contenida en esa unión.
+    """
+    params = {"prefix": prefix, "limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+
+    pages = [CustomerPage(**p) for p in await _get_json_all("/customers", params)]
+
+    merged = list(heapq.merge(*(p.items for p in pages)))
+    items = merged[:limit]
+    has_more = len(merged) > limit or any(p.next_cursor for p in pages)
+
+    return CustomerPage(
+        items=items,
+        next_cursor=items[-1] if items and has_more else None,
+        total=sum(p.total for p in pages),
+    )
+
+
+def _merge_debt_by_product_type(results: List[BookAnalytics]) -> List[ProductTypeDebt]:
+    merged: dict = {}
+    for result in results:
+        for row in result.debt_by_product_type:
+            acc = merged.setdefault(row.product_type, [0, 0, 0.0])
+            acc[0] += row.products
+            acc[1] += row.customers  # cada cliente está en un solo shard
+            acc[2] += row.total_balance
+    total = sum(acc[2] for acc in merged.values())
+    # Mismo orden que en un solo proceso: tipos en orden alfabético, card al final.
+    order = sorted(t for t in merged if t != "card") + (["card"] if "card" in merged else [])
+    return [
+        ProductTypeDebt(
+            product_type=t,
+            products=merged[t][0],
+            customers=merged[t][1],
+            total_balance=merged[t][2],
+            share_of_debt=merged[t][2] / total if total else 0.0,
+        )
+        for t in order
+    ]
+
+
+def _merge_savings(results: List[BookAnalytics], savings: List[bytes]) -> SavingsDistribution:
+    import numpy as np
+
+    values = np.concatenate([np.frombuffer(raw, dtype="<f8") for raw in savings])
+    q = np.quantile(values, [0.1, 0.25, 0.5, 0.75, 0.9]) if len(values) else np.zeros(5)
+    buckets = [b.model_copy() for b in results[0].savings.buckets]
+    for result in results[1:]:
+        for bucket, other in zip(buckets, result.savings.buckets):
+            bucket.customers += other.customers
+    return SavingsDistribution(
+        total=float(values.sum()),
+        mean=float(values.mean()) if len(values) else 0.0,
+        p10=float(q[0]),
+        p25=float(q[1]),
+        p50=float(q[2]),
+        p75=float(q[3]),
+        p90=float(q[4]),
+        buckets=buckets,
+    )
+
+
+def _merge_score_bands(results: List[BookAnalytics]) -> List[ScoreBandSavings]:
+    merged: dict = {}
+    for result in results:
+        for band in result.by_score_band:
+            acc = merged.setdefault(band.band, [0, 0.0, 0.0])
+            acc[0] += band.customers
+            acc[1] += band.total_savings
+            acc[2] += round(band.consolidation_eligible_share * band.customers)
+    return [
+        ScoreBandSavings(
+            band=band,
+            customers=customers,
+            total_savings=total,
+            avg_savings=total / customers if customers else 0.0,
+            consolidation_eligible_share=eligible / customers if customers else 0.0,
+        )
+        for band, (customers, total, eligible) in merged.items()
+    ]
+
+
+@app.get("/analytics/book", response_model=BookAnalytics)
+async def book_analytics():
+    """
+    Agregados de todos los shards. Conteos y sumas se suman; los
+    percentiles de ahorro se calculan sobre el ahorro por cliente de
+    todos los shards (`/analytics/book/savings`, 8 bytes por cliente).
+    """
+    pages, savings = await asyncio.gather(
+        _get_json_all("/analytics/book"),
+        _get_bytes_all("/analytics/book/savings"),
+    )
+    results = [BookAnalytics(**page) for page in pages]
+    customers = sum(r.customers for r in results)
+    eligible = sum(r.consolidation_eligible_customers for r in results)
+    return BookAnalytics(
+        customers=customers,
+        total_debt=sum(r.total_debt for r in results),
+        debt_by_product_type=_merge_debt_by_product_type(results),
+        savings=_merge_savings(results, savings),
+        consolidation_eligible_customers=eligible,
+        consolidation_eligible_share=eligible / customers if customers else 0.0,
+        by_score_band=_merge_score_bands(results),
+    )
+
+
+@app.post("/offers/impact", response_model=OfferImpactResult)
+async def offer_impact(offer: BankOffer):
+    """
+    Cada shard mide la oferta sobre sus clientes; los conteos e intereses
+    se suman y la muestra de ids es la misma que en un solo proceso (los
+    primeros ids en orden, cada shard los devuelve ordenados).
+    """
+    results = [
+        OfferImpactResult(**r)
+        for r in await _post_json_all("/offers/impact", offer.model_dump())
+    ]
+    return OfferImpactResult(
+        offer_id=offer.offer_id,
+        # El catálogo de ofertas se replica completo en cada shard.
+        replaces_existing=results[0].replaces_existing,
+        customers_in_book=sum(r.customers_in_book for r in results),
+        customers_recomputed=sum(r.customers_recomputed for r in results),
+        customers_affected=sum(r.customers_affected for r in results),
+        customers_gained=sum(r.customers_gained for r in results),
+        customers_lost=sum(r.customers_lost for r in results),
+        customers_switched=sum(r.customers_switched for r in results),
+        interest_before=sum(r.interest_before for r in results),
+        interest_after=sum(r.interest_after for r in results),
+        interest_savings_delta=sum(r.interest_savings_delta for r in results),
+        sample_customer_ids=list(
+            islice(heapq.merge(*(r.sample_customer_ids for r in results)), OFFER_IMPACT_SAMPLE_SIZE)
+        ),
+    )
+
+
+def _merge_jobs(job_id: str, jobs: List[ReportJob]) -> ReportJob:
+    statuses = {job.status for job in jobs}
+    if statuses == {"completed"}:
+        status = "completed"
+    elif statuses == {"pending"}:
+        status = "pending"
+    else:
+        status = "running"
+    return ReportJob(
+        job_id=job_id,
+        status=status,
+        created_at=min(job.created_at for job in jobs),
+        updated_at=max(job.updated_at for job in jobs),
+        total=sum(job.total for job in jobs),
+        done=sum(job.done for job in jobs),
+        failed=sum(job.failed for job in jobs),
+        items=[item for job in jobs for item in job.items],
+    )
+
+
+def _parse_job_id(job_id: str) -> List[tuple]:
+    """`0.<id>-2.<id>` -> [(0, id), (2, id)]; 404 si no tiene ese formato."""
+    parts = []
+    for part in job_id.split("-"):
+        index, _, shard_job_id = part.partition(".")
+        if not index.isdigit() or int(index) >= len(app.state.shard_urls) or not shard_job_id:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+        parts.append((int(index), shard_job_id))
+    return parts
+
+
+@app.post("/reports/jobs", response_model=ReportJob, status_code=202)
+async def create_report_job(request: ReportJobRequest):
+    """
+    Cada shard encola un job con sus clientes (todos los suyos si no se
+    pasa `customer_ids`). El id del job combina los de cada shard, así que
+    `GET /reports/jobs/{job_id}` no necesita estado en el router.
+    """
+    urls = app.state.shard_urls
+    if request.customer_ids is None:
+        bodies = {i: {} for i in range(len(urls))}
+    else:
+        bodies = {}
+        for cid in dict.fromkeys(request.customer_ids):
+            bodies.setdefault(shard_for_customer(cid, len(urls)), {"customer_ids": []})["customer_ids"].append(cid)
+        if not bodies:
+            raise HTTPException(status_code=400, detail="No hay clientes para el job")
+
+    client: httpx.AsyncClient = app.state.client
+    shards = sorted(bodies)
+    try:
+        responses = await asyncio.gather(
+            *(client.post(f"{urls[i]}/reports/jobs", json=bodies[i]) for i in shards)
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+
+    if request.customer_ids is None:
+        # Un shard sin clientes no crea job (400); el resto sí.
+        kept = [(i, r) for i, r in zip(shards, responses) if r.status_code != 400]
+        if not kept:
+            raise HTTPException(status_code=400, detail="No hay clientes para el job")
+        shards, responses = [i for i, _ in kept], [r for _, r in kept]
+    jobs = [ReportJob(**body) for body in _json_responses(responses)]
+    job_id = "-".join(f"{i}.{job.job_id}" for i, job in zip(shards, jobs))
+    return _merge_jobs(job_id, jobs)
+
+
+@app.get("/reports/jobs/{job_id}", response_model=ReportJob)
+async def get_report_job(job_id: str):
+    """Estado del job armado con el de cada shard (ítems agrupados por shard)."""
+    urls = app.state.shard_urls
+    parts = _parse_job_id(job_id)
+    client: httpx.AsyncClient = app.state.client
+    try:
+        responses = await asyncio.gather(
+            *(
+                client.get(f"{urls[i]}/reports/jobs/{quote(shard_job_id, safe='')}")
+                for i, shard_job_id in parts
+            )
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+    if any(r.status_code == 404 for r in responses):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+    jobs = [ReportJob(**body) for body in _json_responses(responses)]
+    return _merge_jobs(job_id, jobs)
+
+
+async def _post_upload_all(body: bytes, headers: dict, params: dict) -> List[httpx.Response]:
+    client: httpx.AsyncClient = app.state.client
+    try:
+        return await asyncio.gather(
+            *(
+                client.post(f"{url}/datasets/upload", content=body, headers=headers, params=params)
+                for url in app.state.shard_urls
+            )
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Shard no disponible: {e}")
+
+
+@app.post("/datasets/upload")
+async def upload_datasets(request: Request):
+    """
+    Reenvía el mismo multipart a todos los shards en dos fases: primero
+    todos validan (`validate_only=true`) y solo si ninguno rechaza los
+    archivos se publican en todos. Cada shard se queda con su porción de
+    clientes y se suman las filas por dataset.
+
+    Si la publicación falla en algún shard después de validar (caída,
+    error de escritura), responde 502 indicando qué shards ya aplicaron
+    el upload y cuáles no: hay que repetirlo.
+    """
+    body = await request.body()
+    headers = _forward_headers(request)
+
+    # Fase 1: validar en todos; un rechazo no deja ningún shard cambiado.
+    _json_responses(await _post_upload_all(body, headers, {"validate_only": "true"}))
+
+    # Fase 2: publicar.
+    client: httpx.AsyncClient = app.state.client
+    urls = app.state.shard_urls
+    responses = await asyncio.gather(
+        *(client.post(f"{url}/datasets/upload", content=body, headers=headers) for url in urls),
+        return_exceptions=True,
+    )
+    applied, failed = [], []
+    for i, resp in enumerate(responses):
+        if isinstance(resp, httpx.Response) and resp.status_code < 400:
+            applied.append(i)
+        else:
+            error = _error_detail(resp) if isinstance(resp, httpx.Response) else str(resp)
+            failed.append({"shard": i, "error": error})
+    if failed:
+        raise HTTPException(
+            status_code=502,
+            detail={
+                "message": "El upload no se aplicó en todos los shards; repítelo.",
+                "applied_shards": applied,
+                "failed_shards": failed,
+            },
+        )
+
+    rows_per_dataset: dict = {}
+    for resp in responses:
+        for name, rows in resp.json()["rows_per_dataset"].items():
+            if name == "bank_offers":
+                # El catálogo de ofertas se replica completo en cada shard.
+                rows_per_dataset[name] = rows
+            else:
+                rows_per_dataset[name] = rows_per_dataset.get(name, 0) + rows
+
+    return {
+        "status": "ok",
+        "message": "Datasets cargados y reemplazados correctamente.",
+        "rows_per_dataset": rows_per_dataset,
+    }
+
+
+@app.api_route(
+    "/customers/{customer_id}/{path:path}",
+    methods=["GET", "POST", "PUT", "DELETE"],
+)
+async def forward_customer(customer_id: str, path: str, request: Request):
+    urls = app.state.shard_urls
+    owner = urls[shard_for_customer(customer_id, len(urls))]
+    return await _proxy(request, owner, f"customers/{quote(customer_id, safe='')}/{path}")
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def forward_default(path: str, request: Request):
+    return await _proxy(request, app.state.shard_urls[0], path)
@@ -0,0 +1,305 @@
+"""
+Analítica agregada del book (`GET /analytics/book`).
+
+Se arma en dos estructuras derivadas por generación de datasets:
+
+  - "book_scenarios": una fila por cliente (con deudas y cashflow) con los
+    intereses de los escenarios mínimo, optimizado (avalanche) y de la
+    mejor consolidación. Se simulan todos los clientes juntos con
+    operaciones vectorizadas (ver `card_minimum_totals`,
+    `loan_standard_totals` y `simulate_book_avalanche`), sin armar un
+    portafolio por cliente ni llamar a `compute_scenarios_overview`.
+  - "book_analytics": los agregados (deuda por tipo de producto,
+    distribución del ahorro potencial, elegibilidad a consolidación y
+    ahorro por banda de score) con group-bys sobre esa tabla.
+
+El ahorro potencial de un cliente es el del mejor escenario (optimizado o
+consolidación viable) vs el pago mínimo, como en el overview; los clientes
+sin flujo disponible no tienen plan y cuentan con ahorro 0.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from ..models.analytics import (
+    BookAnalytics,
+    ProductTypeDebt,
+    SavingsBucket,
+    SavingsDistribution,
+    ScoreBandSavings,
+)
+from ..services.dataset_service import get_dataset_generation, get_derived
+from ..services.financial_math import annuity_payments, monthly_rate
+from ..services.offer_impact_service import OfferImpactIndex, get_offer_impact_index
+from ..services.scenario_batch_engine import DebtArrays, simulate_book_avalanche
+from ..services.scenario_kernels import get_kernels
+from ..services.scenario_minimum_service import card_minimum_totals, loan_standard_totals
+from ..utils.single_flight import single_flight
+
+
+# Bandas de score: (límite inferior, etiqueta). Sin score va aparte.
+SCORE_BANDS = [(-np.inf, "<580"), (580, "580-669"), (670, "670-739"), (740, "740-799"), (800, "800+")]
+NO_SCORE_BAND = "sin score"
+
+# Cortes del histograma de ahorro potencial (el último tramo es abierto).
+SAVINGS_EDGES = [0.0, 500.0, 1_000.0, 2_500.0, 5_000.0, 10_000.0, 25_000.0]
+
+
+def _debt_rows(store, index: OfferImpactIndex) -> pd.DataFrame:
+    """
+    Deudas del book en el orden de `debt_arrays` (por cliente: loans y
+    luego cards, en el orden del archivo), con la fila del cliente en
+    `index` y los intereses del escenario mínimo por deuda.
+    """
+    loans = store.read_frame(
+        "loans", ["customer_id", "principal", "annual_rate_pct", "remaining_term_months", "days_past_due"]
+    )
+    cards = store.read_frame(
+        "cards", ["customer_id", "balance", "annual_rate_pct", "min_payment_pct", "days_past_due"]
+    )
+    ids = pd.Index(index.customer_ids)
+
+    loan_interest, _ = loan_standard_totals(
+        loans["principal"], loans["annual_rate_pct"], loans["remaining_term_months"]
+    )
+    card_interest, _ = card_minimum_totals(
+        cards["balance"], cards["annual_rate_pct"], cards["min_payment_pct"]
+    )
+
+    principal = loans["principal"].to_numpy(dtype=float)
+    rate = loans["annual_rate_pct"].to_numpy(dtype=float)
+    loan_payment = annuity_payments(principal, rate, loans["remaining_term_months"].to_numpy(dtype=np.int64))
+
+    frame = pd.DataFrame({
+        "row": np.concatenate([
+            ids.get_indexer(loans["customer_id"].astype(str)),
+            ids.get_indexer(cards["customer_id"].astype(str)),
+        ]),
+        "is_card": np.r_[np.zeros(len(loans), dtype=bool), np.ones(len(cards), dtype=bool)],
+        "balance": np.r_[principal, cards["balance"].to_numpy(dtype=float)],
+        "rate_annual": np.r_[rate, cards["annual_rate_pct"].to_numpy(dtype=float)],
+        "min_payment_pct": np.r_[np.zeros(len(loans)), cards["min_payment_pct"].to_numpy(dtype=float) / 100.0],
+        "loan_payment": np.r_[loan_payment, np.zeros(len(cards))],
+        "days_past_due": np.r_[
+            loans["days_past_due"].to_numpy(dtype=np.int64), cards["days_past_due"].to_numpy(dtype=np.int64)
+        ],
+        "minimum_interest": np.r_[loan_interest, card_interest],
+    })
+    frame = frame[frame["row"] >= 0]
+    # Orden estable por cliente: conserva loans antes que cards y el orden del archivo.
+    return frame.iloc[np.argsort(frame["row"].to_numpy(), kind="stable")].reset_index(drop=True)
+
+
+def _optimized_interest(debts: pd.DataFrame, cashflows: np.ndarray) -> np.ndarray:
+    """
+    Intereses del plan optimizado por cliente. Con Numba se recorre el
+    book en un kernel compilado; si no, los clientes se agrupan por
+    cantidad de deudas para simular matrices (clientes x deudas) sin relleno.
+    """
+    out = np.zeros(len(cashflows))
+    rows = debts["row"].to_numpy()
+    if len(rows) == 0:
+        return out
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    counts = np.diff(np.r_[starts, len(rows)])
+
+    kernels = get_kernels()
+    if kernels is not None:
+        # Avalanche: tasa más alta primero, desempate estable (ver static_priority).
+        order = np.lexsort((-debts["rate_annual"].to_numpy(), rows))
+        local = order - np.repeat(starts, counts)
+        interest = np.zeros(len(starts))
+        kernels.book_optimized(
+            np.r_[starts, len(rows)],
+            debts["balance"].to_numpy(dtype=np.float64),
+            monthly_rate(debts["rate_annual"].to_numpy(dtype=np.float64)),
+            ~debts["is_card"].to_numpy(),
+            debts["loan_payment"].to_numpy(dtype=np.float64),
+            debts["min_payment_pct"].to_numpy(dtype=np.float64),
+            local.astype(np.int64),
+            cashflows[rows[starts]],
+            600,
+            interest,
+        )
+        out[rows[starts]] = interest
+        return out
+
+    columns = {
+        name: debts[name].to_numpy()
+        for name in ("is_card", "balance", "rate_annual", "min_payment_pct", "loan_payment", "days_past_due")
+    }
+    for k in np.unique(counts):
+        group = starts[counts == k]
+        positions = group[:, None] + np.arange(k)
+        arrays = {name: values[positions] for name, values in columns.items()}
+        batch = DebtArrays(
+            product_ids=[],
+            product_types=[],
+            monthly_rate=monthly_rate(arrays["rate_annual"]),
+            **arrays,
+        )
+        customer_rows = rows[group]
+        interest, _ = simulate_book_avalanche(batch, cashflows[customer_rows])
+        out[customer_rows] = interest
+    return out
+
+
+def build_book_scenarios(store, index: OfferImpactIndex) -> pd.DataFrame:
+    """Intereses por escenario y cliente (una fila por cliente de `index`)."""
+    debts = _debt_rows(store, index)
+    rows = debts["row"].to_numpy()
+    c = len(index)
+
+    return pd.DataFrame({
+        "customer_id": index.customer_ids,
+        "credit_score": index.credit_score,
+        "available_cashflow": index.available_cashflow,
+        "total_debt": np.bincount(rows, weights=debts["balance"].to_numpy(), minlength=c),
+        "minimum_interest": np.bincount(rows, weights=debts["minimum_interest"].to_numpy(), minlength=c),
+        "optimized_interest": _optimized_interest(debts, index.available_cashflow),
+        "consolidation_interest": index.best_interest,
+    })
+
+
+def _potential_savings(scenarios: pd.DataFrame) -> pd.Series:
+    # fmin ignora el NaN de los clientes sin consolidación viable.
+    best = np.fmin(scenarios["optimized_interest"], scenarios["consolidation_interest"])
+    savings = scenarios["minimum_interest"] - best
+    return savings.where(scenarios["available_cashflow"] > 0, 0.0)
+
+
+def _debt_by_product_type(store) -> List[ProductTypeDebt]:
+    loans = store.read_frame("loans", ["customer_id", "product_type", "principal"])
+    cards = store.read_frame("cards", ["customer_id", "balance"])
+
+    by_type = loans.groupby("product_type", observed=True).agg(
+        products=("principal", "size"),
+        customers=("customer_id", "nunique"),
+        total_balance=("principal", "sum"),
+    )
+    # Orden alfabético de tipos (las categorías siguen el orden de aparición), card al final.
+    rows = sorted((str(t), rec) for t, rec in by_type.to_dict("index").items())
+    rows.append((
+        "card",
+        {"products": len(cards), "customers": cards["customer_id"].nunique(), "total_balance": cards["balance"].sum()},
+    ))
+    total = sum(rec["total_balance"] for _, rec in rows)
+
+    return [
+        ProductTypeDebt(
+            product_type=product_type,
+            products=int(rec["products"]),
+            customers=int(rec["customers"]),
+            total_balance=float(rec["total_balance"]),
+            share_of_debt=float(rec["total_balance"] / total) if total else 0.0,
+        )
+        for product_type, rec in rows
+    ]
+
+
+def _savings_distribution(savings: pd.Series) -> SavingsDistribution:
+    values = savings.to_numpy()
+    q = np.quantile(values, [0.1, 0.25, 0.5, 0.75, 0.9]) if len(values) else np.zeros(5)
+    edges = SAVINGS_EDGES + [np.inf]
+    # Ahorro <= 0 (ningún plan mejora el mínimo) va al primer tramo.
+    counts = np.bincount(
+        np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(SAVINGS_EDGES) - 1),
+        minlength=len(SAVINGS_EDGES),
+    )
+    return SavingsDistribution(
+        total=float(values.sum()),
+        mean=float(values.mean()) if len(values) else 0.0,
+        p10=float(q[0]),
+        p25=float(q[1]),
+        p50=float(q[2]),
+        p75=float(q[3]),
+        p90=float(q[4]),
+        buckets=[
+            SavingsBucket(
+                min_savings=lo,
+                max_savings=None if np.isinf(hi) else hi,
+                customers=int(n),
+            )
+            for lo, hi, n in zip(SAVINGS_EDGES, edges[1:], counts)
+        ],
+    )
+
+
+def _score_bands(scores: pd.Series) -> pd.Series:
+    bands = pd.cut(
+        scores,
+        bins=[lower for lower, _ in SCORE_BANDS] + [np.inf],
+        labels=[label for _, label in SCORE_BANDS],
+        right=False,
+    )
+    return bands.cat.add_categories([NO_SCORE_BAND]).fillna(NO_SCORE_BAND)
+
+
+def build_book_analytics(store, scenarios: pd.DataFrame) -> BookAnalytics:
+    savings = _potential_savings(scenarios)
+    eligible = scenarios["consolidation_interest"].notna()
+    customers = len(scenarios)
+
+    by_band = pd.DataFrame({
+        "band": _score_bands(scenarios["credit_score"]),
+        "savings": savings,
+        "eligible": eligible,
+    }).groupby("band", observed=False).agg(
+        customers=("savings", "size"),
+        total_savings=("savings", "sum"),
+        avg_savings=("savings", "mean"),
+        eligible_share=("eligible", "mean"),
+    )
+
+    return BookAnalytics(
+        customers=customers,
+        total_debt=float(scenarios["total_debt"].sum()),
+        debt_by_product_type=_debt_by_product_type(store),
+        savings=_savings_distribution(savings),
+        consolidation_eligible_customers=int(eligible.sum()),
+        consolidation_eligible_share=float(eligible.mean()) if customers else 0.0,
+        by_score_band=[
+            ScoreBandSavings(
+                band=str(band),
+                customers=int(rec["customers"]),
+                total_savings=float(rec["total_savings"]),
+                avg_savings=float(rec["avg_savings"]) if rec["customers"] else 0.0,
+                consolidation_eligible_share=float(rec["eligible_share"]) if rec["customers"] else 0.0,
+            )
+            for band, rec in by_band.iterrows()
+        ],
+    )
+
+
+def get_book_scenarios(app) -> pd.DataFrame:
+    # Lo piden la analítica y el ahorro por cliente (router): se calcula una vez.
+    def _build() -> pd.DataFrame:
+        index = get_offer_impact_index(app)
+        return get_derived(app, "book_scenarios", lambda store: build_book_scenarios(store, index))
+
+    return single_flight.do("book_scenarios", get_dataset_generation(app), _build)
+
+
+def get_book_analytics(app) -> BookAnalytics:
+    """
+    Analítica del book de la generación actual. El primer pedido de cada
+    generación la calcula (los pedidos simultáneos comparten ese cálculo);
+    los siguientes la leen del caché.
+    """
+    def _build() -> BookAnalytics:
+        scenarios = get_book_scenarios(app)
+        return get_derived(app, "book_analytics", lambda store: build_book_analytics(store, scenarios))
+
+    return single_flight.do("book_analytics", get_dataset_generation(app), _build)
+
+
+def get_book_savings(app) -> np.ndarray:
+    """
+    Ahorro potencial por cliente (orden de customer_id). En modo shard el
+    router lo pide a cada shard para calcular los percentiles del book.
+    """
+    scenarios = get_book_scenarios(app)
+    return get_derived(
+        app, "book_savings", lambda store: _potential_savings(scenarios).to_numpy(dtype=np.float64)
+    )
@@ -0,0 +1,114 @@
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.credit_score import CreditScoreAt, CreditScorePoint, CreditScoreTrend
+from ..services.dataset_service import get_derived
+
+
+_DAYS_PER_MONTH = 365.25 / 12
+
+
+class CreditScoreIndex:
+    """
+    Historial de credit score parseado y ordenado una vez por generación.
+
+    Guarda fechas (datetime64[D]) y scores en arreglos contiguos ordenados
+    por (customer_id, date), con el rango de cada cliente y su último score
+    precalculado: leer el score vigente es un lookup en dict.
+    """
+
+    def __init__(self, ranges: Dict[str, Tuple[int, int]], dates: np.ndarray, scores: np.ndarray):
+        self._ranges = ranges
+        self._dates = dates
+        self._scores = scores
+        self.latest: Dict[str, int] = {
+            cid: int(scores[hi - 1]) for cid, (lo, hi) in ranges.items()
+        }
+
+    def latest_score(self, customer_id: str) -> Optional[int]:
+        return self.latest.get(customer_id)
+
+    def _history(self, customer_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = self._ranges.get(customer_id, (0, 0))
+        return self._dates[lo:hi], self._scores[lo:hi]
+
+    def score_at(self, customer_id: str, at: date) -> CreditScoreAt:
+        """Último score observado en o antes de `at`."""
+        dates, scores = self._history(customer_id)
+        i = int(np.searchsorted(dates, np.datetime64(at, "D"), side="right")) - 1
+
+        if i < 0:
+            return CreditScoreAt(customer_id=customer_id, date=at, credit_score=None, observed_at=None)
+
+        return CreditScoreAt(
+            customer_id=customer_id,
+            date=at,
+            credit_score=int(scores[i]),
+            observed_at=dates[i].astype(date),
+        )
+
+    def trend(
+        self,
+        customer_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> CreditScoreTrend:
+        """
+        Puntos del historial en [date_from, date_to], variación total y
+        pendiente (puntos por mes) por mínimos cuadrados.
+        """
+        dates, scores = self._history(customer_id)
+        lo = 0 if date_from is None else int(np.searchsorted(dates, np.datetime64(date_from, "D"), side="left"))
+        hi = len(dates) if date_to is None else int(np.searchsorted(dates, np.datetime64(date_to, "D"), side="right"))
+        dates, scores = dates[lo:hi], scores[lo:hi]
+
+        slope = 0.0
+        if len(dates) >= 2:
+            x = (dates - dates[0]).astype(np.float64) / _DAYS_PER_MONTH
+            if np.ptp(x) > 0:
+                slope = float(np.polyfit(x, scores.astype(np.float64), 1)[0])
+
+        return CreditScoreTrend(
+            customer_id=customer_id,
+            latest_score=self.latest_score(customer_id),
+            change=int(scores[-1] - scores[0]) if len(scores) else 0,
+            slope_per_month=slope,
+            points=[
+                CreditScorePoint(date=d.astype(date), credit_score=int(s))
+                for d, s in zip(dates, scores)
+            ],
+        )
+
+
+def build_credit_score_index(store) -> CreditScoreIndex:
+    credit_df = store.read_frame("credit_score_history", ["customer_id", "date", "credit_score"])
+
+    frame = pd.DataFrame(
+        {
+            "customer_id": credit_df["customer_id"].astype(str).to_numpy(),
+            "date": pd.to_datetime(credit_df["date"], errors="coerce").to_numpy(),
+            "credit_score": pd.to_numeric(credit_df["credit_score"], errors="coerce").to_numpy(),
+        }
+    ).dropna()
+    # Orden estable: ante fechas repetidas gana la última fila del archivo.
+    frame = frame.sort_values(["customer_id", "date"], kind="stable")
+
+    ids = frame["customer_id"].to_numpy()
+    dates = frame["date"].to_numpy().astype("datetime64[D]")
+    scores = frame["credit_score"].to_numpy().astype(np.int64)
+
+    if len(ids):
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)]
+        ranges = {ids[lo]: (int(lo), int(hi)) for lo, hi in zip(starts, ends)}
+    else:
+        ranges = {}
+
+    return CreditScoreIndex(ranges, dates, scores)
+
+
+def get_credit_score_index(app) -> CreditScoreIndex:
+    return get_derived(app, "credit_score_index", build_credit_score_index)
@@ -0,0 +1,64 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+from ..models.customers import CustomerPage
+from ..services.dataset_service import get_derived
+
+
+class CustomerIndex:
+    """
+    Arreglo ordenado de customer_id (loans ∪ cards).
+
+    Se construye una vez por generación de datasets y responde paginación
+    por cursor y búsqueda por prefijo con búsqueda binaria.
+    """
+
+    def __init__(self, customer_ids: List[str]):
+        self.ids = customer_ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, customer_id: str) -> bool:
+        i = bisect_left(self.ids, customer_id)
+        return i < len(self.ids) and self.ids[i] == customer_id
+
+    def prefix_range(self, prefix: str) -> range:
+        if not prefix:
+            return range(0, len(self.ids))
+        lo = bisect_left(self.ids, prefix)
+        hi = bisect_left(self.ids, prefix + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def page(self, prefix: str = "", cursor: Optional[str] = None, limit: int = 50) -> CustomerPage:
+        """
+        Devuelve hasta `limit` ids que empiezan con `prefix`, estrictamente
+        posteriores a `cursor` (el último id de la página anterior).
+        """
+        span = self.prefix_range(prefix)
+        start = span.start
+        if cursor:
+            start = max(start, bisect_right(self.ids, cursor, span.start, span.stop))
+
+        stop = min(start + limit, span.stop)
+        items = self.ids[start:stop]
+        next_cursor = items[-1] if items and stop < span.stop else None
+
+        return CustomerPage(items=items, next_cursor=next_cursor, total=len(span))
+
+
+def build_customer_index(store) -> CustomerIndex:
+    return CustomerIndex(store.customer_ids())
+
+
+def get_customer_index(app) -> CustomerIndex:
+    return get_derived(app, "customer_index", build_customer_index)
+
+
+def list_customers_page(
+    app,
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> CustomerPage:
+    return get_customer_index(app).page(prefix=prefix, cursor=cursor, limit=limit)
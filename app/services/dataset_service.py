@@ -0,0 +1,213 @@
+import os
+import secrets
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils import shared_store
+from ..utils.dataset_store import PandasStore, SqliteStore, dataset_backend, frames_from_data, sqlite_path
+from ..utils.memory import release_free_memory
+from ..utils.sharding import get_shard_config
+
+
+_lock = threading.Lock()
+
+
+def publish_datasets(app, data: Dict[str, Any]) -> int:
+    """
+    Reemplaza los datasets en memoria y abre una nueva "generación".
+
+    Todas las estructuras derivadas (índices, agregados, cachés) se
+    calculan una sola vez por generación, por lo que al publicar
+    datos nuevos se descartan las anteriores.
+    """
+    return publish_store(app, PandasStore(data), data)
+
+
+def publish_store(app, store, data: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Publica un store (ver utils/dataset_store.py). `app.state.data` solo
+    se mantiene con el backend pandas (lo usa el modo SHARED_DATA).
+    """
+    with _lock:
+        generation = getattr(app.state, "data_generation", 0) + 1
+        app.state.store = store
+        app.state.store_generation = store.generation()
+        app.state.data = data
+        app.state.data_generation = generation
+        # Identifica esta publicación (ETags, ver utils/http_cache.py); el
+        # contador de generación se repite entre procesos y reinicios.
+        app.state.data_version = f"{generation}.{secrets.token_hex(4)}"
+        app.state.derived = {}
+    return generation
+
+
+def get_store(app):
+    return app.state.store
+
+
+def get_bank_offers(app) -> List[dict]:
+    return app.state.store.bank_offers()
+
+
+def get_dataset_generation(app) -> int:
+    return getattr(app.state, "data_generation", 0)
+
+
+def get_data_version(app) -> str:
+    return getattr(app.state, "data_version", "0")
+
+
+def get_derived(app, key: str, builder: Callable[[Any], Any]) -> Any:
+    """
+    Devuelve la estructura derivada `key` de la generación actual,
+    construyéndola con `builder(store)` la primera vez que se pide.
+    """
+    with _lock:
+        store = app.state.store
+        generation = get_dataset_generation(app)
+        derived = getattr(app.state, "derived", None)
+        if derived is None:
+            derived = app.state.derived = {}
+        if key in derived:
+            return derived[key]
+
+    value = builder(store)
+
+    with _lock:
+        # Si se publicó otra generación mientras construíamos, no cacheamos.
+        if get_dataset_generation(app) == generation:
+            app.state.derived.setdefault(key, value)
+            return app.state.derived[key]
+    return value
+
+
+def _shared_dir():
+    shard_index, _ = get_shard_config()
+    return shared_store.get_shared_dir(shard_index)
+
+
+def _adopt_shared(app, manifest: dict) -> None:
+    data = shared_store.attach_shared(manifest)
+    publish_datasets(app, data)
+    app.state.shared_manifest = {k: manifest[k] for k in ("segment", "size", "generation")}
+    shared_store.release_unused(manifest["segment"])
+
+
+def load_initial_datasets(
+    app,
+    loader: Callable[[], Dict[str, Any]],
+    file_timings: Optional[Dict[str, float]] = None,
+) -> None:
+    """
+    Carga inicial de datasets. En modo SHARED_DATA el primer worker carga
+    y publica en memoria compartida; los demás solo se adjuntan. Con
+    DATASET_BACKEND=sqlite se importa ./data a la base (si cambió) y no
+    se usa `loader`; `file_timings` recibe los segundos de lectura de
+    cada archivo importado.
+    """
+    _load_initial(app, loader, file_timings)
+    # Libera los buffers temporales de lectura y validación.
+    release_free_memory()
+
+
+def _load_initial(
+    app,
+    loader: Callable[[], Dict[str, Any]],
+    file_timings: Optional[Dict[str, float]] = None,
+) -> None:
+    if dataset_backend() == "sqlite":
+        from ..utils.data_loader import import_data_into_store
+
+        shard_index, shard_count = get_shard_config()
+        store = SqliteStore(sqlite_path(shard_index, shard_count))
+        import_data_into_store(store, shard_index, shard_count, timings=file_timings)
+        publish_store(app, store)
+        return
+
+    if not shared_store.shared_data_enabled():
+        publish_datasets(app, loader())
+        return
+
+    shared_dir = _shared_dir()
+    with shared_store.publish_lock(shared_dir):
+        manifest = shared_store.read_manifest(shared_dir)
+        # Un manifest de otra ejecución (otro proceso maestro) se descarta:
+        # al reiniciar se vuelve a ./data, igual que sin memoria compartida.
+        if manifest and manifest.get("owner_ppid") == os.getppid():
+            try:
+                _adopt_shared(app, manifest)
+                app.state.shared_mtime = shared_store.manifest_mtime(shared_dir)
+                return
+            except FileNotFoundError:
+                pass
+
+        generation = (manifest or {}).get("generation", 0) + 1
+        manifest = shared_store.publish_shared(loader(), shared_dir, generation)
+        _adopt_shared(app, manifest)
+        app.state.shared_mtime = shared_store.manifest_mtime(shared_dir)
+
+
+def replace_datasets(app, data: Dict[str, Any]) -> None:
+    """
+    Reemplaza los datasets (upload). En modo SHARED_DATA publica un
+    segmento nuevo al que se cambian todos los workers; con SQLite el
+    reemplazo es una transacción y los demás workers lo ven por la
+    generación guardada en la base.
+    """
+    _replace(app, data)
+    release_free_memory()
+
+
+def _replace(app, data: Dict[str, Any]) -> None:
+    store = getattr(app.state, "store", None)
+    if isinstance(store, SqliteStore):
+        store.replace(frames_from_data(data), data["bank_offers"])
+        publish_store(app, store)
+        return
+
+    if not shared_store.shared_data_enabled():
+        publish_datasets(app, data)
+        return
+
+    shared_dir = _shared_dir()
+    with shared_store.publish_lock(shared_dir):
+        current = shared_store.read_manifest(shared_dir)
+        generation = (current or {}).get("generation", 0) + 1
+        manifest = shared_store.publish_shared(data, shared_dir, generation)
+        _adopt_shared(app, manifest)
+        app.state.shared_mtime = shared_store.manifest_mtime(shared_dir)
+
+
+def sync_shared_datasets(app) -> None:
+    """
+    Si otro worker publicó un segmento nuevo, este worker se cambia a él.
+    El costo por request es un `stat` del manifest.
+    """
+    shared_dir = _shared_dir()
+    mtime = shared_store.manifest_mtime(shared_dir)
+    if mtime is None or mtime == getattr(app.state, "shared_mtime", None):
+        return
+
+    manifest = shared_store.read_manifest(shared_dir)
+    current = getattr(app.state, "shared_manifest", None)
+    if manifest and (current is None or manifest["segment"] != current["segment"]):
+        try:
+            _adopt_shared(app, manifest)
+        except FileNotFoundError:
+            # Se publicó otro segmento justo después; el próximo request lo toma.
+            return
+    app.state.shared_mtime = mtime
+
+
+def sync_datasets(app) -> None:
+    """
+    Antes de cada request: toma los datos que haya publicado otro worker
+    (base SQLite con otra generación, o segmento compartido nuevo).
+    """
+    store = getattr(app.state, "store", None)
+    if store is None:
+        return
+    if store.generation() != app.state.store_generation:
+        publish_store(app, store)
+    elif shared_store.shared_data_enabled() and app.state.data is not None:
+        sync_shared_datasets(app)
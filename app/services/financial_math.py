@@ -0,0 +1,119 @@
+"""
+Matemática financiera compartida por los motores de escenarios (mínimo,
+optimizado, consolidación) y sus versiones para todo el book.
+
+- `monthly_rate`: tasa anual en % -> tasa mensual decimal.
+- Préstamos de cuota fija (anualidad): `loan_monthly_payment` y
+  `annuity_totals` por préstamo, `annuity_payments` y
+  `annuity_total_interest` vectorizados.
+- Tarjetas: `card_minimum_payment` y `card_minimum_payments`.
+
+Las funciones escalares guardan en un memo (LRU) `(1 + r) ** n` por
+(tasa anual, plazo): préstamos y ofertas repiten pocas combinaciones, así
+que cada una se calcula una sola vez por proceso. Las vectorizadas hacen
+una sola potencia por arreglo (más rápido que buscar en el memo fila a
+fila). Ambas usan la misma fórmula, con las operaciones en el mismo
+orden; las escalares dan exactamente los montos de la fórmula original y
+las vectorizadas difieren a lo sumo en el último dígito (~1e-15 relativo,
+la potencia de numpy no es la de libm), igual que las copias anteriores.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+# Combinaciones (tasa anual, plazo) que se recuerdan.
+ANNUITY_CACHE_SIZE = 4096
+
+
+def monthly_rate(annual_rate_pct):
+    """Convierte tasa anual en tasa mensual decimal (escalar o arreglo)."""
+    return (annual_rate_pct / 100.0) / 12.0
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def _annuity_terms(annual_rate_pct: float, term_months: int) -> Tuple[float, float]:
+    """Numerador `r * (1 + r) ** n` y denominador `(1 + r) ** n - 1` de la cuota."""
+    r = monthly_rate(annual_rate_pct)
+    growth = (1 + r) ** term_months
+    return r * growth, growth - 1
+
+
+def annuity_cache_info():
+    return _annuity_terms.cache_info()
+
+
+def loan_monthly_payment(principal, annual_rate_pct: float, term_months: int):
+    """
+    Cuota fija de un préstamo con fórmula de anualidad. Con plazo vencido
+    (n <= 0) se paga todo el capital. `principal` puede ser un arreglo
+    (misma tasa y plazo para todos, p. ej. una oferta).
+    """
+    n = term_months
+    if n <= 0:
+        return principal
+
+    if annual_rate_pct == 0:
+        return principal / n
+
+    numerator, denominator = _annuity_terms(annual_rate_pct, n)
+    return principal * numerator / denominator
+
+
+def annuity_factor(annual_rate_pct: float, term_months: int) -> float:
+    """Cuota por unidad de capital."""
+    return loan_monthly_payment(1.0, annual_rate_pct, term_months)
+
+
+def annuity_totals(principal: float, annual_rate_pct: float, term_months: int) -> Tuple[float, float]:
+    """
+    (total pagado, intereses) de un préstamo pagando la cuota fija hasta
+    el final del plazo. Con plazo vencido se paga el capital sin intereses.
+    """
+    if term_months <= 0:
+        return principal, 0.0
+    total_paid = loan_monthly_payment(principal, annual_rate_pct, term_months) * term_months
+    return total_paid, total_paid - principal
+
+
+def annuity_payments(principal, annual_rate_pct, term_months) -> np.ndarray:
+    """`loan_monthly_payment` vectorizado (tasa y plazo por fila)."""
+    principal = np.asarray(principal, dtype=float)
+    r = monthly_rate(np.asarray(annual_rate_pct, dtype=float))
+    n = np.asarray(term_months, dtype=np.int64)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + r) ** n
+        annuity = principal * (r * growth) / (growth - 1)
+        return np.where(n <= 0, principal, np.where(r == 0, principal / n, annuity))
+
+
+def annuity_total_interest(principal, annual_rate_pct, term_months) -> np.ndarray:
+    """Intereses de `annuity_totals`, vectorizado."""
+    principal = np.asarray(principal, dtype=float)
+    n = np.asarray(term_months, dtype=np.int64)
+    payment = annuity_payments(principal, annual_rate_pct, n)
+    return np.where(n > 0, payment * n - principal, 0.0)
+
+
+def card_minimum_payment(balance: float, annual_rate_pct: float, min_payment_pct: float) -> float:
+    """
+    Pago mínimo de tarjeta:
+      - porcentaje sobre saldo
+      - nunca menor que 10
+      - debe cubrir al menos intereses + algo de capital
+    """
+    interest = balance * monthly_rate(annual_rate_pct)
+    raw_min = balance * (min_payment_pct / 100.0)
+    payment = max(raw_min, interest + 1.0, 10.0)
+
+    return min(payment, balance + interest)
+
+
+def card_minimum_payments(balance, annual_rate_pct, min_payment_pct) -> np.ndarray:
+    """`card_minimum_payment` vectorizado."""
+    balance = np.asarray(balance, dtype=float)
+    interest = balance * monthly_rate(np.asarray(annual_rate_pct, dtype=float))
+    raw_min = balance * (np.asarray(min_payment_pct, dtype=float) / 100.0)
+    payment = np.maximum(np.maximum(raw_min, interest + 1.0), 10.0)
+    return np.minimum(payment, balance + interest)
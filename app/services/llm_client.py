@@ -1,12 +1,16 @@
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
-
-load_dotenv()
+import re
+import time
+from typing import Optional
 
 
 class LLMClient:
     def __init__(self):
+        # El SDK y el .env se cargan al crear el primer cliente, no al importar.
+        from dotenv import load_dotenv
+        from openai import AzureOpenAI
+
+        load_dotenv()
         endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
         api_key = os.getenv("AZURE_OPENAI_API_KEY")
         deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
@@ -18,24 +22,101 @@ class LLMClient:
                 "Faltan AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_API_KEY / AZURE_OPENAI_DEPLOYMENT"
             )
 
+        # Sin timeout el SDK espera hasta 10 minutos; los informes con plazo
+        # (REPORT_DEADLINE_S) igual responden antes con la plantilla.
+        timeout_s = float(os.getenv("AZURE_OPENAI_TIMEOUT_S", "60"))
+
         self.client = AzureOpenAI(
             azure_endpoint=endpoint,
             api_key=api_key,
             api_version=api_version,
+            timeout=timeout_s,
         )
 
         self.model = deployment
 
-    def generate_text(self, prompt: str) -> str:
+        # Tokens de la última llamada según el servicio (ver `_usage`).
+        self.last_usage: Optional[dict] = None
+
+    def generate_text(self, prompt: str, instructions: Optional[str] = None) -> str:
         """
         Llamada simple al Responses API en Azure OpenAI.
+
+        `instructions` va como mensaje de sistema, antes de `prompt`: si es
+        siempre el mismo texto, el servicio puede reutilizarlo entre
+        llamadas (prompt caching, que informa `cached_tokens`).
         """
-        resp = self.client.responses.create(
-            model=self.model,
-            input=prompt,
-        )
+        kwargs = {"model": self.model, "input": prompt}
+        if instructions:
+            kwargs["instructions"] = instructions
+        resp = self.client.responses.create(**kwargs)
+        self.last_usage = _usage(getattr(resp, "usage", None))
 
         if getattr(resp, "output_text", None):
             return resp.output_text
 
-        raise RuntimeError("La respuesta del modelo no contiene texto utilizable.")
\ No newline at end of file
+        raise RuntimeError("La respuesta del modelo no contiene texto utilizable.")
+
+
+def _usage(usage) -> Optional[dict]:
+    if usage is None:
+        return None
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+
+class StubRateLimitError(RuntimeError):
+    """Simula el 429 del servicio (mismo atributo `status_code` que openai)."""
+    status_code = 429
+
+
+class StubLLMClient:
+    """
+    LLM local para pruebas (LLM_PROVIDER=stub): no llama a ningún servicio.
+    Devuelve un Markdown con el esquema del informe armado con los datos del
+    prompt.
+
+    - LLM_STUB_LATENCY_S: demora simulada por llamada (default 0).
+    - LLM_STUB_RATE_LIMIT_EVERY: si es N > 0, una de cada N llamadas
+      responde como rate limit (para probar reintentos).
+    """
+
+    _calls = 0
+
+    def __init__(self):
+        self.latency_s = float(os.getenv("LLM_STUB_LATENCY_S", "0"))
+        self.rate_limit_every = int(os.getenv("LLM_STUB_RATE_LIMIT_EVERY", "0"))
+        self.model = "stub"
+        self.last_usage: Optional[dict] = None
+
+    def generate_text(self, prompt: str, instructions: Optional[str] = None) -> str:
+        StubLLMClient._calls += 1
+        if self.rate_limit_every > 0 and StubLLMClient._calls % self.rate_limit_every == 0:
+            raise StubRateLimitError("Rate limit simulado por el stub")
+
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+
+        facts = [
+            line.strip()
+            for line in prompt.splitlines()
+            if re.match(r"^\s*- [a-z_]+( \([a-z]+\))?: ", line)
+        ]
+        body = "\n".join(facts)
+        return (
+            "# Resumen general\n\n"
+            "Informe de prueba generado sin modelo (LLM_PROVIDER=stub).\n\n"
+            "## Datos usados\n\n"
+            f"{body}\n"
+        )
+
+
+def get_llm_client():
+    """Cliente según LLM_PROVIDER: `azure` (default) o `stub`."""
+    if os.getenv("LLM_PROVIDER", "azure").lower() == "stub":
+        return StubLLMClient()
+    return LLMClient()
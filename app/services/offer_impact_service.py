@@ -0,0 +1,253 @@
+"""
+Impacto de una oferta nueva o modificada sobre la consolidación del book.
+
+Una vez por generación se precalcula, para todos los clientes:
+  - saldo y máximo atraso por tipo de producto (personal, micro, card, ...),
+  - score vigente y flujo disponible,
+  - intereses de cada oferta del catálogo (NaN si no aplica o si la cuota
+    no entra en el flujo) y la mejor consolidación vigente.
+
+El índice inverso va de la elegibilidad de una oferta a los clientes: por
+cada conjunto de tipos elegibles guarda los clientes con saldo elegible
+> 0 ordenados por ese saldo, así el tope de la oferta es una búsqueda
+binaria y las condiciones de score/mora se filtran solo sobre ese prefijo.
+Al evaluar una oferta se recalculan únicamente esos clientes (más los que
+hoy tienen como mejor la versión anterior de la oferta); el resto del book
+no se toca.
+
+Las reglas son las de `scenario_consolidation_service`: saldo elegible,
+tope, condiciones, cuota <= flujo disponible y, entre las que aplican,
+menos intereses (empate: menor plazo; luego orden del catálogo).
+"""
+from typing import Dict, FrozenSet, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.portfolio import BankOffer
+from ..models.scenarios import OfferImpactResult
+from ..services.credit_score_service import get_credit_score_index
+from ..services.dataset_service import get_derived
+from ..services.financial_math import loan_monthly_payment
+from ..services.scenario_consolidation_service import _parse_offers, offer_requirements
+
+SAMPLE_SIZE = 20
+
+
+def _offer_interest(
+    balance: np.ndarray,
+    rate_pct: float,
+    term_months: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cuota y total de intereses del préstamo consolidado (vectorizado)."""
+    payment = loan_monthly_payment(balance, rate_pct, term_months)
+    return payment, payment * term_months - balance
+
+
+def _best_offer(interest: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Posición de la mejor oferta por fila (-1 si ninguna aplica): menos
+    intereses, luego menor plazo, luego la primera del catálogo.
+    """
+    if interest.shape[1] == 0:
+        return np.full(interest.shape[0], -1, dtype=np.int64)
+    feasible = ~np.isnan(interest)
+    key = np.where(feasible, interest, np.inf)
+    cand = feasible & (key == key.min(axis=1, keepdims=True))
+    term = np.where(cand, months[None, :], np.iinfo(np.int64).max)
+    cand &= term == term.min(axis=1, keepdims=True)
+    return np.where(feasible.any(axis=1), cand.argmax(axis=1), -1)
+
+
+class OfferImpactIndex:
+    """
+    Estado de consolidación del book (una fila por cliente con deudas y
+    cashflow) más el índice inverso elegibilidad → clientes.
+    """
+
+    def __init__(
+        self,
+        customer_ids: np.ndarray,
+        product_types: List[str],
+        balance: np.ndarray,
+        days_past_due: np.ndarray,
+        credit_score: np.ndarray,
+        available_cashflow: np.ndarray,
+        offers: List[BankOffer],
+    ):
+        self.customer_ids = customer_ids
+        self.product_types = product_types
+        self.balance = balance
+        self.days_past_due = days_past_due
+        self.credit_score = credit_score
+        self.available_cashflow = available_cashflow
+        self.offers = offers
+        self._eligibility: Dict[FrozenSet[int], Tuple[np.ndarray, np.ndarray]] = {}
+
+        rows = np.arange(len(customer_ids))
+        self.interest = np.full((len(customer_ids), len(offers)), np.nan)
+        for j, offer in enumerate(offers):
+            candidates = self.candidates(offer)
+            self.interest[candidates, j] = self.evaluate(offer, candidates)
+        self.months = np.array([o.max_term_months for o in offers], dtype=np.int64)
+        self.best = _best_offer(self.interest, self.months)
+        self.best_interest = np.where(
+            self.best >= 0, self.interest[rows, np.maximum(self.best, 0)], np.nan
+        )
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def _type_columns(self, offer: BankOffer) -> FrozenSet[int]:
+        eligible = set(offer.product_types_eligible)
+        return frozenset(i for i, t in enumerate(self.product_types) if t in eligible)
+
+    def _eligible_by_balance(self, columns: FrozenSet[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Clientes con saldo elegible > 0 para `columns`, ordenados por saldo."""
+        cached = self._eligibility.get(columns)
+        if cached is not None:
+            return cached
+        cols = sorted(columns)
+        eligible = self.balance[:, cols].sum(axis=1)
+        rows = np.flatnonzero(eligible > 0)
+        order = np.argsort(eligible[rows], kind="stable")
+        entry = (eligible[rows][order], rows[order])
+        return self._eligibility.setdefault(columns, entry)
+
+    def candidates(self, offer: BankOffer) -> np.ndarray:
+        """
+        Filas a las que la oferta aplica por tipos, tope y condiciones
+        (sin mirar todavía la cuota vs el flujo).
+        """
+        columns = self._type_columns(offer)
+        if not columns:
+            return np.empty(0, dtype=np.int64)
+        balances, rows = self._eligible_by_balance(columns)
+        rows = rows[: int(np.searchsorted(balances, offer.max_consolidated_balance, side="right"))]
+
+        score_above, dpd_limit = offer_requirements(offer)
+        keep = self.available_cashflow[rows] > 0
+        if score_above is not None:
+            # NaN (sin score) no cumple.
+            keep &= self.credit_score[rows] > score_above
+        if dpd_limit is not None:
+            keep &= self.days_past_due[rows][:, sorted(columns)].max(axis=1) <= dpd_limit
+        return rows[keep]
+
+    def evaluate(self, offer: BankOffer, rows: np.ndarray) -> np.ndarray:
+        """Intereses de la oferta para `rows` (NaN si la cuota no entra en el flujo)."""
+        cols = sorted(self._type_columns(offer))
+        eligible = self.balance[rows][:, cols].sum(axis=1)
+        payment, interest = _offer_interest(eligible, offer.new_rate_pct, offer.max_term_months)
+        return np.where(payment <= self.available_cashflow[rows], interest, np.nan)
+
+    def impact(self, offer: BankOffer) -> OfferImpactResult:
+        """
+        Recalcula la mejor consolidación solo de los clientes alcanzados
+        por `offer` (nueva, o reemplazo de la oferta con el mismo offer_id).
+        """
+        position = next((j for j, o in enumerate(self.offers) if o.offer_id == offer.offer_id), None)
+        replaces = position is not None
+
+        candidates = self.candidates(offer)
+        rows = candidates
+        if replaces:
+            rows = np.union1d(candidates, np.flatnonzero(self.best == position))
+
+        interest = self.interest[rows]
+        months = self.months
+        new_column = np.full(len(rows), np.nan)
+        in_candidates = np.isin(rows, candidates)
+        new_column[in_candidates] = self.evaluate(offer, rows[in_candidates])
+        if replaces:
+            interest[:, position] = new_column
+            months = months.copy()
+            months[position] = offer.max_term_months
+        else:
+            interest = np.column_stack([interest, new_column])
+            months = np.append(months, offer.max_term_months)
+
+        best = _best_offer(interest, months)
+        after = np.where(best >= 0, interest[np.arange(len(rows)), np.maximum(best, 0)], np.nan)
+        before = self.best_interest[rows]
+        old_best = self.best[rows]
+
+        had, has = ~np.isnan(before), ~np.isnan(after)
+        # Misma posición no basta: la oferta reemplazada pudo cambiar de términos.
+        changed = (old_best != best) | (had & has & (before != after))
+        switched = changed & had & has
+
+        return OfferImpactResult(
+            offer_id=offer.offer_id,
+            replaces_existing=replaces,
+            customers_in_book=len(self),
+            customers_recomputed=int(len(rows)),
+            customers_affected=int(changed.sum()),
+            customers_gained=int((changed & ~had & has).sum()),
+            customers_lost=int((changed & had & ~has).sum()),
+            customers_switched=int(switched.sum()),
+            interest_before=float(np.nansum(before[changed])),
+            interest_after=float(np.nansum(after[changed])),
+            interest_savings_delta=float((before[switched] - after[switched]).sum()),
+            sample_customer_ids=[str(c) for c in self.customer_ids[np.sort(rows[changed])[:SAMPLE_SIZE]]],
+        )
+
+
+def build_offer_impact_index(store, latest_scores: Dict[str, int]) -> OfferImpactIndex:
+    loans = store.read_frame("loans", ["customer_id", "product_type", "principal", "days_past_due"])
+    cards = store.read_frame("cards", ["customer_id", "balance", "days_past_due"])
+    cashflow = store.read_frame(
+        "customer_cashflow", ["customer_id", "monthly_income_avg", "essential_expenses_avg"]
+    )
+
+    loan_ids = loans["customer_id"].astype(str).to_numpy()
+    card_ids = cards["customer_id"].astype(str).to_numpy()
+    # Como en build_customer_portfolio: clientes con deudas y con cashflow.
+    cf = cashflow.assign(customer_id=cashflow["customer_id"].astype(str)).drop_duplicates("customer_id")
+    ids = pd.Index(store.customer_ids())
+    ids = ids[ids.isin(cf["customer_id"])]
+    customer_ids = ids.to_numpy()
+
+    product_types = sorted(loans["product_type"].astype(str).unique()) + ["card"]
+    balance = np.zeros((len(ids), len(product_types)))
+    days_past_due = np.zeros((len(ids), len(product_types)), dtype=np.int64)
+
+    loan_rows = ids.get_indexer(loan_ids)
+    loan_types = loans["product_type"].astype(str).to_numpy()
+    parts = [
+        (loan_rows, loan_types == t, loans["principal"], loans["days_past_due"])
+        for t in product_types[:-1]
+    ]
+    card_rows = ids.get_indexer(card_ids)
+    parts.append((card_rows, np.ones(len(cards), dtype=bool), cards["balance"], cards["days_past_due"]))
+
+    for col, (rows, mask, amount, dpd) in enumerate(parts):
+        mask = mask & (rows >= 0)
+        np.add.at(balance[:, col], rows[mask], amount.to_numpy(dtype=float)[mask])
+        np.maximum.at(days_past_due[:, col], rows[mask], dpd.to_numpy(dtype=np.int64)[mask])
+
+    cf = cf.set_index("customer_id").reindex(ids)
+    available = np.maximum(
+        cf["monthly_income_avg"].to_numpy(dtype=float) - cf["essential_expenses_avg"].to_numpy(dtype=float),
+        0.0,
+    )
+    scores = ids.map(latest_scores).to_numpy(dtype=float, na_value=np.nan)
+
+    return OfferImpactIndex(
+        customer_ids=customer_ids,
+        product_types=product_types,
+        balance=balance,
+        days_past_due=days_past_due,
+        credit_score=scores,
+        available_cashflow=available,
+        offers=_parse_offers(store.bank_offers() or []),
+    )
+
+
+def get_offer_impact_index(app) -> OfferImpactIndex:
+    latest = get_credit_score_index(app).latest
+    return get_derived(app, "offer_impact_index", lambda store: build_offer_impact_index(store, latest))
+
+
+def offer_impact(app, offer: BankOffer) -> OfferImpactResult:
+    return get_offer_impact_index(app).impact(offer)
@@ -0,0 +1,209 @@
+"""
+Motor de agregación de `payments_history`.
+
+Procesa el historial en bloques (chunks) ordenados por
+(customer_id, product_id, date) y calcula por producto:
+  - meses con pago, meses sin pago (missed_months) y regularidad,
+  - pago mensual promedio y sobrepago promedio vs el pago mínimo.
+
+Como la entrada viene ordenada, cada grupo queda completo dentro de un
+bloque salvo el último, que se arrastra al bloque siguiente; así la
+memoria depende del tamaño de bloque y no del tamaño del historial.
+
+El resultado es una tabla indexada por customer_id que se construye una
+vez por generación de datasets; los requests solo hacen una búsqueda
+binaria sobre ese índice.
+"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..models.behavior import CustomerPaymentBehavior, ProductPaymentBehavior
+from ..services.dataset_service import get_derived
+from ..services.financial_math import annuity_payments, card_minimum_payments
+
+
+_KEYS = ["customer_id", "product_id", "product_type"]
+
+
+def _month_index(dates: pd.Series) -> pd.Series:
+    parsed = pd.to_datetime(dates, errors="coerce")
+    return parsed.dt.year * 12 + parsed.dt.month - 1
+
+
+def _partial_aggregates(chunk: pd.DataFrame) -> pd.DataFrame:
+    frame = pd.DataFrame(
+        {
+            "customer_id": chunk["customer_id"].astype(str).to_numpy(),
+            "product_id": chunk["product_id"].astype(str).to_numpy(),
+            "product_type": chunk["product_type"].astype(str).to_numpy(),
+            "month": _month_index(chunk["date"]).to_numpy(),
+            "amount": pd.to_numeric(chunk["amount"], errors="coerce").to_numpy(),
+        }
+    ).dropna(subset=["month", "amount"])
+    frame["month"] = frame["month"].astype(np.int64)
+
+    # Varios pagos en el mismo mes cuentan como un solo mes pagado.
+    monthly = (
+        frame.groupby(_KEYS + ["month"], sort=False)
+        .agg(amount=("amount", "sum"), payments=("amount", "size"))
+        .reset_index()
+    )
+    return monthly.groupby(_KEYS, sort=False).agg(
+        payments_count=("payments", "sum"),
+        months_with_payment=("month", "size"),
+        first_month=("month", "min"),
+        last_month=("month", "max"),
+        total_amount=("amount", "sum"),
+    )
+
+
+def _split_tail(chunk: pd.DataFrame):
+    """Separa las filas del último (cliente, producto) del bloque."""
+    last = chunk.iloc[-1]
+    tail_mask = (
+        (chunk["customer_id"] == last["customer_id"])
+        & (chunk["product_id"] == last["product_id"])
+    ).to_numpy()
+    return chunk[~tail_mask], chunk[tail_mask]
+
+
+def aggregate_payment_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Agrega bloques ordenados de `payments_history`. Devuelve una fila por
+    (customer_id, product_id, product_type) con conteos y montos.
+    """
+    partials: List[pd.DataFrame] = []
+    carry: Optional[pd.DataFrame] = None
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        if carry is not None and not carry.empty:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        body, carry = _split_tail(chunk)
+        if not body.empty:
+            partials.append(_partial_aggregates(body))
+
+    if carry is not None and not carry.empty:
+        partials.append(_partial_aggregates(carry))
+
+    if not partials:
+        return pd.DataFrame(
+            columns=_KEYS + [
+                "payments_count", "months_with_payment", "first_month", "last_month", "total_amount",
+            ]
+        )
+
+    # Con entrada ordenada los parciales no se solapan; si no lo estuviera,
+    # esta combinación mantiene conteos y montos correctos por producto.
+    combined = pd.concat(partials)
+    if combined.index.has_duplicates:
+        combined = combined.groupby(level=_KEYS, sort=False).agg(
+            payments_count=("payments_count", "sum"),
+            months_with_payment=("months_with_payment", "sum"),
+            first_month=("first_month", "min"),
+            last_month=("last_month", "max"),
+            total_amount=("total_amount", "sum"),
+        )
+    return combined.reset_index()
+
+
+def product_minimum_payments(loans_df: pd.DataFrame, cards_df: pd.DataFrame) -> pd.Series:
+    """
+    Pago mínimo vigente por producto (vectorizado):
+      - loans: cuota fija de anualidad con el plazo restante,
+      - cards: % mínimo sobre saldo, al menos intereses + 1 y nunca < 10.
+    """
+    loan_min = annuity_payments(
+        loans_df["principal"].astype(float).to_numpy(),
+        loans_df["annual_rate_pct"].astype(float).to_numpy(),
+        loans_df["remaining_term_months"].to_numpy(dtype=np.int64),
+    )
+    card_min = card_minimum_payments(
+        cards_df["balance"].astype(float).to_numpy(),
+        cards_df["annual_rate_pct"].astype(float).to_numpy(),
+        cards_df["min_payment_pct"].astype(float).to_numpy(),
+    )
+
+    return pd.Series(
+        np.concatenate([loan_min, card_min]),
+        index=pd.Index(
+            np.concatenate([
+                loans_df["loan_id"].astype(str).to_numpy(),
+                cards_df["card_id"].astype(str).to_numpy(),
+            ])
+        ),
+        dtype=float,
+    )
+
+
+class PaymentBehaviorTable:
+    """
+    Tabla de comportamiento de pago indexada (y ordenada) por customer_id.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._ids = frame.index.to_numpy()
+
+    def for_customer(self, customer_id: str) -> CustomerPaymentBehavior:
+        lo = int(np.searchsorted(self._ids, customer_id, side="left"))
+        hi = int(np.searchsorted(self._ids, customer_id, side="right"))
+        rows = self.frame.iloc[lo:hi]
+
+        products = [
+            ProductPaymentBehavior(
+                product_id=rec["product_id"],
+                product_type=rec["product_type"],
+                payments_count=int(rec["payments_count"]),
+                months_with_payment=int(rec["months_with_payment"]),
+                missed_months=int(rec["missed_months"]),
+                regularity=float(rec["regularity"]),
+                avg_monthly_payment=float(rec["avg_monthly_payment"]),
+                min_payment=float(rec["min_payment"]),
+                avg_overpayment=float(rec["avg_overpayment"]),
+            )
+            for rec in rows.to_dict("records")
+        ]
+        return CustomerPaymentBehavior(customer_id=customer_id, products=products)
+
+
+def build_payment_behavior_table(
+    chunks: Iterable[pd.DataFrame],
+    loans_df: pd.DataFrame,
+    cards_df: pd.DataFrame,
+) -> PaymentBehaviorTable:
+    agg = aggregate_payment_chunks(chunks)
+
+    # Meses sin pago: desde el primer pago del producto hasta el último
+    # mes presente en el historial (fecha de corte).
+    as_of = int(agg["last_month"].max()) if not agg.empty else 0
+    span = (as_of - agg["first_month"] + 1).clip(lower=1)
+
+    minimums = product_minimum_payments(loans_df, cards_df)
+    agg["missed_months"] = (span - agg["months_with_payment"]).clip(lower=0).astype(np.int64)
+    agg["regularity"] = (agg["months_with_payment"] / span).astype(float)
+    agg["avg_monthly_payment"] = agg["total_amount"] / agg["months_with_payment"]
+    agg["min_payment"] = agg["product_id"].map(minimums).fillna(0.0)
+    agg["avg_overpayment"] = agg["avg_monthly_payment"] - agg["min_payment"]
+
+    frame = agg.set_index("customer_id").sort_index(kind="stable")
+    return PaymentBehaviorTable(frame)
+
+
+def _build_from_store(store) -> PaymentBehaviorTable:
+    return build_payment_behavior_table(
+        store.scan("payments_history", order_by=["customer_id", "product_id", "date"]),
+        store.read_frame("loans", ["loan_id", "principal", "annual_rate_pct", "remaining_term_months"]),
+        store.read_frame("cards", ["card_id", "balance", "annual_rate_pct", "min_payment_pct"]),
+    )
+
+
+def get_payment_behavior_table(app) -> PaymentBehaviorTable:
+    return get_derived(app, "payment_behavior", _build_from_store)
+
+
+def get_customer_payment_behavior(app, customer_id: str) -> CustomerPaymentBehavior:
+    return get_payment_behavior_table(app).for_customer(customer_id)
@@ -10,62 +10,34 @@ from ..models.portfolio import (
     CreditScoreRecord,  
     BankOffer,         
 )
+from ..services.credit_score_service import get_credit_score_index
+from ..services.dataset_service import get_store
 
 
-def build_customer_portfolio(app, customer_id: str) -> CustomerPortfolio:
-    data = app.state.data
+LOAN_COLUMNS = list(LoanItem.model_fields)
+CARD_COLUMNS = list(CardItem.model_fields)
 
-    loans_df = data["loans"]
-    cards_df = data["cards"]
-    credit_df = data["credit_score_history"]
-    cashflow_df = data["customer_cashflow"]
-    # payments_df = data["payments_history"]
 
-    # --- Loans ---
-    customer_loans = loans_df[loans_df["customer_id"] == customer_id]
+def build_customer_portfolio(app, customer_id: str) -> CustomerPortfolio:
+    store = get_store(app)
 
-    loan_items = [
-        LoanItem(
-            loan_id=row["loan_id"],
-            customer_id=row["customer_id"],
-            product_type=row["product_type"],
-            principal=float(row["principal"]),
-            annual_rate_pct=float(row["annual_rate_pct"]),
-            remaining_term_months=int(row["remaining_term_months"]),
-            collateral=str(row["collateral"]).lower() == "true",
-            days_past_due=int(row["days_past_due"]),
-        )
-        for _, row in customer_loans.iterrows()
-    ]
+    # Columnas ya tipadas al cargar (ver utils/dataset_schema.py).
+    # --- Loans ---
+    customer_loans = store.customer_rows("loans", customer_id, LOAN_COLUMNS)
+    loan_items = [LoanItem(**row) for row in customer_loans.to_dict("records")]
 
     # --- Cards ---
-    customer_cards = cards_df[cards_df["customer_id"] == customer_id]
-
-    card_items = [
-        CardItem(
-            card_id=row["card_id"],
-            customer_id=row["customer_id"],
-            balance=float(row["balance"]),
-            annual_rate_pct=float(row["annual_rate_pct"]),
-            min_payment_pct=float(row["min_payment_pct"]),
-            payment_due_day=int(row["payment_due_day"]),
-            days_past_due=int(row["days_past_due"]),
-        )
-        for _, row in customer_cards.iterrows()
-    ]
+    customer_cards = store.customer_rows("cards", customer_id, CARD_COLUMNS)
+    card_items = [CardItem(**row) for row in customer_cards.to_dict("records")]
 
     if not loan_items and not card_items:
         raise HTTPException(status_code=404, detail="Customer not found or no debts")
 
-    # --- Credit score: último registro por fecha ---
-    customer_credit = credit_df[credit_df["customer_id"] == customer_id]
-    credit_score: Optional[int] = None
-    if not customer_credit.empty:
-        customer_credit_sorted = customer_credit.sort_values("date")
-        credit_score = int(customer_credit_sorted.iloc[-1]["credit_score"])
+    # --- Credit score: último registro por fecha (precalculado) ---
+    credit_score: Optional[int] = get_credit_score_index(app).latest_score(customer_id)
 
     # --- Cashflow ---
-    customer_cf = cashflow_df[cashflow_df["customer_id"] == customer_id]
+    customer_cf = store.customer_rows("customer_cashflow", customer_id)
     if customer_cf.empty:
         raise HTTPException(
             status_code=404,
@@ -73,9 +45,9 @@ def build_customer_portfolio(app, customer_id: str) -> CustomerPortfolio:
         )
 
     cf_row = customer_cf.iloc[0]
-    monthly_income = float(cf_row["monthly_income_avg"])
-    essential_expenses = float(cf_row["essential_expenses_avg"])
-    income_variability = float(cf_row["income_variability_pct"])
+    monthly_income = cf_row["monthly_income_avg"]
+    essential_expenses = cf_row["essential_expenses_avg"]
+    income_variability = cf_row["income_variability_pct"]
 
     available_cashflow = max(monthly_income - essential_expenses, 0.0)
 
@@ -1,10 +1,33 @@
-from typing import Optional
+import os
 import textwrap
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Deque, Dict, Hashable, Optional
 
 from ..models.portfolio import CustomerPortfolio
 from ..models.scenarios import ScenarioComparisonResult, ScenarioSavings
-from ..models.report import GeneratedReport
-from ..services.llm_client import LLMClient
+from ..models.report import GeneratedReport, ReportUsage
+from ..services.llm_client import get_llm_client
+from ..services.dataset_service import get_dataset_generation, get_derived
+from ..services.portfolio_service import build_customer_portfolio
+from ..services.scenario_comparison_service import coalesced_scenarios_overview
+from ..utils.single_flight import single_flight
+from ..utils.token_count import count_tokens, tokenizer_name
+
+
+# Presupuesto de latencia de GET /customers/{id}/report (0 = esperar al LLM
+# sin límite, como antes). Vencido, se responde el informe de plantilla.
+REPORT_DEADLINE_S = float(os.getenv("REPORT_DEADLINE_S", "8"))
+# Si el LLM termina después del plazo, su informe queda en el caché y lo
+# recibe el siguiente pedido del cliente (0 = se descarta).
+REPORT_BACKFILL = os.getenv("REPORT_BACKFILL", "1") != "0"
+# Informes del LLM cacheados por generación de datasets (LRU).
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "1000"))
+# Llamadas al LLM en curso para los pedidos con plazo.
+REPORT_LLM_WORKERS = int(os.getenv("REPORT_LLM_WORKERS", "8"))
 
 
 def _find_scenario(
@@ -17,15 +40,24 @@ def _find_scenario(
     return None
 
 
+def _is_viable(s: ScenarioSavings) -> bool:
+    """
+    Un escenario sin meses ni pagos no cubre ninguna deuda (p. ej. la
+    consolidación sin oferta viable): su "ahorro" es todo el interés del
+    mínimo y no puede recomendarse.
+    """
+    return s.total_months > 0 and s.total_paid > 0
+
+
 def _choose_best_scenario(overview: ScenarioComparisonResult) -> Optional[ScenarioSavings]:
     """
-    Elige el mejor escenario distinto al mínimo, priorizando:
+    Elige el mejor escenario viable distinto al mínimo, priorizando:
       1) Mayor ahorro de intereses
       2) En caso de empate, más meses ahorrados
     """
     candidates = [
         s for s in overview.scenarios
-        if s.scenario_type != "minimum_payment"
+        if s.scenario_type != "minimum_payment" and _is_viable(s)
     ]
     if not candidates:
         return None
@@ -42,14 +74,56 @@ def _choose_best_scenario(overview: ScenarioComparisonResult) -> Optional[Scenar
     return best
 
 
-def _build_report_prompt(
+# Instrucciones fijas del informe (mensaje de sistema). Son el mismo texto en
+# todas las llamadas, así que el servicio puede reutilizarlas entre clientes
+# (prompt caching); los datos de cada cliente van aparte, en
+# `_build_report_payload`.
+REPORT_INSTRUCTIONS = textwrap.dedent(
+    """\
+    Eres un asesor financiero de un banco en Perú. Explica a un cliente de banca de personas, en lenguaje claro, sus alternativas para pagar sus deudas. No menciones que eres un modelo de IA ni uses lenguaje técnico innecesario.
+
+    Recibirás los datos del cliente y los escenarios calculados por el motor analítico del banco (montos en soles):
+    - cliente, credit_score, ingresos, gastos_esenciales, flujo_disponible (mensual para pagar deudas), prestamos y tarjetas (cantidad).
+    - pago_minimo, plan_optimizado (plan organizado con el flujo de caja) y consolidacion: meses, total pagado, intereses, ahorro de intereses y meses_ahorrados frente al pago mínimo. "no_viable" = no hay oferta de consolidación viable.
+    - recomendado: escenario con más ahorro según las métricas ("ninguno" si ninguno mejora claramente al pago mínimo).
+
+    Responde en ESPAÑOL, en Markdown simple, con este esquema:
+    # Resumen general
+    (1–2 párrafos cortos)
+    ## Escenario 1 – Pago mínimo
+    (viñetas)
+    ## Escenario 2 – Plan organizado con tu flujo de caja
+    (viñetas)
+    ## Escenario 3 – Consolidación de deudas
+    (explica la consolidación o indica claramente que no es viable; plazo, total pagado, intereses y ahorro vs pago mínimo si existe)
+    ## Recomendación final
+    (qué escenario conviene según las métricas, por qué —intereses ahorrados y meses menos de deuda— y un mensaje empático y práctico)
+
+    Reglas:
+    1. No inventes montos ni plazos: usa solo los números entregados; puedes redondearlos sin cambiar el sentido.
+    2. Separa cada sección con su título y una línea en blanco.
+    3. Frases cortas y listas con viñetas, para leerse en una app móvil.
+    4. Usa nombres amigables, nunca los internos: "pago mínimo", "plan organizado con tu flujo de caja", "consolidación de deudas".
+    5. Devuelve un único texto en Markdown listo para mostrarse al cliente.
+    """
+)
+
+_PAYLOAD_NAMES = {
+    "minimum_payment": "pago_minimo",
+    "optimized_plan": "plan_optimizado",
+    "consolidation": "consolidacion",
+    "behavioral": "pago_habitual",
+}
+
+
+def _build_report_payload(
     portfolio: CustomerPortfolio,
     overview: ScenarioComparisonResult,
 ) -> str:
     """
-    Construye el prompt para el modelo generativo usando la info del portafolio
-    y las métricas de los escenarios.
-    Todo el texto final lo escribe el LLM.
+    Datos de un cliente para el informe: una línea `- clave: valor` por dato
+    y por escenario, sin texto repetido (las instrucciones van en
+    REPORT_INSTRUCTIONS). Todo el texto final lo escribe el LLM.
     """
     min_s = _find_scenario(overview, "minimum_payment")
     opt_s = _find_scenario(overview, "optimized_plan")
@@ -62,151 +136,370 @@ def _build_report_prompt(
     def r2(x: float) -> float:
         return round(x, 2)
 
-    # Datos básicos del cliente
-    customer_id = portfolio.customer_id
-    credit_score = portfolio.credit_score
-    available_cf = r2(portfolio.cashflow.available_cashflow)
-    monthly_income = r2(portfolio.cashflow.monthly_income_avg)
-    essential_expenses = r2(portfolio.cashflow.essential_expenses_avg)
+    def scenario_line(s: ScenarioSavings) -> str:
+        line = f"- {_PAYLOAD_NAMES[s.scenario_type]}: meses={s.total_months} total={r2(s.total_paid)} intereses={r2(s.total_interest_paid)}"
+        if s.scenario_type != "minimum_payment":
+            line += f" ahorro={r2(s.interest_savings_vs_minimum)} meses_ahorrados={s.months_saved_vs_minimum}"
+        return line
+
+    cf = portfolio.cashflow
+    lines = [
+        f"- cliente: {portfolio.customer_id}",
+        f"- credit_score: {portfolio.credit_score}",
+        f"- ingresos: {r2(cf.monthly_income_avg)}",
+        f"- gastos_esenciales: {r2(cf.essential_expenses_avg)}",
+        f"- flujo_disponible: {r2(cf.available_cashflow)}",
+        f"- prestamos: {len(portfolio.loans)}",
+        f"- tarjetas: {len(portfolio.cards)}",
+        scenario_line(min_s),
+    ]
+    if opt_s is not None:
+        lines.append(scenario_line(opt_s))
+    # Mismos criterios que el informe de plantilla: escenarios viables y,
+    # para recomendar, con ahorro frente al mínimo.
+    if cons_s is not None and _is_viable(cons_s):
+        lines.append(scenario_line(cons_s))
+    else:
+        lines.append("- consolidacion: no_viable")
+    if best_s is not None and best_s.interest_savings_vs_minimum > 0:
+        lines.append(f"- recomendado: {_PAYLOAD_NAMES[best_s.scenario_type]}")
+    else:
+        lines.append("- recomendado: ninguno")
+    return "\n".join(lines) + "\n"
+
 
-    # Resumen numérico por escenario
-    min_block = f"""
-    Escenario 'minimum_payment' (solo pagos mínimos):
-    - total_months: {min_s.total_months}
-    - total_paid: {r2(min_s.total_paid)}
-    - total_interest_paid: {r2(min_s.total_interest_paid)}
+_FRIENDLY_NAMES = {
+    "minimum_payment": "pago mínimo",
+    "optimized_plan": "plan organizado con tu flujo de caja",
+    "consolidation": "consolidación de deudas",
+    "behavioral": "seguir pagando como hasta ahora",
+}
+
+
+def render_template_report(
+    portfolio: CustomerPortfolio,
+    overview: ScenarioComparisonResult,
+) -> str:
+    """
+    Informe determinístico (sin LLM) con el mismo esquema y los mismos
+    datos que `_build_report_payload`. Es el respaldo cuando el LLM no
+    responde dentro del plazo.
     """
+    min_s = _find_scenario(overview, "minimum_payment")
+    opt_s = _find_scenario(overview, "optimized_plan")
+    cons_s = _find_scenario(overview, "consolidation")
+    best_s = _choose_best_scenario(overview)
+
+    if min_s is None:
+        raise ValueError("No se encontró escenario mínimo en el overview")
 
-    opt_block = ""
+    def money(x: float) -> str:
+        return f"S/ {x:,.2f}"
+
+    cf = portfolio.cashflow
+    lines = [
+        "# Resumen general",
+        "",
+        f"Tienes {len(portfolio.loans)} préstamo(s) y {len(portfolio.cards)} tarjeta(s). "
+        f"Con ingresos promedio de {money(cf.monthly_income_avg)} y gastos esenciales de "
+        f"{money(cf.essential_expenses_avg)}, te quedan {money(cf.available_cashflow)} al mes "
+        "para pagar tus deudas.",
+        "",
+        "## Escenario 1 – Pago mínimo",
+        "",
+        f"- Terminarías de pagar en {min_s.total_months} meses.",
+        f"- Pagarías en total {money(min_s.total_paid)}, de los cuales "
+        f"{money(min_s.total_interest_paid)} son intereses.",
+        "",
+        "## Escenario 2 – Plan organizado con tu flujo de caja",
+        "",
+    ]
     if opt_s is not None:
-        opt_block = f"""
-        Escenario 'optimized_plan' (plan optimizado usando flujo de caja):
-        - total_months: {opt_s.total_months}
-        - total_paid: {r2(opt_s.total_paid)}
-        - total_interest_paid: {r2(opt_s.total_interest_paid)}
-        - interest_savings_vs_minimum: {r2(opt_s.interest_savings_vs_minimum)}
-        - months_saved_vs_minimum: {opt_s.months_saved_vs_minimum}
-        """
-
-    if cons_s is not None:
-        cons_block = f"""
-        Escenario 'consolidation' (consolidación de deudas):
-        - total_months: {cons_s.total_months}
-        - total_paid: {r2(cons_s.total_paid)}
-        - total_interest_paid: {r2(cons_s.total_interest_paid)}
-        - interest_savings_vs_minimum: {r2(cons_s.interest_savings_vs_minimum)}
-        - months_saved_vs_minimum: {cons_s.months_saved_vs_minimum}
-        """
+        lines += [
+            f"- Terminarías de pagar en {opt_s.total_months} meses "
+            f"({opt_s.months_saved_vs_minimum} meses menos que con el pago mínimo).",
+            f"- Pagarías {money(opt_s.total_paid)} en total y {money(opt_s.total_interest_paid)} de intereses.",
+            f"- Ahorro en intereses vs pago mínimo: {money(opt_s.interest_savings_vs_minimum)}.",
+        ]
+    else:
+        lines.append("- No se calculó este escenario.")
+
+    lines += ["", "## Escenario 3 – Consolidación de deudas", ""]
+    if cons_s is not None and _is_viable(cons_s):
+        lines += [
+            f"- Plazo del préstamo consolidado: {cons_s.total_months} meses.",
+            f"- Pagarías {money(cons_s.total_paid)} en total y {money(cons_s.total_interest_paid)} de intereses.",
+            f"- Ahorro en intereses vs pago mínimo: {money(cons_s.interest_savings_vs_minimum)}.",
+        ]
     else:
-        cons_block = """
-        Escenario 'consolidation':
-        - No hay oferta viable de consolidación para este cliente.
-        """
-
-    if best_s is not None:
-        best_block = f"""
-        Escenario recomendado según las métricas:
-        - scenario_type: {best_s.scenario_type}
-        - interest_savings_vs_minimum: {r2(best_s.interest_savings_vs_minimum)}
-        - months_saved_vs_minimum: {best_s.months_saved_vs_minimum}
-        """
+        lines.append("- Hoy no hay una oferta de consolidación viable para ti.")
+
+    lines += ["", "## Recomendación final", ""]
+    if best_s is not None and best_s.interest_savings_vs_minimum > 0:
+        lines += [
+            f"- La opción más conveniente es: {_FRIENDLY_NAMES.get(best_s.scenario_type, best_s.scenario_type)}.",
+            f"- Ahorrarías {money(best_s.interest_savings_vs_minimum)} en intereses y "
+            f"{best_s.months_saved_vs_minimum} meses de deuda frente al pago mínimo.",
+        ]
     else:
-        best_block = """
-        Escenario recomendado según las métricas:
-        - Ningún escenario alternativo mejora de forma clara al pago mínimo.
-        """
+        lines.append("- Ningún escenario alternativo mejora de forma clara al pago mínimo.")
+    lines.append("- Un asesor puede ayudarte a elegir el plan que mejor se ajuste a tu día a día.")
+
+    return "\n".join(lines) + "\n"
+
+
+def generate_explanatory_report(
+    portfolio: CustomerPortfolio,
+    overview: ScenarioComparisonResult,
+) -> GeneratedReport:
+    """
+    Genera un informe explicativo,
+    usando los datos del portafolio y los resultados de los escenarios.
+    """
+    payload = _build_report_payload(portfolio, overview)
+
+    llm = get_llm_client()
+    started = time.perf_counter()
+    report_text = llm.generate_text(payload, instructions=REPORT_INSTRUCTIONS)
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    service_usage = getattr(llm, "last_usage", None) or {}
+    usage = ReportUsage(
+        instruction_tokens=_instruction_tokens(),
+        payload_tokens=count_tokens(payload),
+        input_tokens=service_usage.get("input_tokens"),
+        cached_tokens=service_usage.get("cached_tokens"),
+        output_tokens=service_usage.get("output_tokens"),
+        latency_ms=round(latency_ms, 1),
+    )
+    _record_usage(usage, count_tokens(report_text))
+
+    return GeneratedReport(
+        customer_id=portfolio.customer_id,
+        language="es",
+        report_text=report_text,
+        usage=usage,
+    )
 
-    num_loans = len(portfolio.loans)
-    num_cards = len(portfolio.cards)
 
-    prompt = textwrap.dedent(
-        f"""
-        Eres un asesor financiero de un banco en Perú. Tu tarea es explicar a un cliente
-        de banca de personas, en lenguaje claro, sus alternativas para pagar sus deudas.
-        NO menciones que eres un modelo de IA ni uses lenguaje técnico innecesario.
+class ReportCache:
+    """LRU de informes del LLM por cliente (uno por generación de datasets)."""
 
-        Información del cliente:
-        - customer_id: {customer_id}
-        - credit_score: {credit_score}
-        - ingresos_mensuales_promedio: {monthly_income}
-        - gastos_esenciales_mensuales: {essential_expenses}
-        - flujo_de_caja_disponible_mensual (available_cashflow): {available_cf}
-        - numero_prestamos (loans): {num_loans}
-        - numero_tarjetas (cards): {num_cards}
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, GeneratedReport]" = OrderedDict()
+        self._lock = threading.Lock()
 
-        Información de escenarios calculados por el motor analítico del banco:
+    def get(self, customer_id: str) -> Optional[GeneratedReport]:
+        with self._lock:
+            report = self._items.get(customer_id)
+            if report is not None:
+                self._items.move_to_end(customer_id)
+            return report
 
-        {min_block}
+    def put(self, report: GeneratedReport) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[report.customer_id] = report
+            self._items.move_to_end(report.customer_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
 
-        {opt_block}
 
-        {cons_block}
+def get_report_cache(app) -> ReportCache:
+    return get_derived(app, "report_cache", lambda store: ReportCache(REPORT_CACHE_SIZE))
 
-        {best_block}
 
-        FORMATO DE SALIDA:
-        - Escribe la respuesta en ESPAÑOL.
-        - Usa **Markdown simple** con este esquema:
+_stats_lock = threading.Lock()
+_stats = {"cached": 0, "llm": 0, "fallback_deadline": 0, "fallback_llm_error": 0, "backfilled": 0}
 
-          # Resumen general
 
-          (1–2 párrafos cortos)
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
 
-          ## Escenario 1 – Pago mínimo
 
-          - Punto 1…
-          - Punto 2…
-          - etc.
+def report_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
 
-          ## Escenario 2 – Plan organizado con tu flujo de caja
 
-          - Punto 1…
-          - Punto 2…
-          - etc.
+@lru_cache(maxsize=1)
+def _instruction_tokens() -> int:
+    return count_tokens(REPORT_INSTRUCTIONS)
 
-          ## Escenario 3 – Consolidación de deudas
 
-          - Explica la consolidación o indica claramente si no es viable.
-          - Menciona plazo, total pagado e intereses.
-          - Menciona el ahorro vs pago mínimo si existe.
+# Latencias de las últimas llamadas al LLM, para p50/p99 en /metrics.
+_LATENCY_WINDOW = 1000
+_usage_totals = {
+    "calls": 0,
+    "instruction_tokens": 0,
+    "payload_tokens": 0,
+    "input_tokens": 0,
+    "cached_tokens": 0,
+    "output_tokens": 0,
+}
+_latencies_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
 
-          ## Recomendación final
 
-          - Indica qué escenario es más conveniente según las métricas.
-          - Explica por qué es mejor (intereses ahorrados y meses menos de deuda).
-          - Incluye un mensaje empático y práctico.
+def _record_usage(usage: ReportUsage, local_output_tokens: int) -> None:
+    prompt_tokens = usage.instruction_tokens + usage.payload_tokens
+    with _stats_lock:
+        _usage_totals["calls"] += 1
+        _usage_totals["instruction_tokens"] += usage.instruction_tokens
+        _usage_totals["payload_tokens"] += usage.payload_tokens
+        # Sin conteo del servicio se suma el local.
+        _usage_totals["input_tokens"] += usage.input_tokens if usage.input_tokens is not None else prompt_tokens
+        _usage_totals["cached_tokens"] += usage.cached_tokens or 0
+        _usage_totals["output_tokens"] += usage.output_tokens if usage.output_tokens is not None else local_output_tokens
+        _latencies_ms.append(usage.latency_ms)
 
-        INSTRUCCIONES ADICIONALES:
-        1. No inventes montos ni plazos nuevos: usa solo los números entregados arriba,
-           puedes redondear para hacer el texto más natural sin cambiar el sentido.
-        2. Separa claramente cada sección con un título y una línea en blanco.
-        3. Usa frases cortas y listas con viñetas para que el texto sea fácil de leer
-           en una app móvil.
-        4. No menciones palabras internas como "scenario_type", "min_s" o similares;
-           usa nombres amigables: "pago mínimo", "plan organizado con tu flujo de caja"
-           y "consolidación de deudas".
-        5. Genera un único texto en Markdown listo para mostrarse al cliente.
-        """
-    )
 
-    return prompt
+def report_usage_stats() -> Dict[str, object]:
+    """Tokens acumulados de las llamadas al LLM y latencia reciente (ms)."""
+    with _stats_lock:
+        totals = dict(_usage_totals)
+        latencies = sorted(_latencies_ms)
 
+    def pct(q: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
 
-def generate_explanatory_report(
+    calls = totals["calls"]
+    return {
+        **totals,
+        "tokenizer": tokenizer_name(),
+        "avg_input_tokens": round(totals["input_tokens"] / calls, 1) if calls else None,
+        "avg_output_tokens": round(totals["output_tokens"] / calls, 1) if calls else None,
+        "cached_ratio": round(totals["cached_tokens"] / totals["input_tokens"], 3) if totals["input_tokens"] else 0.0,
+        "latency_ms": {"window": len(latencies), "p50": pct(0.5), "p99": pct(0.99), "max": latencies[-1] if latencies else None},
+    }
+
+
+def coalesced_customer_report(app, customer_id: str) -> GeneratedReport:
+    """
+    Portafolio + overview + informe de un cliente. Las solicitudes
+    simultáneas para el mismo cliente y generación de datasets comparten
+    una sola llamada al LLM, y el resultado queda en el caché de informes.
+    """
+    cache = get_report_cache(app)
+    cached = cache.get(customer_id)
+    if cached is not None:
+        return cached
+
+    def _generate() -> GeneratedReport:
+        portfolio = build_customer_portfolio(app, customer_id)
+        overview = coalesced_scenarios_overview(app, customer_id)
+        return generate_explanatory_report(portfolio, overview)
+
+    key = (customer_id, get_dataset_generation(app))
+    report = single_flight.do("report", key, _generate)
+    cache.put(report)
+    return report
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_inflight: Dict[Hashable, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _llm_future(
+    app,
     portfolio: CustomerPortfolio,
     overview: ScenarioComparisonResult,
-) -> GeneratedReport:
+    cache: ReportCache,
+) -> Future:
     """
-    Genera un informe explicativo,
-    usando los datos del portafolio y los resultados de los escenarios.
+    Llamada al LLM en segundo plano (una por cliente y generación). Si
+    termina después del plazo del pedido, el informe igual llega al caché
+    (salvo REPORT_BACKFILL=0).
     """
-    prompt = _build_report_prompt(portfolio, overview)
-
-    llm = LLMClient()
-    report_text = llm.generate_text(prompt)
+    global _executor
+    customer_id = portfolio.customer_id
+    key = (customer_id, get_dataset_generation(app))
+
+    # `late` lo marca el pedido que venció esperando (ver customer_report_within_deadline).
+    state = {"late": False}
+
+    def _generate() -> GeneratedReport:
+        report = single_flight.do(
+            "report", key, lambda: generate_explanatory_report(portfolio, overview)
+        )
+        with _inflight_lock:
+            late = state["late"]
+        if REPORT_BACKFILL or not late:
+            cache.put(report)
+            if late:
+                _count("backfilled")
+        return report
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_LLM_WORKERS, thread_name_prefix="report-llm")
+        future = _executor.submit(_generate)
+        future.report_state = state
+        _inflight[key] = future
+
+    def _release(done: Future) -> None:
+        with _inflight_lock:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+    future.add_done_callback(_release)
+    return future
+
+
+def customer_report_within_deadline(
+    app,
+    customer_id: str,
+    deadline_s: float = REPORT_DEADLINE_S,
+) -> GeneratedReport:
+    """
+    Informe de GET /customers/{id}/report con presupuesto de latencia.
 
+    Espera al LLM hasta `deadline_s` (contados desde que llega el pedido).
+    Si no respondió a tiempo, o falló, devuelve el informe de plantilla
+    (`fallback=True`) armado con el mismo portafolio y overview; la
+    llamada al LLM sigue en segundo plano y su resultado reemplaza al de
+    plantilla en los pedidos siguientes (caché de informes).
+    """
+    started = time.monotonic()
+    cache = get_report_cache(app)
+    cached = cache.get(customer_id)
+    if cached is not None:
+        _count("cached")
+        return cached
+
+    if deadline_s <= 0:
+        report = coalesced_customer_report(app, customer_id)
+        _count("llm")
+        return report
+
+    portfolio = build_customer_portfolio(app, customer_id)
+    overview = coalesced_scenarios_overview(app, customer_id)
+    future = _llm_future(app, portfolio, overview, cache)
+
+    try:
+        report = future.result(timeout=max(deadline_s - (time.monotonic() - started), 0.0))
+        _count("llm")
+        return report
+    except FutureTimeout:
+        with _inflight_lock:
+            future.report_state["late"] = True
+        reason = "deadline"
+    except Exception:
+        reason = "llm_error"
+
+    _count(f"fallback_{reason}")
     return GeneratedReport(
-        customer_id=portfolio.customer_id,
+        customer_id=customer_id,
         language="es",
-        report_text=report_text,
-    )
\ No newline at end of file
+        report_text=render_template_report(portfolio, overview),
+        fallback=True,
+        fallback_reason=reason,
+    )
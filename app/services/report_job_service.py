@@ -0,0 +1,385 @@
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..models.report import ReportJob, ReportJobItem
+from ..services.customer_service import get_customer_index
+from ..services.report_generation_service import coalesced_customer_report
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+REPORTS_DIR = Path(os.getenv("REPORTS_DIR", str(BASE_DIR / "docs" / "reports")))
+REPORT_JOB_CONCURRENCY = int(os.getenv("REPORT_JOB_CONCURRENCY", "4"))
+# Llamadas al LLM por minuto entre todos los jobs del proceso (0 = sin límite).
+REPORT_JOB_RPM = float(os.getenv("REPORT_JOB_RPM", "60"))
+# Snapshot completo del job cada N ítems terminados o cada T segundos; entre
+# snapshots, cada ítem terminado se agrega como una línea a `<job_id>.log`.
+REPORT_JOB_CHECKPOINT_ITEMS = int(os.getenv("REPORT_JOB_CHECKPOINT_ITEMS", "500"))
+REPORT_JOB_CHECKPOINT_S = float(os.getenv("REPORT_JOB_CHECKPOINT_S", "10"))
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class RateLimiter:
+    """
+    Token bucket: hasta `per_minute` llamadas por minuto, con ráfagas de
+    como máximo `concurrency` llamadas.
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        """Tras un 429 deja el bucket en negativo: nadie llama durante `seconds`."""
+        with self.lock:
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+def _retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _write_report_file(customer_id: str, job_id: str, report_text: str) -> Path:
+    """
+    Escribe el informe en `report_<cliente>_<fecha>_<job_id>.md`. El archivo
+    se crea en modo exclusivo: si ya existe (el mismo job reintentó al
+    cliente en el mismo segundo, p. ej. al retomarse), se agrega un sufijo
+    `-2`, `-3`, ... en vez de pisarlo.
+    """
+    generated = datetime.now(timezone.utc)
+    stem = f"report_{customer_id}_{generated.strftime('%Y%m%d-%H%M%S')}_{job_id}"
+    header = (
+        f"# Informe IA — {customer_id}\n\n"
+        f"Generado: {generated.isoformat(timespec='milliseconds').replace('+00:00', 'Z')}\n"
+        f"Fuente: Job {job_id} (POST /reports/jobs)\n\n"
+        "---\n\n"
+    )
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    n = 1
+    while True:
+        path = REPORTS_DIR / (f"{stem}.md" if n == 1 else f"{stem}-{n}.md")
+        try:
+            with open(path, "x", encoding="utf-8") as f:
+                f.write(header + report_text + "\n")
+            return path
+        except FileExistsError:
+            n += 1
+
+
+class ReportJobManager:
+    """
+    Cola de informes en lote.
+
+    - Cada job queda persistido en `REPORTS_DIR/jobs/<job_id>.json` (snapshot
+      cada `REPORT_JOB_CHECKPOINT_ITEMS` ítems o `REPORT_JOB_CHECKPOINT_S`
+      segundos) más `<job_id>.log`, una línea por ítem terminado desde el
+      último snapshot; al reiniciar, `resume_pending` retoma los que no
+      terminaron (lo que estaba "running" vuelve a "pending").
+    - Los informes se generan en un pool de `REPORT_JOB_CONCURRENCY` hilos
+      compartido por todos los jobs (cada job tiene a lo sumo el doble de
+      ítems en cola), y las llamadas al LLM pasan por un
+      token bucket de `REPORT_JOB_RPM` llamadas por minuto.
+    - Un 429 (o un 5xx) se reintenta con backoff exponencial, respetando
+      Retry-After si viene en la respuesta.
+    - Con varios workers, un lock por job (flock) evita que dos procesos
+      ejecuten el mismo job.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.jobs_dir = REPORTS_DIR / "jobs"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.executor = ThreadPoolExecutor(
+            max_workers=REPORT_JOB_CONCURRENCY,
+            thread_name_prefix="report-job",
+        )
+        self.limiter = RateLimiter(REPORT_JOB_RPM, REPORT_JOB_CONCURRENCY)
+        self.jobs: Dict[str, ReportJob] = {}
+        self.lock = threading.Lock()
+        # Por job: lock de escritura (snapshot y log) y progreso desde el
+        # último snapshot (ítems terminados, instante).
+        self._write_locks: Dict[str, threading.Lock] = {}
+        self._checkpoints: Dict[str, List[float]] = {}
+
+    # ----- persistencia -----
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _log_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.log"
+
+    def _write_lock(self, job_id: str) -> threading.Lock:
+        with self.lock:
+            return self._write_locks.setdefault(job_id, threading.Lock())
+
+    def _save(self, job: ReportJob) -> None:
+        """
+        Snapshot completo del job; reemplaza al log. Se serializa fuera de
+        `self.lock`: un ítem que cambia mientras tanto ya está en memoria
+        antes de ir al log, y su línea se escribe después de este snapshot.
+        """
+        with self._write_lock(job.job_id):
+            with self.lock:
+                job.updated_at = _now_iso()
+                self._checkpoints[job.job_id] = [0, time.monotonic()]
+            data = job.model_dump_json()
+            path = self._job_path(job.job_id)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, path)
+            self._log_path(job.job_id).unlink(missing_ok=True)
+
+    def _record(self, job: ReportJob, item: ReportJobItem) -> None:
+        """Agrega el ítem terminado al log y, si toca, guarda un snapshot."""
+        line = item.model_dump_json() + "\n"
+        with self._write_lock(job.job_id):
+            with open(self._log_path(job.job_id), "a", encoding="utf-8") as f:
+                f.write(line)
+
+        with self.lock:
+            progress = self._checkpoints.setdefault(job.job_id, [0, time.monotonic()])
+            progress[0] += 1
+            due = (
+                progress[0] >= REPORT_JOB_CHECKPOINT_ITEMS
+                or time.monotonic() - progress[1] >= REPORT_JOB_CHECKPOINT_S
+            )
+        if due:
+            self._save(job)
+
+    def _load(self, job_id: str) -> Optional[ReportJob]:
+        path = self._job_path(job_id)
+        # El log antes que el snapshot: si el dueño del job guarda uno nuevo
+        # entre ambas lecturas, ya incluye esas líneas.
+        try:
+            log = self._log_path(job_id).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            log = ""
+        if not path.exists():
+            return None
+        job = ReportJob.model_validate_json(path.read_text(encoding="utf-8"))
+
+        positions = {it.customer_id: i for i, it in enumerate(job.items)}
+        for line in log.splitlines():
+            try:
+                item = ReportJobItem.model_validate_json(line)
+            except ValueError:
+                # Última línea cortada por una caída a mitad de escritura.
+                continue
+            i = positions.get(item.customer_id)
+            if i is not None:
+                job.items[i] = item
+        job.done = sum(1 for it in job.items if it.status == "done")
+        job.failed = sum(1 for it in job.items if it.status == "failed")
+        return job
+
+    def _try_lock(self, job_id: str):
+        """Lock exclusivo no bloqueante del job; None si otro proceso lo tiene."""
+        lock_file = open(self.jobs_dir / f"{job_id}.lock", "w")
+        try:
+            import fcntl  # solo POSIX; en Windows no hay varios workers
+        except ImportError:
+            return lock_file
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    # ----- API -----
+
+    def submit(self, customer_ids: Optional[List[str]]) -> ReportJob:
+        index = get_customer_index(self.app)
+        if customer_ids is None:
+            customer_ids = list(index.ids)
+        else:
+            customer_ids = list(dict.fromkeys(customer_ids))
+            unknown = [cid for cid in customer_ids if cid not in index]
+            if unknown:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Clientes no encontrados: {', '.join(unknown[:20])}",
+                )
+        if not customer_ids:
+            raise HTTPException(status_code=400, detail="No hay clientes para el job")
+
+        now = _now_iso()
+        job = ReportJob(
+            job_id=uuid.uuid4().hex[:12],
+            created_at=now,
+            updated_at=now,
+            total=len(customer_ids),
+            items=[ReportJobItem(customer_id=cid) for cid in customer_ids],
+        )
+        with self.lock:
+            self.jobs[job.job_id] = job
+        self._save(job)
+
+        lock_file = self._try_lock(job.job_id)
+        self._start(job, lock_file)
+        return self.get(job.job_id)
+
+    def get(self, job_id: str) -> ReportJob:
+        # Copia vía JSON: bajo el lock solo se serializa (mucho más barato
+        # que model_copy(deep=True) con miles de ítems).
+        with self.lock:
+            job = self.jobs.get(job_id)
+            data = job.model_dump_json() if job is not None else None
+        if data is not None:
+            return ReportJob.model_validate_json(data)
+        # Puede haberlo creado otro worker: se lee del disco.
+        job = self._load(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+        return job
+
+    def resume_pending(self) -> List[str]:
+        """Retoma los jobs sin terminar que ningún otro proceso esté ejecutando."""
+        resumed = []
+        for path in sorted(self.jobs_dir.glob("*.json")):
+            job_id = path.stem
+            job = self._load(job_id)
+            if job is None or job.status == "completed":
+                continue
+            lock_file = self._try_lock(job_id)
+            if lock_file is None:
+                continue
+            for item in job.items:
+                if item.status == "running":
+                    item.status = "pending"
+            with self.lock:
+                self.jobs[job_id] = job
+            self._save(job)
+            self._start(job, lock_file)
+            resumed.append(job_id)
+        return resumed
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----- ejecución -----
+
+    def _start(self, job: ReportJob, lock_file) -> None:
+        thread = threading.Thread(
+            target=self._run_job,
+            args=(job, lock_file),
+            name=f"report-job-{job.job_id}",
+            daemon=True,
+        )
+        thread.start()
+
+    def _run_job(self, job: ReportJob, lock_file) -> None:
+        try:
+            with self.lock:
+                job.status = "running"
+            self._save(job)
+
+            # Ventana acotada de ítems en el pool: un job grande no llena la
+            # cola con N futures ni deja esperando a los demás jobs.
+            window = 2 * REPORT_JOB_CONCURRENCY
+            inflight = set()
+            for item in [it for it in job.items if it.status == "pending"]:
+                if len(inflight) >= window:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                inflight.add(self.executor.submit(self._run_item, job, item))
+            for future in inflight:
+                future.result()
+
+            with self.lock:
+                job.status = "completed"
+            self._save(job)
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+    def _run_item(self, job: ReportJob, item: ReportJobItem) -> None:
+        # "running" solo vive en memoria: al retomar volvería a "pending".
+        with self.lock:
+            item.status = "running"
+        status, file, error = "failed", None, None
+        try:
+            while True:
+                self.limiter.acquire()
+                with self.lock:
+                    item.attempts += 1
+                try:
+                    report = coalesced_customer_report(self.app, item.customer_id)
+                    break
+                except Exception as e:
+                    if not _retryable(e) or item.attempts >= MAX_ATTEMPTS:
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (item.attempts - 1))
+                        delay *= 1 + random.random() * 0.25
+                    if self.limiter.rate > 0:
+                        # El siguiente acquire espera `delay` (y frena al resto de hilos).
+                        self.limiter.penalize(delay)
+                    else:
+                        time.sleep(delay)
+
+            path = _write_report_file(item.customer_id, job.job_id, report.report_text)
+            if path.is_relative_to(BASE_DIR):
+                path = path.relative_to(BASE_DIR)
+            status, file = "done", str(path)
+        except HTTPException as e:
+            error = str(e.detail)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        with self.lock:
+            item.status = status
+            item.file = file
+            item.error = error
+            if status == "done":
+                job.done += 1
+            else:
+                job.failed += 1
+            job.updated_at = _now_iso()
+        self._record(job, item)
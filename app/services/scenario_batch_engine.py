@@ -0,0 +1,373 @@
+"""
+Versión vectorizada (NumPy) del plan optimizado.
+
+Simula el mismo portafolio para G valores de `available_cashflow` a la
+vez: el estado es una matriz (G x D) de saldos y cada mes se resuelve con
+operaciones por columnas en vez de un loop por deuda. Replica exactamente
+las reglas de `simulate_optimized_plan`:
+  - pagar mínimos (escalados si no alcanza el flujo),
+  - el sobrante va a la deuda prioritaria según la estrategia (avalanche,
+    snowball o hybrid), luego a la siguiente, etc.
+"""
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import RepaymentStrategy
+from ..services.financial_math import loan_monthly_payment, monthly_rate
+
+
+@dataclass
+class DebtArrays:
+    """Deudas del portafolio como arreglos primitivos (una posición por deuda)."""
+    product_ids: List[str]
+    product_types: List[str]
+    is_card: np.ndarray
+    balance: np.ndarray
+    rate_annual: np.ndarray
+    monthly_rate: np.ndarray
+    min_payment_pct: np.ndarray
+    loan_payment: np.ndarray
+    days_past_due: np.ndarray
+
+
+@dataclass
+class BatchResult:
+    """
+    Totales por fila (valor de flujo) y deuda: matrices (G x D).
+    `payoff_month` (G,) es el mes calendario en que la fila quedó sin
+    deuda (0 si no se simuló, -1 si no terminó dentro del horizonte).
+    """
+    total_paid: np.ndarray
+    total_interest: np.ndarray
+    months: np.ndarray
+    balance: np.ndarray
+    payoff_month: np.ndarray
+
+    @property
+    def total_months(self) -> np.ndarray:
+        if self.months.shape[1] == 0:
+            return np.zeros(self.months.shape[0], dtype=np.int64)
+        return self.months.max(axis=1)
+
+    @property
+    def scenario_total_paid(self) -> np.ndarray:
+        return self.total_paid.sum(axis=1)
+
+    @property
+    def scenario_total_interest(self) -> np.ndarray:
+        return self.total_interest.sum(axis=1)
+
+
+def debt_arrays(portfolio: CustomerPortfolio) -> DebtArrays:
+    loans = portfolio.loans
+    cards = portfolio.cards
+
+    rate_annual = np.array(
+        [l.annual_rate_pct for l in loans] + [c.annual_rate_pct for c in cards], dtype=float
+    )
+    return DebtArrays(
+        product_ids=[l.loan_id for l in loans] + [c.card_id for c in cards],
+        product_types=["loan"] * len(loans) + ["card"] * len(cards),
+        is_card=np.array([False] * len(loans) + [True] * len(cards), dtype=bool),
+        balance=np.array([float(l.principal) for l in loans] + [float(c.balance) for c in cards], dtype=float),
+        rate_annual=rate_annual,
+        monthly_rate=monthly_rate(rate_annual),
+        min_payment_pct=np.array([0.0] * len(loans) + [c.min_payment_pct / 100.0 for c in cards], dtype=float),
+        loan_payment=np.array(
+            [
+                loan_monthly_payment(l.principal, l.annual_rate_pct, l.remaining_term_months)
+                for l in loans
+            ]
+            + [0.0] * len(cards),
+            dtype=float,
+        ),
+        days_past_due=np.array(
+            [l.days_past_due for l in loans] + [c.days_past_due for c in cards], dtype=np.int64
+        ),
+    )
+
+
+def _minimum_payments(debts: DebtArrays, balance: np.ndarray, alive: np.ndarray):
+    """Interés y pago mínimo del mes para cada (fila, deuda)."""
+    interest = balance * debts.monthly_rate
+    owed = balance + interest
+
+    loan_min = np.minimum(debts.loan_payment, owed)
+    card_min = np.minimum(
+        np.maximum(np.maximum(balance * debts.min_payment_pct, interest + 1.0), 10.0),
+        owed,
+    )
+    mins = np.where(debts.is_card, card_min, loan_min)
+
+    return np.where(alive, interest, 0.0), np.where(alive, mins, 0.0)
+
+
+def _allocate_extra(balance: np.ndarray, cash: np.ndarray) -> np.ndarray:
+    """
+    Reparte el sobrante de cada fila recorriendo las columnas en orden
+    (las deudas ya vienen ordenadas por prioridad). Equivale al loop
+    secuencial: cada deuda recibe min(sobrante, saldo) mientras el
+    sobrante sea > 0.01.
+    """
+    eligible = np.where(balance > 0.01, balance, 0.0)
+    cum_before = np.cumsum(eligible, axis=1) - eligible
+    remaining = cash[:, None] - cum_before
+    return np.where(remaining > 0.01, np.minimum(remaining, eligible), 0.0)
+
+
+def _allocate_extra_ordered(balance: np.ndarray, cash: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """`_allocate_extra` con un orden de columnas propio por fila (G x D)."""
+    ordered = np.take_along_axis(balance, order, axis=1)
+    extra = np.empty_like(balance)
+    np.put_along_axis(extra, order, _allocate_extra(ordered, cash), axis=1)
+    return extra
+
+
+def static_priority(
+    debts: DebtArrays,
+    strategy: RepaymentStrategy,
+    arrears_threshold_days: int = 1,
+) -> Optional[np.ndarray]:
+    """
+    Orden fijo de columnas para la estrategia (mismo desempate estable que
+    `sorted(..., reverse=True)` del escalar). Snowball depende del saldo de
+    cada mes, así que no tiene orden fijo: devuelve None.
+    """
+    if strategy == "avalanche":
+        return np.argsort(-debts.rate_annual, kind="stable")
+    if strategy == "hybrid":
+        not_in_arrears = (debts.days_past_due < arrears_threshold_days).astype(np.int8)
+        return np.lexsort((-debts.rate_annual, not_in_arrears))
+    if strategy == "snowball":
+        return None
+    raise ValueError(f"Estrategia desconocida: {strategy}")
+
+
+def _take(debts: DebtArrays, order: np.ndarray) -> DebtArrays:
+    """Reordena las columnas de deudas según `order`."""
+    return DebtArrays(
+        product_ids=[debts.product_ids[i] for i in order],
+        product_types=[debts.product_types[i] for i in order],
+        is_card=debts.is_card[order],
+        balance=debts.balance[order],
+        rate_annual=debts.rate_annual[order],
+        monthly_rate=debts.monthly_rate[order],
+        min_payment_pct=debts.min_payment_pct[order],
+        loan_payment=debts.loan_payment[order],
+        days_past_due=debts.days_past_due[order],
+    )
+
+
+def simulate_optimized_batch(
+    debts: DebtArrays,
+    cashflows: np.ndarray,
+    max_months: int = 600,
+    monthly_cashflow: Optional[Callable[[int, np.ndarray], np.ndarray]] = None,
+    capitalize_unpaid_interest: bool = False,
+    strategy: RepaymentStrategy = "avalanche",
+    arrears_threshold_days: int = 1,
+    initial_balance: Optional[np.ndarray] = None,
+) -> BatchResult:
+    """
+    Plan optimizado para cada valor de `cashflows` en una sola pasada
+    vectorizada. Las columnas del resultado siguen el orden original de
+    `debts`.
+
+    `monthly_cashflow(mes, filas)`, si se indica, da el flujo disponible de
+    cada fila en ese mes (p. ej. trayectorias de ingreso simuladas); si no,
+    el flujo de cada fila es constante (`cashflows`).
+
+    Con `capitalize_unpaid_interest` el interés que no se cubre en un mes
+    se suma al saldo (el escalar lo omite, lo que con flujo constante casi
+    nunca ocurre pero con meses de ingreso bajo sí).
+
+    `initial_balance` (G x D, orden original de `debts`) permite partir de
+    saldos distintos por fila, p. ej. con algunas deudas ya consolidadas
+    (saldo 0).
+    """
+    cashflows = np.asarray(cashflows, dtype=float)
+
+    # Con orden fijo (avalanche/hybrid) trabajamos con las columnas ya
+    # ordenadas por prioridad y el reparto es un cumsum directo. Snowball
+    # reordena cada fila por saldo en cada mes.
+    priority = static_priority(debts, strategy, arrears_threshold_days)
+    dynamic = priority is None
+    if dynamic:
+        priority = np.arange(len(debts.balance))
+    ordered = _take(debts, priority)
+
+    g, d = len(cashflows), len(ordered.balance)
+    if initial_balance is None:
+        balance = np.tile(ordered.balance, (g, 1))
+    else:
+        balance = np.array(initial_balance, dtype=float)[:, priority]
+    total_paid = np.zeros((g, d))
+    total_interest = np.zeros((g, d))
+    months = np.zeros((g, d), dtype=np.int64)
+    payoff_month = np.where(cashflows > 0, -1, 0)
+
+    # Sin flujo disponible el escenario queda vacío (igual que el escalar).
+    running = cashflows > 0
+    rows = np.flatnonzero(running)
+
+    for month in range(max_months):
+        alive = balance[rows] > 0.01
+        still = alive.any(axis=1)
+        if not still.all():
+            # Compactamos: las filas ya pagadas dejan de simularse.
+            payoff_month[rows[~still]] = month
+            rows, alive = rows[still], alive[still]
+        if rows.size == 0:
+            break
+
+        b = balance[rows]
+        cash = cashflows[rows] if monthly_cashflow is None else monthly_cashflow(month, rows)
+
+        interest, mins = _minimum_payments(ordered, b, alive)
+
+        min_total = mins.sum(axis=1)
+        short = min_total > cash
+        scale = np.ones_like(cash)
+        scale[short] = cash[short] / min_total[short]
+        cash = cash - min_total * scale
+
+        pay = np.minimum(mins * scale[:, None], b + interest)
+        paying = pay > 0
+
+        paid = np.where(paying, pay, 0.0)
+        if capitalize_unpaid_interest:
+            b = np.where(alive, b + interest - paid, b)
+            charged = interest
+        else:
+            principal = np.maximum(pay - interest, 0.0)
+            b = np.where(paying, np.maximum(b - principal, 0.0), b)
+            charged = np.where(paying, interest, 0.0)
+
+        if dynamic:
+            # Snowball: saldo más chico primero; las pagadas van al final.
+            order = np.argsort(np.where(b > 0.01, b, np.inf), axis=1, kind="stable")
+            extra = _allocate_extra_ordered(b, cash, order)
+        else:
+            extra = _allocate_extra(b, cash)
+
+        balance[rows] = b - extra
+        total_paid[rows] += paid + extra
+        total_interest[rows] += charged
+        months[rows] += paying
+
+    if rows.size:
+        finished = ~(balance[rows] > 0.01).any(axis=1)
+        payoff_month[rows[finished]] = max_months
+
+    inverse = np.argsort(priority)
+    return BatchResult(
+        total_paid=total_paid[:, inverse],
+        total_interest=total_interest[:, inverse],
+        months=months[:, inverse],
+        balance=balance[:, inverse],
+        payoff_month=payoff_month,
+    )
+
+
+# Fracción de filas ya saldadas a partir de la cual se compacta.
+BOOK_COMPACT_FRACTION = 0.1
+
+
+def _take_rows(debts: DebtArrays, rows: np.ndarray) -> DebtArrays:
+    """Filas `rows` de un DebtArrays con atributos por cliente (C x D)."""
+    return DebtArrays(
+        product_ids=[],
+        product_types=[],
+        is_card=debts.is_card[rows],
+        balance=debts.balance[rows],
+        rate_annual=debts.rate_annual[rows],
+        monthly_rate=debts.monthly_rate[rows],
+        min_payment_pct=debts.min_payment_pct[rows],
+        loan_payment=debts.loan_payment[rows],
+        days_past_due=debts.days_past_due[rows],
+    )
+
+
+def simulate_book_avalanche(
+    debts: DebtArrays,
+    cashflows: np.ndarray,
+    max_months: int = 600,
+):
+    """
+    Plan optimizado (avalanche) de muchos clientes en una sola pasada: una
+    fila por cliente y sus deudas en columnas (atributos C x D, en el orden
+    de `debt_arrays`: loans y luego cards). Las columnas de relleno de
+    clientes con menos deudas van con saldo 0.
+
+    Devuelve (intereses totales, meses hasta saldar) por fila, iguales a
+    `simulate_optimized_plan(portfolio)` de cada cliente.
+    """
+    cashflows = np.asarray(cashflows, dtype=float)
+    # Misma prioridad que `static_priority`, pero propia de cada fila.
+    order = np.argsort(-debts.rate_annual, axis=1, kind="stable")
+    ordered = DebtArrays(
+        product_ids=[],
+        product_types=[],
+        **{
+            name: np.take_along_axis(getattr(debts, name), order, axis=1)
+            for name in (
+                "is_card", "balance", "rate_annual", "monthly_rate",
+                "min_payment_pct", "loan_payment", "days_past_due",
+            )
+        },
+    )
+
+    c = len(cashflows)
+    total_interest = np.zeros(c)
+    total_months = np.zeros(c, dtype=np.int64)
+
+    # Sin flujo disponible el escenario queda vacío (igual que el escalar).
+    rows = np.flatnonzero(cashflows > 0)
+    state = _take_rows(ordered, rows)
+    balance = state.balance.copy()
+    interest_acc = np.zeros_like(balance)
+    months = np.zeros(balance.shape, dtype=np.int64)
+
+    def _flush(done: np.ndarray) -> None:
+        total_interest[rows[done]] = interest_acc[done].sum(axis=1)
+        total_months[rows[done]] = months[done].max(axis=1, initial=0)
+
+    for _ in range(max_months):
+        alive = balance > 0.01
+        still = alive.any(axis=1)
+        # Compactamos cuando ya saldó una parte apreciable de las filas:
+        # copiar todas las matrices cada mes cuesta más que arrastrar
+        # algunas filas sin deuda (no pagan ni suman intereses).
+        if not still.any() or (~still).sum() >= BOOK_COMPACT_FRACTION * rows.size:
+            _flush(~still)
+            rows, alive = rows[still], alive[still]
+            state = _take_rows(state, still)
+            balance, interest_acc, months = balance[still], interest_acc[still], months[still]
+        if rows.size == 0:
+            break
+
+        cash = cashflows[rows]
+        interest, mins = _minimum_payments(state, balance, alive)
+
+        min_total = mins.sum(axis=1)
+        short = min_total > cash
+        scale = np.ones_like(cash)
+        scale[short] = cash[short] / min_total[short]
+        cash = cash - min_total * scale
+
+        pay = np.minimum(mins * scale[:, None], balance + interest)
+        paying = pay > 0
+        principal = np.maximum(pay - interest, 0.0)
+        balance = np.where(paying, np.maximum(balance - principal, 0.0), balance)
+
+        balance = balance - _allocate_extra(balance, cash)
+        interest_acc += np.where(paying, interest, 0.0)
+        months += paying
+
+    if rows.size:
+        _flush(np.ones(rows.size, dtype=bool))
+
+    return total_interest, total_months
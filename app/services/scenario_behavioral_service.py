@@ -0,0 +1,111 @@
+from typing import Dict, List
+
+from ..models.behavior import CustomerPaymentBehavior, ProductPaymentBehavior
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import ScenarioSummary, DebtAmortizationSummary
+from ..services.financial_math import loan_monthly_payment, monthly_rate
+from ..services.scenario_minimum_service import _simulate_card_minimum
+
+
+def _expected_monthly_payment(behavior: ProductPaymentBehavior) -> float:
+    """
+    Pago esperado por mes según el historial: el promedio de los meses
+    con pago, ponderado por la regularidad (meses pagados / meses vigentes).
+    """
+    return behavior.avg_monthly_payment * behavior.regularity
+
+
+def _simulate_fixed_payment(
+    balance: float,
+    annual_rate_pct: float,
+    monthly_payment: float,
+    max_months: int = 600,
+) -> DebtAmortizationSummary:
+    """
+    Simula una deuda pagando siempre el mismo monto mensual.
+    Si el pago no cubre el interés, el saldo crece hasta `max_months`
+    (refleja que, con ese hábito, la deuda no se termina de pagar).
+    """
+    starting_balance = balance
+    r = monthly_rate(annual_rate_pct)
+
+    total_paid = 0.0
+    total_interest = 0.0
+    months = 0
+
+    while balance > 0.01 and months < max_months:
+        interest = balance * r
+        payment = min(max(monthly_payment, 0.0), balance + interest)
+
+        balance += interest - payment
+
+        total_paid += payment
+        total_interest += interest
+        months += 1
+
+    return DebtAmortizationSummary(
+        product_id="(behavioral)",
+        product_type="loan",
+        starting_balance=starting_balance,
+        total_paid=total_paid,
+        total_interest_paid=total_interest,
+        months_to_payoff=months,
+    )
+
+
+def simulate_behavioral_scenario(
+    portfolio: CustomerPortfolio,
+    behavior: CustomerPaymentBehavior,
+) -> ScenarioSummary:
+    """
+    Escenario "behavioral": proyecta las deudas si el cliente sigue pagando
+    como lo hizo en `payments_history` (monto promedio y meses sin pago).
+    Los productos sin historial siguen su pago mínimo / cuota contractual.
+    """
+    by_product: Dict[str, ProductPaymentBehavior] = {
+        p.product_id: p for p in behavior.products
+    }
+    debt_summaries: List[DebtAmortizationSummary] = []
+
+    # --- Loans ---
+    for loan in portfolio.loans:
+        observed = by_product.get(loan.loan_id)
+        monthly = (
+            _expected_monthly_payment(observed)
+            if observed is not None
+            else loan_monthly_payment(loan.principal, loan.annual_rate_pct, loan.remaining_term_months)
+        )
+        summary = _simulate_fixed_payment(loan.principal, loan.annual_rate_pct, monthly)
+        summary.product_id = loan.loan_id
+        summary.product_type = "loan"
+        debt_summaries.append(summary)
+
+    # --- Cards ---
+    for card in portfolio.cards:
+        observed = by_product.get(card.card_id)
+        if observed is not None:
+            summary = _simulate_fixed_payment(
+                card.balance, card.annual_rate_pct, _expected_monthly_payment(observed)
+            )
+        else:
+            summary = _simulate_card_minimum(
+                balance=card.balance,
+                annual_rate_pct=card.annual_rate_pct,
+                min_payment_pct=card.min_payment_pct,
+            )
+        summary.product_id = card.card_id
+        summary.product_type = "card"
+        debt_summaries.append(summary)
+
+    total_months = max((d.months_to_payoff for d in debt_summaries), default=0)
+    total_paid = sum(d.total_paid for d in debt_summaries)
+    total_interest = sum(d.total_interest_paid for d in debt_summaries)
+
+    return ScenarioSummary(
+        customer_id=portfolio.customer_id,
+        scenario_type="behavioral",
+        total_months=total_months,
+        total_paid=total_paid,
+        total_interest_paid=total_interest,
+        debts=debt_summaries,
+    )
@@ -2,6 +2,10 @@ from ..services.portfolio_service import build_customer_portfolio
 from ..services.scenario_minimum_service import simulate_minimum_payment_scenario
 from ..services.scenario_optimized_service import simulate_optimized_plan
 from ..services.scenario_consolidation_service import simulate_consolidation_scenario
+from ..services.scenario_behavioral_service import simulate_behavioral_scenario
+from ..services.payment_behavior_service import get_customer_payment_behavior
+from ..services.dataset_service import get_bank_offers, get_dataset_generation
+from ..utils.single_flight import single_flight
 
 from ..models.scenarios import (
     ScenarioComparisonResult,
@@ -9,12 +13,16 @@ from ..models.scenarios import (
 )
 
 
-def compute_scenarios_overview(app, customer_id: str) -> ScenarioComparisonResult:
+def compute_scenarios_overview(
+    app,
+    customer_id: str,
+    include_behavioral: bool = False,
+) -> ScenarioComparisonResult:
     """
     Calcula los tres escenarios para un cliente y devuelve
     el ahorro vs el escenario de pago mínimo.
+    Con `include_behavioral` agrega la proyección según su historial de pagos.
     """
-    data = app.state.data
     portfolio = build_customer_portfolio(app, customer_id)
 
     min_s = simulate_minimum_payment_scenario(portfolio)
@@ -45,13 +53,36 @@ def compute_scenarios_overview(app, customer_id: str) -> ScenarioComparisonResul
     opt_s = simulate_optimized_plan(portfolio)
     scenarios_savings.append(_build_savings_item(opt_s))
 
-    cons_s = simulate_consolidation_scenario(portfolio, data["bank_offers"])
+    cons_s = simulate_consolidation_scenario(portfolio, get_bank_offers(app))
     scenarios_savings.append(_build_savings_item(cons_s))
 
+    if include_behavioral:
+        behavior = get_customer_payment_behavior(app, customer_id)
+        beh_s = simulate_behavioral_scenario(portfolio, behavior)
+        scenarios_savings.append(_build_savings_item(beh_s))
+
     return ScenarioComparisonResult(
         customer_id=customer_id,
         baseline_type="minimum_payment",
         baseline_total_months=baseline_months,
         baseline_total_interest_paid=baseline_interest,
         scenarios=scenarios_savings,
-    )
\ No newline at end of file
+    )
+
+
+def coalesced_scenarios_overview(
+    app,
+    customer_id: str,
+    include_behavioral: bool = False,
+) -> ScenarioComparisonResult:
+    """
+    `compute_scenarios_overview` con deduplicación: las llamadas
+    simultáneas para el mismo cliente y generación de datasets comparten
+    un único cálculo.
+    """
+    key = (customer_id, get_dataset_generation(app), include_behavioral)
+    return single_flight.do(
+        "overview",
+        key,
+        lambda: compute_scenarios_overview(app, customer_id, include_behavioral=include_behavioral),
+    )
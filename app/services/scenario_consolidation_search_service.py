@@ -0,0 +1,416 @@
+"""
+Consolidación parcial y con varias ofertas.
+
+Cada deuda puede quedarse en el plan optimizado o pasar a una oferta; una
+oferta es un solo préstamo nuevo (tope `max_consolidated_balance`) y puede
+agrupar varias deudas. Lo que no se consolida sigue el plan optimizado con
+el flujo que dejan libre las cuotas nuevas (mes a mes: al terminar un
+préstamo consolidado su cuota vuelve al flujo).
+
+Búsqueda en dos etapas:
+  1) Branch-and-bound sobre las deudas con un objetivo lineal: el interés
+     de una oferta es proporcional al saldo consolidado (saldo x costo por
+     unidad de la anualidad) y el de una deuda que se queda se estima con
+     su costo por unidad en el plan optimizado actual. Restricciones: tope
+     por oferta y que cuotas nuevas + mínimos de lo que queda quepan en el
+     flujo. La cota de cada nodo sale de una mochila (DP) sobre el flujo
+     restante con los topes relajados (lagrangiano); se guardan las mejores
+     asignaciones.
+  2) Las mejores asignaciones (y las de referencia: sin consolidar y cada
+     oferta completa) se evalúan exactamente en una sola pasada del motor
+     vectorizado y se elige la de menor interés total entre las que caben
+     en el flujo y terminan de pagarse (si ninguna, no se consolida).
+"""
+import heapq
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from ..models.portfolio import BankOffer, CustomerPortfolio
+from ..models.scenarios import (
+    ConsolidationGroup,
+    ConsolidationSearchResult,
+    DebtAmortizationSummary,
+    ScenarioSummary,
+)
+from ..services.scenario_batch_engine import (
+    DebtArrays,
+    _minimum_payments,
+    debt_arrays,
+    simulate_optimized_batch,
+)
+from ..services.financial_math import annuity_factor, loan_monthly_payment
+from ..services.scenario_consolidation_service import _meets_conditions, _parse_offers
+
+
+# Ofertas que se consideran por deuda (las de mayor ahorro estimado).
+MAX_OFFERS_PER_DEBT = 4
+# Asignaciones que pasan a la evaluación exacta.
+TOP_CANDIDATES = 16
+# Cota de nodos del branch-and-bound (acota el tiempo por cliente).
+MAX_SEARCH_NODES = 50_000
+# Resolución del flujo mensual en la tabla de cotas y pasos de subgradiente
+# para los multiplicadores de los topes.
+KNAPSACK_BUCKETS = 4096
+MULTIPLIER_ITERATIONS = 10
+
+MAX_MONTHS = 600
+
+Assignment = Tuple[int, ...]  # oferta por deuda (-1 = se queda)
+
+
+def _debt_product_types(portfolio: CustomerPortfolio) -> List[str]:
+    """Tipo de producto que usan las ofertas (personal/micro/card)."""
+    return [l.product_type for l in portfolio.loans] + ["card"] * len(portfolio.cards)
+
+
+def _eligible_offers(
+    portfolio: CustomerPortfolio,
+    offers: List[BankOffer],
+    debts: DebtArrays,
+) -> Dict[int, Set[int]]:
+    """Ofertas a las que puede ir cada deuda (tipo, tope, score y mora)."""
+    types = _debt_product_types(portfolio)
+    eligible: Dict[int, Set[int]] = {}
+    for j in range(len(debts.balance)):
+        eligible[j] = {
+            o
+            for o, offer in enumerate(offers)
+            if types[j] in offer.product_types_eligible
+            and debts.balance[j] <= offer.max_consolidated_balance
+            and _meets_conditions(portfolio, offer, int(debts.days_past_due[j]))
+        }
+    return eligible
+
+
+def _knapsack_bounds(
+    gains: List[List[Tuple[int, float, float]]],
+    stay_weight: np.ndarray,
+    balance: np.ndarray,
+    order: List[int],
+    lam: np.ndarray,
+    unit: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tabla de cotas por programación dinámica (mochila de elección múltiple
+    sobre el flujo mensual):
+      V[i, b] = máximo de Σ (ahorro_jo − λ_o · B_j) para las deudas order[i:]
+                con b unidades de flujo.
+    Los topes de las ofertas entran relajados con λ (lagrangiano), así que
+    λ · tope_restante + V es una cota superior válida para cualquier λ >= 0.
+    Los pesos se redondean hacia abajo; -inf marca que ni quedándose todas
+    las deudas caben en el flujo. También devuelve la carga por oferta de la
+    solución relajada (para ajustar λ).
+    """
+    n = len(order)
+    table = np.full((n + 1, KNAPSACK_BUCKETS + 1), -np.inf)
+    table[n] = 0.0
+    picks = []
+    for i in range(n - 1, -1, -1):
+        j = order[i]
+        options = [(-1, 0.0, stay_weight[j])] + [
+            (o, g - lam[o] * balance[j], w) for o, g, w in gains[j]
+        ]
+        pick = np.full(KNAPSACK_BUCKETS + 1, -2)
+        quanta = []
+        for k, (o, g, w) in enumerate(options):
+            q = int(np.floor(w / unit + 1e-9))
+            quanta.append(q)
+            if q > KNAPSACK_BUCKETS:
+                continue
+            shifted = np.full(KNAPSACK_BUCKETS + 1, -np.inf)
+            shifted[q:] = table[i + 1, : KNAPSACK_BUCKETS + 1 - q] + g
+            better = shifted > table[i]
+            table[i][better] = shifted[better]
+            pick[better] = k
+        picks.append((options, quanta, pick))
+    picks.reverse()
+
+    load = np.zeros(len(lam))
+    b = KNAPSACK_BUCKETS
+    for i in range(n):
+        options, quanta, pick = picks[i]
+        k = pick[b]
+        if k < 0:
+            break
+        o = options[k][0]
+        if o >= 0:
+            load[o] += balance[order[i]]
+        b -= quanta[k]
+    return table, load
+
+
+def _search(
+    gains: List[List[Tuple[int, float, float]]],
+    stay_weight: np.ndarray,
+    balance: np.ndarray,
+    caps: np.ndarray,
+    budget: float,
+    keep: int,
+) -> Tuple[List[Tuple[float, Assignment]], int, bool]:
+    """
+    Branch-and-bound: maximiza el ahorro estimado eligiendo para cada deuda
+    "se queda" u una de sus opciones (oferta, ahorro, peso en flujo).
+    Devuelve hasta `keep` asignaciones (las mejores encontradas), los nodos
+    explorados (nunca más de MAX_SEARCH_NODES) y si la cota de nodos cortó
+    la búsqueda (entonces las asignaciones no son necesariamente óptimas).
+    """
+    n = len(gains)
+    # Deudas con más ahorro posible primero: la cota poda antes.
+    order = sorted(range(n), key=lambda j: -max((g for _, g, _ in gains[j]), default=0.0))
+    caps = np.minimum(caps, balance.sum())
+    unit = budget / KNAPSACK_BUCKETS if budget > 0 else 1.0
+
+    # λ de los topes por subgradiente sobre la cota de la raíz.
+    lam = np.zeros(len(caps))
+    bounds, load = _knapsack_bounds(gains, stay_weight, balance, order, lam, unit)
+    best_root, best_lam, best_bounds = bounds[0, -1], lam, bounds
+    for k in range(MULTIPLIER_ITERATIONS):
+        excess = load - caps
+        if (excess <= 0).all() or best_root == -np.inf:
+            break
+        step = 0.5 * best_root / (k + 1) / float(excess @ excess)
+        lam = np.maximum(lam + step * excess, 0.0)
+        bounds, load = _knapsack_bounds(gains, stay_weight, balance, order, lam, unit)
+        root = float(lam @ caps) + bounds[0, -1]
+        if root < best_root:
+            best_root, best_lam, best_bounds = root, lam, bounds
+    lam, bounds = best_lam, best_bounds
+
+    top: List[Tuple[float, Assignment]] = []
+    best = [0.0]
+    # Estado en floats de Python: el loop interno no pasa por numpy.
+    used = [0.0] * len(caps)
+    caps_list = caps.tolist()
+    lam_list = lam.tolist()
+    bound_rows = bounds.tolist()
+    inv_unit = 1.0 / unit
+    choice = [-1] * n
+    nodes = 0
+    exhausted = False
+
+    def visit(i: int, gain: float, weight: float, slack_value: float) -> None:
+        # slack_value = λ · (tope − usado), mantenido incrementalmente.
+        nonlocal nodes, exhausted
+        if nodes >= MAX_SEARCH_NODES:
+            exhausted = True
+            return
+        nodes += 1
+        remaining = budget - weight
+        if remaining < -1e-9:
+            return
+        bound = bound_rows[i][min(int(remaining * inv_unit + 1e-9), KNAPSACK_BUCKETS)]
+        if bound == -np.inf:
+            return
+        if top and gain + bound + slack_value <= best[0] + 1e-9:
+            return
+        if i == n:
+            best[0] = max(best[0], gain)
+            assignment = tuple(choice)
+            if len(top) < keep:
+                heapq.heappush(top, (gain, assignment))
+            else:
+                heapq.heappushpop(top, (gain, assignment))
+            return
+
+        j = order[i]
+        b_j = balance_list[j]
+        for o, g, w in gains[j]:
+            if used[o] + b_j > caps_list[o]:
+                continue
+            used[o] += b_j
+            choice[j] = o
+            visit(i + 1, gain + g, weight + w, slack_value - lam_list[o] * b_j)
+            choice[j] = -1
+            used[o] -= b_j
+        visit(i + 1, gain, weight + stay_weight_list[j], slack_value)
+
+    balance_list = balance.tolist()
+    stay_weight_list = stay_weight.tolist()
+    visit(0, 0.0, 0.0, float(lam @ caps))
+    return sorted(top, reverse=True), nodes, exhausted
+
+
+def _groups_for(
+    assignment: Assignment,
+    offers: List[BankOffer],
+    debts: DebtArrays,
+) -> List[ConsolidationGroup]:
+    members: Dict[int, List[int]] = {}
+    for j, o in enumerate(assignment):
+        if o >= 0:
+            members.setdefault(o, []).append(j)
+
+    groups = []
+    for o, js in sorted(members.items()):
+        offer = offers[o]
+        balance = float(sum(debts.balance[j] for j in js))
+        payment = loan_monthly_payment(balance, offer.new_rate_pct, offer.max_term_months)
+        groups.append(
+            ConsolidationGroup(
+                offer_id=offer.offer_id,
+                product_ids=[debts.product_ids[j] for j in js],
+                consolidated_balance=balance,
+                monthly_payment=payment,
+                term_months=offer.max_term_months,
+                total_interest_paid=payment * offer.max_term_months - balance,
+            )
+        )
+    return groups
+
+
+def search_consolidation_plan(
+    portfolio: CustomerPortfolio,
+    offers_raw,
+) -> ConsolidationSearchResult:
+    """
+    Mejor combinación de consolidaciones (parciales y/o en varias ofertas)
+    con el resto de deudas en el plan optimizado.
+    """
+    cash = portfolio.cashflow.available_cashflow
+    offers = _parse_offers(offers_raw or [])
+    debts = debt_arrays(portfolio)
+    d = len(debts.balance)
+
+    # Costo actual por unidad de saldo de cada deuda en el plan optimizado.
+    base = simulate_optimized_batch(debts, np.array([cash]))
+    base_interest = float(base.scenario_total_interest[0])
+    stay_cost = np.divide(
+        base.total_interest[0],
+        debts.balance,
+        out=np.zeros(d),
+        where=debts.balance > 0,
+    )
+    # Deudas que no terminan de pagarse: su costo real es mayor que el
+    # acumulado en el horizonte, así que consolidarlas nunca se subestima.
+    stay_cost[base.balance[0] > 0.01] = np.inf
+
+    # Oferta: cuota e interés por unidad de saldo (anualidad lineal).
+    unit_payment = np.array(
+        [annuity_factor(o.new_rate_pct, o.max_term_months) for o in offers]
+    )
+    unit_cost = unit_payment * np.array([o.max_term_months for o in offers]) - 1.0
+    caps = np.array([o.max_consolidated_balance for o in offers], dtype=float)
+
+    _, stay_min = _minimum_payments(
+        debts, debts.balance[None, :], (debts.balance > 0.01)[None, :]
+    )
+    stay_weight = stay_min[0]
+
+    eligible = _eligible_offers(portfolio, offers, debts)
+    gains: List[List[Tuple[int, float, float]]] = []
+    for j in range(d):
+        options = []
+        for o in sorted(eligible[j]):
+            saving = stay_cost[j] - unit_cost[o]
+            if saving > 0:
+                gain = debts.balance[j] * min(saving, 1e6)
+                options.append((o, gain, debts.balance[j] * unit_payment[o]))
+        options.sort(key=lambda x: -x[1])
+        kept = options[:MAX_OFFERS_PER_DEBT]
+        # También la de menor cuota: con flujo justo puede ser la única que cabe.
+        lightest = min(options, key=lambda x: x[2], default=None)
+        if lightest is not None and lightest not in kept:
+            kept.append(lightest)
+        gains.append(kept)
+
+    nodes = 0
+    exhausted = False
+    candidates: List[Assignment] = [tuple([-1] * d)]
+    single: Set[Assignment] = set()
+    if cash > 0 and offers:
+        top, nodes, exhausted = _search(gains, stay_weight, debts.balance, caps, cash, TOP_CANDIDATES)
+        candidates += [a for _, a in top]
+
+        # Referencia: cada oferta aplicada a todas sus deudas elegibles.
+        for o in range(len(offers)):
+            a = tuple(o if o in eligible[j] else -1 for j in range(d))
+            if any(x >= 0 for x in a) and debts.balance[[x >= 0 for x in a]].sum() <= caps[o]:
+                candidates.append(a)
+                single.add(a)
+
+    candidates = list(dict.fromkeys(candidates))
+    groups_by = [_groups_for(a, offers, debts) for a in candidates]
+
+    # Evaluación exacta de todas las candidatas en una pasada.
+    start = np.tile(debts.balance, (len(candidates), 1))
+    committed = np.zeros((len(candidates), MAX_MONTHS))
+    for k, (a, groups) in enumerate(zip(candidates, groups_by)):
+        start[k, [o >= 0 for o in a]] = 0.0
+        for g in groups:
+            committed[k, : g.term_months] += g.monthly_payment
+
+    feasible = committed[:, 0] <= cash + 1e-9
+    free = np.maximum(cash - committed, 0.0)
+    batch = simulate_optimized_batch(
+        debts,
+        np.full(len(candidates), cash),
+        monthly_cashflow=lambda month, rows: free[rows, month],
+        initial_balance=start,
+    )
+
+    totals = []
+    for k, groups in enumerate(groups_by):
+        interest = float(batch.total_interest[k].sum()) + sum(g.total_interest_paid for g in groups)
+        months = max([int(batch.total_months[k])] + [g.term_months for g in groups])
+        pending = bool((batch.balance[k] > 0.01).any())
+        totals.append((bool(feasible[k]) and not pending, interest, months))
+
+    # Solo cuentan las asignaciones que caben en el flujo y terminan de
+    # pagarse; si ninguna lo hace, no se consolida (candidata 0).
+    viable = [k for k in range(len(candidates)) if totals[k][0]]
+    best = min(viable, key=lambda k: totals[k][1:]) if viable else 0
+    single_best = min(
+        (totals[k][1] for k in viable if candidates[k] in single),
+        default=None,
+    )
+
+    groups = groups_by[best]
+    debts_summary = [
+        DebtAmortizationSummary(
+            product_id=g.offer_id,
+            product_type="loan",
+            starting_balance=g.consolidated_balance,
+            total_paid=g.monthly_payment * g.term_months,
+            total_interest_paid=g.total_interest_paid,
+            months_to_payoff=g.term_months,
+        )
+        for g in groups
+    ]
+    for j in range(d):
+        if start[best, j] > 0 and batch.total_paid[best, j] > 0:
+            debts_summary.append(
+                DebtAmortizationSummary(
+                    product_id=debts.product_ids[j],
+                    product_type=debts.product_types[j],
+                    starting_balance=float(debts.balance[j]),
+                    total_paid=float(batch.total_paid[best, j]),
+                    total_interest_paid=float(batch.total_interest[best, j]),
+                    months_to_payoff=int(batch.months[best, j]),
+                )
+            )
+
+    plan_feasible, interest, months = totals[best]
+    scenario = ScenarioSummary(
+        customer_id=portfolio.customer_id,
+        scenario_type="consolidation",
+        total_months=months if debts_summary else 0,
+        total_paid=sum(x.total_paid for x in debts_summary),
+        total_interest_paid=interest,
+        debts=debts_summary,
+    )
+
+    return ConsolidationSearchResult(
+        customer_id=portfolio.customer_id,
+        available_cashflow=cash,
+        feasible=plan_feasible,
+        groups=groups,
+        scenario=scenario,
+        optimized_total_interest_paid=base_interest,
+        interest_savings_vs_optimized=base_interest - interest,
+        single_offer_total_interest_paid=single_best,
+        interest_savings_vs_single_offer=None if single_best is None else single_best - interest,
+        candidates_evaluated=len(candidates),
+        search_nodes=nodes,
+        search_budget_exhausted=exhausted,
+    )
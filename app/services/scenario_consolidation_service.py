@@ -1,37 +1,160 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from ..models.portfolio import CustomerPortfolio, BankOffer
 from ..models.scenarios import ScenarioSummary, DebtAmortizationSummary
+from ..services.financial_math import loan_monthly_payment
 
 
-def _monthly_rate(annual_rate_pct: float) -> float:
-    return (annual_rate_pct / 100.0) / 12.0
+def _parse_offers(offers_raw) -> List[BankOffer]:
+    """
+    Convierte la lista/dict cruda de JSON en modelos BankOffer.
+    """
+    offers: List[BankOffer] = []
+    for o in offers_raw:
+        offers.append(BankOffer(**o))
+    return offers
 
 
-def _loan_monthly_payment(principal: float, annual_rate_pct: float, term_months: int) -> float:
+def offer_requirements(offer: BankOffer) -> Tuple[Optional[int], Optional[int]]:
     """
-    Cuota fija estándar de un préstamo.
+    Condiciones de texto de la oferta como umbrales:
+    (score mínimo exclusivo, máximo atraso permitido en días); None si la
+    oferta no exige esa condición.
     """
-    r = _monthly_rate(annual_rate_pct)
-    n = term_months
+    cond = offer.conditions.lower()
 
-    if n <= 0:
-        return principal
+    # Condición de score
+    score_above = 650 if "score > 650" in cond else None
 
-    if r == 0:
-        return principal / n
+    # Condición de mora
+    max_days_past_due = None
+    if "no mora >30" in cond or "no mora > 30" in cond or "sin mora activa" in cond:
+        max_days_past_due = 30
 
-    return principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
+    return score_above, max_days_past_due
 
 
-def _parse_offers(offers_raw) -> List[BankOffer]:
+def _meets_conditions(
+    portfolio: CustomerPortfolio,
+    offer: BankOffer,
+    max_days_past_due: int,
+) -> bool:
     """
-    Convierte la lista/dict cruda de JSON en modelos BankOffer.
+    Condiciones de texto de la oferta (score y mora) para un cliente y el
+    máximo atraso de las deudas que se consolidarían.
     """
-    offers: List[BankOffer] = []
-    for o in offers_raw:
-        offers.append(BankOffer(**o))
-    return offers
+    score_above, dpd_limit = offer_requirements(offer)
+
+    if score_above is not None:
+        if portfolio.credit_score is None or portfolio.credit_score <= score_above:
+            return False
+
+    if dpd_limit is not None and max_days_past_due > dpd_limit:
+        return False
+
+    return True
+
+
+def _evaluate_offer(
+    portfolio: CustomerPortfolio,
+    offer: BankOffer,
+) -> Optional[Tuple[float, ScenarioSummary]]:
+    """
+    Evalúa una oferta para el cliente sin mirar el flujo de caja:
+    saldo elegible, tope, condiciones de score/mora y cuota resultante.
+    Devuelve (cuota_mensual, escenario) o None si la oferta no aplica.
+    """
+    eligible_balance = 0.0
+    max_days_past_due = 0
+
+    # Loans
+    for loan in portfolio.loans:
+        if loan.product_type in offer.product_types_eligible:
+            eligible_balance += loan.principal
+            max_days_past_due = max(max_days_past_due, loan.days_past_due)
+
+    # Cards
+    for card in portfolio.cards:
+        if "card" in offer.product_types_eligible:
+            eligible_balance += card.balance
+            max_days_past_due = max(max_days_past_due, card.days_past_due)
+
+    if eligible_balance <= 0:
+        return None
+
+    if eligible_balance > offer.max_consolidated_balance:
+        return None
+
+    if not _meets_conditions(portfolio, offer, max_days_past_due):
+        return None
+
+    n = offer.max_term_months
+    monthly_payment = loan_monthly_payment(
+        principal=eligible_balance,
+        annual_rate_pct=offer.new_rate_pct,
+        term_months=n,
+    )
+
+    total_paid = monthly_payment * n
+    total_interest = total_paid - eligible_balance
+
+    debt_summary = DebtAmortizationSummary(
+        product_id=offer.offer_id,
+        product_type="loan",
+        starting_balance=eligible_balance,
+        total_paid=total_paid,
+        total_interest_paid=total_interest,
+        months_to_payoff=n,
+    )
+
+    scenario_summary = ScenarioSummary(
+        customer_id=portfolio.customer_id,
+        scenario_type="consolidation",
+        total_months=n,
+        total_paid=total_paid,
+        total_interest_paid=total_interest,
+        debts=[debt_summary],
+    )
+    return monthly_payment, scenario_summary
+
+
+def consolidation_candidates(
+    portfolio: CustomerPortfolio,
+    offers_raw,
+) -> List[Tuple[float, ScenarioSummary]]:
+    """
+    Ofertas aplicables al cliente (en el orden del catálogo), cada una con
+    su cuota mensual. La restricción de flujo de caja se aplica después,
+    lo que permite reutilizarlas para varios valores de available_cashflow.
+    """
+    candidates = []
+    for offer in _parse_offers(offers_raw):
+        evaluated = _evaluate_offer(portfolio, offer)
+        if evaluated is not None:
+            candidates.append(evaluated)
+    return candidates
+
+
+def _is_better(candidate: ScenarioSummary, best: Optional[ScenarioSummary]) -> bool:
+    if best is None:
+        return True
+    if candidate.total_interest_paid < best.total_interest_paid:
+        return True
+    return (
+        candidate.total_interest_paid == best.total_interest_paid
+        and candidate.total_months < best.total_months
+    )
+
+
+def _empty_consolidation(customer_id: str) -> ScenarioSummary:
+    return ScenarioSummary(
+        customer_id=customer_id,
+        scenario_type="consolidation",
+        total_months=0,
+        total_paid=0.0,
+        total_interest_paid=0.0,
+        debts=[],
+    )
 
 
 def simulate_consolidation_scenario(
@@ -52,105 +175,21 @@ def simulate_consolidation_scenario(
       - Devolvemos un ScenarioSummary con un solo "préstamo consolidado".
     """
 
-    offers = _parse_offers(offers_raw)
     available_cf = portfolio.cashflow.available_cashflow
 
-    if available_cf <= 0 or not offers:
-        return ScenarioSummary(
-            customer_id=portfolio.customer_id,
-            scenario_type="consolidation",
-            total_months=0,
-            total_paid=0.0,
-            total_interest_paid=0.0,
-            debts=[],
-        )
+    if available_cf <= 0 or not offers_raw:
+        return _empty_consolidation(portfolio.customer_id)
 
     best_summary: Optional[ScenarioSummary] = None
 
-    for offer in offers:
-        eligible_balance = 0.0
-        max_days_past_due = 0
-
-        # Loans
-        for loan in portfolio.loans:
-            if loan.product_type in offer.product_types_eligible:
-                eligible_balance += loan.principal
-                max_days_past_due = max(max_days_past_due, loan.days_past_due)
-
-        # Cards
-        for card in portfolio.cards:
-            if "card" in offer.product_types_eligible:
-                eligible_balance += card.balance
-                max_days_past_due = max(max_days_past_due, card.days_past_due)
-
-        if eligible_balance <= 0:
-            continue
-
-        if eligible_balance > offer.max_consolidated_balance:
-            continue
-
-        cond = offer.conditions.lower()
-
-        # Condición de score
-        if "score > 650" in cond:
-            if portfolio.credit_score is None or portfolio.credit_score <= 650:
-                continue
-
-        # Condición de mora
-        if "no mora >30" in cond or "no mora > 30" in cond or "sin mora activa" in cond:
-            if max_days_past_due > 30:
-                continue
-
-        n = offer.max_term_months
-        monthly_payment = _loan_monthly_payment(
-            principal=eligible_balance,
-            annual_rate_pct=offer.new_rate_pct,
-            term_months=n,
-        )
-
+    for monthly_payment, scenario_summary in consolidation_candidates(portfolio, offers_raw):
         if monthly_payment > available_cf:
             continue
 
-        total_paid = monthly_payment * n
-        total_interest = total_paid - eligible_balance
-
-        debt_summary = DebtAmortizationSummary(
-            product_id=offer.offer_id,
-            product_type="loan",
-            starting_balance=eligible_balance,
-            total_paid=total_paid,
-            total_interest_paid=total_interest,
-            months_to_payoff=n,
-        )
-
-        scenario_summary = ScenarioSummary(
-            customer_id=portfolio.customer_id,
-            scenario_type="consolidation",
-            total_months=n,
-            total_paid=total_paid,
-            total_interest_paid=total_interest,
-            debts=[debt_summary],
-        )
-
-        if best_summary is None:
+        if _is_better(scenario_summary, best_summary):
             best_summary = scenario_summary
-        else:
-            if scenario_summary.total_interest_paid < best_summary.total_interest_paid:
-                best_summary = scenario_summary
-            elif (
-                scenario_summary.total_interest_paid == best_summary.total_interest_paid
-                and scenario_summary.total_months < best_summary.total_months
-            ):
-                best_summary = scenario_summary
 
     if best_summary is None:
-        return ScenarioSummary(
-            customer_id=portfolio.customer_id,
-            scenario_type="consolidation",
-            total_months=0,
-            total_paid=0.0,
-            total_interest_paid=0.0,
-            debts=[],
-        )
-
-    return best_summary
\ No newline at end of file
+        return _empty_consolidation(portfolio.customer_id)
+
+    return best_summary
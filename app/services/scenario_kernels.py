@@ -0,0 +1,375 @@
+"""
+Kernels de simulación sobre arreglos primitivos (backend compilado opcional).
+
+Los bucles mes a mes del pago mínimo de tarjetas y del plan optimizado
+(una estrategia, o varias a la vez en `strategies_kernel`) se escriben
+aquí como funciones sobre float64/int64 (sin modelos ni dicts), en el
+subconjunto de Python que Numba compila. El backend se
+elige con SIMULATION_BACKEND:
+
+  - "auto" (default): Numba si está instalado; si no, Python.
+  - "numba": Numba (si no está instalado se usa Python).
+  - "python": las implementaciones originales de los servicios.
+
+Con Python los servicios no usan estos kernels (siguen con su código de
+siempre); `scripts/bench_kernels.py` verifica que ambos backends den los
+mismos resultados y mide el speedup.
+"""
+import os
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+
+BALANCE_EPS = 0.01
+
+
+def card_minimum_kernel(balance, monthly_rate, min_pct, max_months):
+    """
+    Tarjeta pagando siempre el mínimo (misma regla que
+    `_simulate_card_minimum`). `min_pct` ya viene en fracción.
+    Devuelve (total_pagado, total_interes, meses).
+    """
+    total_paid = 0.0
+    total_interest = 0.0
+    months = 0
+
+    while balance > BALANCE_EPS and months < max_months:
+        interest = balance * monthly_rate
+        raw_min_payment = balance * min_pct
+        payment = max(raw_min_payment, interest + 1.0, 10.0)
+
+        if payment > balance + interest:
+            payment = balance + interest
+
+        balance -= payment - interest
+
+        total_paid += payment
+        total_interest += interest
+        months += 1
+
+    return total_paid, total_interest, months
+
+
+def optimized_kernel(
+    balance,
+    monthly_rate,
+    is_loan,
+    loan_payment,
+    min_pct,
+    order,
+    snowball,
+    available,
+    max_months,
+    total_paid,
+    total_interest,
+    months,
+):
+    """
+    Plan optimizado de un cliente (misma regla que `simulate_optimized_plan`).
+
+    - `balance` se actualiza en su lugar; `total_paid`, `total_interest` y
+      `months` son salidas por deuda.
+    - El sobrante va a la primera deuda activa de `order` (avalanche e
+      hybrid) o, con `snowball`, a la de menor saldo (empate: la primera).
+    """
+    n = balance.shape[0]
+    interest = np.zeros(n)
+    min_payment = np.zeros(n)
+    month = 0
+
+    while month < max_months:
+        any_active = False
+        for i in range(n):
+            if balance[i] > BALANCE_EPS:
+                any_active = True
+                break
+        if not any_active:
+            break
+
+        month += 1
+
+        # Mínimos del mes
+        min_total = 0.0
+        for i in range(n):
+            b = balance[i]
+            if b <= BALANCE_EPS:
+                interest[i] = 0.0
+                min_payment[i] = 0.0
+                continue
+            interest[i] = b * monthly_rate[i]
+            if is_loan[i]:
+                p = loan_payment[i]
+                if p > b + interest[i]:
+                    p = b + interest[i]
+            else:
+                p = max(b * min_pct[i], interest[i] + 1.0, 10.0)
+                if p > b + interest[i]:
+                    p = b + interest[i]
+            min_payment[i] = p
+            min_total += p
+
+        cash = available
+        scale = 1.0
+        if min_total > cash and min_total > 0:
+            scale = cash / min_total
+        cash -= min_total * scale
+
+        for i in range(n):
+            if min_payment[i] == 0:
+                continue
+            effective = min_payment[i] * scale
+            if effective <= 0:
+                continue
+            cap = balance[i] + interest[i]
+            if effective > cap:
+                effective = cap
+            principal = max(effective - interest[i], 0.0)
+            balance[i] -= principal
+            if balance[i] < 0:
+                balance[i] = 0.0
+            total_paid[i] += effective
+            total_interest[i] += interest[i]
+            months[i] += 1
+
+        # Sobrante según la estrategia
+        while cash > BALANCE_EPS:
+            target = -1
+            if snowball:
+                for i in range(n):
+                    if balance[i] > BALANCE_EPS and (target < 0 or balance[i] < balance[target]):
+                        target = i
+            else:
+                for k in range(n):
+                    if balance[order[k]] > BALANCE_EPS:
+                        target = order[k]
+                        break
+            if target < 0:
+                break
+            extra = min(cash, balance[target])
+            balance[target] -= extra
+            total_paid[target] += extra
+            cash -= extra
+
+
+def strategies_kernel(
+    balance,
+    monthly_rate,
+    is_loan,
+    loan_payment,
+    min_pct,
+    order,
+    snowball,
+    available,
+    max_months,
+    total_paid,
+    total_interest,
+    months,
+):
+    """
+    `optimized_kernel` para varias estrategias del mismo cliente: una fila
+    por estrategia (`balance`, `order` y las salidas son G x n; `snowball`
+    es G). Todas avanzan en el mismo bucle de meses y los mínimos del mes
+    se calculan en una sola pasada sobre (fila, deuda); filas con los
+    mismos saldos que la anterior reutilizan sus mínimos.
+    """
+    g, n = balance.shape
+    interest = np.zeros((g, n))
+    min_payment = np.zeros((g, n))
+    min_total = np.zeros(g)
+    active = np.ones(g, dtype=np.bool_)
+    month = 0
+
+    while month < max_months:
+        any_row = False
+        for r in range(g):
+            if active[r]:
+                active[r] = False
+                for i in range(n):
+                    if balance[r, i] > BALANCE_EPS:
+                        active[r] = True
+                        break
+                any_row = any_row or active[r]
+        if not any_row:
+            break
+
+        month += 1
+
+        # Mínimos del mes de todas las filas
+        for r in range(g):
+            if not active[r]:
+                continue
+            same = r > 0 and active[r - 1]
+            if same:
+                for i in range(n):
+                    if balance[r, i] != balance[r - 1, i]:
+                        same = False
+                        break
+            if same:
+                for i in range(n):
+                    interest[r, i] = interest[r - 1, i]
+                    min_payment[r, i] = min_payment[r - 1, i]
+                min_total[r] = min_total[r - 1]
+                continue
+            total = 0.0
+            for i in range(n):
+                b = balance[r, i]
+                if b <= BALANCE_EPS:
+                    interest[r, i] = 0.0
+                    min_payment[r, i] = 0.0
+                    continue
+                interest[r, i] = b * monthly_rate[i]
+                if is_loan[i]:
+                    p = loan_payment[i]
+                else:
+                    p = max(b * min_pct[i], interest[r, i] + 1.0, 10.0)
+                if p > b + interest[r, i]:
+                    p = b + interest[r, i]
+                min_payment[r, i] = p
+                total += p
+            min_total[r] = total
+
+        for r in range(g):
+            if not active[r]:
+                continue
+            cash = available
+            scale = 1.0
+            if min_total[r] > cash and min_total[r] > 0:
+                scale = cash / min_total[r]
+            cash -= min_total[r] * scale
+
+            for i in range(n):
+                if min_payment[r, i] == 0:
+                    continue
+                effective = min_payment[r, i] * scale
+                if effective <= 0:
+                    continue
+                cap = balance[r, i] + interest[r, i]
+                if effective > cap:
+                    effective = cap
+                principal = max(effective - interest[r, i], 0.0)
+                balance[r, i] -= principal
+                if balance[r, i] < 0:
+                    balance[r, i] = 0.0
+                total_paid[r, i] += effective
+                total_interest[r, i] += interest[r, i]
+                months[r, i] += 1
+
+            # Sobrante según la estrategia de la fila
+            while cash > BALANCE_EPS:
+                target = -1
+                if snowball[r]:
+                    for i in range(n):
+                        if balance[r, i] > BALANCE_EPS and (target < 0 or balance[r, i] < balance[r, target]):
+                            target = i
+                else:
+                    for k in range(n):
+                        if balance[r, order[r, k]] > BALANCE_EPS:
+                            target = order[r, k]
+                            break
+                if target < 0:
+                    break
+                extra = min(cash, balance[r, target])
+                balance[r, target] -= extra
+                total_paid[r, target] += extra
+                cash -= extra
+
+
+_KERNELS = {
+    "card_minimum": card_minimum_kernel,
+    "optimized": optimized_kernel,
+    "strategies": strategies_kernel,
+}
+
+
+def _book_kernels(card_minimum, optimized):
+    """
+    Kernels sobre todo el book (ver services/book_analytics_service.py):
+    recorren las deudas/clientes dentro de código compilado en vez de
+    llamar a los kernels por cliente desde Python.
+    """
+
+    def book_card_minimum(balance, monthly_rate, min_pct, max_months, total_interest, months):
+        for i in range(balance.shape[0]):
+            _, interest, m = card_minimum(balance[i], monthly_rate[i], min_pct[i], max_months)
+            total_interest[i] = interest
+            months[i] = m
+
+    def book_optimized(
+        starts, balance, monthly_rate, is_loan, loan_payment, min_pct, order,
+        available, max_months, total_interest,
+    ):
+        # Deudas del cliente c en [starts[c], starts[c + 1]); `order` es
+        # local a ese tramo.
+        for c in range(starts.shape[0] - 1):
+            lo, hi = starts[c], starts[c + 1]
+            if available[c] <= 0 or hi == lo:
+                continue
+            n = hi - lo
+            interest = np.zeros(n)
+            optimized(
+                balance[lo:hi].copy(), monthly_rate[lo:hi], is_loan[lo:hi], loan_payment[lo:hi],
+                min_pct[lo:hi], order[lo:hi], False, available[c], max_months,
+                np.zeros(n), interest, np.zeros(n, dtype=np.int64),
+            )
+            total_interest[c] = interest.sum()
+
+    return {"book_card_minimum": book_card_minimum, "book_optimized": book_optimized}
+
+_active: Optional[SimpleNamespace] = None
+_backend: Optional[str] = None
+
+
+def _compile() -> Optional[SimpleNamespace]:
+    try:
+        import numba
+    except ImportError:
+        return None
+    compiled = {name: numba.njit(cache=True, nogil=True)(fn) for name, fn in _KERNELS.items()}
+    # Cierran sobre los kernels compilados: sin caché en disco.
+    book = _book_kernels(compiled["card_minimum"], compiled["optimized"])
+    compiled.update({name: numba.njit(nogil=True)(fn) for name, fn in book.items()})
+    return SimpleNamespace(**compiled)
+
+
+def use_backend(name: str) -> str:
+    """Selecciona el backend ("auto" | "numba" | "python"); devuelve el efectivo."""
+    global _active, _backend
+    if name not in ("auto", "numba", "python"):
+        raise ValueError(f"SIMULATION_BACKEND desconocido: {name}")
+
+    _active = _compile() if name != "python" else None
+    _backend = "numba" if _active is not None else "python"
+    return _backend
+
+
+def get_kernels() -> Optional[SimpleNamespace]:
+    """Kernels compilados del backend vigente, o None si es Python."""
+    if _backend is None:
+        use_backend(os.getenv("SIMULATION_BACKEND", "auto").lower())
+    return _active
+
+
+def simulation_backend() -> str:
+    get_kernels()
+    return _backend
+
+
+def warm_up() -> None:
+    """Compila (o carga del caché) los kernels fuera del primer request."""
+    kernels = get_kernels()
+    if kernels is None:
+        return
+    kernels.card_minimum(1000.0, 0.03, 0.05, 600)
+    one = np.ones(1)
+    kernels.optimized(
+        one * 1000.0, one * 0.03, np.zeros(1, dtype=np.bool_), one * 0.0, one * 0.05,
+        np.zeros(1, dtype=np.int64), False, 500.0, 600,
+        np.zeros(1), np.zeros(1), np.zeros(1, dtype=np.int64),
+    )
+    kernels.strategies(
+        np.ones((1, 1)) * 1000.0, one * 0.03, np.zeros(1, dtype=np.bool_), one * 0.0, one * 0.05,
+        np.zeros((1, 1), dtype=np.int64), np.zeros(1, dtype=np.bool_), 500.0, 600,
+        np.zeros((1, 1)), np.zeros((1, 1)), np.zeros((1, 1), dtype=np.int64),
+    )
@@ -1,16 +1,15 @@
 import math
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 from ..models.portfolio import CustomerPortfolio
 from ..models.scenarios import (
     ScenarioSummary,
     DebtAmortizationSummary,
 )
-
-
-def _monthly_rate(annual_rate_pct: float) -> float:
-    """Convierte tasa anual en tasa mensual decimal."""
-    return (annual_rate_pct / 100.0) / 12.0
+from ..services.financial_math import annuity_total_interest, annuity_totals, monthly_rate
+from ..services.scenario_kernels import get_kernels
 
 
 def _simulate_card_minimum(
@@ -29,26 +28,32 @@ def _simulate_card_minimum(
     """
 
     starting_balance = balance
-    r = _monthly_rate(annual_rate_pct)
+    r = monthly_rate(annual_rate_pct)
 
-    total_paid = 0.0
-    total_interest = 0.0
-    months = 0
+    kernels = get_kernels()
+    if kernels is not None:
+        total_paid, total_interest, months = kernels.card_minimum(
+            balance, r, min_payment_pct / 100.0, max_months
+        )
+    else:
+        total_paid = 0.0
+        total_interest = 0.0
+        months = 0
 
-    while balance > 0.01 and months < max_months:
-        interest = balance * r
-        raw_min_payment = balance * (min_payment_pct / 100.0)
-        payment = max(raw_min_payment, interest + 1.0, 10.0)  
+        while balance > 0.01 and months < max_months:
+            interest = balance * r
+            raw_min_payment = balance * (min_payment_pct / 100.0)
+            payment = max(raw_min_payment, interest + 1.0, 10.0)
 
-        if payment > balance + interest:
-            payment = balance + interest 
+            if payment > balance + interest:
+                payment = balance + interest
 
-        principal_payment = payment - interest
-        balance -= principal_payment
+            principal_payment = payment - interest
+            balance -= principal_payment
 
-        total_paid += payment
-        total_interest += interest
-        months += 1
+            total_paid += payment
+            total_interest += interest
+            months += 1
 
     return DebtAmortizationSummary(
         product_id="(card-aggregated)",
@@ -72,16 +77,8 @@ def _simulate_loan_standard(
     """
 
     starting_balance = principal
-    r = _monthly_rate(annual_rate_pct)
     n = remaining_term_months
-
-    if r == 0:
-        monthly_payment = principal / n
-    else:
-        monthly_payment = principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-
-    total_paid = monthly_payment * n
-    total_interest = total_paid - principal
+    total_paid, total_interest = annuity_totals(principal, annual_rate_pct, n)
 
     return DebtAmortizationSummary(
         product_id="(loan-aggregated)",
@@ -93,6 +90,60 @@ def _simulate_loan_standard(
     )
 
 
+def card_minimum_totals(
+    balance: np.ndarray,
+    annual_rate_pct: np.ndarray,
+    min_payment_pct: np.ndarray,
+    max_months: int = 600,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `_simulate_card_minimum` para muchas tarjetas a la vez (mes a mes,
+    solo sobre las que siguen con saldo). Devuelve (intereses, meses).
+    """
+    balance = np.asarray(balance, dtype=float).copy()
+    r = monthly_rate(np.asarray(annual_rate_pct, dtype=float))
+    pct = np.asarray(min_payment_pct, dtype=float) / 100.0
+    total_interest = np.zeros(len(balance))
+    months = np.zeros(len(balance), dtype=np.int64)
+
+    kernels = get_kernels()
+    if kernels is not None:
+        kernels.book_card_minimum(balance, r, pct, max_months, total_interest, months)
+        return total_interest, months
+
+    idx = np.flatnonzero(balance > 0.01)
+    b, r, pct = balance[idx], r[idx], pct[idx]
+    acc = np.zeros(len(idx))
+    for month in range(max_months):
+        alive = b > 0.01
+        if not alive.all():
+            done = ~alive
+            total_interest[idx[done]] = acc[done]
+            months[idx[done]] = month
+            idx, b, r, pct, acc = idx[alive], b[alive], r[alive], pct[alive], acc[alive]
+        if idx.size == 0:
+            break
+        interest = b * r
+        payment = np.maximum(np.maximum(b * pct, interest + 1.0), 10.0)
+        payment = np.minimum(payment, b + interest)
+        b = b - (payment - interest)
+        acc += interest
+
+    total_interest[idx] = acc
+    months[idx] = max_months
+    return total_interest, months
+
+
+def loan_standard_totals(
+    principal: np.ndarray,
+    annual_rate_pct: np.ndarray,
+    remaining_term_months: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """`_simulate_loan_standard` vectorizado. Devuelve (intereses, meses)."""
+    n = np.asarray(remaining_term_months, dtype=np.int64)
+    return annuity_total_interest(principal, annual_rate_pct, n), n
+
+
 def simulate_minimum_payment_scenario(
     portfolio: CustomerPortfolio,
 ) -> ScenarioSummary:
@@ -1,75 +1,43 @@
-from typing import List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
-from ..models.portfolio import CustomerPortfolio
-from ..models.scenarios import ScenarioSummary, DebtAmortizationSummary
-
-
-def _monthly_rate(annual_rate_pct: float) -> float:
-    """Convierte tasa anual en tasa mensual decimal."""
-    return (annual_rate_pct / 100.0) / 12.0
-
-
-def _loan_monthly_payment(principal: float, annual_rate_pct: float, term_months: int) -> float:
-    """
-    Calcula la cuota fija de un préstamo con fórmula de anualidad.
-    La usaremos como "pago mínimo contractual" del loan.
-    """
-    r = _monthly_rate(annual_rate_pct)
-    n = term_months
-
-    if n <= 0:
-        return principal
-
-    if r == 0:
-        return principal / n
-
-    return principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
+import numpy as np
 
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import ScenarioSummary, DebtAmortizationSummary, RepaymentStrategy
+from ..services.financial_math import card_minimum_payment, loan_monthly_payment, monthly_rate
+from ..services.scenario_kernels import get_kernels
 
-def _card_minimum_payment(balance: float, annual_rate_pct: float, min_payment_pct: float) -> float:
-    """
-    Pago mínimo de tarjeta:
-      - porcentaje sobre saldo
-      - nunca menor que 10
-      - debe cubrir al menos intereses + algo de capital
-    """
-    r = _monthly_rate(annual_rate_pct)
-    interest = balance * r
-    raw_min = balance * (min_payment_pct / 100.0)
-    payment = max(raw_min, interest + 1.0, 10.0)
 
-    return min(payment, balance + interest)
+# Horizonte de simulación (meses).
+MAX_MONTHS = 600
 
 
-def simulate_optimized_plan(portfolio: CustomerPortfolio) -> ScenarioSummary:
+def _priority_key(strategy: RepaymentStrategy, arrears_threshold_days: int):
     """
-    Escenario 2: Plan optimizado.
-
-    Regla:
-      - Cada mes el cliente dispone de `available_cashflow` para pagar deudas.
-      - Primero paga los mínimos de todos los productos (loans + cards).
-      - Con lo que sobra, ataca la deuda con tasa más alta (y en caso de empate,
-        podrías priorizar las que estén en mora, aquí lo hacemos por tasa).
-      - Repite hasta que todas las deudas se cancelan o se llega a un máximo de meses.
+    Clave de orden (se usa con reverse=True) para elegir a qué deuda va el
+    sobrante del mes:
+      - avalanche: tasa más alta primero.
+      - snowball: saldo más chico primero.
+      - hybrid: primero las deudas en mora (days_past_due >= umbral) y,
+        dentro de cada grupo, tasa más alta primero.
     """
+    if strategy == "avalanche":
+        return lambda d: d["rate_annual"]
+    if strategy == "snowball":
+        return lambda d: -d["balance"]
+    if strategy == "hybrid":
+        return lambda d: (d["days_past_due"] >= arrears_threshold_days, d["rate_annual"])
+    raise ValueError(f"Estrategia desconocida: {strategy}")
 
-    available = portfolio.cashflow.available_cashflow
-    if available <= 0:
-        return ScenarioSummary(
-            customer_id=portfolio.customer_id,
-            scenario_type="optimized_plan",
-            total_months=0,
-            total_paid=0.0,
-            total_interest_paid=0.0,
-            debts=[],
-        )
 
-    # --------- Estado inicial por deuda ---------
+def _initial_state(portfolio: CustomerPortfolio) -> List[dict]:
+    """Estado inicial por deuda (loans primero, luego cards)."""
     debts_state = []
 
     # Loans
     for loan in portfolio.loans:
-        monthly_min = _loan_monthly_payment(
+        # Cuota contractual: el "pago mínimo" del loan.
+        monthly_min = loan_monthly_payment(
             principal=loan.principal,
             annual_rate_pct=loan.annual_rate_pct,
             term_months=loan.remaining_term_months,
@@ -104,87 +72,88 @@ def simulate_optimized_plan(portfolio: CustomerPortfolio) -> ScenarioSummary:
             }
         )
 
-    # --------- Simulación mes a mes ---------
-    max_months = 600
-    month = 0
+    return debts_state
 
-    while month < max_months:
-        if all(d["balance"] <= 0.01 for d in debts_state):
-            break
 
-        month += 1
+def _month_minimums(debts_state: List[dict]) -> Tuple[List[Tuple[int, float, float]], float]:
+    """Interés y pago mínimo del mes por deuda, y la suma de mínimos."""
+    min_total = 0.0
+    per_debt_min: List[Tuple[int, float, float]] = []
 
-        min_total = 0.0
-        per_debt_min: List[Tuple[int, float, float]] = []
+    for idx, d in enumerate(debts_state):
+        balance = d["balance"]
+        if balance <= 0.01:
+            per_debt_min.append((idx, 0.0, 0.0))
+            continue
 
-        for idx, d in enumerate(debts_state):
-            balance = d["balance"]
-            if balance <= 0.01:
-                per_debt_min.append((idx, 0.0, 0.0))
-                continue
+        r = monthly_rate(d["rate_annual"])
+        interest = balance * r
+
+        if d["product_type"] == "loan":
+            min_payment = d["min_payment"]
+            min_payment = min(min_payment, balance + interest)
+        else:
+            min_payment = card_minimum_payment(
+                balance=balance,
+                annual_rate_pct=d["rate_annual"],
+                min_payment_pct=d["min_payment_pct"],
+            )
 
-            r = _monthly_rate(d["rate_annual"])
-            interest = balance * r
+        per_debt_min.append((idx, interest, min_payment))
+        min_total += min_payment
 
-            if d["product_type"] == "loan":
-                min_payment = d["min_payment"]
-                min_payment = min(min_payment, balance + interest)
-            else:
-                min_payment = _card_minimum_payment(
-                    balance=balance,
-                    annual_rate_pct=d["rate_annual"],
-                    min_payment_pct=d["min_payment_pct"],
-                )
+    return per_debt_min, min_total
 
-            per_debt_min.append((idx, interest, min_payment))
-            min_total += min_payment
 
-        cash_available = available
-        scale_factor = 1.0
-        if min_total > cash_available and min_total > 0:
-            scale_factor = cash_available / min_total
+def _apply_minimums(
+    debts_state: List[dict],
+    per_debt_min: List[Tuple[int, float, float]],
+    scale_factor: float,
+) -> None:
+    """Aplica los mínimos del mes (escalados si el flujo no alcanza)."""
+    for idx, interest, min_payment in per_debt_min:
+        if min_payment == 0:
+            continue
 
-        cash_available -= min_total * scale_factor
+        d = debts_state[idx]
+        effective_payment = min_payment * scale_factor
 
-        for idx, interest, min_payment in per_debt_min:
-            if min_payment == 0:
-                continue
+        if effective_payment <= 0:
+            continue
 
-            d = debts_state[idx]
-            effective_payment = min_payment * scale_factor
+        max_this_month = d["balance"] + interest
+        if effective_payment > max_this_month:
+            effective_payment = max_this_month
 
-            if effective_payment <= 0:
-                continue
+        principal_payment = max(effective_payment - interest, 0.0)
+        d["balance"] -= principal_payment
+        if d["balance"] < 0:
+            d["balance"] = 0.0
 
-            max_this_month = d["balance"] + interest
-            if effective_payment > max_this_month:
-                effective_payment = max_this_month
+        d["total_paid"] += effective_payment
+        d["total_interest"] += interest if effective_payment > 0 else 0.0
+        d["months"] += 1
 
-            principal_payment = max(effective_payment - interest, 0.0)
-            d["balance"] -= principal_payment
-            if d["balance"] < 0:
-                d["balance"] = 0.0
 
-            d["total_paid"] += effective_payment
-            d["total_interest"] += interest if effective_payment > 0 else 0.0
-            d["months"] += 1
+def _pay_extra(debts_state: List[dict], cash_available: float, priority) -> None:
+    """Reparte el sobrante del mes siguiendo la prioridad de la estrategia."""
+    while cash_available > 0.01 and any(d["balance"] > 0.01 for d in debts_state):
 
-        while cash_available > 0.01 and any(d["balance"] > 0.01 for d in debts_state):
+        debts_sorted = sorted(
+            [d for d in debts_state if d["balance"] > 0.01],
+            key=priority,
+            reverse=True,
+        )
+        target = debts_sorted[0]
+        extra = min(cash_available, target["balance"])
 
-            debts_sorted = sorted(
-                [d for d in debts_state if d["balance"] > 0.01],
-                key=lambda x: x["rate_annual"],
-                reverse=True,
-            )
-            target = debts_sorted[0]
-            extra = min(cash_available, target["balance"])
+        target["balance"] -= extra
+        target["total_paid"] += extra
 
-            target["balance"] -= extra
-            target["total_paid"] += extra
+        cash_available -= extra
 
-            cash_available -= extra
 
-    # --------- Construir resumen final ---------
+def _build_summary(portfolio: CustomerPortfolio, debts_state: List[dict]) -> ScenarioSummary:
     debt_summaries: List[DebtAmortizationSummary] = []
 
     for d in debts_state:
@@ -215,4 +184,273 @@ def simulate_optimized_plan(portfolio: CustomerPortfolio) -> ScenarioSummary:
         total_paid=total_paid,
         total_interest_paid=total_interest,
         debts=debt_summaries,
-    )
\ No newline at end of file
+    )
+
+
+def _order(debts_state: List[dict], strategy: RepaymentStrategy, arrears_threshold_days: int) -> np.ndarray:
+    """Mismo orden (estable) que `sorted(..., reverse=True)` de `_pay_extra`."""
+    priority = _priority_key(strategy, arrears_threshold_days)
+    n = len(debts_state)
+    return np.array(sorted(range(n), key=lambda i: priority(debts_state[i]), reverse=True), dtype=np.int64)
+
+
+def _kernel_inputs(debts_state: List[dict]):
+    is_loan = np.array([d["product_type"] == "loan" for d in debts_state], dtype=np.bool_)
+    balance = np.array([d["balance"] for d in debts_state], dtype=np.float64)
+    rates = monthly_rate(np.array([d["rate_annual"] for d in debts_state], dtype=np.float64))
+    loan_payment = np.array([d.get("min_payment", 0.0) for d in debts_state], dtype=np.float64)
+    min_pct = np.array([d.get("min_payment_pct", 0.0) / 100.0 for d in debts_state], dtype=np.float64)
+    return balance, rates, is_loan, loan_payment, min_pct
+
+
+def _store_totals(debts_state: List[dict], balance, total_paid, total_interest, months) -> None:
+    for i, d in enumerate(debts_state):
+        d["balance"] = float(balance[i])
+        d["total_paid"] = float(total_paid[i])
+        d["total_interest"] = float(total_interest[i])
+        d["months"] = int(months[i])
+
+
+def _simulate_with_kernel(
+    kernels,
+    debts_state: List[dict],
+    available: float,
+    strategy: RepaymentStrategy,
+    arrears_threshold_days: int,
+    max_months: int,
+) -> None:
+    """Corre `optimized_kernel` sobre el estado inicial y vuelca los totales."""
+    n = len(debts_state)
+    balance, rates, is_loan, loan_payment, min_pct = _kernel_inputs(debts_state)
+    order = _order(debts_state, strategy, arrears_threshold_days)
+
+    total_paid = np.zeros(n)
+    total_interest = np.zeros(n)
+    months = np.zeros(n, dtype=np.int64)
+    kernels.optimized(
+        balance, rates, is_loan, loan_payment, min_pct, order,
+        strategy == "snowball", float(available), max_months,
+        total_paid, total_interest, months,
+    )
+    _store_totals(debts_state, balance, total_paid, total_interest, months)
+
+
+def _simulate_strategies_with_kernel(
+    kernels,
+    states: Dict[str, List[dict]],
+    available: float,
+    arrears_threshold_days: int,
+    max_months: int,
+) -> None:
+    """Corre `strategies_kernel` (una fila por estrategia) y vuelca los totales."""
+    strategies = list(states)
+    first = states[strategies[0]]
+    g, n = len(strategies), len(first)
+    balance, rates, is_loan, loan_payment, min_pct = _kernel_inputs(first)
+    balance = np.tile(balance, (g, 1))
+    order = np.array(
+        [_order(first, s, arrears_threshold_days) for s in strategies], dtype=np.int64
+    ).reshape(g, n)
+    snowball = np.array([s == "snowball" for s in strategies], dtype=np.bool_)
+
+    total_paid = np.zeros((g, n))
+    total_interest = np.zeros((g, n))
+    months = np.zeros((g, n), dtype=np.int64)
+    kernels.strategies(
+        balance, rates, is_loan, loan_payment, min_pct, order, snowball,
+        float(available), max_months, total_paid, total_interest, months,
+    )
+    for r, s in enumerate(strategies):
+        _store_totals(states[s], balance[r], total_paid[r], total_interest[r], months[r])
+
+
+def _simulate_strategies_python(
+    states: Dict[str, List[dict]],
+    available: float,
+    arrears_threshold_days: int,
+    max_months: int,
+) -> None:
+    """
+    Mismo algoritmo que `strategies_kernel` en Python puro (listas, sin
+    dicts por deuda): una fila por estrategia en un solo bucle de meses;
+    filas con los mismos saldos que la anterior reutilizan sus mínimos.
+    """
+    strategies = list(states)
+    first = states[strategies[0]]
+    n = len(first)
+    rate = [monthly_rate(d["rate_annual"]) for d in first]
+    is_loan = [d["product_type"] == "loan" for d in first]
+    loan_payment = [d.get("min_payment", 0.0) for d in first]
+    min_pct = [d.get("min_payment_pct", 0.0) / 100.0 for d in first]
+    orders = [_order(first, s, arrears_threshold_days).tolist() for s in strategies]
+    snowball = [s == "snowball" for s in strategies]
+
+    g = len(strategies)
+    balance = [[d["balance"] for d in first] for _ in range(g)]
+    total_paid = [[0.0] * n for _ in range(g)]
+    total_interest = [[0.0] * n for _ in range(g)]
+    months = [[0] * n for _ in range(g)]
+    debts = range(n)
+
+    active = list(range(g))
+    month = 0
+    while month < max_months:
+        active = [r for r in active if any(b > 0.01 for b in balance[r])]
+        if not active:
+            break
+
+        month += 1
+
+        previous = None
+        for r in active:
+            b = balance[r]
+            key = tuple(b)
+            if key != previous:
+                # Mínimos del mes (compartidos con la fila anterior si coinciden).
+                interest = [0.0] * n
+                mins = [0.0] * n
+                min_total = 0.0
+                for i in debts:
+                    if b[i] <= 0.01:
+                        continue
+                    interest[i] = b[i] * rate[i]
+                    if is_loan[i]:
+                        p = loan_payment[i]
+                    else:
+                        p = max(b[i] * min_pct[i], interest[i] + 1.0, 10.0)
+                    if p > b[i] + interest[i]:
+                        p = b[i] + interest[i]
+                    mins[i] = p
+                    min_total += p
+                scale = 1.0
+                if min_total > available and min_total > 0:
+                    scale = available / min_total
+                previous = key
+
+            cash = available - min_total * scale
+            paid, charged, paid_months = total_paid[r], total_interest[r], months[r]
+            for i in debts:
+                if mins[i] == 0:
+                    continue
+                effective = mins[i] * scale
+                if effective <= 0:
+                    continue
+                cap = b[i] + interest[i]
+                if effective > cap:
+                    effective = cap
+                principal = effective - interest[i]
+                if principal > 0:
+                    b[i] = b[i] - principal if b[i] > principal else 0.0
+                paid[i] += effective
+                charged[i] += interest[i]
+                paid_months[i] += 1
+
+            # Sobrante según la estrategia de la fila
+            while cash > 0.01:
+                target = -1
+                if snowball[r]:
+                    for i in debts:
+                        if b[i] > 0.01 and (target < 0 or b[i] < b[target]):
+                            target = i
+                else:
+                    for i in orders[r]:
+                        if b[i] > 0.01:
+                            target = i
+                            break
+                if target < 0:
+                    break
+                extra = min(cash, b[target])
+                b[target] -= extra
+                paid[target] += extra
+                cash -= extra
+
+    for r, s in enumerate(strategies):
+        _store_totals(states[s], balance[r], total_paid[r], total_interest[r], months[r])
+
+
+def _simulate_scalar(debts_state: List[dict], available: float, priority, max_months: int) -> None:
+    """Simulación mes a mes de una estrategia (backend Python)."""
+    month = 0
+    while month < max_months and any(d["balance"] > 0.01 for d in debts_state):
+        month += 1
+
+        per_debt_min, min_total = _month_minimums(debts_state)
+
+        cash_available = available
+        scale_factor = 1.0
+        if min_total > cash_available and min_total > 0:
+            scale_factor = cash_available / min_total
+
+        cash_available -= min_total * scale_factor
+
+        _apply_minimums(debts_state, per_debt_min, scale_factor)
+        _pay_extra(debts_state, cash_available, priority)
+
+
+def simulate_optimized_plan(
+    portfolio: CustomerPortfolio,
+    strategy: RepaymentStrategy = "avalanche",
+    arrears_threshold_days: int = 1,
+) -> ScenarioSummary:
+    """
+    Escenario 2: Plan optimizado.
+
+    Regla:
+      - Cada mes el cliente dispone de `available_cashflow` para pagar deudas.
+      - Primero paga los mínimos de todos los productos (loans + cards).
+      - Con lo que sobra, ataca la deuda prioritaria según `strategy`
+        (por defecto avalanche: tasa más alta; ver `_priority_key`).
+      - Repite hasta que todas las deudas se cancelan o se llega a un máximo de meses.
+    """
+    debts_state = _initial_state(portfolio)
+
+    available = portfolio.cashflow.available_cashflow
+    if available <= 0:
+        return _build_summary(portfolio, [])
+
+    kernels = get_kernels()
+    if kernels is not None:
+        _simulate_with_kernel(
+            kernels, debts_state, available, strategy, arrears_threshold_days, MAX_MONTHS
+        )
+    else:
+        _simulate_scalar(
+            debts_state, available, _priority_key(strategy, arrears_threshold_days), MAX_MONTHS
+        )
+    return _build_summary(portfolio, debts_state)
+
+
+def simulate_optimized_plans(
+    portfolio: CustomerPortfolio,
+    strategies: Sequence[RepaymentStrategy],
+    arrears_threshold_days: int = 1,
+) -> Dict[str, ScenarioSummary]:
+    """
+    Plan optimizado para varias estrategias en una sola simulación: una
+    fila por estrategia (`strategies_kernel` con Numba,
+    `_simulate_strategies_python` si no). Todas avanzan en el mismo bucle
+    de meses; los mínimos del mes se calculan en una pasada por fila y se
+    reutilizan entre estrategias con los mismos saldos. Solo el reparto
+    del sobrante es propio de cada estrategia.
+
+    Cuesta menos que simular cada estrategia por separado
+    (`scripts/bench_strategies.py`): ~x1.1 con Numba (el costo es sobre
+    todo armar los arreglos) y x2 a x4 con Python.
+    """
+    for s in strategies:
+        _priority_key(s, arrears_threshold_days)  # falla con estrategias desconocidas
+
+    available = portfolio.cashflow.available_cashflow
+    if available <= 0:
+        return {s: _build_summary(portfolio, []) for s in strategies}
+
+    states = {s: _initial_state(portfolio) for s in strategies}
+    if not states[strategies[0]]:
+        return {s: _build_summary(portfolio, []) for s in strategies}
+
+    kernels = get_kernels()
+    if kernels is not None:
+        _simulate_strategies_with_kernel(kernels, states, available, arrears_threshold_days, MAX_MONTHS)
+    else:
+        _simulate_strategies_python(states, available, arrears_threshold_days, MAX_MONTHS)
+    return {s: _build_summary(portfolio, states[s]) for s in strategies}
@@ -0,0 +1,271 @@
+"""
+Cronograma mes a mes (pago, interés y saldo por deuda) de cada escenario.
+
+Las filas se generan de forma perezosa, un mes a la vez, replicando las
+mismas reglas que los motores que devuelven totales; así el endpoint puede
+transmitirlas (NDJSON o CSV) sin armar la matriz meses x deudas en memoria.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ..models.behavior import CustomerPaymentBehavior
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import (
+    DebtScheduleSeries,
+    RepaymentStrategy,
+    ScenarioScheduleColumns,
+)
+from ..services.financial_math import loan_monthly_payment, monthly_rate
+from ..services.scenario_consolidation_service import simulate_consolidation_scenario
+from ..services.scenario_optimized_service import (
+    _apply_minimums,
+    _initial_state,
+    _month_minimums,
+    _pay_extra,
+    _priority_key,
+)
+from ..services.scenario_behavioral_service import _expected_monthly_payment
+
+
+# (mes, product_id, product_type, pago, interés, saldo al cierre del mes)
+ScheduleRow = Tuple[int, str, str, float, float, float]
+
+SCHEDULE_FIELDS = ["month", "product_id", "product_type", "payment", "interest", "balance"]
+
+MAX_MONTHS = 600
+
+
+# --------- Deudas independientes (una trayectoria por deuda) ---------
+
+def _iter_annuity(principal: float, annual_rate_pct: float, term_months: int) -> Iterator[Tuple[float, float, float]]:
+    """Cuota fija durante `term_months` (mismo total que la fórmula de anualidad)."""
+    if term_months <= 0:
+        yield principal, 0.0, 0.0
+        return
+
+    r = monthly_rate(annual_rate_pct)
+    payment = loan_monthly_payment(principal, annual_rate_pct, term_months)
+    balance = principal
+    for _ in range(term_months):
+        interest = balance * r
+        balance = max(balance + interest - payment, 0.0)
+        yield payment, interest, balance
+
+
+def _iter_card_minimum(
+    balance: float,
+    annual_rate_pct: float,
+    min_payment_pct: float,
+    max_months: int = MAX_MONTHS,
+) -> Iterator[Tuple[float, float, float]]:
+    """Mismas reglas que `_simulate_card_minimum`."""
+    r = monthly_rate(annual_rate_pct)
+    months = 0
+    while balance > 0.01 and months < max_months:
+        interest = balance * r
+        payment = max(balance * (min_payment_pct / 100.0), interest + 1.0, 10.0)
+        if payment > balance + interest:
+            payment = balance + interest
+        balance -= payment - interest
+        months += 1
+        yield payment, interest, balance
+
+
+def _iter_fixed_payment(
+    balance: float,
+    annual_rate_pct: float,
+    monthly_payment: float,
+    max_months: int = MAX_MONTHS,
+) -> Iterator[Tuple[float, float, float]]:
+    """Mismas reglas que `_simulate_fixed_payment` (escenario behavioral)."""
+    r = monthly_rate(annual_rate_pct)
+    months = 0
+    while balance > 0.01 and months < max_months:
+        interest = balance * r
+        payment = min(max(monthly_payment, 0.0), balance + interest)
+        balance += interest - payment
+        months += 1
+        yield payment, interest, balance
+
+
+def _merge_months(debts: List[Tuple[str, str, Iterator[Tuple[float, float, float]]]]) -> Iterator[ScheduleRow]:
+    """Intercala las trayectorias de cada deuda en orden de mes."""
+    active = list(debts)
+    month = 0
+    while active:
+        month += 1
+        still = []
+        for product_id, product_type, steps in active:
+            step = next(steps, None)
+            if step is None:
+                continue
+            payment, interest, balance = step
+            yield month, product_id, product_type, payment, interest, balance
+            still.append((product_id, product_type, steps))
+        active = still
+
+
+def iter_minimum_schedule(portfolio: CustomerPortfolio) -> Iterator[ScheduleRow]:
+    debts = [
+        (
+            loan.loan_id,
+            "loan",
+            _iter_annuity(loan.principal, loan.annual_rate_pct, loan.remaining_term_months),
+        )
+        for loan in portfolio.loans
+    ] + [
+        (
+            card.card_id,
+            "card",
+            _iter_card_minimum(card.balance, card.annual_rate_pct, card.min_payment_pct),
+        )
+        for card in portfolio.cards
+    ]
+    return _merge_months(debts)
+
+
+def iter_behavioral_schedule(
+    portfolio: CustomerPortfolio,
+    behavior: CustomerPaymentBehavior,
+) -> Iterator[ScheduleRow]:
+    by_product = {p.product_id: p for p in behavior.products}
+    debts = []
+    for loan in portfolio.loans:
+        observed = by_product.get(loan.loan_id)
+        monthly = (
+            _expected_monthly_payment(observed)
+            if observed is not None
+            else loan_monthly_payment(loan.principal, loan.annual_rate_pct, loan.remaining_term_months)
+        )
+        debts.append((loan.loan_id, "loan", _iter_fixed_payment(loan.principal, loan.annual_rate_pct, monthly)))
+    for card in portfolio.cards:
+        observed = by_product.get(card.card_id)
+        steps = (
+            _iter_fixed_payment(card.balance, card.annual_rate_pct, _expected_monthly_payment(observed))
+            if observed is not None
+            else _iter_card_minimum(card.balance, card.annual_rate_pct, card.min_payment_pct)
+        )
+        debts.append((card.card_id, "card", steps))
+    return _merge_months(debts)
+
+
+def iter_consolidation_schedule(portfolio: CustomerPortfolio, offers_raw) -> Iterator[ScheduleRow]:
+    """Cronograma del préstamo consolidado elegido por `simulate_consolidation_scenario`."""
+    scenario = simulate_consolidation_scenario(portfolio, offers_raw)
+    if not scenario.debts:
+        return iter(())
+
+    loan = scenario.debts[0]
+    offer = next(o for o in offers_raw if o.get("offer_id") == loan.product_id)
+    steps = _iter_annuity(loan.starting_balance, float(offer["new_rate_pct"]), loan.months_to_payoff)
+    return _merge_months([(loan.product_id, "loan", steps)])
+
+
+# --------- Plan optimizado (deudas acopladas por el flujo) ---------
+
+def iter_optimized_schedule(
+    portfolio: CustomerPortfolio,
+    strategy: RepaymentStrategy = "avalanche",
+    arrears_threshold_days: int = 1,
+) -> Iterator[ScheduleRow]:
+    """
+    Mismo loop que `simulate_optimized_plan`, emitiendo por mes lo que cada
+    deuda activa pagó y devengó.
+    """
+    available = portfolio.cashflow.available_cashflow
+    if available <= 0:
+        return
+
+    debts_state = _initial_state(portfolio)
+    priority = _priority_key(strategy, arrears_threshold_days)
+
+    month = 0
+    while month < MAX_MONTHS:
+        active = [d for d in debts_state if d["balance"] > 0.01]
+        if not active:
+            break
+
+        month += 1
+        before = [(d["total_paid"], d["total_interest"]) for d in active]
+
+        per_debt_min, min_total = _month_minimums(debts_state)
+        cash_available = available
+        scale_factor = 1.0
+        if min_total > cash_available and min_total > 0:
+            scale_factor = cash_available / min_total
+        cash_available -= min_total * scale_factor
+
+        _apply_minimums(debts_state, per_debt_min, scale_factor)
+        _pay_extra(debts_state, cash_available, priority)
+
+        for d, (paid, interest) in zip(active, before):
+            yield (
+                month,
+                d["product_id"],
+                d["product_type"],
+                d["total_paid"] - paid,
+                d["total_interest"] - interest,
+                d["balance"],
+            )
+
+
+# --------- Formatos de salida ---------
+
+def schedule_ndjson(rows: Iterable[ScheduleRow]) -> Iterator[str]:
+    """Una línea JSON por (mes, deuda)."""
+    for row in rows:
+        yield json.dumps(dict(zip(SCHEDULE_FIELDS, row))) + "\n"
+
+
+def schedule_csv(rows: Iterable[ScheduleRow]) -> Iterator[str]:
+    """CSV con encabezado, emitido en un bloque por mes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SCHEDULE_FIELDS)
+    current: Optional[int] = None
+    for row in rows:
+        if current is not None and row[0] != current:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        current = row[0]
+        writer.writerow(row)
+    yield buffer.getvalue()
+
+
+def schedule_columns(
+    customer_id: str,
+    scenario_type: str,
+    rows: Iterable[ScheduleRow],
+) -> ScenarioScheduleColumns:
+    """
+    Variante por columnas para gráficos: una serie por deuda desde su
+    primer mes hasta que se cancela (sin ceros de relleno). Los montos van
+    en soles, redondeados a 2 decimales.
+    """
+    series = {}
+    total_months = 0
+    for month, product_id, product_type, payment, interest, balance in rows:
+        s = series.get(product_id)
+        if s is None:
+            s = series[product_id] = DebtScheduleSeries(
+                product_id=product_id,
+                product_type=product_type,
+                start_month=month,
+                payment=[],
+                interest=[],
+                balance=[],
+            )
+        s.payment.append(round(payment, 2))
+        s.interest.append(round(interest, 2))
+        s.balance.append(round(max(balance, 0.0), 2))
+        total_months = month
+
+    return ScenarioScheduleColumns(
+        customer_id=customer_id,
+        scenario_type=scenario_type,
+        total_months=total_months,
+        series=list(series.values()),
+    )
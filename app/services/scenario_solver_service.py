@@ -0,0 +1,313 @@
+"""
+Modo solver del plan optimizado: asignación mensual de pagos que minimiza
+el interés total (programa lineal resuelto con HiGHS vía scipy).
+
+Formulación (T meses, D deudas, r = tasa mensual, e_t = escala que el
+greedy aplica a los mínimos en el mes t, 1 si el flujo los cubre):
+  - saldo[t+1, d] = saldo[t, d] * (1 + r_d) - pago[t, d], saldo >= 0
+  - sum_d pago[t, d] <= available_cashflow
+  - tarjetas: pago >= e_t * max(min_payment_pct, r) * saldo (sin los pisos
+    fijos de 1 y 10 del greedy, que no son lineales)
+  - préstamos: pago >= e_t * interés y el saldo no debería quedar por
+    encima del cronograma de la cuota escalada por e_t (se permite prepagar)
+  - objetivo: min sum r_d * saldo[t, d] + penalización por cada sol de
+    mínimo no pagado o de saldo sobre el cronograma
+
+Mínimos y cronogramas son restricciones blandas (con la penalización): el
+LP siempre tiene solución salvo por el plazo. El greedy es la referencia:
+su duración fija el horizonte T (si terminó, se exige saldo 0 al final).
+No se le pasa como punto inicial (linprog/HiGHS no lo admite).
+
+Si el LP no termina en ese plazo o su plan paga más intereses que el
+greedy (el greedy no capitaliza el interés que no alcanza a pagar), el
+status es "greedy" y `solver` es el plan greedy.
+scipy es opcional: sin él el status es "unavailable".
+"""
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import (
+    DebtAmortizationSummary,
+    OptimizedSolverResult,
+    ScenarioSummary,
+)
+from ..services.scenario_batch_engine import debt_arrays
+from ..services.scenario_optimized_service import (
+    _apply_minimums,
+    _initial_state,
+    _month_minimums,
+    _pay_extra,
+    _priority_key,
+    simulate_optimized_plan,
+)
+
+
+SOLVER_TIME_LIMIT_S = float(os.getenv("SOLVER_TIME_LIMIT_S", "2.0"))
+
+MAX_MONTHS = 600
+
+# Costo (en el objetivo) de cada sol de mínimo no pagado o de préstamo por
+# encima de su cronograma; muy por encima del interés de un mes.
+SHORTFALL_PENALTY = 100.0
+
+
+def _greedy_scales(portfolio: CustomerPortfolio, months: int) -> np.ndarray:
+    """
+    Escala que el greedy (avalanche) aplica a los mínimos en cada mes:
+    flujo / suma de mínimos si no alcanza, 1 si alcanza o ya terminó.
+    Mismo loop que `simulate_optimized_plan`.
+    """
+    scales = np.ones(months)
+    available = portfolio.cashflow.available_cashflow
+    debts_state = _initial_state(portfolio)
+    priority = _priority_key("avalanche", 1)
+
+    for t in range(months):
+        if not any(d["balance"] > 0.01 for d in debts_state):
+            break
+        per_debt_min, min_total = _month_minimums(debts_state)
+        if min_total > available and min_total > 0:
+            scales[t] = available / min_total
+        _apply_minimums(debts_state, per_debt_min, scales[t])
+        _pay_extra(debts_state, available - min_total * scales[t], priority)
+    return scales
+
+
+def _loan_schedule(principal: float, r: float, payment: float, scales: np.ndarray) -> np.ndarray:
+    """
+    Saldo del préstamo después de t = 1..T cuotas, pagando en cada mes la
+    cuota escalada `scales[t] * payment` (el cronograma contractual si
+    todas las escalas son 1).
+    """
+    sched = np.empty(len(scales))
+    balance = principal
+    for t, scale in enumerate(scales):
+        balance = max(balance * (1 + r) - scale * payment, 0.0)
+        sched[t] = balance
+    return sched
+
+
+def _solver_summary(
+    portfolio: CustomerPortfolio,
+    product_ids: List[str],
+    product_types: List[str],
+    start: np.ndarray,
+    rate: np.ndarray,
+    pay: np.ndarray,
+    bal: np.ndarray,
+) -> ScenarioSummary:
+    """Resumen del plan del LP con la misma forma que el greedy."""
+    debts = []
+    for j, pid in enumerate(product_ids):
+        paying = np.flatnonzero(pay[:, j] > 0.005)
+        if paying.size == 0:
+            continue
+        owing = bal[:-1, j] > 0.01
+        debts.append(
+            DebtAmortizationSummary(
+                product_id=pid,
+                product_type=product_types[j],
+                starting_balance=float(start[j]),
+                total_paid=float(pay[:, j].sum()),
+                total_interest_paid=float((bal[:-1, j] * rate[j])[owing].sum()),
+                months_to_payoff=int(paying[-1]) + 1,
+            )
+        )
+
+    return ScenarioSummary(
+        customer_id=portfolio.customer_id,
+        scenario_type="optimized_plan",
+        total_months=max((d.months_to_payoff for d in debts), default=0),
+        total_paid=sum(d.total_paid for d in debts),
+        total_interest_paid=sum(d.total_interest_paid for d in debts),
+        debts=debts,
+    )
+
+
+def _solve_lp(debts, cash: float, horizon: int, must_finish: bool, scales: np.ndarray, time_limit_s: float):
+    """
+    Arma y resuelve el LP. Variables: pagos (T x D), saldos al final de
+    cada mes (T x D), faltante de cada mínimo (T x D) y exceso de cada
+    préstamo sobre su cronograma (T x D). Faltantes y excesos se penalizan
+    con SHORTFALL_PENALTY por sol, así que el LP primero cumple mínimos y
+    cronogramas todo lo que el flujo permite y luego minimiza el interés.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+    d = len(debts.balance)
+    r = debts.monthly_rate
+    n_pay = horizon * d
+    n_var = 4 * n_pay
+
+    def pay_idx(t, j):
+        return t * d + j
+
+    def bal_idx(t, j):  # saldo al final del mes t (t = 1..horizon)
+        return n_pay + (t - 1) * d + j
+
+    def short_idx(t, j):  # faltante del mínimo del mes t (t = 0..horizon-1)
+        return 2 * n_pay + t * d + j
+
+    def over_idx(t, j):  # exceso sobre el cronograma al final del mes t
+        return 3 * n_pay + (t - 1) * d + j
+
+    # Objetivo: interés de cada mes sobre el saldo inicial del mes (el del
+    # mes 1 es constante y no entra al LP) más la penalización.
+    c = np.zeros(n_var)
+    for t in range(1, horizon):
+        c[bal_idx(t, 0):bal_idx(t, 0) + d] = r
+    c[2 * n_pay:] = SHORTFALL_PENALTY
+
+    # Dinámica del saldo (igualdades).
+    eq_rows, eq_cols, eq_vals = [], [], []
+    b_eq = np.zeros(n_pay)
+    for t in range(horizon):
+        for j in range(d):
+            row = t * d + j
+            eq_rows += [row, row]
+            eq_cols += [bal_idx(t + 1, j), pay_idx(t, j)]
+            eq_vals += [1.0, 1.0]
+            if t == 0:
+                b_eq[row] = (1 + r[j]) * debts.balance[j]
+            else:
+                eq_rows.append(row)
+                eq_cols.append(bal_idx(t, j))
+                eq_vals.append(-(1 + r[j]))
+    a_eq = coo_matrix((eq_vals, (eq_rows, eq_cols)), shape=(n_pay, n_var))
+
+    # Flujo mensual, pagos mínimos escalados como en el greedy y
+    # cronograma (escalado) de los préstamos (desigualdades <=).
+    floor = np.outer(scales, np.where(debts.is_card, np.maximum(debts.min_payment_pct, r), r))
+    schedules = {
+        j: _loan_schedule(debts.balance[j], r[j], debts.loan_payment[j], scales)
+        for j in range(d)
+        if not debts.is_card[j]
+    }
+    ub_rows, ub_cols, ub_vals = [], [], []
+    b_ub = np.zeros(horizon + 2 * n_pay)
+    for t in range(horizon):
+        for j in range(d):
+            ub_rows.append(t)
+            ub_cols.append(pay_idx(t, j))
+            ub_vals.append(1.0)
+        b_ub[t] = cash
+        for j in range(d):
+            # -pago - faltante + piso * saldo <= 0
+            row = horizon + t * d + j
+            ub_rows += [row, row]
+            ub_cols += [pay_idx(t, j), short_idx(t, j)]
+            ub_vals += [-1.0, -1.0]
+            if t == 0:
+                b_ub[row] = -floor[t, j] * debts.balance[j]
+            else:
+                ub_rows.append(row)
+                ub_cols.append(bal_idx(t, j))
+                ub_vals.append(floor[t, j])
+            if j in schedules:
+                # saldo - exceso <= cronograma
+                row = horizon + n_pay + t * d + j
+                ub_rows += [row, row]
+                ub_cols += [bal_idx(t + 1, j), over_idx(t + 1, j)]
+                ub_vals += [1.0, -1.0]
+                b_ub[row] = schedules[j][t] + 1e-6
+    a_ub = coo_matrix((ub_vals, (ub_rows, ub_cols)), shape=(horizon + 2 * n_pay, n_var))
+
+    # Cotas: saldo final 0 si aplica; sin exceso posible en tarjetas.
+    upper = np.full(n_var, np.inf)
+    for j in range(d):
+        if must_finish:
+            upper[bal_idx(horizon, j)] = 0.0
+        if j not in schedules:
+            upper[over_idx(1, j):over_idx(horizon, j) + 1:d] = 0.0
+    bounds = np.column_stack([np.zeros(n_var), upper])
+
+    return linprog(
+        c,
+        A_ub=a_ub.tocsr(),
+        b_ub=b_ub,
+        A_eq=a_eq.tocsr(),
+        b_eq=b_eq,
+        bounds=bounds,
+        method="highs",
+        options={"time_limit": time_limit_s},
+    )
+
+
+def solve_optimal_plan(
+    portfolio: CustomerPortfolio,
+    time_limit_s: Optional[float] = None,
+) -> OptimizedSolverResult:
+    """
+    Plan optimizado por LP comparado con el greedy (`simulate_optimized_plan`).
+
+    El tiempo de resolución está acotado por `time_limit_s` (default
+    SOLVER_TIME_LIMIT_S); si se alcanza, el status es "time_limit" y solo
+    se devuelve el greedy. "infeasible" queda para clientes sin flujo
+    disponible o sin deudas.
+    """
+    greedy = simulate_optimized_plan(portfolio)
+    started = time.perf_counter()
+
+    def _result(status, horizon=0, solver=None):
+        result = OptimizedSolverResult(
+            customer_id=portfolio.customer_id,
+            status=status,
+            solve_seconds=time.perf_counter() - started,
+            horizon_months=horizon,
+            greedy=greedy,
+            solver=solver,
+        )
+        if solver is not None:
+            result.interest_improvement_vs_greedy = (
+                greedy.total_interest_paid - solver.total_interest_paid
+            )
+            result.months_improvement_vs_greedy = greedy.total_months - solver.total_months
+        return result
+
+    try:
+        import scipy.optimize  # noqa: F401
+    except ImportError:
+        return _result("unavailable")
+
+    cash = portfolio.cashflow.available_cashflow
+    debts = debt_arrays(portfolio)
+    d = len(debts.balance)
+    if cash <= 0 or d == 0:
+        return _result("infeasible")
+
+    # El horizonte es el del greedy; si el greedy terminó, el LP también
+    # debe terminar dentro de ese plazo.
+    horizon = greedy.total_months if 0 < greedy.total_months < MAX_MONTHS else MAX_MONTHS
+    limit = SOLVER_TIME_LIMIT_S if time_limit_s is None else time_limit_s
+
+    res = _solve_lp(debts, cash, horizon, horizon < MAX_MONTHS, _greedy_scales(portfolio, horizon), limit)
+    if res.status == 1:
+        return _result("time_limit", horizon)
+    if res.status != 0:
+        # Sin solución (p. ej. con el interés impago capitalizado no se
+        # termina en el plazo del greedy): el greedy es el plan.
+        return _result("greedy", horizon, greedy)
+
+    r = debts.monthly_rate
+    n_pay = horizon * d
+    pay = res.x[:n_pay].reshape(horizon, d)
+    bal = np.vstack([debts.balance, res.x[n_pay:2 * n_pay].reshape(horizon, d)])
+    solver = _solver_summary(
+        portfolio,
+        debts.product_ids,
+        debts.product_types,
+        debts.balance,
+        r,
+        pay,
+        bal,
+    )
+    if solver.total_interest_paid > greedy.total_interest_paid + 0.01:
+        # El greedy no capitaliza el interés que no alcanza a pagar; si el
+        # flujo no cubre los intereses, su total queda por debajo del LP.
+        return _result("greedy", horizon, greedy)
+    return _result("optimal", horizon, solver)
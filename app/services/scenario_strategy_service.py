@@ -0,0 +1,60 @@
+from typing import get_args
+
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import RepaymentStrategy, StrategyComparisonResult, StrategySavings
+from ..services.scenario_minimum_service import simulate_minimum_payment_scenario
+from ..services.scenario_optimized_service import simulate_optimized_plans
+
+
+STRATEGIES = get_args(RepaymentStrategy)
+
+
+def compare_repayment_strategies(
+    portfolio: CustomerPortfolio,
+    arrears_threshold_days: int = 1,
+) -> StrategyComparisonResult:
+    """
+    Plan optimizado con cada estrategia (avalanche, snowball, hybrid) lado
+    a lado, con ahorros vs pago mínimo.
+
+    Las tres se simulan juntas (`simulate_optimized_plans`): un solo bucle
+    de meses con una fila por estrategia.
+    """
+    min_s = simulate_minimum_payment_scenario(portfolio)
+    plans = simulate_optimized_plans(portfolio, STRATEGIES, arrears_threshold_days)
+
+    items = []
+    for strategy in STRATEGIES:
+        plan = plans[strategy]
+        # Deudas en el orden en que se terminan de pagar (dentro del horizonte).
+        paid_off = sorted(
+            (d for d in plan.debts if d.months_to_payoff < 600),
+            key=lambda d: d.months_to_payoff,
+        )
+        items.append(
+            StrategySavings(
+                strategy=strategy,
+                total_months=plan.total_months,
+                total_paid=plan.total_paid,
+                total_interest_paid=plan.total_interest_paid,
+                interest_savings_vs_minimum=min_s.total_interest_paid - plan.total_interest_paid,
+                months_saved_vs_minimum=min_s.total_months - plan.total_months,
+                payoff_order=[d.product_id for d in paid_off],
+            )
+        )
+
+    # Sin flujo disponible ninguna estrategia se simula: no hay "mejor".
+    best = None
+    if portfolio.cashflow.available_cashflow > 0:
+        best = min(items, key=lambda s: (s.total_interest_paid, s.total_months)).strategy
+
+    return StrategyComparisonResult(
+        customer_id=portfolio.customer_id,
+        available_cashflow=portfolio.cashflow.available_cashflow,
+        arrears_threshold_days=arrears_threshold_days,
+        baseline_type="minimum_payment",
+        baseline_total_months=min_s.total_months,
+        baseline_total_interest_paid=min_s.total_interest_paid,
+        best_strategy=best,
+        strategies=items,
+    )
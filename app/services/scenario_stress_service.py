@@ -0,0 +1,141 @@
+"""
+Estrés Monte Carlo por variabilidad de ingresos.
+
+Los escenarios base asumen un `available_cashflow` constante. Aquí se
+simulan miles de trayectorias de ingreso mensual:
+
+    ingreso_t = monthly_income_avg * (1 + σ · z_t),  z_t ~ N(0, 1)
+    flujo_t   = max(ingreso_t - essential_expenses_avg, 0)
+
+con σ = income_variability_pct / 100 y semilla fija (resultados
+reproducibles). Todas las trayectorias se simulan juntas con el motor
+vectorizado del plan optimizado, y las mismas trayectorias se usan para
+medir si alcanzaría la cuota de la consolidación elegida. En los meses
+de flujo insuficiente el interés no pagado se capitaliza.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import (
+    ConsolidationStressResult,
+    IncomeStressResult,
+    OptimizedStressResult,
+    PercentileSummary,
+)
+from ..services.scenario_batch_engine import debt_arrays, simulate_optimized_batch
+from ..services.scenario_consolidation_service import consolidation_candidates, _is_better
+
+
+class IncomePaths:
+    """
+    Flujo disponible mes a mes para `simulations` trayectorias. Los meses
+    se generan en orden y se guardan solo los primeros `keep_months`
+    (los que necesita la verificación de la consolidación).
+    """
+
+    def __init__(
+        self,
+        portfolio: CustomerPortfolio,
+        simulations: int,
+        seed: int,
+        keep_months: int = 0,
+    ):
+        cf = portfolio.cashflow
+        self.income = cf.monthly_income_avg
+        self.expenses = cf.essential_expenses_avg
+        self.sigma = max(cf.income_variability_pct, 0.0) / 100.0
+        self.simulations = simulations
+        self.keep_months = keep_months
+
+        self._rng = np.random.default_rng(seed)
+        self._months: List[np.ndarray] = []
+        self._last: Optional[np.ndarray] = None
+        self._generated = 0
+
+    def _draw(self) -> np.ndarray:
+        z = self._rng.standard_normal(self.simulations)
+        income = np.maximum(self.income * (1.0 + self.sigma * z), 0.0)
+        return np.maximum(income - self.expenses, 0.0)
+
+    def month(self, m: int) -> np.ndarray:
+        if m < len(self._months):
+            return self._months[m]
+        while self._generated <= m:
+            self._last = self._draw()
+            if self._generated < self.keep_months:
+                self._months.append(self._last)
+            self._generated += 1
+        return self._last
+
+    def cashflow_for(self, m: int, rows: np.ndarray) -> np.ndarray:
+        return self.month(m)[rows]
+
+
+def _percentiles(values: np.ndarray) -> PercentileSummary:
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return PercentileSummary(p10=float(p10), p50=float(p50), p90=float(p90), mean=float(values.mean()))
+
+
+def simulate_income_stress(
+    portfolio: CustomerPortfolio,
+    offers_raw,
+    simulations: int = 10_000,
+    seed: int = 42,
+    max_months: int = 600,
+) -> IncomeStressResult:
+    """
+    Percentiles de meses hasta pagar todo e intereses del plan optimizado,
+    y probabilidad de no cubrir alguna cuota de la consolidación que se
+    elegiría con el flujo promedio.
+    """
+    # Consolidación elegida con el flujo promedio (misma regla que el escenario 3).
+    available = portfolio.cashflow.available_cashflow
+    chosen = None
+    if available > 0:
+        for monthly_payment, summary in consolidation_candidates(portfolio, offers_raw):
+            if monthly_payment <= available and (chosen is None or _is_better(summary, chosen[1])):
+                chosen = (monthly_payment, summary)
+
+    term = chosen[1].total_months if chosen else 0
+    paths = IncomePaths(portfolio, simulations, seed, keep_months=term)
+
+    debts = debt_arrays(portfolio)
+    batch = simulate_optimized_batch(
+        debts,
+        np.ones(simulations),
+        max_months=max_months,
+        monthly_cashflow=paths.cashflow_for,
+        capitalize_unpaid_interest=True,
+    )
+
+    not_paid = batch.payoff_month < 0
+    payoff = np.where(not_paid, max_months, batch.payoff_month)
+
+    consolidation = None
+    if chosen:
+        monthly_payment, summary = chosen
+        missed = np.zeros(simulations, dtype=np.int64)
+        for m in range(term):
+            missed += paths.month(m) < monthly_payment
+        consolidation = ConsolidationStressResult(
+            offer_id=summary.debts[0].product_id,
+            monthly_payment=monthly_payment,
+            term_months=term,
+            probability_missed_payment=float((missed > 0).mean()),
+            expected_missed_payments=float(missed.mean()),
+        )
+
+    return IncomeStressResult(
+        customer_id=portfolio.customer_id,
+        simulations=simulations,
+        seed=seed,
+        income_variability_pct=portfolio.cashflow.income_variability_pct,
+        optimized=OptimizedStressResult(
+            payoff_months=_percentiles(payoff),
+            total_interest_paid=_percentiles(batch.scenario_total_interest),
+            probability_not_paid_off=float(not_paid.mean()),
+        ),
+        consolidation=consolidation,
+    )
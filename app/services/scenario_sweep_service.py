@@ -0,0 +1,83 @@
+import numpy as np
+
+from ..models.portfolio import CustomerPortfolio
+from ..models.scenarios import CashflowSweepPoint, CashflowSweepResult
+from ..services.scenario_minimum_service import simulate_minimum_payment_scenario
+from ..services.scenario_consolidation_service import consolidation_candidates, _is_better
+from ..services.scenario_batch_engine import debt_arrays, simulate_optimized_batch
+
+
+MAX_SWEEP_POINTS = 1000
+
+
+def cashflow_grid(cashflow_from: float, cashflow_to: float, step: float) -> np.ndarray:
+    """
+    Valores de available_cashflow desde `cashflow_from` hasta `cashflow_to`
+    (inclusive) cada `step`.
+    """
+    if step <= 0:
+        raise ValueError("step debe ser mayor que 0")
+    if cashflow_to < cashflow_from:
+        raise ValueError("'to' debe ser mayor o igual que 'cashflow_from'")
+
+    count = int(np.floor((cashflow_to - cashflow_from) / step + 1e-9)) + 1
+    if count > MAX_SWEEP_POINTS:
+        raise ValueError(f"El barrido tendría {count} puntos (máximo {MAX_SWEEP_POINTS})")
+
+    return cashflow_from + step * np.arange(count)
+
+
+def simulate_cashflow_sweep(
+    portfolio: CustomerPortfolio,
+    offers_raw,
+    cashflows: np.ndarray,
+) -> CashflowSweepResult:
+    """
+    Curva de meses e intereses para una grilla de available_cashflow.
+
+    - El escenario mínimo no depende del flujo: se calcula una sola vez.
+    - El plan optimizado se simula para toda la grilla en una pasada
+      vectorizada (`simulate_optimized_batch`).
+    - Las ofertas de consolidación se evalúan una vez; para cada punto
+      solo se filtra por cuota <= flujo y se elige la mejor, con el mismo
+      criterio que `simulate_consolidation_scenario`.
+    """
+    min_s = simulate_minimum_payment_scenario(portfolio)
+    baseline_interest = min_s.total_interest_paid
+
+    batch = simulate_optimized_batch(debt_arrays(portfolio), cashflows)
+    opt_months = batch.total_months
+    opt_interest = batch.scenario_total_interest
+
+    candidates = consolidation_candidates(portfolio, offers_raw)
+
+    points = []
+    for i, cf in enumerate(cashflows):
+        cf = float(cf)
+        best = None
+        if cf > 0:
+            for monthly_payment, summary in candidates:
+                if monthly_payment <= cf and _is_better(summary, best):
+                    best = summary
+
+        point = CashflowSweepPoint(
+            available_cashflow=cf,
+            optimized_total_months=int(opt_months[i]),
+            optimized_total_interest_paid=float(opt_interest[i]),
+            optimized_interest_savings_vs_minimum=baseline_interest - float(opt_interest[i]),
+        )
+        if best is not None:
+            point.consolidation_offer_id = best.debts[0].product_id
+            point.consolidation_total_months = best.total_months
+            point.consolidation_total_interest_paid = best.total_interest_paid
+            point.consolidation_interest_savings_vs_minimum = baseline_interest - best.total_interest_paid
+        points.append(point)
+
+    return CashflowSweepResult(
+        customer_id=portfolio.customer_id,
+        current_available_cashflow=portfolio.cashflow.available_cashflow,
+        baseline_type="minimum_payment",
+        baseline_total_months=min_s.total_months,
+        baseline_total_interest_paid=baseline_interest,
+        points=points,
+    )
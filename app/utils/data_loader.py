@@ -1,49 +1,289 @@
+import gzip
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, IO, Iterator, List, Optional
 
 import pandas as pd
 import json
+from pandas.api.types import union_categoricals
+
+from .dataset_schema import DATASET_SCHEMAS, DatasetValidationError, validate_chunks, validate_datasets
+from .sharding import filter_frame_for_shard
 
 
 # Carpeta raíz del proyecto (…/desafio-bcp)
 ROOT_DIR = Path(__file__).resolve().parents[2]
-DATA_DIR = ROOT_DIR / "data"
+# DATA_DIR permite apuntar a otro book (p. ej. uno generado para benchmarks).
+DATA_DIR = Path(os.getenv("DATA_DIR", str(ROOT_DIR / "data")))
+
+# Filas por bloque al leer CSV. Cada bloque se valida y convierte (ids a
+# category) antes de leer el siguiente: los textos crudos de un bloque se
+# liberan enseguida y la memoria queda cerca del tamaño ya convertido.
+# En modo shard además solo se retiene la porción del shard.
+READ_CHUNKSIZE = 500_000
+
+# Los datasets se leen en paralelo, un hilo por archivo.
+LOAD_WORKERS = int(os.getenv("DATASET_LOAD_WORKERS", "6"))
+# "auto": pyarrow si está instalado (parser multihilo, montos y fechas
+# convertidos en C++); "pandas": siempre el lector C de pandas.
+CSV_ENGINE = os.getenv("DATASET_CSV_ENGINE", "auto")
+# Bloques de pyarrow, en bytes (del orden de READ_CHUNKSIZE filas).
+ARROW_BLOCK_BYTES = 16 << 20
+
+# Archivos de ./data y uploads pueden venir comprimidos: `loans.csv.gz`,
+# `loans.csv.zst` (zstd en pandas requiere el paquete `zstandard`).
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    # Con pd.concat las categóricas con categorías distintas quedarían object.
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[col] = union_categoricals(parts)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def _compression(filename: Optional[str]) -> Optional[str]:
+    return COMPRESSIONS.get(Path(filename or "").suffix.lower())
+
+
+def _dataset_path(filename: str) -> Path:
+    """Archivo de DATA_DIR, sin comprimir o con alguna extensión de COMPRESSIONS."""
+    for suffix in ("", *COMPRESSIONS):
+        path = DATA_DIR / f"{filename}{suffix}"
+        if path.exists():
+            return path
+    return DATA_DIR / filename
+
+
+def _arrow():
+    if CSV_ENGINE == "pandas":
+        return None
+    try:
+        import pyarrow
+        import pyarrow.csv  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _arrow_convert_options(pa, name: str):
+    # Números y fechas los convierte pyarrow; texto y bool quedan como texto
+    # para `validate_frame`. Un valor que no convierte corta la lectura
+    # (ArrowInvalid) y el resto del archivo lo lee pandas (ver _csv_chunks).
+    kinds = {"float": pa.float64(), "int": pa.float64(), "date": pa.timestamp("ns")}
+    types = {col.name: kinds.get(col.kind, pa.string()) for col in DATASET_SCHEMAS[name]}
+    return pa.csv.ConvertOptions(column_types=types, strings_can_be_null=True)
+
+
+def _csv_chunks(path: Path, name: str) -> Iterator[pd.DataFrame]:
+    """Bloques crudos (sin validar) de un CSV, con pyarrow si está disponible."""
+    pa = _arrow()
+    if pa is None:
+        yield from pd.read_csv(path, chunksize=READ_CHUNKSIZE, compression=_compression(path.name))
+        return
+
+    rows = 0
+    try:
+        reader = pa.csv.open_csv(
+            pa.input_stream(str(path), compression=_compression(path.name)),
+            read_options=pa.csv.ReadOptions(block_size=ARROW_BLOCK_BYTES),
+            convert_options=_arrow_convert_options(pa, name),
+        )
+        for batch in reader:
+            chunk = batch.to_pandas()
+            rows += len(chunk)
+            yield chunk
+    except pa.ArrowInvalid:
+        # Desde el bloque con el valor inválido lee pandas, sin tipos: la
+        # validación reporta cada error con su línea, igual que sin pyarrow.
+        yield from pd.read_csv(
+            path,
+            chunksize=READ_CHUNKSIZE,
+            compression=_compression(path.name),
+            skiprows=range(1, rows + 1),
+        )
+
+
+def read_csv_upload(file: IO[bytes], filename: Optional[str], name: str) -> pd.DataFrame:
+    """CSV completo de un upload (comprimido según la extensión de `filename`)."""
+    compression = _compression(filename)
+    pa = _arrow()
+    if pa is not None:
+        try:
+            stream = pa.input_stream(pa.PythonFile(file, mode="r"), compression=compression)
+            return pa.csv.read_csv(stream, convert_options=_arrow_convert_options(pa, name)).to_pandas()
+        except pa.ArrowInvalid:
+            file.seek(0)
+    return pd.read_csv(file, compression=compression)
+
+
+def decompress_bytes(raw: bytes, filename: Optional[str]) -> bytes:
+    compression = _compression(filename)
+    if compression == "gzip":
+        return gzip.decompress(raw)
+    if compression == "zstd":
+        import zstandard
 
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw)).read()
+    return raw
 
-def load_loans() -> pd.DataFrame:
-    return pd.read_csv(DATA_DIR / "loans.csv")
 
+def _iter_dataset_chunks(name: str, shard_index: Optional[int], shard_count: int) -> Iterator[pd.DataFrame]:
+    # Se valida antes de filtrar para que las líneas reportadas sean las del CSV.
+    chunks = _csv_chunks(_dataset_path(f"{name}.csv"), name)
+    for chunk in validate_chunks(name, chunks):
+        if shard_index is not None and shard_count > 1:
+            chunk = filter_frame_for_shard(chunk, shard_index, shard_count)
+        yield chunk
 
-def load_cards() -> pd.DataFrame:
-    return pd.read_csv(DATA_DIR / "cards.csv")
 
+def _read_dataset(name: str, shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    """Lee, valida y convierte un CSV de ./data (DatasetValidationError si hay errores)."""
+    return _concat_chunks(list(_iter_dataset_chunks(name, shard_index, shard_count)))
 
-def load_payments_history() -> pd.DataFrame:
-    return pd.read_csv(DATA_DIR / "payments_history.csv")
 
+def load_loans(shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    return _read_dataset("loans", shard_index, shard_count)
 
-def load_credit_score_history() -> pd.DataFrame:
-    return pd.read_csv(DATA_DIR / "credit_score_history.csv")
 
+def load_cards(shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    return _read_dataset("cards", shard_index, shard_count)
 
-def load_customer_cashflow() -> pd.DataFrame:
-    return pd.read_csv(DATA_DIR / "customer_cashflow.csv")
+
+def load_payments_history(shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    return _read_dataset("payments_history", shard_index, shard_count)
+
+
+def load_credit_score_history(shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    return _read_dataset("credit_score_history", shard_index, shard_count)
+
+
+def load_customer_cashflow(shard_index: Optional[int] = None, shard_count: int = 1) -> pd.DataFrame:
+    return _read_dataset("customer_cashflow", shard_index, shard_count)
 
 
 def load_bank_offers() -> Any:
-    with open(DATA_DIR / "bank_offers.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    path = _dataset_path("bank_offers.json")
+    with open(path, "rb") as f:
+        return json.loads(decompress_bytes(f.read(), path.name).decode("utf-8"))
+
 
+def _timed(name: str, loader: Callable[[], Any], timings: Optional[Dict[str, float]]) -> Any:
+    started = time.perf_counter()
+    try:
+        return loader()
+    finally:
+        if timings is not None:
+            timings[name] = round(time.perf_counter() - started, 3)
 
-def load_all_data() -> Dict[str, Any]:
+
+def load_all_data(
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
     """
     Carga todos los datasets y los devuelve en un dict.
+
+    Si se indica `shard_index`/`shard_count`, solo se conservan los
+    clientes que pertenecen a ese shard (ver `utils/sharding.py`).
+    Las columnas se validan y convierten según `utils/dataset_schema.py`
+    (por bloques, ver READ_CHUNKSIZE); los errores de todos los datasets
+    se reportan juntos.
+
+    Los archivos se leen en paralelo (LOAD_WORKERS hilos): el tiempo total
+    se acerca al del archivo más grande. En `timings` se anotan los
+    segundos de cada dataset.
     """
-    return {
-        "loans": load_loans(),
-        "cards": load_cards(),
-        "payments_history": load_payments_history(),
-        "credit_score_history": load_credit_score_history(),
-        "customer_cashflow": load_customer_cashflow(),
-        "bank_offers": load_bank_offers(),
-    }
\ No newline at end of file
+    loaders = {
+        "loans": partial(load_loans, shard_index, shard_count),
+        "cards": partial(load_cards, shard_index, shard_count),
+        "payments_history": partial(load_payments_history, shard_index, shard_count),
+        "credit_score_history": partial(load_credit_score_history, shard_index, shard_count),
+        "customer_cashflow": partial(load_customer_cashflow, shard_index, shard_count),
+        "bank_offers": lambda: validate_datasets({"bank_offers": load_bank_offers()})["bank_offers"],
+    }
+    workers = max(1, min(LOAD_WORKERS, len(loaders)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dataset-load") as pool:
+        futures = {name: pool.submit(_timed, name, loader, timings) for name, loader in loaders.items()}
+
+    data: Dict[str, Any] = {}
+    errors: List[DatasetValidationError] = []
+    for name, future in futures.items():
+        try:
+            data[name] = future.result()
+        except DatasetValidationError as e:
+            errors.append(e)
+
+    if errors:
+        raise DatasetValidationError(
+            [err for e in errors for err in e.errors],
+            {name: n for e in errors for name, n in e.error_counts.items()},
+        )
+    return data
+
+
+def _source_signature(shard_index: Optional[int], shard_count: int) -> str:
+    """Tamaño y mtime de los archivos de ./data + shard: cambia si cambian los datos."""
+    parts = []
+    for name in [f"{n}.csv" for n in DATASET_SCHEMAS] + ["bank_offers.json"]:
+        path = _dataset_path(name)
+        st = path.stat()
+        parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    parts.append(f"shard:{shard_index or 0}/{shard_count}")
+    return "|".join(parts)
+
+
+def _timed_chunks(name: str, chunks: Iterator[pd.DataFrame], timings: Dict[str, float]) -> Iterator[pd.DataFrame]:
+    # Solo el tiempo de lectura y validación; el de escritura queda afuera.
+    timings[name] = 0.0
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        timings[name] = round(timings[name] + time.perf_counter() - started, 3)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def import_data_into_store(
+    store,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
+    timings: Optional[Dict[str, float]] = None,
+) -> bool:
+    """
+    Importa ./data a un store SQLite por bloques, sin tener ningún
+    dataset completo en memoria. Si los archivos no cambiaron desde la
+    última importación se conserva la base (incluidos uploads
+    posteriores). Devuelve True si importó.
+
+    Los datasets se leen uno tras otro, al ritmo de la escritura (la base
+    tiene un solo escritor); `timings` recibe los segundos de lectura de
+    cada uno.
+    """
+    with store.import_lock():
+        signature = _source_signature(shard_index, shard_count)
+        if not store.is_empty() and store.source_signature() == signature:
+            return False
+
+        bank_offers = validate_datasets({"bank_offers": load_bank_offers()})["bank_offers"]
+        frames = {
+            name: _iter_dataset_chunks(name, shard_index, shard_count)
+            for name in DATASET_SCHEMAS
+        }
+        if timings is not None:
+            frames = {name: _timed_chunks(name, chunks, timings) for name, chunks in frames.items()}
+        store.replace(frames, bank_offers, source_signature=signature)
+        return True
@@ -0,0 +1,273 @@
+"""
+Esquema declarativo de los datasets y coerción de tipos por columna.
+
+Cada dataset se valida y se convierte una sola vez, al cargar `./data` o
+al recibir un upload, con operaciones vectorizadas por columna:
+
+    str   -> object (texto); `category` si la columna se repite mucho
+             (customer_id, product_id, product_type)
+    float -> float64 (montos y tasas: sin pérdida de precisión)
+    int   -> int32 (sin decimales)
+    bool  -> bool ("true"/"false", "1"/"0", "si"/"no")
+    date  -> datetime64[ns] (formato ISO, p. ej. 2024-03-01)
+
+Las columnas `category` guardan un código entero por fila (int8 a int32
+según la cantidad de valores) y cada valor distinto una sola vez (categorías en orden de aparición, sin ordenar:
+`pd.factorize` es varias veces más rápido que `astype("category")`).
+Los tipos y valores permitidos siguen a los modelos de
+`app/models/portfolio.py`. Después de `validate_datasets` los servicios
+pueden usar las columnas tipadas sin conversiones fila a fila.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, get_args
+
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from ..models.portfolio import BankOffer, LoanItem, PaymentHistoryItem
+
+
+# Errores detallados que se devuelven por dataset (el total se cuenta igual).
+MAX_REPORTED_ERRORS = 50
+
+INT_DTYPE = np.int32
+
+_TRUE = {"true", "1", "yes", "si", "sí", "t", "y"}
+_FALSE = {"false", "0", "no", "f", "n"}
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str  # "str" | "float" | "int" | "bool" | "date"
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    choices: Optional[Tuple[str, ...]] = None
+    # Solo para "str": guardar como pandas category (valores muy repetidos).
+    categorical: bool = False
+
+
+def _choices(model, field: str) -> Tuple[str, ...]:
+    return get_args(model.model_fields[field].annotation)
+
+
+DATASET_SCHEMAS: Dict[str, List[Column]] = {
+    "loans": [
+        Column("loan_id", "str"),
+        Column("customer_id", "str", categorical=True),
+        Column("product_type", "str", choices=_choices(LoanItem, "product_type"), categorical=True),
+        Column("principal", "float", min_value=0),
+        Column("annual_rate_pct", "float", min_value=0),
+        Column("remaining_term_months", "int", min_value=0),
+        Column("collateral", "bool"),
+        Column("days_past_due", "int", min_value=0),
+    ],
+    "cards": [
+        Column("card_id", "str"),
+        Column("customer_id", "str", categorical=True),
+        Column("balance", "float", min_value=0),
+        Column("annual_rate_pct", "float", min_value=0),
+        Column("min_payment_pct", "float", min_value=0, max_value=100),
+        Column("payment_due_day", "int", min_value=1, max_value=31),
+        Column("days_past_due", "int", min_value=0),
+    ],
+    "payments_history": [
+        Column("product_id", "str", categorical=True),
+        Column("product_type", "str", choices=_choices(PaymentHistoryItem, "product_type"), categorical=True),
+        Column("customer_id", "str", categorical=True),
+        Column("date", "date"),
+        Column("amount", "float"),
+    ],
+    "credit_score_history": [
+        Column("customer_id", "str", categorical=True),
+        Column("date", "date"),
+        Column("credit_score", "int", min_value=0),
+    ],
+    "customer_cashflow": [
+        # Una fila por cliente: como category no ahorra memoria.
+        Column("customer_id", "str"),
+        Column("monthly_income_avg", "float", min_value=0),
+        Column("income_variability_pct", "float", min_value=0),
+        Column("essential_expenses_avg", "float", min_value=0),
+    ],
+}
+
+
+class DatasetValidationError(ValueError):
+    """
+    Errores de esquema de uno o varios datasets. `errors` trae hasta
+    MAX_REPORTED_ERRORS filas por dataset; `error_counts` el total.
+    """
+
+    def __init__(self, errors: List[dict], error_counts: Dict[str, int]):
+        self.errors = errors
+        self.error_counts = error_counts
+        total = sum(error_counts.values())
+        summary = ", ".join(f"{name}: {n}" for name, n in error_counts.items())
+        super().__init__(f"{total} errores de esquema ({summary})")
+
+
+class _Report:
+    def __init__(self, dataset: str):
+        self.dataset = dataset
+        self.errors: List[dict] = []
+        self.count = 0
+        # Filas ya validadas en bloques anteriores (lectura por chunks).
+        self.offset = 0
+
+    def add(self, message: str, column: Optional[str] = None) -> None:
+        self.count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"dataset": self.dataset, "line": None, "column": column, "error": message})
+
+    def add_rows(self, mask: np.ndarray, raw: pd.Series, column: str, message: str) -> None:
+        rows = np.flatnonzero(mask)
+        self.count += len(rows)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        for i in rows[: max(room, 0)]:
+            value = raw.iloc[i]
+            self.errors.append(
+                {
+                    "dataset": self.dataset,
+                    # Línea del CSV (la 1 es el encabezado).
+                    "line": self.offset + int(i) + 2,
+                    "column": column,
+                    "value": None if pd.isna(value) else str(value),
+                    "error": message,
+                }
+            )
+
+
+def _coerce_text(raw: pd.Series, categorical: bool) -> pd.Series:
+    if pd.api.types.infer_dtype(raw, skipna=True) != "string":
+        # Ids numéricos u otros tipos se guardan como texto.
+        raw = raw.astype(str).where(raw.notna()).astype(object)
+    if not categorical:
+        return raw
+    codes, uniques = pd.factorize(raw)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=raw.index)
+
+
+def _coerce(raw: pd.Series, kind: str, categorical: bool = False) -> Tuple[pd.Series, np.ndarray]:
+    """Columna convertida al tipo y máscara de valores inválidos (no nulos)."""
+    if kind == "str":
+        return _coerce_text(raw, categorical), np.zeros(len(raw), dtype=bool)
+
+    if kind in ("float", "int"):
+        values = pd.to_numeric(raw, errors="coerce")
+        invalid = (values.isna() & raw.notna()).to_numpy()
+        if kind == "int":
+            fractional = (values.notna() & (values != np.floor(values))).to_numpy()
+            invalid |= fractional
+        return values.astype(np.float64), invalid
+
+    if kind == "bool":
+        if raw.dtype == bool:
+            return raw, np.zeros(len(raw), dtype=bool)
+        text = raw.astype(str).str.strip().str.lower()
+        is_true = text.isin(_TRUE).to_numpy()
+        is_false = text.isin(_FALSE).to_numpy()
+        invalid = ~(is_true | is_false) & raw.notna().to_numpy()
+        return pd.Series(is_true, index=raw.index), invalid
+
+    if kind == "date":
+        values = pd.to_datetime(raw, errors="coerce", format="ISO8601")
+        invalid = (values.isna() & raw.notna()).to_numpy()
+        return values, invalid
+
+    raise ValueError(f"Tipo de columna desconocido: {kind}")
+
+
+def validate_frame(name: str, df: pd.DataFrame, report: _Report) -> pd.DataFrame:
+    schema = DATASET_SCHEMAS[name]
+    missing = [col.name for col in schema if col.name not in df.columns]
+    if missing:
+        report.add(f"Faltan columnas: {', '.join(missing)}")
+        return df
+
+    out = {}
+    for col in schema:
+        raw = df[col.name]
+        values, invalid = _coerce(raw, col.kind, col.categorical)
+        report.add_rows(invalid, raw, col.name, f"no es un valor {col.kind} válido")
+
+        # En texto `values` conserva los nulos; en categóricas isna es sobre códigos.
+        null = (values if col.kind == "str" else raw).isna().to_numpy()
+        report.add_rows(null, raw, col.name, "valor vacío")
+        bad = invalid | null
+
+        if col.min_value is not None:
+            below = ~bad & (values < col.min_value).to_numpy()
+            report.add_rows(below, raw, col.name, f"debe ser >= {col.min_value:g}")
+        if col.max_value is not None:
+            above = ~bad & (values > col.max_value).to_numpy()
+            report.add_rows(above, raw, col.name, f"debe ser <= {col.max_value:g}")
+        if col.choices is not None:
+            outside = ~bad & ~values.isin(col.choices).to_numpy()
+            report.add_rows(outside, raw, col.name, f"debe ser uno de {', '.join(col.choices)}")
+
+        if col.kind == "int":
+            limit = np.iinfo(INT_DTYPE).max
+            too_big = ~bad & (values.abs() > limit).to_numpy()
+            report.add_rows(too_big, raw, col.name, f"fuera de rango (máx. {limit})")
+            if not (bad | too_big).any():
+                values = values.astype(INT_DTYPE)
+        out[col.name] = values
+
+    # Las columnas extra se conservan sin cambios, después de las del esquema.
+    extra = [c for c in df.columns if c not in out]
+    typed = pd.DataFrame(out, index=df.index)
+    return pd.concat([typed, df[extra]], axis=1) if extra else typed
+
+
+def validate_chunks(name: str, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Valida un dataset leído por bloques. Los bloques se entregan
+    convertidos mientras no haya errores; al terminar, si hubo alguno,
+    lanza DatasetValidationError con todos los del dataset.
+    """
+    report = _Report(name)
+    for chunk in chunks:
+        typed = validate_frame(name, chunk, report)
+        report.offset += len(chunk)
+        if not report.count:
+            yield typed
+    if report.count:
+        raise DatasetValidationError(report.errors, {name: report.count})
+
+
+def validate_bank_offers(offers: Any, report: _Report) -> List[dict]:
+    """Cada oferta se valida contra `BankOffer` (mismo criterio que el modelo)."""
+    valid = []
+    for i, offer in enumerate(offers):
+        try:
+            valid.append(BankOffer.model_validate(offer).model_dump())
+        except ValidationError as e:
+            for err in e.errors():
+                field = ".".join(str(p) for p in err["loc"])
+                report.add(err["msg"], column=f"[{i}].{field}")
+    return valid
+
+
+def validate_datasets(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida y convierte todos los datasets. Devuelve el dict con columnas
+    tipadas o lanza DatasetValidationError con todos los errores juntos.
+    """
+    reports = []
+    result = {}
+    for name, obj in data.items():
+        report = _Report(name)
+        if name in DATASET_SCHEMAS:
+            result[name] = validate_frame(name, obj, report)
+        elif name == "bank_offers":
+            result[name] = validate_bank_offers(obj, report)
+        else:
+            result[name] = obj
+        reports.append(report)
+
+    if any(r.count for r in reports):
+        errors = [e for r in reports for e in r.errors]
+        raise DatasetValidationError(errors, {r.dataset: r.count for r in reports if r.count})
+    return result
@@ -0,0 +1,350 @@
+"""
+Backends de almacenamiento de los datasets.
+
+Los servicios no acceden a los DataFrames directamente sino a un "store":
+
+  - `customer_rows(name, customer_id)`: filas de un cliente (portafolio),
+  - `customer_ids()`: ids de clientes con deudas, ordenados,
+  - `scan(name, columns, order_by)`: lectura por bloques (agregados),
+  - `read_frame(name, columns)`: columnas completas (índices precalculados),
+  - `bank_offers()`: catálogo de ofertas (chico, siempre en memoria).
+
+Backends (DATASET_BACKEND):
+
+  - "pandas" (default): todo en memoria, como siempre; ideal para demos
+    y compatible con SHARED_DATA.
+  - "sqlite": archivo SQLite (`DATASET_DB_PATH`, default
+    `data/datasets.sqlite`) con índice por customer_id. Solo se trae a
+    memoria lo que pide cada request o cada bloque de un scan, así que el
+    tamaño del book no queda limitado por la RAM. La importación desde
+    CSV y los uploads reemplazan todo en una sola transacción (WAL: los
+    lectores siguen viendo la versión anterior hasta el commit).
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from .dataset_schema import DATASET_SCHEMAS, INT_DTYPE
+
+
+DEFAULT_SCAN_CHUNKSIZE = 500_000
+# Desde SQLite cada bloque se arma a partir de tuplas Python: bloques más
+# chicos para acotar el pico de memoria.
+SQLITE_SCAN_CHUNKSIZE = 100_000
+
+# Índices de la base SQLite: búsqueda por cliente y scans ordenados.
+_SQLITE_INDEXES = {
+    "loans": ["customer_id"],
+    "cards": ["customer_id"],
+    "customer_cashflow": ["customer_id"],
+    "credit_score_history": ["customer_id", "date"],
+    "payments_history": ["customer_id", "product_id", "date"],
+}
+
+_SQL_TYPES = {"str": "TEXT", "float": "REAL", "int": "INTEGER", "bool": "INTEGER", "date": "TEXT"}
+
+
+def dataset_backend() -> str:
+    backend = os.getenv("DATASET_BACKEND", "pandas").lower()
+    if backend not in ("pandas", "sqlite"):
+        raise ValueError(f"DATASET_BACKEND desconocido: {backend}")
+    return backend
+
+
+def _columns(name: str) -> List[str]:
+    return [col.name for col in DATASET_SCHEMAS[name]]
+
+
+class PandasStore:
+    """Datasets en memoria (dict de DataFrames + lista de ofertas)."""
+
+    backend = "pandas"
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    def generation(self) -> int:
+        # En memoria no hay versión compartida entre workers (ver SHARED_DATA).
+        return 0
+
+    def tables(self) -> List[str]:
+        return list(self.data.keys())
+
+    def row_counts(self) -> Dict[str, int]:
+        return {name: len(obj) for name, obj in self.data.items()}
+
+    def stats(self) -> Dict[str, dict]:
+        """Filas y memoria por dataset y columna (`memory_usage(deep=True)`)."""
+        out = {}
+        for name, obj in self.data.items():
+            if not isinstance(obj, pd.DataFrame):
+                out[name] = {"rows": len(obj)}
+                continue
+            usage = obj.memory_usage(deep=True)
+            out[name] = {
+                "rows": len(obj),
+                "memory_bytes": int(usage.sum()),
+                "columns": {
+                    col: {"dtype": str(obj[col].dtype), "memory_bytes": int(usage[col])}
+                    for col in obj.columns
+                },
+            }
+        return out
+
+    def customer_rows(self, name: str, customer_id: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        df = self.data[name]
+        rows = df[df["customer_id"] == customer_id]
+        return rows[list(columns)] if columns is not None else rows
+
+    def customer_ids(self) -> List[str]:
+        ids = set(self.data["loans"]["customer_id"].astype(str).unique())
+        ids.update(self.data["cards"]["customer_id"].astype(str).unique())
+        return sorted(ids)
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[Sequence[str]] = None,
+        chunksize: int = DEFAULT_SCAN_CHUNKSIZE,
+    ) -> Iterator[pd.DataFrame]:
+        df = self.data[name]
+        if columns is not None:
+            df = df[list(columns)]
+        if order_by and len(df):
+            df = df.sort_values(list(order_by), kind="stable")
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def read_frame(self, name: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        df = self.data[name]
+        return df[list(columns)] if columns is not None else df
+
+    def bank_offers(self) -> List[dict]:
+        return self.data["bank_offers"]
+
+
+def _to_sql_values(name: str, df: pd.DataFrame) -> Iterable[tuple]:
+    out = {}
+    for col in DATASET_SCHEMAS[name]:
+        values = df[col.name]
+        if col.kind == "date":
+            values = values.dt.strftime("%Y-%m-%d")
+        elif col.kind == "bool":
+            values = values.astype("int64")
+        out[col.name] = values
+    return pd.DataFrame(out).itertuples(index=False, name=None)
+
+
+def _from_sql(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Vuelve a los tipos del esquema (SQLite guarda bool como 0/1 y fechas como texto)."""
+    kinds = {col.name: col.kind for col in DATASET_SCHEMAS[name]}
+    for column in df.columns:
+        kind = kinds.get(column)
+        if kind == "bool":
+            df[column] = df[column].astype(bool)
+        elif kind == "date":
+            df[column] = pd.to_datetime(df[column], format="ISO8601")
+        elif kind == "int":
+            df[column] = df[column].astype(INT_DTYPE)
+        elif kind == "float":
+            df[column] = df[column].astype("float64")
+        elif kind == "str":
+            df[column] = df[column].astype(object)
+    return df
+
+
+class SqliteStore:
+    """
+    Datasets en un archivo SQLite. Cada hilo usa su propia conexión; la
+    base está en modo WAL para que las lecturas no esperen a un upload.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._offers: Optional[List[dict]] = None
+        self._offers_generation: Optional[int] = None
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    # ----- metadatos -----
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def generation(self) -> int:
+        """Contador que sube con cada importación o upload (lo ven todos los workers)."""
+        return int(self._meta("generation") or 0)
+
+    def source_signature(self) -> Optional[str]:
+        return self._meta("source_signature")
+
+    def is_empty(self) -> bool:
+        return self.generation() == 0
+
+    def tables(self) -> List[str]:
+        return list(DATASET_SCHEMAS) + ["bank_offers"]
+
+    @contextmanager
+    def import_lock(self):
+        """Lock entre procesos: un solo worker importa los CSV a la vez."""
+        import fcntl  # solo POSIX
+
+        with open(self.path.with_name(self.path.name + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----- escritura -----
+
+    def replace(
+        self,
+        frames: Dict[str, Iterable[pd.DataFrame]],
+        bank_offers: List[dict],
+        source_signature: Optional[str] = None,
+    ) -> int:
+        """
+        Reemplaza todos los datasets en una transacción. `frames` trae, por
+        dataset, un iterable de bloques ya validados (ver dataset_schema);
+        si alguno lanza una excepción no se modifica nada. Sin
+        `source_signature` se conserva la de la última importación.
+        """
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for name in DATASET_SCHEMAS:
+                columns = DATASET_SCHEMAS[name]
+                conn.execute(f"DROP TABLE IF EXISTS {name}")
+                conn.execute(
+                    f"CREATE TABLE {name} ("
+                    + ", ".join(f"{c.name} {_SQL_TYPES[c.kind]} NOT NULL" for c in columns)
+                    + ")"
+                )
+                placeholders = ", ".join("?" for _ in columns)
+                for chunk in frames.get(name, ()):
+                    conn.executemany(f"INSERT INTO {name} VALUES ({placeholders})", _to_sql_values(name, chunk))
+                index_columns = ", ".join(_SQLITE_INDEXES[name])
+                conn.execute(f"CREATE INDEX idx_{name}_customer ON {name} ({index_columns})")
+
+            generation = self.generation() + 1
+            meta = {
+                "generation": str(generation),
+                "bank_offers": json.dumps(bank_offers, ensure_ascii=False),
+            }
+            if source_signature is not None:
+                meta["source_signature"] = source_signature
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                list(meta.items()),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.execute("ANALYZE")
+        return generation
+
+    # ----- lectura -----
+
+    def row_counts(self) -> Dict[str, int]:
+        conn = self._conn()
+        counts = {
+            name: conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            for name in DATASET_SCHEMAS
+        }
+        counts["bank_offers"] = len(self.bank_offers())
+        return counts
+
+    def stats(self) -> Dict[str, dict]:
+        """Filas por dataset; los datos están en disco (`disk_bytes` es el archivo)."""
+        out = {name: {"rows": rows} for name, rows in self.row_counts().items()}
+        page_count = self._conn().execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._conn().execute("PRAGMA page_size").fetchone()[0]
+        out["_database"] = {"path": str(self.path), "disk_bytes": page_count * page_size}
+        return out
+
+    def customer_rows(self, name: str, customer_id: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        cols = list(columns) if columns is not None else _columns(name)
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(cols)} FROM {name} WHERE customer_id = ?",
+            self._conn(),
+            params=(customer_id,),
+        )
+        return _from_sql(name, df)
+
+    def customer_ids(self) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT customer_id FROM loans UNION SELECT customer_id FROM cards ORDER BY 1"
+        )
+        return [row[0] for row in rows]
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[Sequence[str]] = None,
+        chunksize: int = SQLITE_SCAN_CHUNKSIZE,
+    ) -> Iterator[pd.DataFrame]:
+        cols = list(columns) if columns is not None else _columns(name)
+        sql = f"SELECT {', '.join(cols)} FROM {name}"
+        if order_by:
+            sql += f" ORDER BY {', '.join(order_by)}"
+        # Conexión propia: el scan puede intercalarse con otras lecturas del hilo.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            for chunk in pd.read_sql_query(sql, conn, chunksize=chunksize):
+                yield _from_sql(name, chunk)
+        finally:
+            conn.close()
+
+    def read_frame(self, name: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        chunks = list(self.scan(name, columns))
+        if not chunks:
+            cols = list(columns) if columns is not None else _columns(name)
+            return _from_sql(name, pd.DataFrame(columns=cols))
+        return pd.concat(chunks, ignore_index=True)
+
+    def bank_offers(self) -> List[dict]:
+        generation = self.generation()
+        if self._offers is None or self._offers_generation != generation:
+            self._offers = json.loads(self._meta("bank_offers") or "[]")
+            self._offers_generation = generation
+        return self._offers
+
+
+def sqlite_path(shard_index: int = 0, shard_count: int = 1) -> Path:
+    """Archivo de la base; en modo shard, uno por shard."""
+    default = Path(__file__).resolve().parents[2] / "data" / "datasets.sqlite"
+    path = Path(os.getenv("DATASET_DB_PATH", str(default)))
+    if shard_count > 1:
+        path = path.with_name(f"{path.stem}.shard{shard_index}of{shard_count}{path.suffix}")
+    return path
+
+
+def frames_from_data(data: Dict[str, Any]) -> Dict[str, Iterable[pd.DataFrame]]:
+    """Datasets ya cargados en memoria (upload) como bloques para `replace`."""
+    return {name: [data[name]] for name in DATASET_SCHEMAS if name in data}
+
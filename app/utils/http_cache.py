@@ -0,0 +1,46 @@
+"""
+Caché HTTP: ETags y GET condicional.
+
+Las respuestas de `/customers/...` dependen solo de los datasets vigentes
+y de la URL (cliente + query), así que su ETag se arma con la versión de
+datos publicada (`app.state.data_version`, nueva en cada generación) y la
+URL, sin ejecutar el endpoint. La excepción es el score sin `at`, que
+es el de hoy: su ETag incluye además la fecha. Si el cliente manda ese mismo ETag en
+`If-None-Match` se responde `304 Not Modified` directamente.
+
+Con varios workers cada uno publica su propia versión: revalidar contra
+otro worker solo devuelve la respuesta completa (nunca un 304 incorrecto).
+"""
+import hashlib
+import os
+from typing import Optional
+
+from starlette.requests import Request
+
+
+def customer_etag(data_version: str, request: Request, extra: str = "") -> str:
+    """`extra`: lo que además de la URL define la respuesta (p. ej. la fecha de hoy)."""
+    url = request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    if extra:
+        url += "#" + extra
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    # Débil: el mismo recurso puede viajar con o sin compresión.
+    return f'W/"{data_version}-{digest}"'
+
+
+def file_etag(path: os.PathLike) -> str:
+    st = os.stat(path)
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """`If-None-Match` contiene `etag` (comparación débil, como indica RFC 9110)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
@@ -0,0 +1,19 @@
+import ctypes
+import ctypes.util
+
+
+def release_free_memory() -> bool:
+    """
+    Devuelve al sistema operativo la memoria libre del heap (glibc
+    `malloc_trim`). Después de cargar datasets quedan liberados los
+    buffers temporales del parser y de la validación, pero glibc los
+    retiene y el RSS no baja. En otras plataformas no hace nada.
+    """
+    libc_name = ctypes.util.find_library("c")
+    if not libc_name:
+        return False
+    try:
+        libc = ctypes.CDLL(libc_name)
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
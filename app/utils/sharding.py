@@ -0,0 +1,64 @@
+import os
+import zlib
+from typing import Any, Dict, Tuple
+
+import pandas as pd
+
+
+def get_shard_config() -> Tuple[int, int]:
+    """
+    Lee la configuración de shard del proceso desde el entorno:
+      - SHARD_COUNT: número total de shards (default 1 = sin sharding).
+      - SHARD_INDEX: shard que atiende este proceso (0..SHARD_COUNT-1).
+    """
+    shard_count = int(os.getenv("SHARD_COUNT", "1"))
+    shard_index = int(os.getenv("SHARD_INDEX", "0"))
+
+    if shard_count < 1:
+        raise ValueError("SHARD_COUNT debe ser >= 1")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"SHARD_INDEX debe estar entre 0 y {shard_count - 1}")
+
+    return shard_index, shard_count
+
+
+def shard_for_customer(customer_id: str, shard_count: int) -> int:
+    """
+    Shard dueño de un cliente. Usa CRC32 (estable entre procesos,
+    a diferencia de `hash()`), así router y shards coinciden siempre.
+    """
+    return zlib.crc32(str(customer_id).encode("utf-8")) % shard_count
+
+
+def filter_frame_for_shard(df: pd.DataFrame, shard_index: int, shard_count: int) -> pd.DataFrame:
+    """
+    Deja solo las filas de clientes que pertenecen al shard. El hash se
+    calcula una vez por customer_id distinto, no por fila. Las columnas
+    categóricas conservan solo las categorías que quedan en el shard.
+    """
+    if shard_count == 1 or "customer_id" not in df.columns:
+        return df
+
+    ids = df["customer_id"].astype(str)
+    owned = {
+        cid for cid in ids.unique()
+        if shard_for_customer(cid, shard_count) == shard_index
+    }
+    out = df[ids.isin(owned)].reset_index(drop=True)
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].cat.remove_unused_categories()
+    return out
+
+
+def filter_data_for_shard(data: Dict[str, Any], shard_index: int, shard_count: int) -> Dict[str, Any]:
+    """
+    Aplica el particionado a todos los datasets. `bank_offers` no depende
+    del cliente, así que cada shard mantiene el catálogo completo.
+    """
+    return {
+        name: filter_frame_for_shard(obj, shard_index, shard_count)
+        if isinstance(obj, pd.DataFrame)
+        else obj
+        for name, obj in data.items()
+    }
@@ -0,0 +1,250 @@
+"""
+Datasets en memoria compartida entre workers (uvicorn/gunicorn).
+
+Un worker carga (o recibe por upload) los datasets y los publica en un
+segmento `multiprocessing.shared_memory`; el resto se adjunta sin copiar:
+  - columnas numéricas, booleanas y de fecha: vistas numpy sobre el segmento,
+  - columnas de texto: categóricas cuyos códigos viven en el segmento
+    (cada worker solo decodifica los valores únicos).
+
+Un manifest JSON en SHARED_DATA_DIR indica el segmento vigente. Cada
+publicación escribe un segmento nuevo y reemplaza el manifest de forma
+atómica; los workers detectan el cambio por mtime y cambian de segmento.
+"""
+import json
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+
+_ALIGN = 64
+
+# Segmentos adjuntos por este proceso: mantienen vivas las vistas numpy.
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def shared_data_enabled() -> bool:
+    return os.getenv("SHARED_DATA", "0").lower() in ("1", "true", "yes")
+
+
+def get_shared_dir(shard_index: int = 0) -> Path:
+    base = os.getenv("SHARED_DATA_DIR") or os.path.join(tempfile.gettempdir(), "desafio-bcp-shared")
+    path = Path(base) / f"shard-{shard_index}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def publish_lock(shared_dir: Path):
+    """Lock entre procesos para que un solo worker cargue/publique a la vez."""
+    import fcntl  # solo POSIX; el modo compartido no aplica en Windows
+
+    with open(shared_dir / "manifest.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # En Python < 3.13 el resource_tracker borra el segmento cuando termina
+    # el proceso que lo abrió; aquí el ciclo de vida lo maneja el manifest.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _is_text(series: pd.Series) -> bool:
+    return isinstance(series.dtype, CategoricalDtype) or series.dtype == object
+
+
+def _build_string_table(frames: List[pd.DataFrame]) -> pd.Index:
+    """
+    Tabla única con todos los textos distintos de todos los datasets.
+    customer_id se repite en los 5 CSV; así cada valor se decodifica una
+    sola vez por worker y todas las columnas comparten categorías.
+    """
+    uniques = [
+        pd.Index(df[col].dropna().astype(str).unique())
+        for df in frames
+        for col in df.columns
+        if _is_text(df[col])
+    ]
+    if not uniques:
+        return pd.Index([], dtype=object)
+    return pd.Index(pd.unique(np.concatenate([u.to_numpy(dtype=object) for u in uniques])))
+
+
+def _column_layout(series: pd.Series, table: pd.Index, codes_dtype: np.dtype) -> Tuple[dict, np.ndarray]:
+    """Describe cómo guardar una columna y devuelve el arreglo a copiar."""
+    if _is_text(series):
+        codes = table.get_indexer(series.astype(str).where(series.notna()))
+        return {"kind": "category"}, np.ascontiguousarray(codes.astype(codes_dtype))
+
+    values = series.to_numpy()
+    return {"kind": "array", "dtype": values.dtype.str}, np.ascontiguousarray(values)
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def publish_shared(data: Dict[str, Any], shared_dir: Path, generation: int) -> dict:
+    """
+    Copia los datasets a un segmento nuevo y actualiza el manifest.
+    Devuelve el manifest escrito.
+    """
+    frames = {name: obj for name, obj in data.items() if isinstance(obj, pd.DataFrame)}
+    table = _build_string_table(list(frames.values()))
+    # Mismo dtype que usa pandas para códigos con ese nro. de categorías;
+    # si no coincide, from_codes copiaría.
+    codes_dtype = pd.Categorical.from_codes([], categories=table).codes.dtype
+
+    layouts: Dict[str, dict] = {}
+    buffers: List[Tuple[int, np.ndarray]] = []
+    offset = 0
+
+    def _place(arr: np.ndarray) -> dict:
+        nonlocal offset
+        part = {"offset": offset, "nbytes": arr.nbytes}
+        buffers.append((offset, arr))
+        offset = _aligned(offset + arr.nbytes)
+        return part
+
+    blob = np.frombuffer("\x00".join(table).encode("utf-8"), dtype=np.uint8)
+    strings_part = _place(blob)
+
+    for name, df in frames.items():
+        columns = []
+        for col in df.columns:
+            meta, arr = _column_layout(df[col], table, codes_dtype)
+            meta["name"] = col
+            meta.setdefault("dtype", codes_dtype.str)
+            meta["part"] = _place(arr)
+            columns.append(meta)
+        layouts[name] = {"nrows": len(df), "columns": columns}
+
+    segment_name = f"desafio-bcp-{uuid.uuid4().hex[:12]}"
+    shm = shared_memory.SharedMemory(name=segment_name, create=True, size=max(offset, 1))
+    _untrack(shm)
+    for start, arr in buffers:
+        shm.buf[start:start + arr.nbytes] = arr.view(np.uint8).reshape(-1)
+    _attached[segment_name] = shm
+
+    manifest = {
+        "segment": segment_name,
+        "size": offset,
+        "generation": generation,
+        "owner_ppid": os.getppid(),
+        "strings": {**strings_part, "count": len(table)},
+        "datasets": layouts,
+        "objects": {
+            name: obj for name, obj in data.items() if not isinstance(obj, pd.DataFrame)
+        },
+    }
+
+    previous = read_manifest(shared_dir)
+
+    tmp_path = shared_dir / f"manifest.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, shared_dir / "manifest.json")
+
+    # Los workers que aún usan el segmento anterior conservan su mapeo;
+    # unlink solo quita el nombre para que no se adjunten nuevos.
+    if previous and previous["segment"] != segment_name:
+        _unlink_segment(previous["segment"])
+
+    return manifest
+
+
+def _unlink_segment(name: str) -> None:
+    try:
+        old = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    old.close()
+    try:
+        old.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def read_manifest(shared_dir: Path) -> Optional[dict]:
+    path = shared_dir / "manifest.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def manifest_mtime(shared_dir: Path) -> Optional[int]:
+    try:
+        return (shared_dir / "manifest.json").stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def attach_shared(manifest: dict) -> Dict[str, Any]:
+    """
+    Reconstruye los datasets como vistas sobre el segmento del manifest.
+    Lanza FileNotFoundError si el segmento ya no existe.
+    """
+    name = manifest["segment"]
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        _attached[name] = shm
+
+    strings = manifest["strings"]
+    raw = bytes(shm.buf[strings["offset"]:strings["offset"] + strings["nbytes"]])
+    categories = raw.decode("utf-8").split("\x00") if strings["count"] else []
+    text_dtype = CategoricalDtype(categories)
+
+    data: Dict[str, Any] = {}
+    for ds_name, layout in manifest["datasets"].items():
+        nrows = layout["nrows"]
+        columns = {}
+        for meta in layout["columns"]:
+            values = np.ndarray(
+                (nrows,),
+                dtype=np.dtype(meta["dtype"]),
+                buffer=shm.buf,
+                offset=meta["part"]["offset"],
+            )
+            values.flags.writeable = False
+
+            if meta["kind"] == "category":
+                columns[meta["name"]] = pd.Categorical.from_codes(
+                    values, dtype=text_dtype, validate=False
+                )
+            else:
+                columns[meta["name"]] = values
+
+        data[ds_name] = pd.DataFrame(columns, copy=False)
+
+    data.update(manifest["objects"])
+    return data
+
+
+def release_unused(current_segment: str) -> None:
+    """Cierra los mapeos de segmentos anteriores de este proceso."""
+    for name in list(_attached):
+        if name == current_segment:
+            continue
+        try:
+            _attached[name].close()
+        except BufferError:
+            # Aún hay vistas vivas (p. ej. un request en curso con los
+            # datos anteriores); se reintenta en el próximo cambio.
+            continue
+        del _attached[name]
@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicación de cálculos concurrentes ("single flight").
+
+    Si llegan varias llamadas con la misma clave mientras la primera está
+    en curso, solo la primera ejecuta `fn`; las demás esperan y reciben el
+    mismo resultado (o la misma excepción). Terminado el cálculo la clave
+    se libera: no es un caché.
+
+    Las métricas se agrupan por `name` (p. ej. "overview", "report").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _stat(self, name: str) -> Dict[str, int]:
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0}
+        return stat
+
+    def do(self, name: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        full_key = (name, key)
+        with self._lock:
+            stat = self._stat(name)
+            stat["calls"] += 1
+            call = self._calls.get(full_key)
+            leader = call is None
+            if leader:
+                call = self._calls[full_key] = _Call()
+                stat["executed"] += 1
+            else:
+                stat["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                stat["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for name, stat in self._stats.items():
+                calls = stat["calls"]
+                in_flight = sum(1 for (n, _) in self._calls if n == name)
+                out[name] = {
+                    **stat,
+                    "in_flight": in_flight,
+                    "coalesced_ratio": stat["coalesced"] / calls if calls else 0.0,
+                }
+            return out
+
+
+# Instancia del proceso: las claves incluyen la generación de datasets,
+# así que un upload nunca comparte cálculo con la generación anterior.
+single_flight = SingleFlight()
@@ -0,0 +1,39 @@
+"""
+Conteo local de tokens de los prompts (antes de llamar al LLM).
+
+Con `tiktoken` instalado se usa el tokenizador de los modelos GPT-4o /
+GPT-4.1 / o-series (`o200k_base`); sin él, una estimación de ~4 caracteres
+por token, suficiente para seguir tendencias de tamaño y costo. El conteo
+real de cada llamada lo informa el servicio (`usage`) cuando está disponible.
+"""
+from functools import lru_cache
+from typing import Optional
+
+TOKEN_ENCODING = "o200k_base"
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception:
+        # Sin red no se puede bajar el vocabulario la primera vez.
+        return None
+
+
+def tokenizer_name() -> str:
+    return TOKEN_ENCODING if _encoding() is not None else "estimate"
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(enc.encode(text))
@@ -0,0 +1,103 @@
+"""
+Paridad y benchmark de la analítica del book (`GET /analytics/book`).
+
+Carga el book (DATA_DIR o uno sintético, ver generate_book.py) y mide:
+  - la tabla de escenarios por cliente ("book_scenarios", una vez por
+    generación),
+  - los agregados sobre esa tabla y la respuesta ya cacheada.
+
+Luego verifica, para una muestra de clientes, que los intereses de los
+escenarios mínimo y optimizado coincidan con los servicios por cliente.
+
+Uso:
+    python scripts/bench_book_analytics.py --customers 100000
+    python scripts/bench_book_analytics.py --data-dir /tmp/book   # book existente
+    SIMULATION_BACKEND=python python scripts/bench_book_analytics.py   # sin Numba
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+TOLERANCE = 1e-6
+
+
+class _State:
+    pass
+
+
+class _App:
+    def __init__(self):
+        self.state = _State()
+
+
+def check_sample(app, scenarios, sample: int, rng: np.random.Generator) -> int:
+    from app.services.portfolio_service import build_customer_portfolio
+    from app.services.scenario_minimum_service import simulate_minimum_payment_scenario
+    from app.services.scenario_optimized_service import simulate_optimized_plan
+
+    mismatches = 0
+    for row in rng.choice(len(scenarios), size=min(sample, len(scenarios)), replace=False):
+        rec = scenarios.iloc[row]
+        portfolio = build_customer_portfolio(app, rec["customer_id"])
+        expected = (
+            simulate_minimum_payment_scenario(portfolio).total_interest_paid,
+            simulate_optimized_plan(portfolio).total_interest_paid,
+        )
+        got = (rec["minimum_interest"], rec["optimized_interest"])
+        if any(abs(e - g) > TOLERANCE * max(1.0, abs(e)) for e, g in zip(expected, got)):
+            mismatches += 1
+            print(f"  {rec['customer_id']}: esperado {expected}, tabla {got}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--sample", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from generate_book import generate_book
+
+            data_dir = Path(tmp)
+            generate_book(args.customers, data_dir)
+        os.environ["DATA_DIR"] = str(data_dir)
+
+        from app.services.book_analytics_service import get_book_analytics, get_book_scenarios
+        from app.services.dataset_service import publish_datasets
+        from app.services.scenario_kernels import simulation_backend
+        from app.utils.data_loader import load_all_data
+
+        app = _App()
+        publish_datasets(app, load_all_data())
+
+    t0 = time.perf_counter()
+    scenarios = get_book_scenarios(app)
+    print(f"escenarios ({simulation_backend()}): {len(scenarios):,} clientes en {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    get_book_analytics(app)
+    print(f"agregados: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    t0 = time.perf_counter()
+    get_book_analytics(app)
+    print(f"respuesta cacheada: {(time.perf_counter() - t0) * 1000:.3f} ms")
+
+    mismatches = check_sample(app, scenarios, args.sample, np.random.default_rng(0))
+    print(f"muestra vs servicios por cliente: {mismatches} diferencias")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Mide el arranque en frío de la API (time-to-first-request).
+
+Levanta `uvicorn app.main:app` en un puerto libre y mide, desde que se
+lanza el proceso:
+  - primera respuesta de `/` (UI),
+  - `/ready` en 200 (datasets cargados),
+  - primera respuesta de un endpoint con datos (`/customers?limit=1`).
+
+Uso:
+    python scripts/bench_cold_start.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, t0: float, timeout: float = 60.0) -> float:
+    while time.perf_counter() - t0 < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                if resp.status == 200:
+                    return time.perf_counter() - t0
+        except OSError:  # conexión rechazada o 503 mientras inicia
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def run_once(env: dict) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR,
+        env=env,
+    )
+    try:
+        first_ui = _wait_for(f"{base}/", t0)
+        ready = _wait_for(f"{base}/ready", t0)
+        first_data = _wait_for(f"{base}/customers?limit=1", t0)
+        return {"first_ui": first_ui, "ready": ready, "first_data": first_data}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    results = [run_once(env) for _ in range(args.runs)]
+
+    for key in ("first_ui", "ready", "first_data"):
+        values = [r[key] for r in results]
+        print(f"{key:>11}: mediana {statistics.median(values):.3f} s  (min {min(values):.3f}, max {max(values):.3f})")
+
+
+if __name__ == "__main__":
+    main()
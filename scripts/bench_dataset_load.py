@@ -0,0 +1,118 @@
+"""
+Benchmark y paridad de la carga de datasets (`load_all_data`).
+
+Carga el book (DATA_DIR o uno sintético, ver generate_book.py) con cada
+combinación de lector (pandas / pyarrow, si está instalado) y lectura
+secuencial o en paralelo, y con `--compress` también desde copias `.gz`
+y `.zst`. Muestra el tiempo total y el de cada archivo, y verifica que
+todas las variantes produzcan exactamente los mismos datasets.
+
+Con varios núcleos, en paralelo el total se acerca al del archivo más
+grande; con uno solo, a la suma.
+
+Uso:
+    python scripts/bench_dataset_load.py --customers 100000
+    python scripts/bench_dataset_load.py --data-dir /tmp/book --compress
+"""
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def compress_copy(src: Path, dst: Path, suffix: str) -> None:
+    dst.mkdir(parents=True, exist_ok=True)
+    for path in src.iterdir():
+        if path.suffix not in (".csv", ".json"):
+            continue
+        raw = path.read_bytes()
+        if suffix == ".gz":
+            data = gzip.compress(raw, compresslevel=6)
+        else:
+            import zstandard
+
+            data = zstandard.ZstdCompressor().compress(raw)
+        (dst / f"{path.name}{suffix}").write_bytes(data)
+
+
+def same_data(a: dict, b: dict) -> bool:
+    for name, expected in a.items():
+        if isinstance(expected, pd.DataFrame):
+            try:
+                pd.testing.assert_frame_equal(expected, b[name])
+            except AssertionError as e:
+                print(f"  {name}: {e}")
+                return False
+        elif expected != b[name]:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--compress", action="store_true", help="también desde copias .gz y .zst")
+    args = parser.parse_args()
+
+    from app.utils import data_loader
+
+    engines = ["pandas"]
+    try:
+        import pyarrow  # noqa: F401
+
+        engines.append("auto")
+    except ImportError:
+        print("pyarrow no está instalado: solo el lector de pandas")
+    parallel = max(data_loader.LOAD_WORKERS, 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from generate_book import generate_book
+
+            data_dir = Path(tmp) / "book"
+            generate_book(args.customers, data_dir)
+        sources = {"csv": data_dir}
+        if args.compress:
+            for suffix in (".gz", ".zst"):
+                try:
+                    compress_copy(data_dir, Path(tmp) / suffix.strip("."), suffix)
+                except ImportError:
+                    print(f"{suffix}: falta el paquete zstandard, se omite")
+                    continue
+                sources[suffix] = Path(tmp) / suffix.strip(".")
+
+        reference = None
+        mismatches = 0
+        for source, path in sources.items():
+            data_loader.DATA_DIR = path
+            for engine in engines:
+                for workers in (1, parallel):
+                    data_loader.CSV_ENGINE = engine
+                    data_loader.LOAD_WORKERS = workers
+                    timings = {}
+                    t0 = time.perf_counter()
+                    data = data_loader.load_all_data(timings=timings)
+                    total = time.perf_counter() - t0
+                    files = ", ".join(f"{name} {timings[name]:.2f}" for name in data)
+                    label = "pyarrow" if engine == "auto" else engine
+                    print(f"{source:>4} {label:>7} hilos={workers}: {total:.2f}s  ({files})")
+                    if reference is None:
+                        reference = data
+                    elif not same_data(reference, data):
+                        mismatches += 1
+
+    print(f"variantes distintas a la primera: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memoria de los datasets cargados: antes (inferencia de `pd.read_csv`) vs
+después (esquema con ids categóricos, enteros int32 y fechas tipadas).
+
+Genera un book sintético (default ≈ 5M filas, ver generate_book.py) y
+carga cada variante en un proceso aparte para medir:
+  - `memory_usage(deep=True)` por dataset,
+  - RSS del proceso después de cargar (VmRSS), en ambos casos después de
+    `release_free_memory()` como hace la app.
+
+Uso:
+    python scripts/bench_dataset_memory.py --customers 320000
+    python scripts/bench_dataset_memory.py --data-dir /tmp/book   # book existente
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+DATASETS = ["loans", "cards", "payments_history", "credit_score_history", "customer_cashflow"]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def measure(mode: str) -> dict:
+    """Se ejecuta en el proceso hijo: carga según `mode` y mide."""
+    import pandas as pd
+
+    from app.utils import data_loader
+    from app.utils.memory import release_free_memory
+
+    rss_before = _rss_bytes()
+    if mode == "before":
+        data = {name: pd.read_csv(data_loader.DATA_DIR / f"{name}.csv") for name in DATASETS}
+    else:
+        data = data_loader.load_all_data()
+    release_free_memory()
+
+    return {
+        "rss_delta": _rss_bytes() - rss_before,
+        "datasets": {
+            name: int(data[name].memory_usage(deep=True).sum()) for name in DATASETS
+        },
+    }
+
+
+def run(mode: str, data_dir: Path) -> dict:
+    env = dict(os.environ, DATA_DIR=str(data_dir))
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def _row(label: str, before: float, after: float) -> str:
+    mb = 1024 * 1024
+    return f"{label:>22}  {before / mb:>9.1f}  {after / mb:>10.1f}  ({after / before - 1:+.0%})"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=320_000)
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--child", choices=["before", "after"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from generate_book import generate_book
+
+            data_dir = Path(tmp)
+            rows = generate_book(args.customers, data_dir)
+            print(f"book sintético: {sum(rows.values()):,} filas")
+
+        before = run("before", data_dir)
+        after = run("after", data_dir)
+
+    print(f"{'dataset':>22}  {'antes MB':>9}  {'después MB':>10}")
+    for name in DATASETS:
+        print(_row(name, before["datasets"][name], after["datasets"][name]))
+    print(_row("total (deep)", sum(before["datasets"].values()), sum(after["datasets"].values())))
+    print(_row("RSS del proceso", before["rss_delta"], after["rss_delta"]))
+
+
+if __name__ == "__main__":
+    main()
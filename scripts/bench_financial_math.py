@@ -0,0 +1,130 @@
+"""
+Paridad y benchmark de `app/services/financial_math.py`.
+
+Con los préstamos del book (DATA_DIR o uno sintético, ver generate_book.py):
+  - compara la cuota de cada préstamo con la fórmula de anualidad que
+    repetían los servicios: la escalar con memo y la por unidad de
+    capital deben coincidir exactamente; la vectorizada, hasta 1e-12
+    relativo (la potencia de numpy puede diferir en el último dígito),
+  - mide la cuota préstamo por préstamo con la fórmula original, con el
+    memo por (tasa, plazo) y vectorizada para todo el book,
+  - mide `simulate_consolidation_scenario` para una muestra de clientes
+    (una cuota por oferta y cliente, servidas desde el memo).
+
+Uso:
+    python scripts/bench_financial_math.py --customers 100000
+    python scripts/bench_financial_math.py --data-dir /tmp/book
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+
+class _State:
+    pass
+
+
+class _App:
+    def __init__(self):
+        self.state = _State()
+
+
+def reference_payment(principal: float, annual_rate_pct: float, term_months: int) -> float:
+    """Fórmula que estaba copiada en los servicios de mínimo, optimizado y consolidación."""
+    r = (annual_rate_pct / 100.0) / 12.0
+    n = term_months
+    if n <= 0:
+        return principal
+    if r == 0:
+        return principal / n
+    return principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from generate_book import generate_book
+
+            data_dir = Path(tmp)
+            generate_book(args.customers, data_dir)
+        os.environ["DATA_DIR"] = str(data_dir)
+
+        from app.services import financial_math as fm
+        from app.services.dataset_service import get_store, publish_datasets
+        from app.utils.data_loader import load_all_data
+
+        app = _App()
+        publish_datasets(app, load_all_data())
+
+    loans = get_store(app).read_frame("loans")
+    principal = loans["principal"].to_numpy(dtype=float)
+    rate = loans["annual_rate_pct"].to_numpy(dtype=float)
+    term = loans["remaining_term_months"].to_numpy(dtype=np.int64)
+    rows = list(zip(principal.tolist(), rate.tolist(), term.tolist()))
+    print(f"{len(rows):,} préstamos, {len(set(zip(rate.tolist(), term.tolist()))):,} combinaciones (tasa, plazo)")
+
+    expected = np.array([reference_payment(p, r, n) for p, r, n in rows])
+    scalar = np.array([fm.loan_monthly_payment(p, r, n) for p, r, n in rows])
+    vector = fm.annuity_payments(principal, rate, term)
+    unit = np.array([fm.annuity_factor(r, n) for _, r, n in rows])
+    unit_expected = np.array([reference_payment(1.0, r, n) for _, r, n in rows])
+    exact = int((scalar != expected).sum() + (unit != unit_expected).sum())
+    relative = np.abs(vector - expected) / np.maximum(np.abs(expected), 1e-300)
+    mismatches = exact + int((relative > 1e-12).sum())
+    print(f"diferencias exactas vs fórmula original (escalar, por unidad): {exact}")
+    print(
+        f"vectorizada: {int((vector != expected).sum()):,} difieren en el último dígito, "
+        f"error relativo máximo {relative.max():.1e}"
+    )
+
+    fm._annuity_terms.cache_clear()
+    t_reference = timed(lambda: [reference_payment(p, r, n) for p, r, n in rows])
+    t_scalar = timed(lambda: [fm.loan_monthly_payment(p, r, n) for p, r, n in rows])
+    t_vector = timed(lambda: fm.annuity_payments(principal, rate, term))
+    print(f"cuota por préstamo, fórmula original: {t_reference * 1000:.1f} ms")
+    print(f"cuota por préstamo, con memo:         {t_scalar * 1000:.1f} ms ({t_reference / t_scalar:.1f}x)")
+    print(f"vectorizada, todo el book:            {t_vector * 1000:.2f} ms ({t_reference / t_vector:.0f}x)")
+    print(f"memo: {fm.annuity_cache_info()}")
+
+    from app.services.dataset_service import get_bank_offers
+    from app.services.portfolio_service import build_customer_portfolio
+    from app.services.scenario_consolidation_service import simulate_consolidation_scenario
+
+    offers = get_bank_offers(app)
+    ids = list(get_store(app).customer_ids())[: args.sample]
+    portfolios = [build_customer_portfolio(app, cid) for cid in ids]
+    fm._annuity_terms.cache_clear()
+    t_consolidation = timed(lambda: [simulate_consolidation_scenario(p, offers) for p in portfolios])
+    print(
+        f"consolidación, {len(portfolios):,} clientes x {len(offers)} ofertas: "
+        f"{t_consolidation * 1000:.0f} ms; memo: {fm.annuity_cache_info()}"
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
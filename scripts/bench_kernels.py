@@ -0,0 +1,142 @@
+"""
+Paridad y benchmark de los backends de simulación (Python vs Numba).
+
+Genera portafolios sintéticos, corre el escenario mínimo y el plan
+optimizado (las tres estrategias) con cada backend, verifica que meses
+e intereses por deuda coincidan y muestra el tiempo por cliente.
+
+Uso:
+    python scripts/bench_kernels.py --customers 500
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from app.models.portfolio import CardItem, CustomerCashflow, CustomerPortfolio, LoanItem  # noqa: E402
+from app.services import scenario_kernels  # noqa: E402
+from app.services.scenario_minimum_service import simulate_minimum_payment_scenario  # noqa: E402
+from app.services.scenario_optimized_service import simulate_optimized_plan  # noqa: E402
+from app.services.scenario_strategy_service import STRATEGIES  # noqa: E402
+
+
+TOLERANCE = 1e-6
+
+
+def random_portfolio(rng: np.random.Generator, i: int, max_debts: int = 7) -> CustomerPortfolio:
+    customer_id = f"CU-{i:06d}"
+    n_loans = int(rng.integers(0, max_debts // 2 + 1))
+    n_cards = int(rng.integers(0, max_debts - max_debts // 2 + 1))
+    if n_loans + n_cards == 0:
+        n_cards = 1
+
+    loans = [
+        LoanItem(
+            loan_id=f"L-{i}-{k}",
+            customer_id=customer_id,
+            product_type=str(rng.choice(["personal", "micro"])),
+            principal=float(rng.uniform(500, 30_000)),
+            annual_rate_pct=float(rng.choice([0.0, 18.0, 25.0, 30.5, 45.0])),
+            remaining_term_months=int(rng.integers(1, 72)),
+            collateral=False,
+            days_past_due=int(rng.integers(0, 60)),
+        )
+        for k in range(n_loans)
+    ]
+    cards = [
+        CardItem(
+            card_id=f"C-{i}-{k}",
+            customer_id=customer_id,
+            balance=float(rng.uniform(100, 15_000)),
+            annual_rate_pct=float(rng.choice([0.0, 30.0, 45.0, 60.0, 90.0])),
+            min_payment_pct=float(rng.uniform(1, 6)),
+            payment_due_day=1,
+            days_past_due=int(rng.integers(0, 60)),
+        )
+        for k in range(n_cards)
+    ]
+    income = float(rng.uniform(800, 6_000))
+    expenses = float(rng.uniform(500, 4_000))
+    cashflow = CustomerCashflow(
+        customer_id=customer_id,
+        monthly_income_avg=income,
+        income_variability_pct=10.0,
+        essential_expenses_avg=expenses,
+        available_cashflow=max(income - expenses, 0.0),
+    )
+    return CustomerPortfolio(
+        customer_id=customer_id, credit_score=700, loans=loans, cards=cards, cashflow=cashflow
+    )
+
+
+def run_all(portfolios):
+    results = []
+    for p in portfolios:
+        scenarios = [simulate_minimum_payment_scenario(p)]
+        scenarios += [simulate_optimized_plan(p, strategy=s) for s in STRATEGIES]
+        results.append(scenarios)
+    return results
+
+
+def timed(portfolios, repeat: int):
+    best = float("inf")
+    results = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        results = run_all(portfolios)
+        best = min(best, time.perf_counter() - t)
+    return results, best
+
+
+def compare(expected, actual) -> float:
+    max_err = 0.0
+    for exp_scenarios, act_scenarios in zip(expected, actual):
+        for exp, act in zip(exp_scenarios, act_scenarios):
+            assert exp.total_months == act.total_months, (exp.customer_id, exp.scenario_type)
+            for de, da in zip(exp.debts, act.debts):
+                assert de.product_id == da.product_id and de.months_to_payoff == da.months_to_payoff
+                max_err = max(
+                    max_err,
+                    abs(de.total_paid - da.total_paid),
+                    abs(de.total_interest_paid - da.total_interest_paid),
+                )
+    return max_err
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    portfolios = [random_portfolio(rng, i) for i in range(args.customers)]
+
+    scenario_kernels.use_backend("python")
+    expected, t_python = timed(portfolios, args.repeat)
+    print(f"python: {t_python / len(portfolios) * 1e3:.3f} ms/cliente")
+
+    if scenario_kernels.use_backend("numba") != "numba":
+        print("numba no está instalado: solo se midió el backend Python")
+        return
+
+    t = time.perf_counter()
+    scenario_kernels.warm_up()
+    print(f"numba: compilación/carga de caché {time.perf_counter() - t:.2f} s")
+
+    actual, t_numba = timed(portfolios, args.repeat)
+    max_err = compare(expected, actual)
+    print(f"numba:  {t_numba / len(portfolios) * 1e3:.3f} ms/cliente  (x{t_python / t_numba:.1f})")
+    print(f"paridad: meses idénticos, máx. diferencia en montos {max_err:.2e}")
+    if max_err > TOLERANCE:
+        raise SystemExit(f"Diferencia mayor a {TOLERANCE}")
+
+
+if __name__ == "__main__":
+    main()
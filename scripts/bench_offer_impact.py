@@ -0,0 +1,150 @@
+"""
+Paridad y benchmark del impacto de ofertas (`POST /offers/impact`).
+
+Carga el book (DATA_DIR o uno sintético, ver generate_book.py) y:
+  - verifica, para una muestra de clientes, que la mejor consolidación
+    del índice coincida con `simulate_consolidation_scenario`,
+  - para varias ofertas (nuevas y reemplazos) compara el recálculo
+    dirigido contra reconstruir el índice completo con el catálogo
+    modificado: mismos clientes afectados e intereses, y el tiempo de
+    cada uno.
+
+Uso:
+    python scripts/bench_offer_impact.py --customers 100000
+    python scripts/bench_offer_impact.py --data-dir /tmp/book   # book existente
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+TOLERANCE = 1e-6
+
+OFFERS = [
+    {"offer_id": "OF-CONSO-36M", "product_types_eligible": ["card", "personal", "micro"],
+     "max_consolidated_balance": 90000, "new_rate_pct": 15.9, "max_term_months": 36,
+     "conditions": "Score > 650 y sin mora activa"},
+    {"offer_id": "OF-CONSO-24M", "product_types_eligible": ["card"],
+     "max_consolidated_balance": 20000, "new_rate_pct": 22.0, "max_term_months": 24,
+     "conditions": "No mora >30 días al momento de la solicitud"},
+    {"offer_id": "OF-CARD-48M", "product_types_eligible": ["card"],
+     "max_consolidated_balance": 30000, "new_rate_pct": 18.0, "max_term_months": 48,
+     "conditions": "Sin condiciones"},
+    {"offer_id": "OF-MICRO-12M", "product_types_eligible": ["micro"],
+     "max_consolidated_balance": 10000, "new_rate_pct": 12.0, "max_term_months": 12,
+     "conditions": "Score > 650"},
+]
+
+
+class _State:
+    pass
+
+
+class _App:
+    def __init__(self):
+        self.state = _State()
+
+
+def check_sample(app, index, sample: int, rng: np.random.Generator) -> int:
+    from app.services.dataset_service import get_bank_offers
+    from app.services.portfolio_service import build_customer_portfolio
+    from app.services.scenario_consolidation_service import simulate_consolidation_scenario
+
+    mismatches = 0
+    rows = rng.choice(len(index), size=min(sample, len(index)), replace=False)
+    for row in rows:
+        customer_id = str(index.customer_ids[row])
+        scenario = simulate_consolidation_scenario(
+            build_customer_portfolio(app, customer_id), get_bank_offers(app)
+        )
+        expected = scenario.debts[0].product_id if scenario.debts else None
+        best = index.best[row]
+        got = index.offers[best].offer_id if best >= 0 else None
+        interest = 0.0 if best < 0 else index.best_interest[row]
+        if got != expected or abs(interest - scenario.total_interest_paid) > TOLERANCE:
+            mismatches += 1
+    return mismatches
+
+
+def full_rebuild(index, offer):
+    """Referencia: todo el book con el catálogo modificado."""
+    from app.services.offer_impact_service import OfferImpactIndex
+
+    offers = [o for o in index.offers if o.offer_id != offer.offer_id]
+    position = next((j for j, o in enumerate(index.offers) if o.offer_id == offer.offer_id), len(offers))
+    offers.insert(position, offer)
+    return OfferImpactIndex(
+        index.customer_ids, index.product_types, index.balance, index.days_past_due,
+        index.credit_score, index.available_cashflow, offers,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--sample", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from generate_book import generate_book
+
+            data_dir = Path(tmp)
+            generate_book(args.customers, data_dir)
+        os.environ["DATA_DIR"] = str(data_dir)
+
+        from app.models.portfolio import BankOffer
+        from app.services.dataset_service import publish_datasets
+        from app.services.offer_impact_service import get_offer_impact_index
+        from app.utils.data_loader import load_all_data
+
+        app = _App()
+        publish_datasets(app, load_all_data())
+
+    t0 = time.perf_counter()
+    index = get_offer_impact_index(app)
+    print(f"índice: {len(index):,} clientes en {time.perf_counter() - t0:.2f}s")
+
+    mismatches = check_sample(app, index, args.sample, np.random.default_rng(0))
+    print(f"muestra vs simulate_consolidation_scenario: {mismatches} diferencias")
+
+    print(f"{'oferta':>14}  {'recalc':>8}  {'afectados':>9}  {'dirigido ms':>11}  {'completo ms':>11}  ok")
+    failed = mismatches > 0
+    for raw in OFFERS:
+        offer = BankOffer(**raw)
+        t0 = time.perf_counter()
+        result = index.impact(offer)
+        targeted = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ref = full_rebuild(index, offer)
+        full = time.perf_counter() - t0
+
+        # best == -1 cae en el "" final (sin consolidación).
+        before = np.array([o.offer_id for o in index.offers] + [""])[index.best]
+        after = np.array([o.offer_id for o in ref.offers] + [""])[ref.best]
+        changed = (before != after) | (
+            ~np.isnan(index.best_interest) & ~np.isnan(ref.best_interest)
+            & (index.best_interest != ref.best_interest)
+        )
+        delta = np.nansum(np.where(changed & (before != "") & (after != ""),
+                                   index.best_interest - ref.best_interest, 0.0))
+        ok = int(changed.sum()) == result.customers_affected and abs(delta - result.interest_savings_delta) < 1e-3
+        failed |= not ok
+        print(f"{offer.offer_id:>14}  {result.customers_recomputed:>8,}  {result.customers_affected:>9,}  "
+              f"{targeted * 1000:>11.1f}  {full * 1000:>11.1f}  {'sí' if ok else 'NO'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark de la comparación de estrategias (avalanche, snowball, hybrid).
+
+Compara, con cada backend de simulación, correr las tres estrategias por
+separado (`simulate_optimized_plan` tres veces) contra la pasada
+compartida (`simulate_optimized_plans`: una fila por estrategia, mínimos
+calculados una vez por mes para todas). Verifica que ambos caminos den
+los mismos meses e intereses por deuda.
+
+Uso:
+    python scripts/bench_strategies.py --customers 500 --max-debts 12
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from app.services import scenario_kernels  # noqa: E402
+from app.services.scenario_optimized_service import simulate_optimized_plan, simulate_optimized_plans  # noqa: E402
+from app.services.scenario_strategy_service import STRATEGIES  # noqa: E402
+from scripts.bench_kernels import random_portfolio  # noqa: E402
+
+
+TOLERANCE = 1e-6
+
+
+def separate(portfolios):
+    return [{s: simulate_optimized_plan(p, strategy=s) for s in STRATEGIES} for p in portfolios]
+
+
+def shared(portfolios):
+    return [simulate_optimized_plans(p, STRATEGIES) for p in portfolios]
+
+
+def timed(fn, portfolios, repeat: int):
+    best = float("inf")
+    results = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        results = fn(portfolios)
+        best = min(best, time.perf_counter() - t)
+    return results, best
+
+
+def compare(expected, actual) -> float:
+    max_err = 0.0
+    for exp_plans, act_plans in zip(expected, actual):
+        for s in STRATEGIES:
+            exp, act = exp_plans[s], act_plans[s]
+            assert exp.total_months == act.total_months, (exp.customer_id, s)
+            for de, da in zip(exp.debts, act.debts):
+                assert de.product_id == da.product_id and de.months_to_payoff == da.months_to_payoff
+                max_err = max(
+                    max_err,
+                    abs(de.total_paid - da.total_paid),
+                    abs(de.total_interest_paid - da.total_interest_paid),
+                )
+    return max_err
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--max-debts", type=int, default=7, help="deudas por cliente: hasta este número")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    portfolios = [random_portfolio(rng, i, max_debts=args.max_debts) for i in range(args.customers)]
+
+    for backend in ("python", "numba"):
+        if scenario_kernels.use_backend(backend) != backend:
+            print(f"{backend}: no disponible")
+            continue
+        scenario_kernels.warm_up()
+
+        expected, t_separate = timed(separate, portfolios, args.repeat)
+        actual, t_shared = timed(shared, portfolios, args.repeat)
+        max_err = compare(expected, actual)
+        per_customer = 1e3 / len(portfolios)
+        print(
+            f"{backend}: por separado {t_separate * per_customer:.3f} ms/cliente, "
+            f"compartido {t_shared * per_customer:.3f} ms/cliente (x{t_separate / t_shared:.1f}); "
+            f"máx. diferencia en montos {max_err:.2e}"
+        )
+        if max_err > TOLERANCE:
+            raise SystemExit(f"Diferencia mayor a {TOLERANCE}")
+
+
+if __name__ == "__main__":
+    main()
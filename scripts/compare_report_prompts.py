@@ -0,0 +1,280 @@
+"""
+Compara el prompt compacto del informe (instrucciones fijas + datos del
+cliente) con el prompt anterior, para una muestra de clientes.
+
+Sin LLM: tokens por informe de cada versión y control de que el payload
+lleve todos los números del prompt anterior.
+Con `--llm`: genera ambos informes con el LLM configurado (LLM_PROVIDER,
+AZURE_OPENAI_*), mide tokens y latencia, verifica que tengan las cinco
+secciones y los guarda en `--out` para revisarlos lado a lado.
+
+Uso:
+    python scripts/compare_report_prompts.py                    # ./data
+    python scripts/compare_report_prompts.py --llm --sample 5 --out /tmp/informes
+    DATA_DIR=/tmp/book python scripts/compare_report_prompts.py --sample 200
+"""
+import argparse
+import re
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from app.models.portfolio import CustomerPortfolio  # noqa: E402
+from app.models.scenarios import ScenarioComparisonResult  # noqa: E402
+from app.services.report_generation_service import (  # noqa: E402
+    _choose_best_scenario,
+    _find_scenario,
+)
+
+SECTIONS = [
+    "# Resumen general",
+    "## Escenario 1",
+    "## Escenario 2",
+    "## Escenario 3",
+    "## Recomendación final",
+]
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class _State:
+    pass
+
+
+class _App:
+    def __init__(self):
+        self.state = _State()
+
+
+def legacy_prompt(
+    portfolio: CustomerPortfolio,
+    overview: ScenarioComparisonResult,
+) -> str:
+    """Prompt anterior (instrucciones y datos en un solo texto), sin cambios."""
+    min_s = _find_scenario(overview, "minimum_payment")
+    opt_s = _find_scenario(overview, "optimized_plan")
+    cons_s = _find_scenario(overview, "consolidation")
+    best_s = _choose_best_scenario(overview)
+
+    if min_s is None:
+        raise ValueError("No se encontró escenario mínimo en el overview")
+
+    def r2(x: float) -> float:
+        return round(x, 2)
+
+    # Datos básicos del cliente
+    customer_id = portfolio.customer_id
+    credit_score = portfolio.credit_score
+    available_cf = r2(portfolio.cashflow.available_cashflow)
+    monthly_income = r2(portfolio.cashflow.monthly_income_avg)
+    essential_expenses = r2(portfolio.cashflow.essential_expenses_avg)
+
+    # Resumen numérico por escenario
+    min_block = f"""
+    Escenario 'minimum_payment' (solo pagos mínimos):
+    - total_months: {min_s.total_months}
+    - total_paid: {r2(min_s.total_paid)}
+    - total_interest_paid: {r2(min_s.total_interest_paid)}
+    """
+
+    opt_block = ""
+    if opt_s is not None:
+        opt_block = f"""
+        Escenario 'optimized_plan' (plan optimizado usando flujo de caja):
+        - total_months: {opt_s.total_months}
+        - total_paid: {r2(opt_s.total_paid)}
+        - total_interest_paid: {r2(opt_s.total_interest_paid)}
+        - interest_savings_vs_minimum: {r2(opt_s.interest_savings_vs_minimum)}
+        - months_saved_vs_minimum: {opt_s.months_saved_vs_minimum}
+        """
+
+    if cons_s is not None:
+        cons_block = f"""
+        Escenario 'consolidation' (consolidación de deudas):
+        - total_months: {cons_s.total_months}
+        - total_paid: {r2(cons_s.total_paid)}
+        - total_interest_paid: {r2(cons_s.total_interest_paid)}
+        - interest_savings_vs_minimum: {r2(cons_s.interest_savings_vs_minimum)}
+        - months_saved_vs_minimum: {cons_s.months_saved_vs_minimum}
+        """
+    else:
+        cons_block = """
+        Escenario 'consolidation':
+        - No hay oferta viable de consolidación para este cliente.
+        """
+
+    if best_s is not None:
+        best_block = f"""
+        Escenario recomendado según las métricas:
+        - scenario_type: {best_s.scenario_type}
+        - interest_savings_vs_minimum: {r2(best_s.interest_savings_vs_minimum)}
+        - months_saved_vs_minimum: {best_s.months_saved_vs_minimum}
+        """
+    else:
+        best_block = """
+        Escenario recomendado según las métricas:
+        - Ningún escenario alternativo mejora de forma clara al pago mínimo.
+        """
+
+    num_loans = len(portfolio.loans)
+    num_cards = len(portfolio.cards)
+
+    prompt = textwrap.dedent(
+        f"""
+        Eres un asesor financiero de un banco en Perú. Tu tarea es explicar a un cliente
+        de banca de personas, en lenguaje claro, sus alternativas para pagar sus deudas.
+        NO menciones que eres un modelo de IA ni uses lenguaje técnico innecesario.
+
+        Información del cliente:
+        - customer_id: {customer_id}
+        - credit_score: {credit_score}
+        - ingresos_mensuales_promedio: {monthly_income}
+        - gastos_esenciales_mensuales: {essential_expenses}
+        - flujo_de_caja_disponible_mensual (available_cashflow): {available_cf}
+        - numero_prestamos (loans): {num_loans}
+        - numero_tarjetas (cards): {num_cards}
+
+        Información de escenarios calculados por el motor analítico del banco:
+
+        {min_block}
+
+        {opt_block}
+
+        {cons_block}
+
+        {best_block}
+
+        FORMATO DE SALIDA:
+        - Escribe la respuesta en ESPAÑOL.
+        - Usa **Markdown simple** con este esquema:
+
+          # Resumen general
+
+          (1–2 párrafos cortos)
+
+          ## Escenario 1 – Pago mínimo
+
+          - Punto 1…
+          - Punto 2…
+          - etc.
+
+          ## Escenario 2 – Plan organizado con tu flujo de caja
+
+          - Punto 1…
+          - Punto 2…
+          - etc.
+
+          ## Escenario 3 – Consolidación de deudas
+
+          - Explica la consolidación o indica claramente si no es viable.
+          - Menciona plazo, total pagado e intereses.
+          - Menciona el ahorro vs pago mínimo si existe.
+
+          ## Recomendación final
+
+          - Indica qué escenario es más conveniente según las métricas.
+          - Explica por qué es mejor (intereses ahorrados y meses menos de deuda).
+          - Incluye un mensaje empático y práctico.
+
+        INSTRUCCIONES ADICIONALES:
+        1. No inventes montos ni plazos nuevos: usa solo los números entregados arriba,
+           puedes redondear para hacer el texto más natural sin cambiar el sentido.
+        2. Separa claramente cada sección con un título y una línea en blanco.
+        3. Usa frases cortas y listas con viñetas para que el texto sea fácil de leer
+           en una app móvil.
+        4. No menciones palabras internas como "scenario_type", "min_s" o similares;
+           usa nombres amigables: "pago mínimo", "plan organizado con tu flujo de caja"
+           y "consolidación de deudas".
+        5. Genera un único texto en Markdown listo para mostrarse al cliente.
+        """
+    )
+
+    return prompt
+
+
+
+def _numbers(text: str) -> set:
+    return {float(n) for n in _NUMBER.findall(text)}
+
+
+def _missing_sections(text: str) -> list:
+    return [s for s in SECTIONS if s not in text]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample", type=int, default=20)
+    parser.add_argument("--llm", action="store_true")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    from app.services.dataset_service import get_store, publish_datasets
+    from app.services.llm_client import get_llm_client
+    from app.services.portfolio_service import build_customer_portfolio
+    from app.services.report_generation_service import REPORT_INSTRUCTIONS, _build_report_payload
+    from app.services.scenario_comparison_service import compute_scenarios_overview
+    from app.utils.data_loader import load_all_data
+    from app.utils.token_count import count_tokens, tokenizer_name
+
+    app = _App()
+    publish_datasets(app, load_all_data())
+    customer_ids = list(get_store(app).customer_ids())[: args.sample]
+
+    instruction_tokens = count_tokens(REPORT_INSTRUCTIONS)
+    legacy_total = compact_total = missing_numbers = 0
+    rows = []
+    for customer_id in customer_ids:
+        portfolio = build_customer_portfolio(app, customer_id)
+        overview = compute_scenarios_overview(app, customer_id)
+        old = legacy_prompt(portfolio, overview)
+        payload = _build_report_payload(portfolio, overview)
+        legacy_total += count_tokens(old)
+        compact_total += instruction_tokens + count_tokens(payload)
+        # Los datos del prompt anterior (salvo los números del formato) tienen que estar en el payload.
+        lost = _numbers(old) - _numbers(payload) - _numbers(REPORT_INSTRUCTIONS)
+        if lost:
+            missing_numbers += 1
+            print(f"  {customer_id}: faltan en el payload {sorted(lost)}")
+        rows.append((customer_id, old, payload))
+
+    n = len(rows)
+    print(f"tokenizador: {tokenizer_name()}, {n} clientes")
+    print(f"prompt anterior: {legacy_total / n:.0f} tokens/informe")
+    print(
+        f"prompt compacto: {compact_total / n:.0f} tokens/informe "
+        f"({instruction_tokens} de instrucciones fijas + {(compact_total / n) - instruction_tokens:.0f} de datos)"
+    )
+    print(f"clientes con datos faltantes: {missing_numbers}")
+    if not args.llm:
+        sys.exit(1 if missing_numbers else 0)
+
+    if args.out:
+        args.out.mkdir(parents=True, exist_ok=True)
+    bad_format = 0
+    latency = {"anterior": [], "compacto": []}
+    for customer_id, old, payload in rows:
+        for label, call in (
+            ("anterior", lambda: get_llm_client().generate_text(old)),
+            ("compacto", lambda: get_llm_client().generate_text(payload, instructions=REPORT_INSTRUCTIONS)),
+        ):
+            started = time.perf_counter()
+            text = call()
+            latency[label].append(time.perf_counter() - started)
+            missing = _missing_sections(text)
+            if missing:
+                bad_format += 1
+                print(f"  {customer_id} ({label}): faltan secciones {missing}")
+            if args.out:
+                (args.out / f"{customer_id}_{label}.md").write_text(text, encoding="utf-8")
+
+    for label, values in latency.items():
+        print(f"latencia {label}: {sum(values) / len(values):.2f}s promedio, máx {max(values):.2f}s")
+    print(f"informes sin el esquema: {bad_format}")
+    sys.exit(1 if missing_numbers or bad_format else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Genera un book sintético con el mismo formato que `./data` (5 CSV + JSON).
+
+Por cliente: 1 fila de cashflow, 3 de score, ~1,5 préstamos, ~1,5
+tarjetas y ~9 pagos (≈ 16 filas por cliente; 5M filas ≈ 320k clientes).
+Para usarlo con la API:
+
+    python scripts/generate_book.py --customers 320000 --out /tmp/book
+    DATA_DIR=/tmp/book uvicorn app.main:app
+"""
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def _ids(prefix: str, n: int) -> np.ndarray:
+    return np.char.add(prefix, np.char.zfill(np.arange(n).astype(str), 8)).astype(object)
+
+
+def generate_book(customers: int, out: Path, seed: int = 7) -> dict:
+    """Escribe los datasets en `out` y devuelve las filas por dataset."""
+    rng = np.random.default_rng(seed)
+    out.mkdir(parents=True, exist_ok=True)
+    customer_ids = _ids("CU-", customers)
+
+    n_loans = customers * 3 // 2
+    loans = pd.DataFrame({
+        "loan_id": _ids("L-", n_loans),
+        "customer_id": customer_ids[rng.integers(0, customers, n_loans)],
+        "product_type": rng.choice(["personal", "micro"], n_loans),
+        "principal": rng.uniform(500, 30_000, n_loans).round(2),
+        "annual_rate_pct": rng.choice([0.0, 18.0, 25.0, 30.5, 45.0], n_loans),
+        "remaining_term_months": rng.integers(1, 72, n_loans),
+        "collateral": rng.choice(["true", "false"], n_loans),
+        "days_past_due": rng.integers(0, 60, n_loans),
+    })
+
+    n_cards = customers * 3 // 2
+    cards = pd.DataFrame({
+        "card_id": _ids("C-", n_cards),
+        "customer_id": customer_ids[rng.integers(0, customers, n_cards)],
+        "balance": rng.uniform(100, 15_000, n_cards).round(2),
+        "annual_rate_pct": rng.choice([0.0, 30.0, 45.0, 60.0, 90.0], n_cards),
+        "min_payment_pct": rng.uniform(1, 6, n_cards).round(2),
+        "payment_due_day": rng.integers(1, 29, n_cards),
+        "days_past_due": rng.integers(0, 60, n_cards),
+    })
+
+    # Pagos: ~3 por producto en promedio, repartidos al azar (algunos sin
+    # historial). `% n` porque np.where evalúa ambas ramas.
+    n_payments = (n_loans + n_cards) * 3
+    is_loan = rng.random(n_payments) < 0.5
+    product = np.where(
+        is_loan, rng.integers(0, n_loans, n_payments), rng.integers(0, n_cards, n_payments)
+    )
+    payments = pd.DataFrame({
+        "product_id": np.where(is_loan, loans["loan_id"].to_numpy()[product % n_loans],
+                               cards["card_id"].to_numpy()[product % n_cards]),
+        "product_type": np.where(is_loan, "loan", "card"),
+        "customer_id": np.where(is_loan, loans["customer_id"].to_numpy()[product % n_loans],
+                                cards["customer_id"].to_numpy()[product % n_cards]),
+        "date": (np.datetime64("2024-01-01") + rng.integers(0, 540, n_payments)).astype(str),
+        "amount": rng.uniform(10, 900, n_payments).round(2),
+    })
+
+    credit = pd.DataFrame({
+        "customer_id": np.repeat(customer_ids, 3),
+        "date": np.tile(["2024-01-01", "2024-07-01", "2025-01-01"], customers),
+        "credit_score": rng.integers(300, 850, customers * 3),
+    })
+
+    income = rng.uniform(800, 6_000, customers).round(2)
+    cashflow = pd.DataFrame({
+        "customer_id": customer_ids,
+        "monthly_income_avg": income,
+        "income_variability_pct": rng.uniform(0, 40, customers).round(1),
+        "essential_expenses_avg": (income * rng.uniform(0.4, 0.9, customers)).round(2),
+    })
+
+    frames = {
+        "loans": loans,
+        "cards": cards,
+        "payments_history": payments,
+        "credit_score_history": credit,
+        "customer_cashflow": cashflow,
+    }
+    for name, df in frames.items():
+        df.to_csv(out / f"{name}.csv", index=False)
+    shutil.copy(ROOT_DIR / "data" / "bank_offers.json", out / "bank_offers.json")
+    return {name: len(df) for name, df in frames.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=320_000)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = generate_book(args.customers, args.out, args.seed)
+    for name, n in rows.items():
+        print(f"{name:>22}: {n:>10,} filas")
+    print(f"{'total':>22}: {sum(rows.values()):>10,} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Levanta N shards locales + el router, para probar el modo shard.
+
+Uso:
+    python scripts/run_shards.py --shards 3 --port 8000
+
+El router queda en http://127.0.0.1:<port> y los shards en los puertos
+siguientes (<port>+1 ... <port>+N). Ctrl+C detiene todo.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    procs = []
+    shard_urls = []
+
+    try:
+        for i in range(args.shards):
+            port = args.port + 1 + i
+            env = dict(os.environ, SHARD_INDEX=str(i), SHARD_COUNT=str(args.shards))
+            procs.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "app.main:app", "--host", args.host, "--port", str(port)],
+                    cwd=ROOT_DIR,
+                    env=env,
+                )
+            )
+            shard_urls.append(f"http://{args.host}:{port}")
+
+        env = dict(os.environ, SHARD_URLS=",".join(shard_urls))
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.router:app", "--host", args.host, "--port", str(args.port)],
+                cwd=ROOT_DIR,
+                env=env,
+            )
+        )
+
+        print(f"Router: http://{args.host}:{args.port}  Shards: {', '.join(shard_urls)}")
+        for p in procs:
+            p.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
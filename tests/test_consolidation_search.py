@@ -0,0 +1,102 @@
+import app.services.scenario_consolidation_search_service as search_service
+from app.models.portfolio import CardItem, CustomerCashflow, CustomerPortfolio, LoanItem
+from app.services.financial_math import loan_monthly_payment
+from app.services.scenario_consolidation_search_service import search_consolidation_plan
+
+OFFERS = [
+    {
+        "offer_id": "OF-CONSO-24M",
+        "product_types_eligible": ["card", "personal"],
+        "max_consolidated_balance": 50000,
+        "new_rate_pct": 19.9,
+        "max_term_months": 24,
+        "conditions": "Sin condiciones",
+    },
+    {
+        "offer_id": "OF-CONSO-36M",
+        "product_types_eligible": ["card", "personal", "micro"],
+        "max_consolidated_balance": 75000,
+        "new_rate_pct": 17.5,
+        "max_term_months": 36,
+        "conditions": "Sin condiciones",
+    },
+]
+
+
+def _portfolio(cash: float) -> CustomerPortfolio:
+    customer_id = "CU-TEST"
+    return CustomerPortfolio(
+        customer_id=customer_id,
+        credit_score=720,
+        loans=[
+            LoanItem(
+                loan_id="LN-1",
+                customer_id=customer_id,
+                product_type="personal",
+                principal=30000,
+                annual_rate_pct=38.0,
+                remaining_term_months=48,
+                collateral=False,
+                days_past_due=0,
+            )
+        ],
+        cards=[
+            CardItem(
+                card_id="CC-1",
+                customer_id=customer_id,
+                balance=20000,
+                annual_rate_pct=65.0,
+                min_payment_pct=4.0,
+                payment_due_day=15,
+                days_past_due=0,
+            )
+        ],
+        cashflow=CustomerCashflow(
+            customer_id=customer_id,
+            monthly_income_avg=cash + 1000,
+            income_variability_pct=10,
+            essential_expenses_avg=1000,
+            available_cashflow=cash,
+        ),
+    )
+
+
+def test_consolidates_when_cashflow_covers_the_payments():
+    result = search_consolidation_plan(_portfolio(5000), OFFERS)
+
+    assert result.feasible
+    assert result.groups
+    assert result.interest_savings_vs_optimized > 0
+
+
+def test_cashflow_below_every_offer_payment_is_not_recommended():
+    cash = 500
+    smallest_payment = min(
+        loan_monthly_payment(balance, o["new_rate_pct"], o["max_term_months"])
+        for o in OFFERS
+        for balance in (20000, 30000)
+    )
+    assert cash < smallest_payment
+
+    result = search_consolidation_plan(_portfolio(cash), OFFERS)
+
+    assert not result.feasible
+    assert result.groups == []
+    assert result.interest_savings_vs_optimized == 0
+    assert result.single_offer_total_interest_paid is None
+
+
+def test_search_completes_within_the_node_budget():
+    result = search_consolidation_plan(_portfolio(5000), OFFERS)
+
+    assert not result.search_budget_exhausted
+    assert 0 < result.search_nodes <= search_service.MAX_SEARCH_NODES
+
+
+def test_node_budget_is_never_exceeded(monkeypatch):
+    monkeypatch.setattr(search_service, "MAX_SEARCH_NODES", 3)
+
+    result = search_consolidation_plan(_portfolio(5000), OFFERS)
+
+    assert result.search_budget_exhausted
+    assert result.search_nodes == 3
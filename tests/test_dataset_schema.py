@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.dataset_schema import (
+    MAX_REPORTED_ERRORS,
+    DatasetValidationError,
+    validate_chunks,
+    validate_datasets,
+)
+
+
+def _scores(values):
+    return pd.DataFrame(
+        {
+            "customer_id": ["CU-001"] * len(values),
+            "date": ["2025-01-01"] * len(values),
+            "credit_score": values,
+        }
+    )
+
+
+def test_valid_columns_are_coerced_once():
+    data = validate_datasets({"credit_score_history": _scores(["610", "702"])})
+
+    df = data["credit_score_history"]
+    assert df["credit_score"].dtype == np.int32
+    assert isinstance(df["customer_id"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+
+
+def test_reported_errors_are_capped_but_all_are_counted():
+    rows = MAX_REPORTED_ERRORS + 25
+
+    with pytest.raises(DatasetValidationError) as info:
+        validate_datasets({"credit_score_history": _scores(["x"] * rows)})
+
+    assert info.value.error_counts == {"credit_score_history": rows}
+    assert len(info.value.errors) == MAX_REPORTED_ERRORS
+
+
+def test_chunked_errors_keep_their_csv_line():
+    chunks = [_scores(["610", "620"]), _scores(["630", "-1"])]
+    chunks[1].index = [2, 3]
+
+    with pytest.raises(DatasetValidationError) as info:
+        list(validate_chunks("credit_score_history", chunks))
+
+    (error,) = info.value.errors
+    assert (error["line"], error["value"]) == (5, "-1")
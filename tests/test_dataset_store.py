@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.services.dataset_service import publish_store
+from app.services.portfolio_service import build_customer_portfolio
+from app.utils.dataset_schema import validate_datasets
+from app.utils.dataset_store import PandasStore, SqliteStore, frames_from_data
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def _book(customers: int = 60) -> dict:
+    rng = np.random.default_rng(42)
+    ids = [f"CU-{i:05d}" for i in range(customers)]
+    loans, cards, payments, scores, cashflow = [], [], [], [], []
+    for i, cid in enumerate(ids):
+        # Uno de cada tres clientes sin préstamos, uno de cada cinco sin tarjetas.
+        for k in range(0 if i % 3 == 0 else int(rng.integers(1, 4))):
+            loans.append(
+                [f"L-{i}-{k}", cid, rng.choice(["personal", "micro"]), round(rng.uniform(500, 30000), 2),
+                 rng.choice([18.0, 28.5, 35.0]), int(rng.integers(1, 72)), rng.choice(["true", "false"]),
+                 int(rng.integers(0, 90))]
+            )
+            payments.append([f"L-{i}-{k}", "loan", cid, "2024-03-01", round(rng.uniform(50, 900), 2)])
+        for k in range(0 if i % 5 == 1 else int(rng.integers(1, 3))):
+            cards.append(
+                [f"C-{i}-{k}", cid, round(rng.uniform(100, 15000), 2), rng.choice([39.9, 45.0, 60.0]),
+                 round(rng.uniform(1, 6), 1), int(rng.integers(1, 29)), int(rng.integers(0, 90))]
+            )
+        # Sin historial de score para algunos; el último por fecha para el resto.
+        for month in range(0 if i % 7 == 0 else 3):
+            scores.append([cid, f"2024-0{3 - month}-01", int(rng.integers(400, 850))])
+        cashflow.append([cid, round(rng.uniform(800, 6000), 2), 10.0, round(rng.uniform(500, 4000), 2)])
+
+    raw = {
+        "loans": pd.DataFrame(loans, columns=["loan_id", "customer_id", "product_type", "principal",
+                                              "annual_rate_pct", "remaining_term_months", "collateral",
+                                              "days_past_due"]),
+        "cards": pd.DataFrame(cards, columns=["card_id", "customer_id", "balance", "annual_rate_pct",
+                                              "min_payment_pct", "payment_due_day", "days_past_due"]),
+        "payments_history": pd.DataFrame(payments, columns=["product_id", "product_type", "customer_id",
+                                                            "date", "amount"]),
+        "credit_score_history": pd.DataFrame(scores, columns=["customer_id", "date", "credit_score"]),
+        "customer_cashflow": pd.DataFrame(cashflow, columns=["customer_id", "monthly_income_avg",
+                                                             "income_variability_pct", "essential_expenses_avg"]),
+        "bank_offers": json.loads((DATA_DIR / "bank_offers.json").read_text(encoding="utf-8")),
+    }
+    return validate_datasets(raw)
+
+
+def _app(store, data=None):
+    app = SimpleNamespace(state=SimpleNamespace())
+    publish_store(app, store, data)
+    return app
+
+
+@pytest.fixture(scope="module")
+def apps(tmp_path_factory):
+    data = _book()
+    sqlite = SqliteStore(tmp_path_factory.mktemp("store") / "datasets.sqlite")
+    sqlite.replace(frames_from_data(data), data["bank_offers"])
+    return _app(PandasStore(data), data), _app(sqlite)
+
+
+def test_stores_list_the_same_customers_and_rows(apps):
+    pandas_app, sqlite_app = apps
+    pandas_store, sqlite_store = pandas_app.state.store, sqlite_app.state.store
+
+    assert sqlite_store.customer_ids() == pandas_store.customer_ids()
+    assert sqlite_store.row_counts() == pandas_store.row_counts()
+    assert sqlite_store.bank_offers() == pandas_store.bank_offers()
+
+
+def test_portfolios_match_between_stores(apps):
+    pandas_app, sqlite_app = apps
+    customer_ids = pandas_app.state.store.customer_ids()
+    assert customer_ids
+
+    for cid in customer_ids:
+        expected = build_customer_portfolio(pandas_app, cid)
+        actual = build_customer_portfolio(sqlite_app, cid)
+        assert actual.model_dump() == expected.model_dump(), cid
+
+    without_score = [cid for cid in customer_ids if build_customer_portfolio(sqlite_app, cid).credit_score is None]
+    assert without_score
+
+
+def test_unknown_customer_is_404_in_both_stores(apps):
+    for app in apps:
+        with pytest.raises(HTTPException) as info:
+            build_customer_portfolio(app, "CU-99999")
+        assert info.value.status_code == 404
+
+
+@pytest.mark.parametrize("name", ["loans", "cards", "payments_history", "credit_score_history"])
+def test_full_columns_have_the_same_values_and_types(apps, name):
+    pandas_app, sqlite_app = apps
+    expected = pandas_app.state.store.read_frame(name)
+    actual = sqlite_app.state.store.read_frame(name)
+
+    assert list(actual.columns) == list(expected.columns)
+    for column in expected.columns:
+        exp, act = expected[column], actual[column]
+        # SQLite devuelve texto (object) donde pandas guarda category.
+        assert act.dtype.kind == exp.dtype.kind or (
+            isinstance(exp.dtype, pd.CategoricalDtype) and act.dtype.kind == "O"
+        ), column
+        assert act.astype(str).tolist() == exp.astype(str).tolist(), column
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CSV_DATASETS = ("loans", "cards", "payments_history", "credit_score_history", "customer_cashflow")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("BACKGROUND_LOAD", "0")
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _files(**overrides):
+    files = {name: (f"{name}.csv", (DATA_DIR / f"{name}.csv").read_bytes()) for name in CSV_DATASETS}
+    files["bank_offers"] = ("bank_offers.json", (DATA_DIR / "bank_offers.json").read_bytes())
+    for name, content in overrides.items():
+        files[name] = (files[name][0], content)
+    return files
+
+
+def test_validate_only_does_not_replace_the_datasets(client):
+    version = main.app.state.data_version
+
+    resp = client.post("/datasets/upload", params={"validate_only": "true"}, files=_files())
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "valid"
+    assert resp.json()["rows_per_dataset"]["loans"] == 2
+    assert main.app.state.data_version == version
+
+    assert client.post("/datasets/upload", files=_files()).status_code == 200
+    assert main.app.state.data_version != version
+
+
+LOANS_WITH_ERRORS = (
+    "loan_id,customer_id,product_type,principal,annual_rate_pct,remaining_term_months,collateral,days_past_due\n"
+    "L-101,CU-001,personal,18000.00,28.5,36,false,0\n"
+    "L-102,CU-002,leasing,abc,35.0,24.5,talvez,-3\n"
+).encode()
+
+
+def test_schema_errors_are_reported_per_row_and_nothing_is_replaced(client):
+    version = main.app.state.data_version
+    cards = (DATA_DIR / "cards.csv").read_text(encoding="utf-8-sig").replace("5.0,15,0", "150,32,0")
+    offers = b'[{"offer_id": "OF-1", "product_types_eligible": ["card"]}]'
+
+    resp = client.post(
+        "/datasets/upload",
+        files=_files(loans=LOANS_WITH_ERRORS, cards=cards.encode(), bank_offers=offers),
+    )
+
+    assert resp.status_code == 422
+    detail = resp.json()["detail"]
+    assert detail["error_counts"]["loans"] == 5
+    assert detail["error_counts"]["cards"] == 2
+    assert detail["error_counts"]["bank_offers"] > 0
+    assert "payments_history" not in detail["error_counts"]
+
+    loan_errors = {e["column"]: e for e in detail["errors"] if e["dataset"] == "loans"}
+    assert set(loan_errors) == {
+        "product_type",
+        "principal",
+        "remaining_term_months",
+        "collateral",
+        "days_past_due",
+    }
+    assert all(e["line"] == 3 for e in loan_errors.values())
+    assert loan_errors["principal"]["value"] == "abc"
+    assert main.app.state.data_version == version
+
+
+def test_missing_columns_are_reported(client):
+    loans = b"loan_id,customer_id,principal\nL-101,CU-001,18000\n"
+
+    resp = client.post("/datasets/upload", params={"validate_only": "true"}, files=_files(loans=loans))
+
+    assert resp.status_code == 422
+    error = resp.json()["detail"]["errors"][0]
+    assert error["dataset"] == "loans"
+    assert "product_type" in error["error"] and "annual_rate_pct" in error["error"]
@@ -0,0 +1,44 @@
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+
+
+class _Date(datetime.date):
+    current = datetime.date(2026, 3, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("BACKGROUND_LOAD", "0")
+    monkeypatch.setattr(main, "date", _Date)
+    monkeypatch.setattr(_Date, "current", datetime.date(2026, 3, 1))
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_credit_score_without_date_is_revalidated_the_next_day(client):
+    first = client.get("/customers/CU-001/credit-score")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    assert client.get("/customers/CU-001/credit-score", headers={"If-None-Match": etag}).status_code == 304
+
+    _Date.current = datetime.date(2026, 3, 2)
+    next_day = client.get("/customers/CU-001/credit-score", headers={"If-None-Match": etag})
+    assert next_day.status_code == 200
+    assert next_day.headers["ETag"] != etag
+
+
+def test_credit_score_with_date_keeps_its_etag(client):
+    url = "/customers/CU-001/credit-score?at=2025-01-01"
+    etag = client.get(url).headers["ETag"]
+
+    _Date.current = datetime.date(2026, 3, 3)
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.payment_behavior_service import aggregate_payment_chunks, build_payment_behavior_table
+
+
+def _history(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    customers = rng.integers(0, 40, rows)
+    products = rng.integers(0, 3, rows)
+    frame = pd.DataFrame(
+        {
+            "customer_id": [f"CU-{c:03d}" for c in customers],
+            "product_id": [f"P-{c:03d}-{p}" for c, p in zip(customers, products)],
+            "product_type": np.where(products == 2, "card", "loan"),
+            "date": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+            "amount": rng.uniform(10, 900, rows).round(2),
+        }
+    )
+    frame["date"] = frame["date"].dt.strftime("%Y-%m-%d")
+    return frame.sort_values(["customer_id", "product_id", "date"], kind="stable").reset_index(drop=True)
+
+
+def _expected(history: pd.DataFrame) -> pd.DataFrame:
+    """Agregados directos con un groupby de pandas sobre todo el historial."""
+    dates = pd.to_datetime(history["date"])
+    frame = history.assign(month=dates.dt.year * 12 + dates.dt.month - 1)
+    keys = ["customer_id", "product_id", "product_type"]
+    months = frame.groupby(keys)["month"]
+    return pd.DataFrame(
+        {
+            "payments_count": frame.groupby(keys).size(),
+            "months_with_payment": months.nunique(),
+            "first_month": months.min(),
+            "last_month": months.max(),
+            "total_amount": frame.groupby(keys)["amount"].sum(),
+        }
+    )
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 64, 10_000])
+def test_chunked_aggregates_match_a_single_groupby(chunksize):
+    history = _history(600)
+    chunks = (history.iloc[i:i + chunksize] for i in range(0, len(history), chunksize))
+
+    agg = aggregate_payment_chunks(chunks).set_index(["customer_id", "product_id", "product_type"]).sort_index()
+    expected = _expected(history).sort_index()
+
+    assert list(agg.index) == list(expected.index)
+    for column in ("payments_count", "months_with_payment", "first_month", "last_month"):
+        assert agg[column].astype(np.int64).tolist() == expected[column].tolist()
+    np.testing.assert_allclose(agg["total_amount"].to_numpy(float), expected["total_amount"].to_numpy(), rtol=1e-12)
+
+
+def test_missed_months_and_overpayment():
+    history = pd.DataFrame(
+        {
+            "customer_id": ["CU-1"] * 4 + ["CU-2"],
+            "product_id": ["L-1", "L-1", "L-1", "C-1", "C-2"],
+            "product_type": ["loan", "loan", "loan", "card", "card"],
+            # L-1: enero (dos pagos) y marzo; hasta abril falta febrero y abril.
+            "date": ["2024-01-05", "2024-01-20", "2024-03-05", "2024-02-10", "2024-04-01"],
+            "amount": [100.0, 50.0, 150.0, 80.0, 10.0],
+        }
+    )
+    loans = pd.DataFrame({"loan_id": ["L-1"], "principal": [1200.0], "annual_rate_pct": [0.0], "remaining_term_months": [12]})
+    cards = pd.DataFrame({"card_id": ["C-1"], "balance": [1000.0], "annual_rate_pct": [24.0], "min_payment_pct": [5.0]})
+
+    table = build_payment_behavior_table([history], loans, cards)
+    products = {p.product_id: p for p in table.for_customer("CU-1").products}
+
+    loan = products["L-1"]
+    assert (loan.payments_count, loan.months_with_payment, loan.missed_months) == (3, 2, 2)
+    assert loan.regularity == pytest.approx(0.5)
+    assert loan.avg_monthly_payment == pytest.approx(150.0)
+    assert loan.min_payment == pytest.approx(100.0)
+    assert loan.avg_overpayment == pytest.approx(50.0)
+
+    card = products["C-1"]
+    assert card.min_payment == pytest.approx(50.0)
+    assert card.missed_months == 2
+    assert [p.product_id for p in table.for_customer("CU-2").products] == ["C-2"]
+    assert table.for_customer("CU-404").products == []
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.services.report_generation_service as report_generation_service
+from app.services.report_generation_service import (
+    customer_report_within_deadline,
+    get_report_cache,
+    report_stats,
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("BACKGROUND_LOAD", "0")
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    with TestClient(main.app) as client:
+        main.app.state.derived.pop("report_cache", None)
+        yield client
+        _wait_idle()
+        main.app.state.derived.pop("report_cache", None)
+
+
+def _wait_idle(timeout_s: float = 5.0) -> None:
+    """Espera a que terminen las llamadas al LLM en segundo plano."""
+    deadline = time.monotonic() + timeout_s
+    while report_generation_service._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not report_generation_service._inflight
+
+
+def test_llm_in_time_is_returned_and_cached(client):
+    report = customer_report_within_deadline(main.app, "CU-001", deadline_s=5.0)
+
+    assert not report.fallback
+    assert report.usage is not None
+    assert get_report_cache(main.app).get("CU-001") == report
+
+
+def test_late_llm_falls_back_to_the_template_and_backfills_the_cache(client, monkeypatch):
+    monkeypatch.setenv("LLM_STUB_LATENCY_S", "0.3")
+    backfilled = report_stats()["backfilled"]
+
+    started = time.monotonic()
+    report = customer_report_within_deadline(main.app, "CU-001", deadline_s=0.05)
+
+    assert time.monotonic() - started < 0.3
+    assert report.fallback
+    assert report.fallback_reason == "deadline"
+    assert report.usage is None
+    assert "## Recomendación final" in report.report_text
+    assert get_report_cache(main.app).get("CU-001") is None
+
+    _wait_idle()
+    assert report_stats()["backfilled"] == backfilled + 1
+    following = customer_report_within_deadline(main.app, "CU-001", deadline_s=0.05)
+    assert not following.fallback
+    assert "Informe de prueba" in following.report_text
+
+
+def test_late_llm_is_discarded_without_backfill(client, monkeypatch):
+    monkeypatch.setenv("LLM_STUB_LATENCY_S", "0.3")
+    monkeypatch.setattr(report_generation_service, "REPORT_BACKFILL", False)
+
+    assert customer_report_within_deadline(main.app, "CU-002", deadline_s=0.05).fallback
+
+    _wait_idle()
+    assert get_report_cache(main.app).get("CU-002") is None
+
+
+def test_llm_error_falls_back_without_caching(client, monkeypatch):
+    class _Failing:
+        last_usage = None
+
+        def generate_text(self, prompt, instructions=None):
+            raise RuntimeError("servicio caído")
+
+    monkeypatch.setattr(report_generation_service, "get_llm_client", _Failing)
+
+    report = customer_report_within_deadline(main.app, "CU-001", deadline_s=5.0)
+
+    assert report.fallback
+    assert report.fallback_reason == "llm_error"
+    _wait_idle()
+    assert get_report_cache(main.app).get("CU-001") is None
+
+
+def test_fallback_response_is_not_cacheable(client, monkeypatch):
+    monkeypatch.setenv("LLM_STUB_LATENCY_S", "0.3")
+    monkeypatch.setattr(customer_report_within_deadline, "__defaults__", (0.05,))
+
+    resp = client.get("/customers/CU-002/report")
+
+    assert resp.status_code == 200
+    assert resp.json()["fallback"] is True
+    assert resp.headers["Cache-Control"] == "no-store"
@@ -0,0 +1,97 @@
+from app.models.portfolio import CustomerCashflow, CustomerPortfolio
+from app.models.scenarios import ScenarioComparisonResult, ScenarioSavings
+from app.services.report_generation_service import _build_report_payload, render_template_report
+
+
+def _portfolio() -> CustomerPortfolio:
+    return CustomerPortfolio(
+        customer_id="CU-00000000",
+        credit_score=610,
+        loans=[],
+        cards=[],
+        cashflow=CustomerCashflow(
+            customer_id="CU-00000000",
+            monthly_income_avg=1500,
+            income_variability_pct=20,
+            essential_expenses_avg=1300,
+            available_cashflow=200,
+        ),
+    )
+
+
+def _overview(consolidation: ScenarioSavings) -> ScenarioComparisonResult:
+    # Mínimo y plan optimizado sin terminar de pagar en el horizonte; el
+    # plan optimizado además paga más intereses que el mínimo.
+    return ScenarioComparisonResult(
+        customer_id="CU-00000000",
+        baseline_type="minimum_payment",
+        baseline_total_months=600,
+        baseline_total_interest_paid=336216.79,
+        scenarios=[
+            ScenarioSavings(
+                scenario_type="minimum_payment",
+                total_months=600,
+                total_paid=345139.53,
+                total_interest_paid=336216.79,
+                interest_savings_vs_minimum=0.0,
+                months_saved_vs_minimum=0,
+            ),
+            ScenarioSavings(
+                scenario_type="optimized_plan",
+                total_months=600,
+                total_paid=137472.0,
+                total_interest_paid=432772.73,
+                interest_savings_vs_minimum=-96555.93,
+                months_saved_vs_minimum=0,
+            ),
+            consolidation,
+        ],
+    )
+
+
+# Consolidación sin oferta viable: sin meses ni pagos, "ahorra" todo el interés del mínimo.
+NO_CONSOLIDATION = ScenarioSavings(
+    scenario_type="consolidation",
+    total_months=0,
+    total_paid=0.0,
+    total_interest_paid=0.0,
+    interest_savings_vs_minimum=336216.79,
+    months_saved_vs_minimum=600,
+)
+
+
+def _section(text: str, title: str) -> str:
+    return text.split(f"## {title}", 1)[1].split("\n## ", 1)[0]
+
+
+def test_fallback_does_not_recommend_a_non_viable_consolidation():
+    text = render_template_report(_portfolio(), _overview(NO_CONSOLIDATION))
+
+    assert "no hay una oferta de consolidación viable" in _section(text, "Escenario 3")
+    recommendation = _section(text, "Recomendación final")
+    assert "consolidación" not in recommendation
+    assert "Ahorrarías" not in recommendation
+    assert "Ningún escenario alternativo mejora" in recommendation
+
+
+def test_fallback_recommends_a_viable_consolidation():
+    consolidation = ScenarioSavings(
+        scenario_type="consolidation",
+        total_months=36,
+        total_paid=11000.0,
+        total_interest_paid=2000.0,
+        interest_savings_vs_minimum=334216.79,
+        months_saved_vs_minimum=564,
+    )
+
+    text = render_template_report(_portfolio(), _overview(consolidation))
+
+    assert "36 meses" in _section(text, "Escenario 3")
+    assert "consolidación de deudas" in _section(text, "Recomendación final")
+
+
+def test_payload_does_not_recommend_a_non_viable_consolidation():
+    payload = _build_report_payload(_portfolio(), _overview(NO_CONSOLIDATION))
+
+    assert "- consolidacion: no_viable\n" in payload
+    assert "- recomendado: ninguno\n" in payload
@@ -0,0 +1,139 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.services.report_generation_service as report_generation_service
+import app.services.report_job_service as report_job_service
+from app.models.report import ReportJob, ReportJobItem
+from app.services.llm_client import StubLLMClient
+from app.services.report_job_service import RateLimiter, ReportJobManager, _write_report_file
+
+
+def _drop_report_cache():
+    derived = getattr(main.app.state, "derived", None)
+    if derived is not None:
+        derived.pop("report_cache", None)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("BACKGROUND_LOAD", "0")
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.setattr(report_job_service, "REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(report_job_service, "REPORT_JOB_RPM", 0)
+    monkeypatch.setattr(report_job_service, "BACKOFF_BASE_S", 0.01)
+    # Sin caché de informes: cada ítem llama al stub.
+    monkeypatch.setattr(report_generation_service, "REPORT_CACHE_SIZE", 0)
+    monkeypatch.setattr(StubLLMClient, "_calls", 0)
+    _drop_report_cache()
+    with TestClient(main.app) as client:
+        yield client
+    _drop_report_cache()
+
+
+def _wait_completed(get, job_id: str, timeout_s: float = 10.0) -> ReportJob:
+    deadline = time.monotonic() + timeout_s
+    while True:
+        job = get(job_id)
+        if job.status == "completed" or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def _get(client):
+    return lambda job_id: ReportJob.model_validate(client.get(f"/reports/jobs/{job_id}").json())
+
+
+def test_job_writes_one_report_per_customer(client, tmp_path):
+    response = client.post("/reports/jobs", json={"customer_ids": ["CU-001", "CU-002", "CU-001"]})
+    assert response.status_code == 202
+    job = ReportJob.model_validate(response.json())
+    assert job.total == 2
+
+    job = _wait_completed(_get(client), job.job_id)
+
+    assert job.status == "completed"
+    assert (job.done, job.failed) == (2, 0)
+    for item in job.items:
+        assert item.status == "done"
+        assert job.job_id in item.file
+        assert "Informe de prueba" in (tmp_path / item.file).read_text(encoding="utf-8")
+    assert (tmp_path / "jobs" / f"{job.job_id}.json").exists()
+
+
+def test_unknown_customers_are_rejected(client):
+    response = client.post("/reports/jobs", json={"customer_ids": ["CU-001", "CU-404"]})
+
+    assert response.status_code == 404
+    assert "CU-404" in response.json()["detail"]
+
+
+def test_rate_limited_calls_are_retried(client, monkeypatch):
+    monkeypatch.setenv("LLM_STUB_RATE_LIMIT_EVERY", "2")
+
+    job_id = client.post("/reports/jobs", json={"customer_ids": ["CU-001", "CU-002"]}).json()["job_id"]
+    job = _wait_completed(_get(client), job_id)
+
+    assert (job.done, job.failed) == (2, 0)
+    # Llamadas 1 y 3 responden; la 2 es un 429 que se reintenta.
+    assert sum(item.attempts for item in job.items) == 3
+
+
+def test_unfinished_job_is_resumed_after_a_restart(client, tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    job = ReportJob(
+        job_id="resumeme",
+        status="running",
+        created_at="2026-01-01T00:00:00.000Z",
+        updated_at="2026-01-01T00:00:00.000Z",
+        total=2,
+        items=[
+            ReportJobItem(customer_id="CU-001", status="running", attempts=1),
+            ReportJobItem(customer_id="CU-002"),
+        ],
+    )
+    (jobs_dir / "resumeme.json").write_text(job.model_dump_json(), encoding="utf-8")
+    # CU-001 terminó después del último snapshot: solo está en el log.
+    done = ReportJobItem(customer_id="CU-001", status="done", attempts=1, file="report_CU-001.md")
+    (jobs_dir / "resumeme.log").write_text(done.model_dump_json() + "\n", encoding="utf-8")
+
+    manager = ReportJobManager(main.app)
+    try:
+        assert manager.resume_pending() == ["resumeme"]
+        job = _wait_completed(manager.get, "resumeme")
+    finally:
+        manager.shutdown()
+
+    assert job.status == "completed"
+    assert (job.done, job.failed) == (2, 0)
+    first, second = job.items
+    assert (first.file, first.attempts) == ("report_CU-001.md", 1)
+    assert second.status == "done" and second.attempts == 1
+    # Solo se llamó al LLM para el cliente pendiente.
+    assert StubLLMClient._calls == 1
+
+
+def test_reports_in_the_same_second_do_not_overwrite_each_other(monkeypatch, tmp_path):
+    monkeypatch.setattr(report_job_service, "REPORTS_DIR", tmp_path)
+
+    first = _write_report_file("CU-001", "job1", "uno")
+    second = _write_report_file("CU-001", "job1", "dos")
+    other_job = _write_report_file("CU-001", "job2", "tres")
+
+    assert len({first, second, other_job}) == 3
+    assert "job1" in first.name and "job2" in other_job.name
+    assert first.read_text(encoding="utf-8").endswith("uno\n")
+    assert second.read_text(encoding="utf-8").endswith("dos\n")
+
+
+def test_rate_limiter_spaces_calls_after_the_burst():
+    limiter = RateLimiter(per_minute=1200, burst=2)  # una llamada cada 50 ms
+
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    elapsed = time.monotonic() - started
+
+    assert 0.08 <= elapsed < 1.0
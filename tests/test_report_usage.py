@@ -0,0 +1,87 @@
+from collections import deque
+
+import pytest
+
+import app.services.report_generation_service as report_generation_service
+import app.utils.token_count as token_count
+from app.services.report_generation_service import (
+    REPORT_INSTRUCTIONS,
+    _build_report_payload,
+    generate_explanatory_report,
+    report_usage_stats,
+)
+from app.utils.token_count import count_tokens, tokenizer_name
+from tests.test_report_generation import NO_CONSOLIDATION, _overview, _portfolio
+
+
+@pytest.fixture
+def usage(monkeypatch):
+    """Contadores de uso vacíos durante el test."""
+    monkeypatch.setattr(
+        report_generation_service,
+        "_usage_totals",
+        {name: 0 for name in report_generation_service._usage_totals},
+    )
+    monkeypatch.setattr(report_generation_service, "_latencies_ms", deque(maxlen=1000))
+
+
+class _Client:
+    """LLM falso que informa tokens como el servicio."""
+
+    def __init__(self, usage=None):
+        self.last_usage = usage
+
+    def generate_text(self, prompt, instructions=None):
+        return "informe " * 50
+
+
+def test_estimate_without_tokenizer(monkeypatch):
+    monkeypatch.setattr(token_count, "_encoding", lambda: None)
+
+    assert tokenizer_name() == "estimate"
+    assert count_tokens(None) == 0
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+
+
+def test_local_counts_are_used_when_the_service_reports_none(usage, monkeypatch):
+    monkeypatch.setattr(report_generation_service, "get_llm_client", _Client)
+    portfolio, overview = _portfolio(), _overview(NO_CONSOLIDATION)
+
+    report = generate_explanatory_report(portfolio, overview)
+
+    assert report.usage.instruction_tokens == count_tokens(REPORT_INSTRUCTIONS)
+    assert report.usage.payload_tokens == count_tokens(_build_report_payload(portfolio, overview))
+    assert report.usage.input_tokens is None
+
+    stats = report_usage_stats()
+    assert stats["calls"] == 1
+    assert stats["input_tokens"] == report.usage.instruction_tokens + report.usage.payload_tokens
+    assert stats["output_tokens"] == count_tokens(report.report_text)
+    assert stats["cached_ratio"] == 0.0
+    assert stats["latency_ms"]["window"] == 1
+
+
+def test_service_counts_and_cache_ratio_are_aggregated(usage, monkeypatch):
+    reported = {"input_tokens": 1000, "output_tokens": 200, "cached_tokens": 750}
+    monkeypatch.setattr(report_generation_service, "get_llm_client", lambda: _Client(reported))
+
+    for _ in range(4):
+        generate_explanatory_report(_portfolio(), _overview(NO_CONSOLIDATION))
+
+    stats = report_usage_stats()
+    assert stats["calls"] == 4
+    assert (stats["input_tokens"], stats["output_tokens"], stats["cached_tokens"]) == (4000, 800, 3000)
+    assert (stats["avg_input_tokens"], stats["avg_output_tokens"]) == (1000.0, 200.0)
+    assert stats["cached_ratio"] == 0.75
+
+
+def test_latency_percentiles(usage):
+    for ms in range(1, 101):
+        report_generation_service._latencies_ms.append(float(ms))
+
+    latency = report_usage_stats()["latency_ms"]
+
+    assert (latency["p50"], latency["p99"], latency["max"]) == (51.0, 100.0, 100.0)
+    assert report_usage_stats()["avg_input_tokens"] is None
@@ -0,0 +1,333 @@
+import json
+
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import router
+
+SHARDS = ["http://shard-0", "http://shard-1"]
+
+
+class _Transport(httpx.AsyncBaseTransport):
+    """Como `httpx.MockTransport`, sin leer la respuesta (el router la reenvía en streaming)."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        resp = self.handler(request)
+        return httpx.Response(resp.status_code, headers=resp.headers, stream=_Body(resp.content))
+
+
+class _Body(httpx.AsyncByteStream):
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def __aiter__(self):
+        yield self.content
+
+
+@pytest.fixture
+def shards(monkeypatch):
+    """
+    Router con dos shards simulados: `responses[(shard, método, path)]`
+    (o `path?query` si la respuesta depende del query).
+    """
+    monkeypatch.setenv("SHARD_URLS", ",".join(SHARDS))
+    responses = {}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        shard = SHARDS.index(f"{request.url.scheme}://{request.url.host}")
+        requests.append((shard, request.method, request.url.path, request.content))
+        key = (shard, request.method, request.url.path)
+        query = request.url.query.decode()
+        if query and (shard, request.method, f"{request.url.path}?{query}") in responses:
+            key = (shard, request.method, f"{request.url.path}?{query}")
+        status, body = responses[key]
+        if isinstance(body, bytes):
+            return httpx.Response(status, content=body)
+        return httpx.Response(status, json=body)
+
+    with TestClient(router.app) as client:
+        router.app.state.client = httpx.AsyncClient(transport=_Transport(handler))
+        yield client, responses, requests
+
+
+def _impact(**values):
+    result = {
+        "offer_id": "OF-X",
+        "replaces_existing": False,
+        "customers_in_book": 0,
+        "customers_recomputed": 0,
+        "customers_affected": 0,
+        "customers_gained": 0,
+        "customers_lost": 0,
+        "customers_switched": 0,
+        "interest_before": 0.0,
+        "interest_after": 0.0,
+        "interest_savings_delta": 0.0,
+        "sample_customer_ids": [],
+    }
+    result.update(values)
+    return result
+
+
+OFFER = {
+    "offer_id": "OF-X",
+    "product_types_eligible": ["card"],
+    "max_consolidated_balance": 50000,
+    "new_rate_pct": 17.5,
+    "max_term_months": 36,
+    "conditions": "Sin condiciones",
+}
+
+
+def test_offer_impact_merges_every_shard(shards):
+    client, responses, requests = shards
+    responses[(0, "POST", "/offers/impact")] = (200, _impact(
+        customers_in_book=10, customers_recomputed=6, customers_affected=3, customers_gained=3,
+        interest_after=300.0, sample_customer_ids=["CU-01", "CU-04", "CU-09"],
+    ))
+    responses[(1, "POST", "/offers/impact")] = (200, _impact(
+        customers_in_book=12, customers_recomputed=5, customers_affected=2, customers_switched=2,
+        interest_before=500.0, interest_after=200.0, interest_savings_delta=300.0,
+        sample_customer_ids=["CU-02", "CU-03"],
+    ))
+
+    resp = client.post("/offers/impact", json=OFFER)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["customers_in_book"] == 22
+    assert body["customers_recomputed"] == 11
+    assert body["customers_affected"] == 5
+    assert body["customers_gained"] == 3
+    assert body["customers_switched"] == 2
+    assert body["interest_after"] == 500.0
+    assert body["interest_savings_delta"] == 300.0
+    assert body["sample_customer_ids"] == ["CU-01", "CU-02", "CU-03", "CU-04", "CU-09"]
+    assert sorted(shard for shard, *_ in requests) == [0, 1]
+    assert all(json.loads(content) == OFFER for *_, content in requests)
+
+
+def test_offer_impact_propagates_shard_errors(shards):
+    client, responses, _ = shards
+    responses[(0, "POST", "/offers/impact")] = (200, _impact())
+    responses[(1, "POST", "/offers/impact")] = (503, {"detail": "Cargando datasets"})
+
+    assert client.post("/offers/impact", json=OFFER).status_code == 503
+
+
+def _analytics(savings, debt, eligible, bands):
+    edges = [0.0, 500.0, 1_000.0, 2_500.0, 5_000.0, 10_000.0, 25_000.0]
+    counts = np.bincount(np.searchsorted(edges, savings, side="right") - 1, minlength=len(edges))
+    customers = len(savings)
+    return {
+        "customers": customers,
+        "total_debt": sum(d[2] for d in debt),
+        "debt_by_product_type": [
+            {"product_type": t, "products": n, "customers": n, "total_balance": b, "share_of_debt": 0.0}
+            for t, n, b in debt
+        ],
+        "savings": {
+            "total": float(sum(savings)),
+            "mean": float(np.mean(savings)),
+            **{f"p{q}": 0.0 for q in (10, 25, 50, 75, 90)},
+            "buckets": [
+                {"min_savings": lo, "max_savings": hi, "customers": int(n)}
+                for lo, hi, n in zip(edges, edges[1:] + [None], counts)
+            ],
+        },
+        "consolidation_eligible_customers": eligible,
+        "consolidation_eligible_share": eligible / customers,
+        "by_score_band": [
+            {"band": band, "customers": n, "total_savings": total,
+             "avg_savings": total / n if n else 0.0, "consolidation_eligible_share": share}
+            for band, n, total, share in bands
+        ],
+    }
+
+
+def test_book_analytics_merges_every_shard(shards):
+    client, responses, _ = shards
+    savings = [[100.0, 700.0, 3_000.0], [0.0, 30_000.0]]
+    responses[(0, "GET", "/analytics/book")] = (200, _analytics(
+        savings[0], debt=[("personal", 2, 1_000.0)], eligible=1,
+        bands=[("<580", 2, 800.0, 0.5), ("sin score", 1, 3_000.0, 0.0)],
+    ))
+    responses[(1, "GET", "/analytics/book")] = (200, _analytics(
+        savings[1], debt=[("micro", 1, 500.0), ("card", 3, 1_500.0)], eligible=2,
+        bands=[("<580", 2, 30_000.0, 1.0), ("sin score", 0, 0.0, 0.0)],
+    ))
+    for shard, values in enumerate(savings):
+        responses[(shard, "GET", "/analytics/book/savings")] = (200, np.array(values, dtype="<f8").tobytes())
+
+    resp = client.get("/analytics/book")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    book = np.concatenate(savings)
+    assert body["customers"] == 5
+    assert body["total_debt"] == 3_000.0
+    assert [t["product_type"] for t in body["debt_by_product_type"]] == ["micro", "personal", "card"]
+    assert [t["share_of_debt"] for t in body["debt_by_product_type"]] == pytest.approx([1 / 6, 1 / 3, 1 / 2])
+    assert body["savings"]["total"] == book.sum()
+    assert body["savings"]["p50"] == np.quantile(book, 0.5)
+    assert body["savings"]["p90"] == np.quantile(book, 0.9)
+    assert [b["customers"] for b in body["savings"]["buckets"]] == [2, 1, 0, 1, 0, 0, 1]
+    assert body["consolidation_eligible_customers"] == 3
+    assert body["consolidation_eligible_share"] == 3 / 5
+    assert body["by_score_band"][0] == {
+        "band": "<580",
+        "customers": 4,
+        "total_savings": 30_800.0,
+        "avg_savings": 7_700.0,
+        "consolidation_eligible_share": 0.75,
+    }
+    assert body["by_score_band"][1]["avg_savings"] == 3_000.0
+
+
+def _job(job_id, status, customers, done=0, created="2026-01-01T00:00:00.000Z"):
+    return {
+        "job_id": job_id,
+        "status": status,
+        "created_at": created,
+        "updated_at": created,
+        "total": len(customers),
+        "done": done,
+        "failed": 0,
+        "items": [
+            {"customer_id": c, "status": "done" if i < done else "pending"}
+            for i, c in enumerate(customers)
+        ],
+    }
+
+
+def test_report_job_is_split_by_owner_shard(shards):
+    client, responses, requests = shards
+    # CU-00000000 y CU-00000001 son del shard 0; CU-00000004 y CU-00000005, del 1.
+    responses[(0, "POST", "/reports/jobs")] = (202, _job("aaa", "running", ["CU-00000000", "CU-00000001"]))
+    responses[(1, "POST", "/reports/jobs")] = (202, _job("bbb", "pending", ["CU-00000004"]))
+
+    resp = client.post("/reports/jobs", json={"customer_ids": ["CU-00000000", "CU-00000004", "CU-00000001"]})
+
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["job_id"] == "0.aaa-1.bbb"
+    assert body["status"] == "running"
+    assert body["total"] == 3
+    assert {shard: json.loads(content) for shard, _, _, content in requests} == {
+        0: {"customer_ids": ["CU-00000000", "CU-00000001"]},
+        1: {"customer_ids": ["CU-00000004"]},
+    }
+
+    responses[(0, "GET", "/reports/jobs/aaa")] = (200, _job("aaa", "completed", ["CU-00000000", "CU-00000001"], done=2))
+    responses[(1, "GET", "/reports/jobs/bbb")] = (200, _job("bbb", "running", ["CU-00000004"], done=0))
+    status = client.get("/reports/jobs/0.aaa-1.bbb").json()
+    assert status["status"] == "running"
+    assert status["done"] == 2
+    assert [it["customer_id"] for it in status["items"]] == ["CU-00000000", "CU-00000001", "CU-00000004"]
+
+
+def test_report_job_for_all_customers_skips_shards_without_customers(shards):
+    client, responses, requests = shards
+    responses[(0, "POST", "/reports/jobs")] = (202, _job("aaa", "pending", ["CU-00000000"]))
+    responses[(1, "POST", "/reports/jobs")] = (400, {"detail": "No hay clientes para el job"})
+
+    body = client.post("/reports/jobs", json={}).json()
+
+    assert body["job_id"] == "0.aaa"
+    assert sorted(shard for shard, *_ in requests) == [0, 1]
+
+
+def test_report_job_unknown_ids(shards):
+    client, responses, _ = shards
+    responses[(1, "GET", "/reports/jobs/bbb")] = (404, {"detail": "Job bbb no encontrado"})
+
+    assert client.get("/reports/jobs/not-a-job").status_code == 404
+    assert client.get("/reports/jobs/7.aaa").status_code == 404
+    assert client.get("/reports/jobs/1.bbb").status_code == 404
+
+
+def test_customer_requests_go_to_the_owner_shard(shards):
+    client, responses, requests = shards
+    responses[(1, "GET", "/customers/CU-00000004/portfolio")] = (200, {"customer_id": "CU-00000004"})
+
+    resp = client.get("/customers/CU-00000004/portfolio")
+
+    assert resp.status_code == 200
+    assert resp.json() == {"customer_id": "CU-00000004"}
+    assert [(shard, path) for shard, _, path, _ in requests] == [(1, "/customers/CU-00000004/portfolio")]
+
+
+def test_customer_listing_merges_pages_across_shards(shards):
+    client, responses, requests = shards
+    responses[(0, "GET", "/customers")] = (200, {
+        "items": ["CU-00000000", "CU-00000001", "CU-00000002"], "next_cursor": "CU-00000002", "total": 5,
+    })
+    responses[(1, "GET", "/customers")] = (200, {"items": ["CU-00000004"], "next_cursor": None, "total": 1})
+
+    page = client.get("/customers", params={"limit": 3, "cursor": "CU-0"}).json()
+
+    assert page == {"items": ["CU-00000000", "CU-00000001", "CU-00000002"], "next_cursor": "CU-00000002", "total": 6}
+    assert sorted(shard for shard, *_ in requests) == [0, 1]
+
+    responses[(0, "GET", "/customers")] = (200, {"items": ["CU-00000003"], "next_cursor": None, "total": 5})
+    last = client.get("/customers", params={"limit": 3, "cursor": "CU-00000002"}).json()
+    assert last == {"items": ["CU-00000003", "CU-00000004"], "next_cursor": None, "total": 6}
+
+
+UPLOAD_FILES = {
+    name: (f"{name}.csv", b"customer_id\nCU-00000000\n", "text/csv")
+    for name in ("loans", "cards", "payments_history", "credit_score_history", "customer_cashflow")
+}
+UPLOAD_FILES["bank_offers"] = ("bank_offers.json", b"[]", "application/json")
+
+
+def _uploaded(rows):
+    return {"status": "ok", "rows_per_dataset": {"loans": rows, "bank_offers": 2}}
+
+
+def test_upload_validates_on_every_shard_before_publishing(shards):
+    client, responses, requests = shards
+    for shard, rows in ((0, 3), (1, 4)):
+        responses[(shard, "POST", "/datasets/upload?validate_only=true")] = (200, {"status": "valid"})
+        responses[(shard, "POST", "/datasets/upload")] = (200, _uploaded(rows))
+
+    resp = client.post("/datasets/upload", files=UPLOAD_FILES)
+
+    assert resp.status_code == 200
+    assert resp.json()["rows_per_dataset"] == {"loans": 7, "bank_offers": 2}
+    assert len(requests) == 4
+
+
+def test_upload_rejected_by_one_shard_is_not_published_anywhere(shards):
+    client, responses, requests = shards
+    responses[(0, "POST", "/datasets/upload?validate_only=true")] = (200, {"status": "valid"})
+    responses[(1, "POST", "/datasets/upload?validate_only=true")] = (422, {"detail": {"message": "Esquema inválido"}})
+
+    resp = client.post("/datasets/upload", files=UPLOAD_FILES)
+
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == {"message": "Esquema inválido"}
+    # Solo se llamó a la fase de validación.
+    assert len(requests) == 2
+
+
+def test_upload_reports_which_shards_applied_it(shards):
+    client, responses, _ = shards
+    for shard in (0, 1):
+        responses[(shard, "POST", "/datasets/upload?validate_only=true")] = (200, {"status": "valid"})
+    responses[(0, "POST", "/datasets/upload")] = (200, _uploaded(3))
+    responses[(1, "POST", "/datasets/upload")] = (500, b"Internal Server Error")
+
+    resp = client.post("/datasets/upload", files=UPLOAD_FILES)
+
+    assert resp.status_code == 502
+    detail = resp.json()["detail"]
+    assert detail["applied_shards"] == [0]
+    assert detail["failed_shards"] == [{"shard": 1, "error": "Internal Server Error"}]
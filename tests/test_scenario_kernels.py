@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.services import scenario_kernels
+from app.services.scenario_minimum_service import _simulate_card_minimum
+from app.services.scenario_optimized_service import simulate_optimized_plan, simulate_optimized_plans
+from app.services.scenario_strategy_service import STRATEGIES
+from scripts.bench_kernels import random_portfolio
+
+pytest.importorskip("numba")
+
+TOLERANCE = 1e-6
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Cambia de backend dentro del test y deja el de antes al terminar."""
+    monkeypatch.setattr(scenario_kernels, "_active", scenario_kernels._active)
+    monkeypatch.setattr(scenario_kernels, "_backend", scenario_kernels._backend)
+
+    def run(name, fn, *args, **kwargs):
+        assert scenario_kernels.use_backend(name) == name
+        assert (scenario_kernels.get_kernels() is None) == (name == "python")
+        return fn(*args, **kwargs)
+
+    return run
+
+
+def _portfolios():
+    rng = np.random.default_rng(41)
+    portfolios = [random_portfolio(rng, i, max_debts=9) for i in range(40)]
+    # Flujo nulo y flujo que no cubre los mínimos (mínimos escalados).
+    portfolios[0].cashflow.available_cashflow = 0.0
+    portfolios[1].cashflow.available_cashflow = 50.0
+    return portfolios
+
+
+def _assert_same(expected, actual):
+    assert actual.total_months == expected.total_months
+    assert actual.total_interest_paid == pytest.approx(expected.total_interest_paid, abs=TOLERANCE)
+    assert [d.product_id for d in actual.debts] == [d.product_id for d in expected.debts]
+    for exp, act in zip(expected.debts, actual.debts):
+        assert act.months_to_payoff == exp.months_to_payoff, exp.product_id
+        assert act.total_paid == pytest.approx(exp.total_paid, abs=TOLERANCE)
+        assert act.total_interest_paid == pytest.approx(exp.total_interest_paid, abs=TOLERANCE)
+
+
+@pytest.mark.parametrize(
+    "balance, rate, min_pct",
+    [
+        (3500.0, 45.0, 5.0),
+        (15000.0, 90.0, 1.0),  # el mínimo no cubre el interés: interés + 1
+        (120.0, 30.0, 2.0),  # piso de 10
+        (5000.0, 0.0, 3.0),
+        (10_000_000.0, 60.0, 1.0),  # no termina en 600 meses
+    ],
+)
+def test_card_minimum_matches_across_backends(backend, balance, rate, min_pct):
+    expected = backend("python", _simulate_card_minimum, balance, rate, min_pct)
+    actual = backend("numba", _simulate_card_minimum, balance, rate, min_pct)
+
+    assert actual.months_to_payoff == expected.months_to_payoff
+    assert actual.total_paid == pytest.approx(expected.total_paid, abs=TOLERANCE)
+    assert actual.total_interest_paid == pytest.approx(expected.total_interest_paid, abs=TOLERANCE)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_optimized_plan_matches_across_backends(backend, strategy):
+    for portfolio in _portfolios():
+        _assert_same(
+            backend("python", simulate_optimized_plan, portfolio, strategy),
+            backend("numba", simulate_optimized_plan, portfolio, strategy),
+        )
+
+
+def test_all_strategies_match_across_backends_and_single_runs(backend):
+    for portfolio in _portfolios():
+        expected = backend("python", simulate_optimized_plans, portfolio, STRATEGIES)
+        actual = backend("numba", simulate_optimized_plans, portfolio, STRATEGIES)
+        for strategy in STRATEGIES:
+            _assert_same(expected[strategy], actual[strategy])
+            _assert_same(expected[strategy], backend("python", simulate_optimized_plan, portfolio, strategy))
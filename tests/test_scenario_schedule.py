@@ -0,0 +1,153 @@
+import pytest
+
+from app.models.behavior import CustomerPaymentBehavior, ProductPaymentBehavior
+from app.models.portfolio import CardItem, CustomerCashflow, CustomerPortfolio, LoanItem
+from app.services.scenario_behavioral_service import simulate_behavioral_scenario
+from app.services.scenario_consolidation_service import simulate_consolidation_scenario
+from app.services.scenario_minimum_service import simulate_minimum_payment_scenario
+from app.services.scenario_optimized_service import simulate_optimized_plan
+from app.services.scenario_schedule_service import (
+    iter_behavioral_schedule,
+    iter_consolidation_schedule,
+    iter_minimum_schedule,
+    iter_optimized_schedule,
+    schedule_columns,
+)
+
+OFFERS = [
+    {
+        "offer_id": "OF-CONSO-36M",
+        "product_types_eligible": ["card", "personal"],
+        "max_consolidated_balance": 75000,
+        "new_rate_pct": 17.5,
+        "max_term_months": 36,
+        "conditions": "Sin condiciones",
+    },
+]
+
+
+def _portfolio(cash: float = 2500) -> CustomerPortfolio:
+    customer_id = "CU-TEST"
+    return CustomerPortfolio(
+        customer_id=customer_id,
+        credit_score=720,
+        loans=[
+            LoanItem(
+                loan_id="LN-1",
+                customer_id=customer_id,
+                product_type="personal",
+                principal=12000,
+                annual_rate_pct=30.0,
+                remaining_term_months=24,
+                collateral=False,
+                days_past_due=0,
+            )
+        ],
+        cards=[
+            CardItem(
+                card_id="CC-1",
+                customer_id=customer_id,
+                balance=6000,
+                annual_rate_pct=60.0,
+                min_payment_pct=5.0,
+                payment_due_day=15,
+                days_past_due=0,
+            ),
+            CardItem(
+                card_id="CC-2",
+                customer_id=customer_id,
+                balance=1500,
+                annual_rate_pct=45.0,
+                min_payment_pct=4.0,
+                payment_due_day=5,
+                days_past_due=40,
+            ),
+        ],
+        cashflow=CustomerCashflow(
+            customer_id=customer_id,
+            monthly_income_avg=cash + 1000,
+            income_variability_pct=10,
+            essential_expenses_avg=1000,
+            available_cashflow=cash,
+        ),
+    )
+
+
+def _behavior() -> CustomerPaymentBehavior:
+    return CustomerPaymentBehavior(
+        customer_id="CU-TEST",
+        products=[
+            ProductPaymentBehavior(
+                product_id="CC-1",
+                product_type="card",
+                payments_count=10,
+                months_with_payment=10,
+                missed_months=2,
+                regularity=10 / 12,
+                avg_monthly_payment=450.0,
+                min_payment=300.0,
+                avg_overpayment=150.0,
+            )
+        ],
+    )
+
+
+def _assert_rows_match(rows, scenario):
+    totals = {}
+    for month, product_id, _, payment, interest, _ in rows:
+        paid, accrued, months = totals.get(product_id, (0.0, 0.0, 0))
+        totals[product_id] = (paid + payment, accrued + interest, max(months, month))
+
+    expected = {d.product_id: d for d in scenario.debts if d.total_paid > 0}
+    assert {p for p, t in totals.items() if t[0] > 0} == set(expected)
+    for product_id, debt in expected.items():
+        paid, accrued, months = totals[product_id]
+        assert paid == pytest.approx(debt.total_paid, abs=0.01)
+        assert accrued == pytest.approx(debt.total_interest_paid, abs=0.01)
+        assert months == debt.months_to_payoff
+
+
+def test_minimum_schedule_matches_the_scenario():
+    portfolio = _portfolio()
+    _assert_rows_match(iter_minimum_schedule(portfolio), simulate_minimum_payment_scenario(portfolio))
+
+
+@pytest.mark.parametrize("strategy", ["avalanche", "snowball", "hybrid"])
+@pytest.mark.parametrize("cash", [2500, 600])
+def test_optimized_schedule_matches_the_scenario(strategy, cash):
+    portfolio = _portfolio(cash)
+    _assert_rows_match(
+        iter_optimized_schedule(portfolio, strategy),
+        simulate_optimized_plan(portfolio, strategy),
+    )
+
+
+def test_consolidation_schedule_matches_the_scenario():
+    portfolio = _portfolio()
+    scenario = simulate_consolidation_scenario(portfolio, OFFERS)
+    assert scenario.debts
+
+    _assert_rows_match(iter_consolidation_schedule(portfolio, OFFERS), scenario)
+
+
+def test_behavioral_schedule_matches_the_scenario():
+    portfolio = _portfolio()
+    _assert_rows_match(
+        iter_behavioral_schedule(portfolio, _behavior()),
+        simulate_behavioral_scenario(portfolio, _behavior()),
+    )
+
+
+def test_columns_are_rounded_soles_that_add_up_to_the_scenario():
+    portfolio = _portfolio()
+    scenario = simulate_optimized_plan(portfolio)
+
+    columns = schedule_columns("CU-TEST", "optimized_plan", iter_optimized_schedule(portfolio))
+
+    assert columns.total_months == scenario.total_months
+    by_product = {d.product_id: d for d in scenario.debts}
+    for s in columns.series:
+        debt = by_product[s.product_id]
+        assert all(round(x, 2) == x for x in s.payment + s.interest + s.balance)
+        assert s.start_month + len(s.payment) - 1 == debt.months_to_payoff
+        assert sum(s.payment) == pytest.approx(debt.total_paid, abs=0.005 * len(s.payment))
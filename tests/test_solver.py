@@ -0,0 +1,64 @@
+import pytest
+
+from app.models.portfolio import CardItem, CustomerCashflow, CustomerPortfolio, LoanItem
+from app.services.scenario_solver_service import solve_optimal_plan
+
+pytest.importorskip("scipy")
+
+
+def _portfolio(cash: float) -> CustomerPortfolio:
+    customer_id = "CU-TEST"
+    return CustomerPortfolio(
+        customer_id=customer_id,
+        credit_score=650,
+        loans=[
+            LoanItem(
+                loan_id="LN-1",
+                customer_id=customer_id,
+                product_type="personal",
+                principal=12000,
+                annual_rate_pct=30.0,
+                remaining_term_months=12,
+                collateral=False,
+                days_past_due=0,
+            )
+        ],
+        cards=[
+            CardItem(
+                card_id="CC-1",
+                customer_id=customer_id,
+                balance=6000,
+                annual_rate_pct=60.0,
+                min_payment_pct=5.0,
+                payment_due_day=15,
+                days_past_due=0,
+            )
+        ],
+        cashflow=CustomerCashflow(
+            customer_id=customer_id,
+            monthly_income_avg=cash + 1000,
+            income_variability_pct=10,
+            essential_expenses_avg=1000,
+            available_cashflow=cash,
+        ),
+    )
+
+
+def test_solver_improves_on_the_greedy_when_cashflow_covers_the_minimums():
+    result = solve_optimal_plan(_portfolio(2500), time_limit_s=10)
+
+    assert result.status == "optimal"
+    assert result.solver.total_months <= result.horizon_months == result.greedy.total_months
+    assert result.interest_improvement_vs_greedy >= 0
+
+
+def test_solver_handles_minimums_above_the_cashflow():
+    # La cuota del préstamo (~1180) más el mínimo de la tarjeta (~300)
+    # superan el flujo: el greedy escala los mínimos y aun así termina.
+    result = solve_optimal_plan(_portfolio(1200), time_limit_s=10)
+
+    assert 0 < result.greedy.total_months < 600
+    assert result.status in ("optimal", "greedy")
+    assert result.solver is not None
+    assert result.interest_improvement_vs_greedy >= 0
+    assert result.solver.total_months <= result.greedy.total_months